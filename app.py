@@ -29,13 +29,13 @@ from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, Tabl
 from sqlalchemy import String, and_, cast, extract, func, literal_column, or_, text
 from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
+from werkzeug.utils import import_string, secure_filename
 import openpyxl
 import pymysql
 
 # Local imports
 from config import DB_CONFIG
-from models import db, Division, User, CTPProductionLog, PlateAdjustmentRequest, PlateBonRequest, KartuStockPlateFuji, KartuStockPlateSaphira, KartuStockChemicalFuji, KartuStockChemicalSaphira, MonthlyWorkHours, ChemicalBonCTP, BonPlate, CTPMachine, CTPProblemLog, CTPProblemPhoto, CTPProblemDocument, TaskCategory, Task, CloudsphereJob, JobTask, JobProgress, JobProgressTask, EvidenceFile, UniversalNotification, NotificationRecipient, CalibrationReference
+from models import db, Division, User, CTPProductionLog, PlateAdjustmentRequest, PlateBonRequest, KartuStockPlateFuji, KartuStockPlateSaphira, KartuStockChemicalFuji, KartuStockChemicalSaphira, MonthlyWorkHours, ChemicalBonCTP, BonPlate, CTPMachine, CTPProblemLog, CTPProblemPhoto, CTPProblemDocument, TaskCategory, Task, CloudsphereJob, JobTask, JobProgress, JobProgressTask, EvidenceFile, UniversalNotification, NotificationRecipient, CalibrationReference, CTPProductionDailyRollup
 from models_rnd import db, RNDProgressStep, RNDProgressTask, RNDJob, RNDJobProgressAssignment, RNDJobTaskAssignment, RNDLeadTimeTracking, RNDEvidenceFile, RNDTaskCompletion
 from models_rnd_external import RNDExternalTime
 from models_mounting import MountingWorkOrderIncoming
@@ -51,6 +51,7 @@ from ctp_dashboard_routes import ctp_dashboard_bp
 from cloudsphere import cloudsphere_bp
 from rnd_cloudsphere import rnd_cloudsphere_bp
 from rnd_webcenter import rnd_webcenter_bp
+from rnd_webcenter.search_index import search_indexer, rnd_webcenter_cli
 from mounting_work_order import mounting_work_order_bp
 from blueprints.notification_routes import notification_bp
 from blueprints.tools_5w1h import tools_5w1h_bp
@@ -61,6 +62,21 @@ from calibration_references import calibration_references_bp
 from calibration_references import routes  # Import routes directly
 from plan_scraper import plan_scraper_bp
 from plate_details import PLATE_DETAILS
+from services.badge_count_service import BadgeCountService
+from services.notification_hub import NotificationHub
+from services.notification_outbox import outbox_worker
+from services.evidence_thumbnails import evidence_thumbnails
+from services.evidence_storage import evidence_storage
+from services.notification_archive import archive_scheduler, notifications_cli
+from services.ctp_production_rollup import CTPProductionRollupService, ctp_rollup_cli
+from services.ctp_search import CTPSearchService, InvalidSearchParamError, ctp_search_cli
+from services.ctp_log_list_service import CTPLogListService, InvalidListParamError
+from services.export_jobs import export_job_worker, export_jobs_cli
+from services.export_cache import export_cache, export_cache_cli
+from services.period_filter import period_filters, period_range
+from services.period_filter_benchmark import period_filter_cli
+from services.rnd_job_progress import rnd_progress_cli
+from services.kartu_stock_ledger import KartuStockLedger, BRAND_MODELS, PLATE_MODELS, CHEMICAL_MODELS, kartu_stock_cli
 
 # Timezone untuk Jakarta
 jakarta_tz = pytz.timezone('Asia/Jakarta')
@@ -135,6 +151,53 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 # Gunakan environment variable untuk flexibility (default ke Y:\Impact untuk network drive)
 app.config['UPLOADS_PATH'] = os.environ.get('UPLOADS_PATH', r'Y:\Impact')
 
+# Backend push notifikasi (SSE). Default in-process (cukup untuk 1 worker);
+# untuk multi-worker isi dengan dotted path class HubBackend, misal 'myapp.hub.LocalBrokerBackend'
+app.config['NOTIFICATION_HUB_BACKEND'] = os.environ.get('NOTIFICATION_HUB_BACKEND')
+if app.config['NOTIFICATION_HUB_BACKEND']:
+    NotificationHub.set_backend(import_string(app.config['NOTIFICATION_HUB_BACKEND'])())
+# Tiap stream SSE menahan satu thread worker sampai 5 menit: jalankan gunicorn dengan
+# --worker-class gthread (atau gevent) dan --threads lebih besar dari batas ini. Di worker sync
+# /api/notifications/stream menjawab 503 dan client kembali ke polling
+app.config['NOTIFICATION_STREAM_MAX_CONNECTIONS'] = int(os.environ.get('NOTIFICATION_STREAM_MAX_CONNECTIONS', 20))
+
+# Worker background untuk dispatch notifikasi dari tabel notification_outbox
+app.config['NOTIFICATION_OUTBOX_WORKERS'] = int(os.environ.get('NOTIFICATION_OUTBOX_WORKERS', 4))
+
+# Retention notifikasi: yang sudah dibaca dan lebih tua dari N hari dipindah ke tabel arsip
+# Interval 0 = scheduler in-process nonaktif, jalankan 'flask notifications archive' dari cron
+app.config['NOTIFICATION_ARCHIVE_AFTER_DAYS'] = int(os.environ.get('NOTIFICATION_ARCHIVE_AFTER_DAYS', 90))
+app.config['NOTIFICATION_ARCHIVE_BATCH_SIZE'] = int(os.environ.get('NOTIFICATION_ARCHIVE_BATCH_SIZE', 1000))
+app.config['NOTIFICATION_ARCHIVE_INTERVAL_HOURS'] = float(os.environ.get('NOTIFICATION_ARCHIVE_INTERVAL_HOURS', 0))
+
+# Thumbnail evidence R&D: dibuat process pool saat upload, disimpan di cache lokal (bukan di UPLOADS_PATH)
+app.config['EVIDENCE_THUMBNAIL_CACHE_DIR'] = os.environ.get('EVIDENCE_THUMBNAIL_CACHE_DIR')  # default instance/evidence_thumbnails
+app.config['EVIDENCE_THUMBNAIL_CACHE_MAX_BYTES'] = int(os.environ.get('EVIDENCE_THUMBNAIL_CACHE_MAX_MB', 512)) * 1024 * 1024
+app.config['EVIDENCE_THUMBNAIL_WORKERS'] = int(os.environ.get('EVIDENCE_THUMBNAIL_WORKERS', 2))
+app.config['EVIDENCE_UPLOAD_STAGING_DIR'] = os.environ.get('EVIDENCE_UPLOAD_STAGING_DIR')  # default instance/evidence_uploads (disk lokal)
+app.config['EVIDENCE_UPLOAD_CHUNK_SIZE'] = int(os.environ.get('EVIDENCE_UPLOAD_CHUNK_KB', 1024)) * 1024
+app.config['EVIDENCE_UPLOAD_MAX_BYTES'] = int(os.environ.get('EVIDENCE_UPLOAD_MAX_MB', 200)) * 1024 * 1024
+
+# Index nama file RND WebCenter (SQLite FTS5 lokal), di-refresh crawler background setiap N menit
+# Interval 0 = crawler in-process nonaktif, jalankan 'flask rnd-webcenter index' dari cron
+app.config['RND_WEBCENTER_INDEX_DIR'] = os.environ.get('RND_WEBCENTER_INDEX_DIR')  # default instance/rnd_webcenter_index
+app.config['RND_WEBCENTER_INDEX_INTERVAL_MINUTES'] = float(os.environ.get('RND_WEBCENTER_INDEX_INTERVAL_MINUTES', 30))
+# Share yang di-index, dipisah ';' (default share EPSON)
+app.config['RND_WEBCENTER_INDEX_PATHS'] = [p for p in os.environ.get('RND_WEBCENTER_INDEX_PATHS', '').split(';') if p]
+# Stat entry direktori paralel: ukuran thread pool dan batas stat bersamaan per share
+app.config['RND_WEBCENTER_CRAWLER_WORKERS'] = int(os.environ.get('RND_WEBCENTER_CRAWLER_WORKERS', 16))
+app.config['RND_WEBCENTER_SHARE_CONCURRENCY'] = int(os.environ.get('RND_WEBCENTER_SHARE_CONCURRENCY', 8))
+
+# Export XLSX: file sementara workbook constant_memory (disk lokal, default temp sistem)
+app.config['EXPORT_TMP_DIR'] = os.environ.get('EXPORT_TMP_DIR')
+# Export background: folder artifact (default instance/export_jobs), thread worker, umur artifact
+app.config['EXPORT_JOB_DIR'] = os.environ.get('EXPORT_JOB_DIR')
+app.config['EXPORT_JOB_WORKERS'] = int(os.environ.get('EXPORT_JOB_WORKERS', 2))
+app.config['EXPORT_JOB_TTL_MINUTES'] = int(os.environ.get('EXPORT_JOB_TTL_MINUTES', 60))
+# Cache export periode tertutup (bulan lalu): folder (default instance/export_cache), batas ukuran total (LRU)
+app.config['EXPORT_CACHE_DIR'] = os.environ.get('EXPORT_CACHE_DIR')
+app.config['EXPORT_CACHE_MAX_BYTES'] = int(os.environ.get('EXPORT_CACHE_MAX_MB', 1024)) * 1024 * 1024
+
 # Register Blueprints
 app.register_blueprint(export_bp)
 app.register_blueprint(ctp_log_bp)
@@ -154,77 +217,46 @@ app.register_blueprint(plan_scraper_bp)  # NEW: Plan Scraper System
 # Initialize the db instance from models.py with the app
 db.init_app(app)
 migrate = Migrate(app, db)
+outbox_worker.init_app(app)
+archive_scheduler.init_app(app)
+evidence_thumbnails.init_app(app)
+evidence_storage.init_app(app)
+search_indexer.init_app(app)
+export_job_worker.init_app(app)
+export_cache.init_app(app)
+app.cli.add_command(notifications_cli)
+app.cli.add_command(kartu_stock_cli)
+app.cli.add_command(ctp_rollup_cli)
+app.cli.add_command(ctp_search_cli)
+app.cli.add_command(period_filter_cli)
+app.cli.add_command(rnd_progress_cli)
+app.cli.add_command(rnd_webcenter_cli)
+app.cli.add_command(export_jobs_cli)
+app.cli.add_command(export_cache_cli)
 
 
 # --- Notifikasi Bulet ---
 @app.route('/api/check-notifications')
 @login_required
 def check_notifications():
-    notifications = {
-        # Ganti 'ctp' dengan 'ctp_adjustment' dan 'ctp_bon'
-        'ctp_adjustment': [],
-        'ctp_bon': [],
-        'pdnd': [],
-        'design': [],
-        'mounting': [],
-        'curve': [],
-    }
-    
+    """
+    Badge sidebar per divisi: {division_key: [{'status', 'count'}]}
+    Mendukung If-None-Match - poll yang tidak berubah dijawab 304 dari cache tanpa query
+    """
     try:
-        ctp_states = ['proses_ctp', 'proses_plate', 'antar_plate']
-        
-        # CTP Adjustment notifications
-        notifications['ctp_adjustment'] = PlateAdjustmentRequest.query.filter(
-            PlateAdjustmentRequest.status.in_(ctp_states)
-        ).all()
-        
-        # CTP Bon notifications
-        notifications['ctp_bon'] = PlateBonRequest.query.filter(
-            PlateBonRequest.status.in_(ctp_states)
-        ).all()
-
-        # PDND notifications (menggunakan logika pemisahan is_epson yang sudah benar)
-        pdnd_states = ['menunggu_adjustment_pdnd', 'proses_adjustment_pdnd']
-        pdnd_q = PlateAdjustmentRequest.query.filter(PlateAdjustmentRequest.status.in_(pdnd_states))
-        pdnd_q_ditolak = PlateAdjustmentRequest.query.filter(
-            PlateAdjustmentRequest.status == 'ditolakmounting',
-            PlateAdjustmentRequest.is_epson == False 
-        )
-        notifications['pdnd'] = pdnd_q.all() + pdnd_q_ditolak.all()
-        
-        # ... (Logika Design dan Mounting tetap sama)
-        design_states = ['menunggu_adjustment_design', 'proses_adjustment_design']
-        design_q = PlateAdjustmentRequest.query.filter(PlateAdjustmentRequest.status.in_(design_states))
-        design_q_ditolak = PlateAdjustmentRequest.query.filter(
-            PlateAdjustmentRequest.status == 'ditolakmounting',
-            PlateAdjustmentRequest.is_epson == True
-        )
-        notifications['design'] = design_q.all() + design_q_ditolak.all()
+        cached = BadgeCountService.peek()
+        if cached and request.if_none_match.contains(cached[1]):
+            response = make_response('', 304)
+            response.set_etag(cached[1])
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
 
-        mounting_states = ['menunggu_adjustment', 'proses_adjustment', 'ditolakctp']
-        notifications['mounting'] = PlateAdjustmentRequest.query.filter(
-            PlateAdjustmentRequest.status.in_(mounting_states)
-        ).all()
+        result, etag = BadgeCountService.get_counts()
 
-        # Curve notifications (non-EPSON items)
-        curve_states = ['menunggu_adjustment_curve', 'proses_adjustment_curve', 'ditolakmounting']
-        curve_q = PlateAdjustmentRequest.query.filter(
-            PlateAdjustmentRequest.status.in_(curve_states),
-            
-        )
-        notifications['curve'] = curve_q.all()
-
-        # Pastikan data yang dikirim ke frontend hanyalah list status
-        result = {
-            'ctp_adjustment': [{'status': item.status} for item in notifications['ctp_adjustment']],
-            'ctp_bon': [{'status': item.status} for item in notifications['ctp_bon']],
-            'pdnd': [{'status': item.status} for item in notifications['pdnd']],
-            'design': [{'status': item.status} for item in notifications['design']],
-            'mounting': [{'status': item.status} for item in notifications['mounting']],
-            'curve': [{'status': item.status} for item in notifications['curve']]
-        }
-        
-        return jsonify(result)
+        response = jsonify(result)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
 
     except Exception as e:
         print(f"Error checking notifications: {str(e)}")
@@ -490,13 +522,11 @@ def get_kartu_stock():
         except ValueError:
             return jsonify({'error': 'Invalid date format'}), 400
 
-        # Gunakan metode get_or_create_stocks dari setiap model dan berikan user_id
-        fuji_chemicals = KartuStockChemicalFuji.get_or_create_stocks(tanggal, shift, current_user.id)
-        saphira_chemicals = KartuStockChemicalSaphira.get_or_create_stocks(tanggal, shift, current_user.id)
-        fuji_stocks = KartuStockPlateFuji.get_or_create_stocks(tanggal, shift, current_user.id)
-        saphira_stocks = KartuStockPlateSaphira.get_or_create_stocks(tanggal, shift, current_user.id)
-        
-        db.session.commit()
+        # Baca ledger kartu stock (di-maintain incremental oleh KartuStockLedger, tanpa tulis di sini)
+        fuji_chemicals = KartuStockLedger.get_shift_stocks(KartuStockChemicalFuji, tanggal, shift)
+        saphira_chemicals = KartuStockLedger.get_shift_stocks(KartuStockChemicalSaphira, tanggal, shift)
+        fuji_stocks = KartuStockLedger.get_shift_stocks(KartuStockPlateFuji, tanggal, shift)
+        saphira_stocks = KartuStockLedger.get_shift_stocks(KartuStockPlateSaphira, tanggal, shift)
 
         # Konversi data ke format dictionary untuk respons JSON
         fuji_chemical_data = [stock.to_dict() for stock in fuji_chemicals]
@@ -535,7 +565,6 @@ def get_kartu_stock():
         return jsonify({'error': 'Invalid date format'}), 400
         
     except Exception as e:
-        db.session.rollback()
         app.logger.error(f'Error processing kartu stock: {str(e)}', exc_info=True)
         return jsonify({'error': str(e)}), 500
 
@@ -556,29 +585,18 @@ def confirm_stock():
         return jsonify({'error': 'Invalid date format'}), 400
 
     # Pilih model berdasarkan brand
-    if brand == 'fuji':
-        models = [KartuStockPlateFuji, KartuStockChemicalFuji]
-    else:
-        models = [KartuStockPlateSaphira, KartuStockChemicalSaphira]
+    models = BRAND_MODELS['fuji'] if brand == 'fuji' else BRAND_MODELS['saphira']
     
-    # Update semua stok untuk brand yang dipilih
-    stocks_updated = False
-    for model in models:
-        stocks = model.query.filter_by(
-            tanggal=tanggal,
-            shift=shift
-        ).all()
-        
-        for stock in stocks:
-            stock.update_stock()  # Pastikan data terbaru
-            stock.confirmed_at = now_jakarta
-            stock.confirmed_by = current_user.id
-            stocks_updated = True
-
-    if not stocks_updated:
-        return jsonify({'error': 'No stock data found for the specified date and shift'}), 404
-
     try:
+        # Konfirmasi = tutup shift: row shift ini dilengkapi, shift berikutnya dibuka
+        # dengan stok awal = stok akhir shift ini (angka ledger sudah terbaru)
+        KartuStockLedger.close_shift(tanggal, shift, models=models, user_id=current_user.id)
+        
+        for model in models:
+            for stock in model.query.filter_by(tanggal=tanggal, shift=shift).all():
+                stock.confirmed_at = now_jakarta
+                stock.confirmed_by = current_user.id
+        
         db.session.commit()
         return jsonify({'message': f'Stock {brand} confirmed successfully'})
     except Exception as e:
@@ -601,71 +619,18 @@ def input_initial_stock():
     try:
         selected_date = datetime.strptime(date_str, '%Y-%m-%d').date()
         
-        # Process Fuji plates
-        for plate in data.get('fuji', {}).get('plates', []):
-            if plate.get('jumlah_stock_awal', 0) > 0:
-                stock = KartuStockPlateFuji(
-                    tanggal=selected_date,
-                    shift='1',  # Add required shift field
-                    item_code=plate['item_code'],
-                    item_name=plate['item_name'],
-                    jumlah_stock_awal=plate['jumlah_stock_awal'],
-                    jumlah_pemakaian=0,
-                    jumlah_incoming=0,
-                    jumlah_stock_akhir=plate['jumlah_stock_awal'],
-                    jumlah_per_box=plate['jumlah_per_box'],
-                    confirmed_by=current_user.id
-                )
-                db.session.add(stock)
-
-        # Process Fuji chemicals
-        for chemical in data.get('fuji', {}).get('chemicals', []):
-            if chemical.get('jumlah_stock_awal', 0) > 0:
-                stock = KartuStockChemicalFuji(
-                    tanggal=selected_date,
-                    shift='1',  # Add required shift field
-                    item_code=chemical['item_code'],
-                    item_name=chemical['item_name'],
-                    jumlah_stock_awal=chemical['jumlah_stock_awal'],
-                    jumlah_pemakaian=0,
-                    jumlah_incoming=0,
-                    jumlah_stock_akhir=chemical['jumlah_stock_awal'],
-                    confirmed_by=current_user.id
-                )
-                db.session.add(stock)
-
-        # Process Saphira plates
-        for plate in data.get('saphira', {}).get('plates', []):
-            if plate.get('jumlah_stock_awal', 0) > 0:
-                stock = KartuStockPlateSaphira(
-                    tanggal=selected_date,
-                    shift='1',  # Add required shift field
-                    item_code=plate['item_code'],
-                    item_name=plate['item_name'],
-                    jumlah_stock_awal=plate['jumlah_stock_awal'],
-                    jumlah_pemakaian=0,
-                    jumlah_incoming=0,
-                    jumlah_stock_akhir=plate['jumlah_stock_awal'],
-                    jumlah_per_box=plate['jumlah_per_box'],
-                    confirmed_by=current_user.id
-                )
-                db.session.add(stock)
-
-        # Process Saphira chemicals
-        for chemical in data.get('saphira', {}).get('chemicals', []):
-            if chemical.get('jumlah_stock_awal', 0) > 0:
-                stock = KartuStockChemicalSaphira(
-                    tanggal=selected_date,
-                    shift='1',  # Add required shift field
-                    item_code=chemical['item_code'],
-                    item_name=chemical['item_name'],
-                    jumlah_stock_awal=chemical['jumlah_stock_awal'],
-                    jumlah_pemakaian=0,
-                    jumlah_incoming=0,
-                    jumlah_stock_akhir=chemical['jumlah_stock_awal'],
-                    confirmed_by=current_user.id
-                )
-                db.session.add(stock)
+        # Stok awal di-set lewat ledger supaya selisihnya ikut di-carry forward ke shift sesudahnya
+        for brand in ('fuji', 'saphira'):
+            for model, key in ((PLATE_MODELS[brand], 'plates'), (CHEMICAL_MODELS[brand], 'chemicals')):
+                for item in data.get(brand, {}).get(key, []):
+                    if item.get('jumlah_stock_awal', 0) > 0:
+                        KartuStockLedger.set_opening_balance(
+                            model, item['item_code'], selected_date, '1',  # Stok awal selalu di Shift 1
+                            item['jumlah_stock_awal'],
+                            user_id=current_user.id,
+                            item_name=item['item_name'],
+                            jumlah_per_box=item.get('jumlah_per_box')
+                        )
 
         db.session.commit()
         return jsonify({'message': 'Stok awal berhasil disimpan'})
@@ -686,126 +651,25 @@ def input_incoming_stock():
     try:
         tanggal = datetime.strptime(date_str, '%Y-%m-%d').date()
 
-        # Proses data berdasarkan brand yang dipilih
-        if 'fuji' in data:
-            # Proses Fuji plates
-            for plate in data['fuji'].get('plates', []):
-                incoming_amount = plate.get('jumlah_incoming', 0)
-                if incoming_amount > 0:
-                    stock = KartuStockPlateFuji.query.filter_by(
-                        tanggal=tanggal,
-                        item_code=plate['item_code'],
-                        shift=shift  # PERBAIKAN: Tambahkan filter shift
-                    ).first()
-
-                    if stock:
-                        stock.jumlah_incoming += incoming_amount
-                        stock.incoming_shift = shift
-                        stock.jumlah_stock_akhir += incoming_amount
-                    else:
-                        new_stock = KartuStockPlateFuji(
-                            tanggal=tanggal,
-                            shift=shift,
-                            item_code=plate['item_code'],
-                            item_name=plate['item_name'],
-                            jumlah_stock_awal=0,
-                            jumlah_pemakaian=0,
-                            jumlah_incoming=incoming_amount,
-                            incoming_shift=shift,
-                            jumlah_stock_akhir=incoming_amount,
-                            jumlah_per_box=plate['jumlah_per_box'],
-                            confirmed_by=current_user.id
-                        )
-                        db.session.add(new_stock)
-
-            # Proses Fuji chemicals
-            for chemical in data['fuji'].get('chemicals', []):
-                incoming_amount = chemical.get('jumlah_incoming', 0)
-                if incoming_amount > 0:
-                    stock = KartuStockChemicalFuji.query.filter_by(
-                        tanggal=tanggal,
-                        item_code=chemical['item_code'],
-                        shift=shift  # PERBAIKAN: Tambahkan filter shift
-                    ).first()
-
-                    if stock:
-                        stock.jumlah_incoming += incoming_amount
-                        stock.incoming_shift = shift
-                        stock.jumlah_stock_akhir += incoming_amount
-                    else:
-                        new_stock = KartuStockChemicalFuji(
-                            tanggal=tanggal,
-                            shift=shift,
-                            item_code=chemical['item_code'],
-                            item_name=chemical['item_name'],
-                            jumlah_stock_awal=0,
-                            jumlah_pemakaian=0,
-                            jumlah_incoming=incoming_amount,
-                            incoming_shift=shift,
-                            jumlah_stock_akhir=incoming_amount,
-                            confirmed_by=current_user.id
+        # Proses data berdasarkan brand yang dipilih; incoming menambah stok akhir shift ini
+        # dan di-carry forward ke shift sesudahnya oleh ledger
+        for brand in ('fuji', 'saphira'):
+            if brand not in data:
+                continue
+            for model, key in ((PLATE_MODELS[brand], 'plates'), (CHEMICAL_MODELS[brand], 'chemicals')):
+                for item in data[brand].get(key, []):
+                    incoming_amount = item.get('jumlah_incoming', 0)
+                    if incoming_amount > 0:
+                        KartuStockLedger.ensure_row(
+                            model, item['item_code'], tanggal, shift,
+                            user_id=current_user.id,
+                            item_name=item['item_name'],
+                            jumlah_per_box=item.get('jumlah_per_box')
                         )
-                        db.session.add(new_stock)
-
-        if 'saphira' in data:
-            # Proses Saphira plates
-            for plate in data['saphira'].get('plates', []):
-                incoming_amount = plate.get('jumlah_incoming', 0)
-                if incoming_amount > 0:
-                    stock = KartuStockPlateSaphira.query.filter_by(
-                        tanggal=tanggal,
-                        item_code=plate['item_code'],
-                        shift=shift  # PERBAIKAN: Tambahkan filter shift
-                    ).first()
-
-                    if stock:
-                        stock.jumlah_incoming += incoming_amount
-                        stock.incoming_shift = shift
-                        stock.jumlah_stock_akhir += incoming_amount
-                    else:
-                        new_stock = KartuStockPlateSaphira(
-                            tanggal=tanggal,
-                            shift=shift,
-                            item_code=plate['item_code'],
-                            item_name=plate['item_name'],
-                            jumlah_stock_awal=0,
-                            jumlah_pemakaian=0,
-                            jumlah_incoming=incoming_amount,
-                            incoming_shift=shift,
-                            jumlah_stock_akhir=incoming_amount,
-                            jumlah_per_box=plate['jumlah_per_box'],
-                            confirmed_by=current_user.id
+                        KartuStockLedger.apply_delta(
+                            model, item['item_code'], tanggal, shift,
+                            incoming=incoming_amount, incoming_shift=shift
                         )
-                        db.session.add(new_stock)
-            
-            # Proses Saphira chemicals
-            for chemical in data['saphira'].get('chemicals', []):
-                incoming_amount = chemical.get('jumlah_incoming', 0)
-                if incoming_amount > 0:
-                    stock = KartuStockChemicalSaphira.query.filter_by(
-                        tanggal=tanggal,
-                        item_code=chemical['item_code'],
-                        shift=shift  # PERBAIKAN: Tambahkan filter shift
-                    ).first()
-
-                    if stock:
-                        stock.jumlah_incoming += incoming_amount
-                        stock.incoming_shift = shift
-                        stock.jumlah_stock_akhir += incoming_amount
-                    else:
-                        new_stock = KartuStockChemicalSaphira(
-                            tanggal=tanggal,
-                            shift=shift,
-                            item_code=chemical['item_code'],
-                            item_name=chemical['item_name'],
-                            jumlah_stock_awal=0,
-                            jumlah_pemakaian=0,
-                            jumlah_incoming=incoming_amount,
-                            incoming_shift=shift,
-                            jumlah_stock_akhir=incoming_amount,
-                            confirmed_by=current_user.id
-                        )
-                        db.session.add(new_stock)
 
         db.session.commit()
         return jsonify({'message': 'Stock incoming berhasil disimpan'}), 200
@@ -1072,13 +936,8 @@ def get_chemical_bon_list():
         if brand_filter:
             query = query.filter(ChemicalBonCTP.brand == brand_filter)
             
-        # Apply year filter
-        if year_filter:
-            query = query.filter(extract('year', ChemicalBonCTP.tanggal) == int(year_filter))
-            
-        # Apply month filter
-        if month_filter:
-            query = query.filter(extract('month', ChemicalBonCTP.tanggal) == int(month_filter))
+        # Apply year/month filter (range tanggal, pakai index)
+        query = query.filter(*period_filters(ChemicalBonCTP.tanggal, year_filter, month_filter))
             
         # Order by latest first
         query = query.order_by(ChemicalBonCTP.created_at.desc())
@@ -1604,6 +1463,7 @@ def submit_plate_adjustment():
         
         db.session.add(new_request)
         db.session.commit()
+        BadgeCountService.refresh_and_publish()
         return jsonify({'message': 'Request plate adjustment berhasil disubmit!'}), 201
     except Exception as e:
         db.session.rollback()
@@ -1634,6 +1494,7 @@ def submit_plate_bon():
         )
         db.session.add(new_request)
         db.session.commit()
+        BadgeCountService.refresh_and_publish()
         return jsonify({'message': 'Request plate bon berhasil disubmit!'}), 201
     except Exception as e:
         db.session.rollback()
@@ -1673,23 +1534,18 @@ def get_mounting_dashboard_data():
         base_filters = [
             PlateAdjustmentRequest.status == 'selesai',
             PlateAdjustmentRequest.adjustment_start_at != None,
-            extract('year', PlateAdjustmentRequest.adjustment_start_at) == year,
             func.upper(PlateAdjustmentRequest.remarks).in_(combined_upper)
         ]
 
-        # Tambahkan filter bulan hanya jika bulan ditentukan (month != None)
-        month_filter = [
-            extract('month', PlateAdjustmentRequest.adjustment_start_at) == month
-        ] if month else []
-        
-        # Filters lengkap (base_filters + month_filter)
-        full_filters = base_filters + month_filter
+        # Filter periode: tahun, plus bulan hanya jika bulan ditentukan (month != None)
+        period = period_filters(PlateAdjustmentRequest.adjustment_start_at, year, month)
+        full_filters = base_filters + period
         
         # Filters untuk total FA
-        fa_filters = base_filters + month_filter + [func.upper(PlateAdjustmentRequest.remarks).in_(fa_upper)]
+        fa_filters = base_filters + period + [func.upper(PlateAdjustmentRequest.remarks).in_(fa_upper)]
         
         # Filters untuk total Curve
-        curve_filters = base_filters + month_filter + [func.upper(PlateAdjustmentRequest.remarks).in_(curve_upper)]
+        curve_filters = base_filters + period + [func.upper(PlateAdjustmentRequest.remarks).in_(curve_upper)]
         
         # Filters untuk Minutes (membutuhkan adjustment_finish_at)
         minutes_condition = PlateAdjustmentRequest.adjustment_finish_at != None
@@ -2041,6 +1897,7 @@ def cancel_bon_plate():
         bon_request.cancelled_at = datetime.now()
 
         db.session.commit()
+        BadgeCountService.refresh_and_publish()
         
         return jsonify({
             'success': True,
@@ -2088,6 +1945,7 @@ def cancel_adjustment_plate():
         adjustment_request.cancelled_at = datetime.now()
 
         db.session.commit()
+        BadgeCountService.refresh_and_publish()
         
         return jsonify({
             'success': True,
@@ -2443,41 +2301,22 @@ def get_kpi_data():
     # Tambahan untuk paginasi
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 30, type=int)
+    count_mode = request.args.get('count', 'exact')
+    # view=summary|density|full atau fields=a,b,c (default semua kolom seperti sebelumnya)
+    view = request.args.get('view', '').strip()
+    fields_param = request.args.get('fields', '').strip()
+    cursor = request.args.get('cursor', '').strip()
 
     try:
+        fields = CTPLogListService.parse_fields(view, fields_param)
+        sort_by, sort_order = CTPLogListService.parse_sort(sort_by, sort_order)
         query = CTPProductionLog.query
 
+        # Token index / exact match WO-MC-id / tanggal (services/ctp_search.py), bukan ILIKE per kolom
         if search_query:
-            query = query.filter(
-                or_(
-                    CTPProductionLog.wo_number.ilike(f"%{search_query}%"),
-                    CTPProductionLog.mc_number.ilike(f"%{search_query}%"),
-                    CTPProductionLog.ctp_pic.ilike(f"%{search_query}%"),
-                    CTPProductionLog.ctp_machine.ilike(f"%{search_query}%"),
-                    CTPProductionLog.remarks_job.ilike(f"%{search_query}%"),
-                    CTPProductionLog.item_name.ilike(f"%{search_query}%"),
-                    CTPProductionLog.plate_type_material.ilike(f"%{search_query}%"),
-                    CTPProductionLog.paper_type.ilike(f"%{search_query}%"),
-                    CTPProductionLog.raster.ilike(f"%{search_query}%"),
-                    CTPProductionLog.not_good_reason.ilike(f"%{search_query}%"),
-                    CTPProductionLog.note.ilike(f"%{search_query}%"),
-                    cast(CTPProductionLog.id, String).ilike(f"%{search_query}%"),
-                    cast(CTPProductionLog.run_length_sheet, String).ilike(f"%{search_query}%"),
-                    cast(CTPProductionLog.num_plate_good, String).ilike(f"%{search_query}%"),
-                    cast(CTPProductionLog.num_plate_not_good, String).ilike(f"%{search_query}%"),
-                    cast(CTPProductionLog.processor_temperature, String).ilike(f"%{search_query}%"),
-                    cast(CTPProductionLog.dwell_time, String).ilike(f"%{search_query}%"),
-                    cast(CTPProductionLog.log_date, String).ilike(f"%{search_query}%"),
-                    cast(CTPProductionLog.start_time, String).ilike(f"%{search_query}%"),
-                    cast(CTPProductionLog.finish_time, String).ilike(f"%{search_query}%")
-                )
-            )
+            query = query.filter(*CTPSearchService.search_filters(search_query))
         
-        if month_filter:
-            query = query.filter(extract('month', CTPProductionLog.log_date) == int(month_filter))
-
-        if year_filter:
-            query = query.filter(extract('year', CTPProductionLog.log_date) == int(year_filter))
+        query = query.filter(*period_filters(CTPProductionLog.log_date, year_filter, month_filter))
 
         if g7_filter:
             if g7_filter.lower() == 'true':
@@ -2488,27 +2327,39 @@ def get_kpi_data():
         if group_filter:
             query = query.filter_by(ctp_group=group_filter)
 
-        if hasattr(CTPProductionLog, sort_by):
-            column_to_sort = getattr(CTPProductionLog, sort_by)
-            if sort_order == 'asc':
-                query = query.order_by(column_to_sort.asc())
-            else:
-                query = query.order_by(column_to_sort.desc())
-        else:
-            query = query.order_by(CTPProductionLog.log_date.desc(), CTPProductionLog.created_at.desc())
-
         # --- PAGINASI ---
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-        items = [item.to_dict() for item in pagination.items]
+        # Urutan (kolom sort, id) supaya cursor keyset stabil; cursor menggantikan OFFSET
+        # untuk halaman berikutnya, page tetap dipakai untuk lompat halaman / nomor baris.
+        # count=estimate: total dibatasi (total_estimated=True kalau lebih), count=none: tanpa COUNT
+        page = max(page, 1)
+        per_page = CTPLogListService.parse_per_page(per_page)
+        offset = (page - 1) * per_page
+        total, total_estimated = CTPSearchService.count(query, count_mode, offset, per_page)
+        result = CTPLogListService.list_logs(
+            query, fields, sort_by, sort_order, per_page=per_page, offset=offset, cursor=cursor
+        )
+        has_next = result['has_next']
+        
+        if total is None:
+            pages = page + 1 if has_next else page
+        else:
+            pages = max((total + per_page - 1) // per_page, 1)
+            if total_estimated and has_next:
+                pages = max(pages, page + 1)
 
         return jsonify({
-            'data': items,
-            'total': pagination.total,
-            'page': pagination.page,
-            'per_page': pagination.per_page,
-            'pages': pagination.pages
+            'data': result['data'],
+            'total': total,
+            'total_estimated': total_estimated,
+            'has_next': has_next,
+            'next_cursor': result['next_cursor'],
+            'page': page,
+            'per_page': per_page,
+            'pages': pages
         }), 200
 
+    except (InvalidSearchParamError, InvalidListParamError) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Error fetching data: {e}")
         return jsonify({'error': str(e)}), 500
@@ -2516,7 +2367,21 @@ def get_kpi_data():
 # NEW: API untuk Mengambil Satu Data KPI berdasarkan ID (untuk mengisi form edit)
 @app.route('/api/kpi_ctp/<int:data_id>', methods=['GET'])
 def get_single_kpi_ctp(data_id):
+    # view=density / fields=...: hanya blok yang diminta (density dimuat saat detail dibuka)
+    view = request.args.get('view', '').strip()
+    fields_param = request.args.get('fields', '').strip()
     try:
+        fields = CTPLogListService.parse_fields(view, fields_param)
+    except InvalidListParamError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        if view or fields_param:
+            result = CTPLogListService.get_log(data_id, fields)
+            if result is None:
+                return jsonify({'error': 'Data KPI CTP tidak ditemukan'}), 404
+            return jsonify(result), 200
+
         kpi_entry = db.session.get(CTPProductionLog, data_id)
         if kpi_entry:
             result = kpi_entry.to_dict()
@@ -3058,6 +2923,7 @@ def decline_adjustment():
         adjustment.status = 'ditolakmounting'
         
         db.session.commit()
+        BadgeCountService.refresh_and_publish()
         
         return jsonify({
             'success': True,
@@ -3135,6 +3001,7 @@ def start_adjustment():
             adjustment.decline_reason = None        
 
         db.session.commit()
+        BadgeCountService.refresh_and_publish()
         
         return jsonify({'success': True, 'message': 'Adjustment started successfully'})
     except Exception as e:
@@ -3160,6 +3027,7 @@ def finish_adjustment():
         adjustment.adjustment_finish_at = datetime.now()
         
         db.session.commit()
+        BadgeCountService.refresh_and_publish()
         
         return jsonify({'success': True, 'message': 'Adjustment finished successfully'})
     except Exception as e:
@@ -3235,6 +3103,7 @@ def start_adjustment_pdnd():
             adjustment.decline_reason = None
         
         db.session.commit()
+        BadgeCountService.refresh_and_publish()
         
         return jsonify({'success': True, 'message': 'Adjustment PDND started successfully'})
     except Exception as e:
@@ -3260,6 +3129,7 @@ def finish_adjustment_pdnd():
         adjustment.pdnd_finish_at = datetime.now()
         
         db.session.commit()
+        BadgeCountService.refresh_and_publish()
         
         return jsonify({'success': True, 'message': 'Adjustment PDND finished successfully'})
     except Exception as e:
@@ -3335,6 +3205,7 @@ def start_adjustment_curve():
             adjustment.decline_reason = None
         
         db.session.commit()
+        BadgeCountService.refresh_and_publish()
 
         return jsonify({'success': True, 'message': 'Adjustment Curve started successfully'})
     except Exception as e:
@@ -3360,6 +3231,7 @@ def finish_adjustment_curve():
         adjustment.curve_finish_at = datetime.now()
         
         db.session.commit()
+        BadgeCountService.refresh_and_publish()
         
         return jsonify({'success': True, 'message': 'Adjustment Curve finished successfully'})
     except Exception as e:
@@ -3435,6 +3307,7 @@ def start_adjustment_design():
             adjustment.decline_reason = None
         
         db.session.commit()
+        BadgeCountService.refresh_and_publish()
         
         return jsonify({'success': True, 'message': 'Adjustment Design started successfully'})
     except Exception as e:
@@ -3460,6 +3333,7 @@ def finish_adjustment_design():
         adjustment.design_finish_at = datetime.now()
         
         db.session.commit()
+        BadgeCountService.refresh_and_publish()
         
         return jsonify({'success': True, 'message': 'Adjustment Design finished successfully'})
     except Exception as e:
@@ -3489,6 +3363,7 @@ def decline_ctp():
         adjustment.status = 'ditolakctp'
         
         db.session.commit()
+        BadgeCountService.refresh_and_publish()
         
         return jsonify({
             'success': True,
@@ -3520,6 +3395,7 @@ def decline_ctp_bon():
         bon.status = 'ditolakctp'
         
         db.session.commit()
+        BadgeCountService.refresh_and_publish()
         
         return jsonify({
             'success': True,
@@ -3587,11 +3463,7 @@ def get_stock_opname_data():
         if plate_type:
             query = query.filter(CTPProductionLog.plate_type_material == plate_type)
         
-        if year:
-            query = query.filter(extract('year', CTPProductionLog.log_date) == int(year))
-        
-        if month:
-            query = query.filter(extract('month', CTPProductionLog.log_date) == int(month))
+        query = query.filter(*period_filters(CTPProductionLog.log_date, year, month))
         
         if search:
             search_term = f"%{search}%"
@@ -3844,7 +3716,7 @@ def get_ctp_production_logs_months():
         months_query = db.session.query(
             extract('month', CTPProductionLog.log_date).label('month')
         ).filter(
-            extract('year', CTPProductionLog.log_date) == int(year)
+            *period_filters(CTPProductionLog.log_date, year)
         ).distinct().order_by(
             extract('month', CTPProductionLog.log_date)
         )
@@ -3894,15 +3766,8 @@ def get_not_good_plate_details():
                 CTPProductionLog.ctp_group == group
             )
         
-        # Apply date filters if provided - FIXED: Proper SQLAlchemy extract syntax
-        if year is not None:
-            query = query.filter(
-                extract('year', CTPProductionLog.log_date) == year
-            )
-        if month is not None:
-            query = query.filter(
-                extract('month', CTPProductionLog.log_date) == month
-            )
+        # Apply date filters if provided (range tanggal, pakai index)
+        query = query.filter(*period_filters(CTPProductionLog.log_date, year, month))
         
         # Order by date descending (most recent first)
         logs = query.order_by(CTPProductionLog.log_date.desc()).all()
@@ -3990,7 +3855,7 @@ def get_chemical_bon_ctp_months():
         months_query = db.session.query(
             extract('month', ChemicalBonCTP.tanggal).label('month')
         ).filter(
-            extract('year', ChemicalBonCTP.tanggal) == int(year)
+            *period_filters(ChemicalBonCTP.tanggal, year)
         ).distinct().order_by(
             extract('month', ChemicalBonCTP.tanggal)
         )
@@ -4092,29 +3957,21 @@ def get_ctp_kpi_data():
         )
 
         # Tambahkan filter tahun dan bulan ke query downtime secara kondisional
-        if year:
-            proof_query = proof_query.filter(extract('year', PlateAdjustmentRequest.tanggal) == year)
-            produksi_query = produksi_query.filter(extract('year', PlateBonRequest.tanggal) == year)
-        if month:
-            proof_query = proof_query.filter(extract('month', PlateAdjustmentRequest.tanggal) == month)
-            produksi_query = produksi_query.filter(extract('month', PlateBonRequest.tanggal) == month)
+        proof_period = period_filters(PlateAdjustmentRequest.tanggal, year, month)
+        produksi_period = period_filters(PlateBonRequest.tanggal, year, month)
+        proof_query = proof_query.filter(*proof_period)
+        produksi_query = produksi_query.filter(*produksi_period)
 
 
-        # Base query for totals from CTPProductionLog
+        # Total plate per group dari rekap harian (ctp_production_daily_rollup),
+        # filter tahun/bulan/plate type (FUJI atau SAPHIRA) secara kondisional
         query_ctp_log = db.session.query(
-            CTPProductionLog.ctp_group,
-            func.sum(CTPProductionLog.num_plate_good).label('total_good'),
-            func.sum(CTPProductionLog.num_plate_not_good).label('total_not_good')
-        ).group_by(CTPProductionLog.ctp_group)
-        
-        # Apply filters untuk data plate secara kondisional
-        if year:
-            query_ctp_log = query_ctp_log.filter(extract('year', CTPProductionLog.log_date) == year)
-        if month:
-            query_ctp_log = query_ctp_log.filter(extract('month', CTPProductionLog.log_date) == month)
-        if plate_type:
-            # Filter berdasarkan plate type (FUJI atau SAPHIRA)
-            query_ctp_log = query_ctp_log.filter(CTPProductionLog.plate_type_material.ilike(f'{plate_type}%'))
+            CTPProductionDailyRollup.ctp_group,
+            func.sum(CTPProductionDailyRollup.num_plate_good).label('total_good'),
+            func.sum(CTPProductionDailyRollup.num_plate_not_good).label('total_not_good')
+        ).filter(
+            *CTPProductionRollupService.period_filters(year, month, plate_type)
+        ).group_by(CTPProductionDailyRollup.ctp_group)
             
         results = query_ctp_log.all()
         
@@ -4133,10 +3990,7 @@ def get_ctp_kpi_data():
             )
             
             # Apply same year/month/plate_type filter secara kondisional
-            if year:
-                reasons_query = reasons_query.filter(extract('year', CTPProductionLog.log_date) == year)
-            if month:
-                reasons_query = reasons_query.filter(extract('month', CTPProductionLog.log_date) == month)
+            reasons_query = reasons_query.filter(*period_filters(CTPProductionLog.log_date, year, month))
             if plate_type:
                 reasons_query = reasons_query.filter(CTPProductionLog.plate_type_material.ilike(f'{plate_type}%'))
             
@@ -4185,10 +4039,7 @@ def get_ctp_kpi_data():
                 PlateAdjustmentRequest.plate_delivered_at.isnot(None),
                 PlateAdjustmentRequest.ctp_group == group
             )
-            if year:
-                group_proof_items_query = group_proof_items_query.filter(extract('year', PlateAdjustmentRequest.tanggal) == year)
-            if month:
-                group_proof_items_query = group_proof_items_query.filter(extract('month', PlateAdjustmentRequest.tanggal) == month)
+            group_proof_items_query = group_proof_items_query.filter(*proof_period)
 
             group_downtime_proof = sum(
                 (item.plate_delivered_at - item.machine_off_at).total_seconds() / 3600
@@ -4204,10 +4055,7 @@ def get_ctp_kpi_data():
                 PlateBonRequest.plate_delivered_at.isnot(None),
                 PlateBonRequest.ctp_group == group
             )
-            if year:
-                group_produksi_items_query = group_produksi_items_query.filter(extract('year', PlateBonRequest.tanggal) == year)
-            if month:
-                group_produksi_items_query = group_produksi_items_query.filter(extract('month', PlateBonRequest.tanggal) == month)
+            group_produksi_items_query = group_produksi_items_query.filter(*produksi_period)
 
             group_downtime_produksi = sum(
                 (item.plate_delivered_at - item.machine_off_at).total_seconds() / 3600
@@ -4245,10 +4093,7 @@ def get_ctp_kpi_data():
             PlateAdjustmentRequest.machine_off_at.isnot(None),
             PlateAdjustmentRequest.plate_delivered_at.isnot(None)
         )
-        if year:
-            overall_proof_items_query = overall_proof_items_query.filter(extract('year', PlateAdjustmentRequest.tanggal) == year)
-        if month:
-            overall_proof_items_query = overall_proof_items_query.filter(extract('month', PlateAdjustmentRequest.tanggal) == month)
+        overall_proof_items_query = overall_proof_items_query.filter(*proof_period)
         
         total_downtime_proof_overall = sum(
             (item.plate_delivered_at - item.machine_off_at).total_seconds() / 3600
@@ -4262,10 +4107,7 @@ def get_ctp_kpi_data():
             PlateBonRequest.machine_off_at.isnot(None),
             PlateBonRequest.plate_delivered_at.isnot(None)
         )
-        if year:
-            overall_produksi_items_query = overall_produksi_items_query.filter(extract('year', PlateBonRequest.tanggal) == year)
-        if month:
-            overall_produksi_items_query = overall_produksi_items_query.filter(extract('month', PlateBonRequest.tanggal) == month)
+        overall_produksi_items_query = overall_produksi_items_query.filter(*produksi_period)
 
         total_downtime_produksi_overall = sum(
             (item.plate_delivered_at - item.machine_off_at).total_seconds() / 3600
@@ -4336,10 +4178,7 @@ def get_ctp_not_good_by_machine():
             CTPProductionLog.num_plate_not_good > 0
         )
 
-        if year:
-            query = query.filter(extract('year', CTPProductionLog.log_date) == year)
-        if month:
-            query = query.filter(extract('month', CTPProductionLog.log_date) == month)
+        query = query.filter(*period_filters(CTPProductionLog.log_date, year, month))
 
         rows = query.group_by('machine', 'reason').order_by('machine', 'reason').all()
 
@@ -4427,6 +4266,7 @@ def start_ctp():
         adjustment.ctp_group = ctp_group   # Assign CTP group
         
         db.session.commit()
+        BadgeCountService.refresh_and_publish()
         
         return jsonify({
             'success': True, 
@@ -4464,6 +4304,7 @@ def start_ctp_bon():
         bon.ctp_group = ctp_group   # Assign CTP group
         
         db.session.commit()
+        BadgeCountService.refresh_and_publish()
         
         return jsonify({
             'success': True, 
@@ -4501,6 +4342,7 @@ def finish_ctp():
         adjustment.plate_finish_at = datetime.now()
         
         db.session.commit()
+        BadgeCountService.refresh_and_publish()
         
         return jsonify({
             'success': True, 
@@ -4540,6 +4382,7 @@ def finish_ctp_bon():
         # PIC tetap sama dengan yang memulai CTP (tidak perlu update ctp_by)
         
         db.session.commit()
+        BadgeCountService.refresh_and_publish()
         
         return jsonify({
             'success': True, 
@@ -4578,6 +4421,7 @@ def plate_delivered():
         adjustment.plate_delivered_at = datetime.now()
         
         db.session.commit()
+        BadgeCountService.refresh_and_publish()
         
         return jsonify({
             'success': True, 
@@ -4616,6 +4460,7 @@ def plate_delivered_bon():
         bon.plate_delivered_at = datetime.now()
         
         db.session.commit()
+        BadgeCountService.refresh_and_publish()
         
         return jsonify({
             'success': True, 
@@ -4698,15 +4543,16 @@ def get_next_bon_number():
         year = today.year
         month = today.month
         
-        # Get last bon number for current month
+        # Get last bon number for current month (range tanggal supaya index bisa dipakai)
+        start, end = period_range(year, month)
         result = db.session.execute(
             text("""
             SELECT MAX(CAST(SUBSTRING_INDEX(bon_number, '/', 1) AS UNSIGNED)) as last_number
             FROM bon_plate
-            WHERE MONTH(tanggal) = :month
-            AND YEAR(tanggal) = :year
+            WHERE tanggal >= :start
+            AND tanggal < :end
             """),
-            {'month': month, 'year': year}
+            {'start': start, 'end': end}
         ).fetchone()
         
         last_number = result.last_number if result.last_number else 0
@@ -3,13 +3,27 @@ Notification Routes - API endpoints untuk notification system
 """
 
 import logging
-from flask import Blueprint, jsonify, request
+import time
+from flask import Blueprint, Response, current_app, jsonify, request
 from flask_login import login_required, current_user
 from models import db, UniversalNotification, NotificationRecipient
 from services.notification_service import NotificationService
+from services.badge_count_service import BadgeCountService
+from services.notification_hub import (
+    NotificationHub, BADGE_CHANNEL, DEFAULT_MAX_STREAMS, format_sse, stream_limiter, user_channel
+)
+from services.notification_outbox import outbox_worker
 
 logger = logging.getLogger(__name__)
 
+# SSE: kirim komentar keep-alive kalau tidak ada event, dan tutup stream secara berkala
+# supaya thread worker tidak tertahan selamanya (EventSource otomatis reconnect)
+STREAM_HEARTBEAT_SECONDS = 25
+STREAM_MAX_SECONDS = 300
+STREAM_RETRY_MS = 5000
+# Client yang ditolak (503) kembali ke polling; Retry-After untuk klien lain
+STREAM_UNAVAILABLE_RETRY_SECONDS = 60
+
 # Create Blueprint
 notification_bp = Blueprint('notifications', __name__, url_prefix='/api/notifications')
 
@@ -26,6 +40,33 @@ def health_check():
     })
 
 
+@notification_bp.route('/outbox/metrics', methods=['GET'])
+@login_required
+def outbox_metrics():
+    """
+    GET /impact/api/notifications/outbox/metrics
+    Queue depth dan latency dispatch notifikasi (admin only)
+    """
+    if not current_user.is_admin():
+        return jsonify({
+            'success': False,
+            'error': 'Admin access required'
+        }), 403
+    
+    try:
+        return jsonify({
+            'success': True,
+            'data': outbox_worker.get_metrics()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error getting outbox metrics: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @notification_bp.route('/unread-count', methods=['GET'])
 @login_required
 def get_unread_count():
@@ -49,6 +90,79 @@ def get_unread_count():
         }), 500
 
 
+@notification_bp.route('/stream', methods=['GET'])
+@login_required
+def stream():
+    """
+    GET /impact/api/notifications/stream
+    Server-Sent Events: push unread count user ini dan perubahan badge sidebar
+    
+    Events:
+    - unread_count: {'unread_count': int, 'notification_id': int|None}
+    - badges: {'etag': str, 'changed': {division_key: [{'status', 'count'}]}}
+    """
+    # Worker sync gunicorn melayani 1 request per proses: stream akan menahan worker itu
+    # sampai STREAM_MAX_SECONDS, jadi endpoint ini hanya jalan di worker gthread/gevent
+    if not request.environ.get('wsgi.multithread'):
+        return _stream_unavailable('Notification stream requires a threaded or async worker')
+    
+    max_streams = current_app.config.get('NOTIFICATION_STREAM_MAX_CONNECTIONS', DEFAULT_MAX_STREAMS)
+    if not stream_limiter.try_acquire(max_streams):
+        logger.warning(f"Notification stream limit reached ({max_streams}), client falls back to polling")
+        return _stream_unavailable('Too many open notification streams')
+    
+    try:
+        user_id = current_user.id
+        unread_count = NotificationService.get_unread_count(user_id)
+        badges, etag = BadgeCountService.get_counts()
+    except Exception as e:
+        stream_limiter.release()
+        logger.error(f"Error opening notification stream: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+    
+    subscription = NotificationHub.subscribe([user_channel(user_id), BADGE_CHANNEL])
+    
+    def generate():
+        try:
+            yield f"retry: {STREAM_RETRY_MS}\n\n"
+            yield format_sse('unread_count', {'unread_count': unread_count, 'notification_id': None})
+            yield format_sse('badges', {'etag': etag, 'changed': badges})
+            
+            deadline = time.monotonic() + STREAM_MAX_SECONDS
+            while time.monotonic() < deadline:
+                message = subscription.get(timeout=STREAM_HEARTBEAT_SECONDS)
+                if message is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(message['event'], message['data'])
+        finally:
+            subscription.close()
+    
+    response = Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # Dipanggil server saat response ditutup, juga kalau generator belum sempat jalan
+    response.call_on_close(subscription.close)
+    response.call_on_close(stream_limiter.release)
+    return response
+
+
+def _stream_unavailable(error):
+    """503 untuk stream yang ditolak; notification-stream.js kembali ke polling"""
+    response = jsonify({
+        'success': False,
+        'error': error,
+        'fallback': 'polling'
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(STREAM_UNAVAILABLE_RETRY_SECONDS)
+    return response
+
+
 @notification_bp.route('/mark-all-read', methods=['PUT'])
 @login_required
 def mark_all_read():
@@ -81,20 +195,29 @@ def get_notifications():
     
     Query params:
     - limit: int (default: 50)
-    - offset: int (default: 0)
+    - offset: int (default: 0) - legacy, pakai cursor untuk halaman dalam
+    - cursor: str - next_cursor dari response sebelumnya (keyset pagination)
     - include_read: bool (default: true)
     """
     try:
         limit = request.args.get('limit', 50, type=int)
         offset = request.args.get('offset', 0, type=int)
+        cursor = request.args.get('cursor') or None
         include_read = request.args.get('include_read', 'true').lower() == 'true'
         
-        notifications = NotificationService.get_user_notifications(
-            user_id=current_user.id,
-            limit=limit,
-            offset=offset,
-            include_read=include_read
-        )
+        try:
+            notifications = NotificationService.get_user_notifications(
+                user_id=current_user.id,
+                limit=limit,
+                offset=offset,
+                include_read=include_read,
+                cursor=cursor
+            )
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
         
         unread_count = NotificationService.get_unread_count(current_user.id)
         
@@ -102,7 +225,8 @@ def get_notifications():
             'success': True,
             'data': notifications,
             'unread_count': unread_count,
-            'count': len(notifications)
+            'count': len(notifications),
+            'next_cursor': notifications[-1]['cursor'] if len(notifications) == limit else None
         })
         
     except Exception as e:
@@ -9,7 +9,7 @@ from models import db, User
 from werkzeug.utils import secure_filename
 from datetime import datetime
 from sqlalchemy.orm.attributes import flag_modified
-from services.notification_service import NotificationDispatcher
+from services.notification_outbox import NotificationOutboxService
 
 UPLOAD_FOLDER = r'\\172.27.168.10\Data_Design\Impact\5w1h'
 ALLOWED_EXTENSIONS = {'pdf', 'jpg', 'jpeg', 'png', 'doc', 'docx', 'xls', 'xlsx'}
@@ -93,6 +93,15 @@ def input_5w1h():
                             logger.error(f"File upload error: {str(e)}")
                             flash(f'Error upload file: {str(e)}', 'warning')
         
+        # Queue notification for new 5W1H entry (dikirim worker setelah commit)
+        NotificationOutboxService.enqueue(
+            'dispatch_5w1h_entry_created',
+            entry_id=entry.id,
+            entry_title=entry.title,
+            created_by_user_id=current_user.id,
+            created_by_name=current_user.name
+        )
+        
         db.session.commit()
         
         msg = 'Form 5W1H berhasil disimpan'
@@ -100,17 +109,6 @@ def input_5w1h():
             msg += f' ({attachment_count} lampiran)'
         flash(msg, 'success')
         
-        # Dispatch notification for new 5W1H entry
-        try:
-            NotificationDispatcher.dispatch_5w1h_entry_created(
-                entry_id=entry.id,
-                entry_title=entry.title,
-                created_by_user_id=current_user.id,
-                created_by_name=current_user.name
-            )
-        except Exception as e:
-            logger.error(f"Error dispatching 5W1H entry created notification: {str(e)}")
-        
         # Render form kembali dengan flash message (jangan redirect)
         return render_template('tools_5w1h/input_5W1H.html')
     return render_template('tools_5w1h/input_5W1H.html')
@@ -195,23 +193,21 @@ def edit_5w1h(entry_id):
                             flash(f'Error upload file: {str(e)}', 'warning')
                             logger.error(f"File upload error during edit: {str(e)}")
         
+        # Queue notification if status changed
+        if old_status != new_status:
+            NotificationOutboxService.enqueue(
+                'dispatch_5w1h_entry_status_changed',
+                entry_id=entry.id,
+                entry_title=entry.title,
+                old_status=old_status,
+                new_status=new_status,
+                updated_by_user_id=current_user.id,
+                updated_by_name=current_user.name
+            )
+        
         db.session.commit()
         flash('Form 5W1H berhasil diperbarui', 'success')
         
-        # Dispatch notification if status changed
-        if old_status != new_status:
-            try:
-                NotificationDispatcher.dispatch_5w1h_entry_status_changed(
-                    entry_id=entry.id,
-                    entry_title=entry.title,
-                    old_status=old_status,
-                    new_status=new_status,
-                    updated_by_user_id=current_user.id,
-                    updated_by_name=current_user.name
-                )
-            except Exception as e:
-                logger.error(f"Error dispatching 5W1H status changed notification: {str(e)}")
-        
         # Return to edit page with flash message instead of redirecting
         return render_template('tools_5w1h/input_5W1H.html', entry=entry, edit=True)
     
@@ -35,8 +35,9 @@ import pymysql
 
 # Local imports
 from config import DB_CONFIG
-from models import db, Division, User, CTPProductionLog, PlateAdjustmentRequest, PlateBonRequest, KartuStockPlateFuji, KartuStockPlateSaphira, KartuStockChemicalFuji, KartuStockChemicalSaphira, MonthlyWorkHours, ChemicalBonCTP, BonPlate, CTPMachine, CTPProblemLog, CTPProblemPhoto, CTPProblemDocument
+from models import db, Division, User, PlateAdjustmentRequest, PlateBonRequest, KartuStockPlateFuji, KartuStockPlateSaphira, KartuStockChemicalFuji, KartuStockChemicalSaphira, MonthlyWorkHours, ChemicalBonCTP, BonPlate, CTPMachine, CTPProblemLog, CTPProblemPhoto, CTPProblemDocument, CTPProductionDailyRollup
 from plate_mappings import PlateTypeMapping
+from services.ctp_production_rollup import CTPProductionRollupService
 
 # Timezone untuk Jakarta
 jakarta_tz = pytz.timezone('Asia/Jakarta')
@@ -106,15 +107,8 @@ def get_ctp_plate_usage():
         month = request.args.get('month', type=int)
         plate_type = request.args.get('plate_type', type=str)
 
-        # Base filters - only add year filter if year is provided
-        filters = []
-        if year:
-            filters.append(extract('year', CTPProductionLog.log_date) == year)
-        if month:
-            filters.append(extract('month', CTPProductionLog.log_date) == month)
-        if plate_type:
-            # Filter berdasarkan plate type (FUJI atau SAPHIRA)
-            filters.append(CTPProductionLog.plate_type_material.ilike(f'{plate_type}%'))
+        # Filter periode + plate type (FUJI atau SAPHIRA) pada rekap harian
+        filters = CTPProductionRollupService.period_filters(year, month, plate_type)
 
         # Build trend
         if month:
@@ -128,9 +122,9 @@ def get_ctp_plate_usage():
             not_goods = [0] * days
 
             rows = db.session.query(
-                extract('day', CTPProductionLog.log_date).label('d'),
-                func.coalesce(func.sum(CTPProductionLog.num_plate_good), 0).label('good'),
-                func.coalesce(func.sum(CTPProductionLog.num_plate_not_good), 0).label('not_good')
+                extract('day', CTPProductionDailyRollup.log_date).label('d'),
+                func.coalesce(func.sum(CTPProductionDailyRollup.num_plate_good), 0).label('good'),
+                func.coalesce(func.sum(CTPProductionDailyRollup.num_plate_not_good), 0).label('not_good')
             ).filter(
                 *filters
             ).group_by(
@@ -154,9 +148,9 @@ def get_ctp_plate_usage():
             not_goods = [0] * 12
 
             rows = db.session.query(
-                extract('month', CTPProductionLog.log_date).label('m'),
-                func.coalesce(func.sum(CTPProductionLog.num_plate_good), 0).label('good'),
-                func.coalesce(func.sum(CTPProductionLog.num_plate_not_good), 0).label('not_good')
+                extract('month', CTPProductionDailyRollup.log_date).label('m'),
+                func.coalesce(func.sum(CTPProductionDailyRollup.num_plate_good), 0).label('good'),
+                func.coalesce(func.sum(CTPProductionDailyRollup.num_plate_not_good), 0).label('not_good')
             ).filter(
                 *filters
             ).group_by(
@@ -175,16 +169,16 @@ def get_ctp_plate_usage():
 
         # Breakdown by plate type (plate_type_material)
         by_type_rows = db.session.query(
-            CTPProductionLog.plate_type_material.label('type'),
-            func.coalesce(func.sum(CTPProductionLog.num_plate_good), 0).label('good'),
-            func.coalesce(func.sum(CTPProductionLog.num_plate_not_good), 0).label('not_good')
+            CTPProductionDailyRollup.plate_type_material.label('type'),
+            func.coalesce(func.sum(CTPProductionDailyRollup.num_plate_good), 0).label('good'),
+            func.coalesce(func.sum(CTPProductionDailyRollup.num_plate_not_good), 0).label('not_good')
         ).filter(
-            CTPProductionLog.plate_type_material.isnot(None),
+            CTPProductionDailyRollup.plate_type_material.isnot(None),
             *filters
         ).group_by(
-            CTPProductionLog.plate_type_material
+            CTPProductionDailyRollup.plate_type_material
         ).order_by(
-            CTPProductionLog.plate_type_material
+            CTPProductionDailyRollup.plate_type_material
         ).all()
 
         by_type = []
@@ -201,16 +195,16 @@ def get_ctp_plate_usage():
 
         # Breakdown by group (ctp_group)
         by_group_rows = db.session.query(
-            CTPProductionLog.ctp_group.label('group'),
-            func.coalesce(func.sum(CTPProductionLog.num_plate_good), 0).label('good'),
-            func.coalesce(func.sum(CTPProductionLog.num_plate_not_good), 0).label('not_good')
+            CTPProductionDailyRollup.ctp_group.label('group'),
+            func.coalesce(func.sum(CTPProductionDailyRollup.num_plate_good), 0).label('good'),
+            func.coalesce(func.sum(CTPProductionDailyRollup.num_plate_not_good), 0).label('not_good')
         ).filter(
-            CTPProductionLog.ctp_group.isnot(None),
+            CTPProductionDailyRollup.ctp_group.isnot(None),
             *filters
         ).group_by(
-            CTPProductionLog.ctp_group
+            CTPProductionDailyRollup.ctp_group
         ).order_by(
-            CTPProductionLog.ctp_group
+            CTPProductionDailyRollup.ctp_group
         ).all()
 
         by_group = []
@@ -252,38 +246,31 @@ def get_ctp_plate_usage_by_type():
         month = request.args.get('month', type=int)
         plate_type = request.args.get('plate_type', type=str)
 
-        # Build filters and labels based on granularity
-        filters = []
-        if year:
-            filters.append(extract('year', CTPProductionLog.log_date) == year)
+        # Build filters (rekap harian) and labels based on granularity
+        filters = CTPProductionRollupService.period_filters(year, month, plate_type)
 
         if month:
-            filters.append(extract('month', CTPProductionLog.log_date) == month)
             # If year is provided, use it; otherwise use current year for calendar range
             year_for_calendar = year if year else datetime.now().year
             days = calendar.monthrange(year_for_calendar, month)[1]
             labels = [str(d) for d in range(1, days + 1)]
             index_key = 'd'
-            dim = extract('day', CTPProductionLog.log_date).label(index_key)
+            dim = extract('day', CTPProductionDailyRollup.log_date).label(index_key)
             granularity = 'daily'
         else:
             labels = ['Jan', 'Feb', 'Mar', 'Apr', 'Mei', 'Jun', 'Jul', 'Agu', 'Sep', 'Okt', 'Nov', 'Des']
             index_key = 'm'
-            dim = extract('month', CTPProductionLog.log_date).label(index_key)
+            dim = extract('month', CTPProductionDailyRollup.log_date).label(index_key)
             granularity = 'monthly'
 
-        # Add plate_type filter if provided
-        if plate_type:
-            filters.append(CTPProductionLog.plate_type_material.ilike(f'{plate_type}%'))
-
         # Query grouped by plate type and time bucket
         rows = db.session.query(
-            CTPProductionLog.plate_type_material.label('type'),
+            CTPProductionDailyRollup.plate_type_material.label('type'),
             dim,
-            func.coalesce(func.sum(CTPProductionLog.num_plate_good), 0).label('good'),
-            func.coalesce(func.sum(CTPProductionLog.num_plate_not_good), 0).label('not_good')
+            func.coalesce(func.sum(CTPProductionDailyRollup.num_plate_good), 0).label('good'),
+            func.coalesce(func.sum(CTPProductionDailyRollup.num_plate_not_good), 0).label('not_good')
         ).filter(
-            CTPProductionLog.plate_type_material.isnot(None),
+            CTPProductionDailyRollup.plate_type_material.isnot(None),
             *filters
         ).group_by(
             'type', index_key
@@ -370,38 +357,31 @@ def get_ctp_plate_usage_by_print_machine():
         month = request.args.get('month', type=int)
         plate_type = request.args.get('plate_type', type=str)
 
-        # Build filters and labels based on granularity
-        filters = []
-        if year:
-            filters.append(extract('year', CTPProductionLog.log_date) == year)
+        # Build filters (rekap harian) and labels based on granularity
+        filters = CTPProductionRollupService.period_filters(year, month, plate_type)
 
         if month:
-            filters.append(extract('month', CTPProductionLog.log_date) == month)
             # If year is provided, use it; otherwise use current year for calendar range
             year_for_calendar = year if year else datetime.now().year
             days = calendar.monthrange(year_for_calendar, month)[1]
             labels = [str(d) for d in range(1, days + 1)]
             index_key = 'd'
-            dim = extract('day', CTPProductionLog.log_date).label(index_key)
+            dim = extract('day', CTPProductionDailyRollup.log_date).label(index_key)
             granularity = 'daily'
         else:
             labels = ['Jan', 'Feb', 'Mar', 'Apr', 'Mei', 'Jun', 'Jul', 'Agu', 'Sep', 'Okt', 'Nov', 'Des']
             index_key = 'm'
-            dim = extract('month', CTPProductionLog.log_date).label(index_key)
+            dim = extract('month', CTPProductionDailyRollup.log_date).label(index_key)
             granularity = 'monthly'
 
-        # Add plate_type filter if provided
-        if plate_type:
-            filters.append(CTPProductionLog.plate_type_material.ilike(f'{plate_type}%'))
-
         # Query grouped by print machine and time bucket
         rows = db.session.query(
-            CTPProductionLog.print_machine.label('machine'),
+            CTPProductionDailyRollup.print_machine.label('machine'),
             dim,
-            func.coalesce(func.sum(CTPProductionLog.num_plate_good), 0).label('good'),
-            func.coalesce(func.sum(CTPProductionLog.num_plate_not_good), 0).label('not_good')
+            func.coalesce(func.sum(CTPProductionDailyRollup.num_plate_good), 0).label('good'),
+            func.coalesce(func.sum(CTPProductionDailyRollup.num_plate_not_good), 0).label('not_good')
         ).filter(
-            CTPProductionLog.print_machine.isnot(None),
+            CTPProductionDailyRollup.print_machine.isnot(None),
             *filters
         ).group_by(
             'machine', index_key
@@ -36,7 +36,8 @@ import pymysql
 # Local imports
 from config import DB_CONFIG
 from models import db, Division, User, CTPProductionLog, PlateAdjustmentRequest, PlateBonRequest, KartuStockPlateFuji, KartuStockPlateSaphira, KartuStockChemicalFuji, KartuStockChemicalSaphira, MonthlyWorkHours, ChemicalBonCTP, BonPlate, CTPMachine, CTPProblemLog, CTPProblemPhoto, CTPProblemDocument
-from services.notification_service import NotificationDispatcher
+from services.notification_outbox import NotificationOutboxService
+from services.period_filter import period_filters
 from plate_mappings import PlateTypeMapping
 
 # Timezone untuk Jakarta
@@ -127,13 +128,8 @@ def get_ctp_problem_logs():
         if technician_type:
             query = query.filter_by(technician_type=technician_type)
         
-        # NEW: Filter by year
-        if year:
-            query = query.filter(db.extract('year', CTPProblemLog.problem_date) == year)
-        
-        # NEW: Filter by month
-        if month:
-            query = query.filter(db.extract('month', CTPProblemLog.problem_date) == month)
+        # NEW: Filter by year/month (range tanggal, pakai index problem_date)
+        query = query.filter(*period_filters(CTPProblemLog.problem_date, year, month))
         
         # NEW: Search functionality
         if search:
@@ -353,22 +349,20 @@ def create_ctp_problem_log():
                 db.session.add(problem_doc)
                 logger.info(f"Added document: {doc_info['filename']} for log ID: {log.id}")
 
+        # Queue notification for new problem (dikirim worker setelah commit)
+        NotificationOutboxService.enqueue(
+            'dispatch_ctp_problem_new',
+            machine_name=machine.name,
+            machine_id=machine_id,
+            machine_nickname=machine.nickname,
+            problem_id=log.id,
+            problem_description=problem_description,
+            triggered_by_user_id=current_user.id
+        )
+        
         # Final commit for all related data
         db.session.commit()
         
-        # Send notification for new problem
-        try:
-            NotificationDispatcher.dispatch_ctp_problem_new(
-                machine_name=machine.name,
-                machine_id=machine_id,
-                machine_nickname=machine.nickname,
-                problem_id=log.id,
-                problem_description=problem_description,
-                triggered_by_user_id=current_user.id
-            )
-        except Exception as e:
-            logger.error(f"Failed to send CTP problem new notification: {str(e)}", exc_info=True)
-        
         # Log successful creation for debugging
         logger.info(
             f"Created CTP problem log {log.id} for machine_id={machine_id} "
@@ -588,20 +582,18 @@ def update_ctp_problem_log(log_id):
                 log.end_time = end_time_jakarta
                 log.status = 'completed'
 
-        db.session.commit()
-        
-        # Send notification if problem was just completed
+        # Queue notification if problem was just completed
         if log.status == 'completed' and log.end_time:
-            try:
-                NotificationDispatcher.dispatch_ctp_problem_resolved(
-                    machine_name=log.machine.name,
-                    machine_id=log.machine_id,
-                    machine_nickname=log.machine.nickname,
-                    problem_id=log.id,
-                    triggered_by_user_id=current_user.id
-                )
-            except Exception as e:
-                logger.error(f"Failed to send CTP problem resolved notification: {str(e)}", exc_info=True)
+            NotificationOutboxService.enqueue(
+                'dispatch_ctp_problem_resolved',
+                machine_name=log.machine.name,
+                machine_id=log.machine_id,
+                machine_nickname=log.machine.nickname,
+                problem_id=log.id,
+                triggered_by_user_id=current_user.id
+            )
+        
+        db.session.commit()
         
         return jsonify({'success': True})
     except Exception as e:
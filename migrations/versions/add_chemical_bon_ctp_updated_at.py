@@ -0,0 +1,27 @@
+"""add_chemical_bon_ctp_updated_at
+
+Revision ID: add_chemical_bon_ctp_updated_at
+Revises: add_export_jobs_table
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_chemical_bon_ctp_updated_at'
+down_revision = 'add_export_jobs_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Fingerprint versi data export chemical bon = count + max(updated_at) + max(id);
+    # row lama diisi created_at supaya max(updated_at) langsung terisi
+    op.add_column('chemical_bon_ctp', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute('UPDATE chemical_bon_ctp SET updated_at = created_at')
+
+
+def downgrade():
+    op.drop_column('chemical_bon_ctp', 'updated_at')
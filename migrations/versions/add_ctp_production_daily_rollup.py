@@ -0,0 +1,53 @@
+"""add_ctp_production_daily_rollup
+
+Revision ID: add_ctp_production_daily_rollup
+Revises: add_ctp_production_log_plate_usage_index
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_ctp_production_daily_rollup'
+down_revision = 'add_ctp_production_log_plate_usage_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'ctp_production_daily_rollup',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('log_date', sa.Date(), nullable=False),
+        sa.Column('ctp_shift', sa.String(50), nullable=False),
+        sa.Column('ctp_group', sa.String(50), nullable=False),
+        sa.Column('ctp_machine', sa.String(50), nullable=False),
+        sa.Column('print_machine', sa.String(50), nullable=False),
+        sa.Column('plate_type_material', sa.String(100), nullable=False),
+        sa.Column('num_plate_good', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('num_plate_not_good', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('log_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'log_date', 'ctp_shift', 'ctp_group', 'ctp_machine', 'print_machine', 'plate_type_material',
+            name='uq_ctp_production_daily_rollup_key'
+        )
+    )
+
+    # Backfill awal dari log yang sudah ada (sama dengan 'flask ctp-rollup backfill')
+    op.execute("""
+        INSERT INTO ctp_production_daily_rollup
+            (log_date, ctp_shift, ctp_group, ctp_machine, print_machine, plate_type_material,
+             num_plate_good, num_plate_not_good, log_count, updated_at)
+        SELECT log_date, ctp_shift, ctp_group, ctp_machine, print_machine, plate_type_material,
+               COALESCE(SUM(num_plate_good), 0), COALESCE(SUM(num_plate_not_good), 0), COUNT(id), NOW()
+        FROM ctp_production_logs
+        GROUP BY log_date, ctp_shift, ctp_group, ctp_machine, print_machine, plate_type_material
+    """)
+
+
+def downgrade():
+    op.drop_table('ctp_production_daily_rollup')
@@ -0,0 +1,27 @@
+"""add_ctp_production_log_plate_usage_index
+
+Revision ID: add_ctp_production_log_plate_usage_index
+Revises: add_kartu_stock_ledger_indexes
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_ctp_production_log_plate_usage_index'
+down_revision = 'add_kartu_stock_ledger_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'idx_ctp_production_logs_date_shift_plate',
+        'ctp_production_logs',
+        ['log_date', 'ctp_shift', 'plate_type_material']
+    )
+
+
+def downgrade():
+    op.drop_index('idx_ctp_production_logs_date_shift_plate', table_name='ctp_production_logs')
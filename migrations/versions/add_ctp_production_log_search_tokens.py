@@ -0,0 +1,49 @@
+"""add_ctp_production_log_search_tokens
+
+Token pencarian tabel KPI CTP (ctp_production_log_search_tokens) + index nomor WO / MC
+untuk exact match. Setelah upgrade jalankan 'flask ctp-search rebuild' untuk mengisi
+token log lama.
+
+Revision ID: add_ctp_production_log_search_tokens
+Revises: add_rnd_evidence_content_sha256
+Create Date: 2026-10-17 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_ctp_production_log_search_tokens'
+down_revision = 'add_rnd_evidence_content_sha256'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'ctp_production_log_search_tokens',
+        # Binary collation: token yang hanya beda huruf besar/aksen tidak bentrok di primary key
+        sa.Column(
+            'token', sa.String(length=64).with_variant(mysql.VARCHAR(length=64, collation='utf8mb4_bin'), 'mysql'),
+            nullable=False
+        ),
+        sa.Column('log_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['log_id'], ['ctp_production_logs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('token', 'log_id')
+    )
+    op.create_index(
+        'idx_ctp_production_log_search_tokens_log_id', 'ctp_production_log_search_tokens', ['log_id']
+    )
+    op.create_index('idx_ctp_production_logs_wo_number', 'ctp_production_logs', ['wo_number'])
+    op.create_index('idx_ctp_production_logs_mc_number', 'ctp_production_logs', ['mc_number'])
+
+
+def downgrade():
+    op.drop_index('idx_ctp_production_logs_mc_number', table_name='ctp_production_logs')
+    op.drop_index('idx_ctp_production_logs_wo_number', table_name='ctp_production_logs')
+    op.drop_index(
+        'idx_ctp_production_log_search_tokens_log_id', table_name='ctp_production_log_search_tokens'
+    )
+    op.drop_table('ctp_production_log_search_tokens')
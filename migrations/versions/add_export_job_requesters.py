@@ -0,0 +1,34 @@
+"""add_export_job_requesters
+
+User yang ikut memakai export job hasil dedupe; mereka boleh polling dan download job
+yang dibuat user lain dengan filter yang sama.
+
+Revision ID: add_export_job_requesters
+Revises: add_chemical_bon_ctp_updated_at
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_export_job_requesters'
+down_revision = 'add_chemical_bon_ctp_updated_at'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'export_job_requesters',
+        sa.Column('job_id', sa.String(32), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['job_id'], ['export_jobs.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('job_id', 'user_id')
+    )
+
+
+def downgrade():
+    op.drop_table('export_job_requesters')
@@ -0,0 +1,52 @@
+"""add_export_jobs_table
+
+Revision ID: add_export_jobs_table
+Revises: add_ctp_production_log_search_tokens
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_export_jobs_table'
+down_revision = 'add_ctp_production_log_search_tokens'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'export_jobs',
+        sa.Column('id', sa.String(32), nullable=False),
+        sa.Column('export_type', sa.String(50), nullable=False),
+        sa.Column('params', sa.Text(), nullable=False),
+        sa.Column('requested_by', sa.Integer(), nullable=True),
+        sa.Column('dedupe_key', sa.String(64), nullable=False),
+        sa.Column('inflight_key', sa.String(64), nullable=True),
+        sa.Column('status', sa.String(20), nullable=False, server_default='queued'),
+        sa.Column('rows_processed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rows_total', sa.Integer(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('artifact_path', sa.String(500), nullable=True),
+        sa.Column('filename', sa.String(255), nullable=True),
+        sa.Column('mimetype', sa.String(100), nullable=True),
+        sa.Column('file_size', sa.BigInteger(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['requested_by'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('inflight_key')
+    )
+    op.create_index('idx_export_jobs_status_updated', 'export_jobs', ['status', 'updated_at'])
+    op.create_index('idx_export_jobs_expires', 'export_jobs', ['expires_at'])
+
+
+def downgrade():
+    op.drop_index('idx_export_jobs_expires', table_name='export_jobs')
+    op.drop_index('idx_export_jobs_status_updated', table_name='export_jobs')
+    op.drop_table('export_jobs')
@@ -0,0 +1,37 @@
+"""add_kartu_stock_ledger_indexes
+
+Revision ID: add_kartu_stock_ledger_indexes
+Revises: add_notification_archive_tables
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_kartu_stock_ledger_indexes'
+down_revision = 'add_notification_archive_tables'
+branch_labels = None
+depends_on = None
+
+LEDGER_TABLES = [
+    'kartu_stock_plate_fuji',
+    'kartu_stock_chemical_fuji',
+    'kartu_stock_plate_saphira',
+    'kartu_stock_chemical_saphira',
+]
+
+
+def upgrade():
+    for table in LEDGER_TABLES:
+        op.create_index(f'idx_{table}_period', table, ['tanggal', 'shift'])
+        op.create_index(f'idx_{table}_item_period', table, ['item_code', 'tanggal', 'shift'])
+
+    # Setelah upgrade, jalankan 'flask kartu-stock rebuild' sekali supaya stok awal/akhir
+    # yang sebelumnya dihitung saat GET menjadi konsisten sebagai ledger
+
+
+def downgrade():
+    for table in LEDGER_TABLES:
+        op.drop_index(f'idx_{table}_item_period', table_name=table)
+        op.drop_index(f'idx_{table}_period', table_name=table)
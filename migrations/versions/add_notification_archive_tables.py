@@ -0,0 +1,83 @@
+"""add_notification_archive_tables
+
+Revision ID: add_notification_archive_tables
+Revises: add_notification_recipient_user_read_index
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_notification_archive_tables'
+down_revision = 'add_notification_recipient_user_read_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'notification_unread_counters',
+        sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('unread_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # Backfill counter untuk semua user dari notification_recipients
+    op.execute("""
+        INSERT INTO notification_unread_counters (user_id, unread_count, updated_at)
+        SELECT u.id, COUNT(nr.id), NOW()
+        FROM users u
+        LEFT JOIN notification_recipients nr ON nr.user_id = u.id AND nr.is_read = 0
+        GROUP BY u.id
+    """)
+
+    op.create_table(
+        'universal_notifications_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('notification_type', sa.String(50), nullable=False),
+        sa.Column('title', sa.String(255), nullable=False),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('related_resource_type', sa.String(50), nullable=False),
+        sa.Column('related_resource_id', sa.Integer(), nullable=False),
+        sa.Column('triggered_by_user_id', sa.Integer(), nullable=False),
+        sa.Column('notification_metadata', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_universal_notifications_archive_created', 'universal_notifications_archive', ['created_at'])
+    op.create_index(
+        'idx_universal_notifications_archive_resource', 'universal_notifications_archive',
+        ['related_resource_type', 'related_resource_id']
+    )
+
+    op.create_table(
+        'notification_recipients_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('notification_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('is_read', sa.Boolean(), nullable=True),
+        sa.Column('read_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'idx_notification_recipients_archive_user', 'notification_recipients_archive',
+        ['user_id', 'notification_id']
+    )
+
+
+def downgrade():
+    op.drop_index('idx_notification_recipients_archive_user', table_name='notification_recipients_archive')
+    op.drop_table('notification_recipients_archive')
+    op.drop_index('idx_universal_notifications_archive_resource', table_name='universal_notifications_archive')
+    op.drop_index('idx_universal_notifications_archive_created', table_name='universal_notifications_archive')
+    op.drop_table('universal_notifications_archive')
+    op.drop_table('notification_unread_counters')
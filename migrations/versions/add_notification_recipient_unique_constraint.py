@@ -0,0 +1,36 @@
+"""add_notification_recipient_unique_constraint
+
+Revision ID: add_notification_recipient_unique
+Revises: universal_notifications_001
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_notification_recipient_unique'
+down_revision = 'universal_notifications_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Hapus duplikat lama (simpan id terkecil) sebelum constraint dipasang
+    op.execute(
+        "DELETE r1 FROM notification_recipients r1 "
+        "JOIN notification_recipients r2 "
+        "ON r1.notification_id = r2.notification_id "
+        "AND r1.user_id = r2.user_id "
+        "AND r1.id > r2.id"
+    )
+    op.create_unique_constraint(
+        'uq_notification_recipient_user',
+        'notification_recipients',
+        ['notification_id', 'user_id']
+    )
+
+
+def downgrade():
+    op.drop_constraint('uq_notification_recipient_user', 'notification_recipients', type_='unique')
@@ -0,0 +1,34 @@
+"""add_notification_recipient_user_read_index
+
+Revision ID: add_notification_recipient_user_read_index
+Revises: add_notification_outbox_table
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_notification_recipient_user_read_index'
+down_revision = 'add_notification_outbox_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'idx_notification_recipients_user_read',
+        'notification_recipients',
+        ['user_id', 'is_read', 'notification_id']
+    )
+    op.create_index(
+        'idx_universal_notifications_created_id',
+        'universal_notifications',
+        ['created_at', 'id']
+    )
+
+
+def downgrade():
+    op.drop_index('idx_universal_notifications_created_id', table_name='universal_notifications')
+    op.drop_index('idx_notification_recipients_user_read', table_name='notification_recipients')
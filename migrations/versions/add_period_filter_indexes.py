@@ -0,0 +1,38 @@
+"""add_period_filter_indexes
+
+Index kolom tanggal untuk filter periode (range setengah terbuka dari services.period_filter).
+ctp_production_logs sudah tercakup idx_ctp_production_logs_date_shift_plate (log_date di depan).
+
+Revision ID: add_period_filter_indexes
+Revises: add_ctp_production_daily_rollup
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_period_filter_indexes'
+down_revision = 'add_ctp_production_daily_rollup'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('idx_plate_adjustment_requests_tanggal', 'plate_adjustment_requests', ['tanggal']),
+    ('idx_plate_adjustment_requests_adjustment_start', 'plate_adjustment_requests', ['adjustment_start_at']),
+    ('idx_chemical_bon_ctp_tanggal', 'chemical_bon_ctp', ['tanggal']),
+    ('idx_plate_bon_requests_tanggal', 'plate_bon_requests', ['tanggal']),
+    ('idx_ctp_problem_logs_problem_date', 'ctp_problem_logs', ['problem_date']),
+    ('idx_ctp_problem_logs_machine_date', 'ctp_problem_logs', ['machine_id', 'problem_date']),
+    ('idx_rnd_jobs_started_at', 'rnd_jobs', ['started_at']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
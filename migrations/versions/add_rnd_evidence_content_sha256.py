@@ -0,0 +1,31 @@
+"""add_rnd_evidence_content_sha256
+
+Hash SHA-256 isi file evidence R&D, dipakai sebagai key cache thumbnail
+(content-addressed). Evidence lama dibiarkan NULL.
+
+Revision ID: add_rnd_evidence_content_sha256
+Revises: add_rnd_job_progress_columns
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_rnd_evidence_content_sha256'
+down_revision = 'add_rnd_job_progress_columns'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('rnd_evidence_files', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_sha256', sa.String(length=64), nullable=True))
+        batch_op.create_index('ix_rnd_evidence_files_content_sha256', ['content_sha256'])
+
+
+def downgrade():
+    with op.batch_alter_table('rnd_evidence_files', schema=None) as batch_op:
+        batch_op.drop_index('ix_rnd_evidence_files_content_sha256')
+        batch_op.drop_column('content_sha256')
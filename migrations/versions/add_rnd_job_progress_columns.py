@@ -0,0 +1,40 @@
+"""add_rnd_job_progress_columns
+
+Progress tersimpan di rnd_jobs (total_tasks, completed_tasks, completion_percentage,
+current_step_id) supaya list job tidak menghitung dari assignment/task per request.
+Setelah upgrade jalankan 'flask rnd-progress backfill' untuk mengisi job lama.
+
+Revision ID: add_rnd_job_progress_columns
+Revises: add_rnd_jobs_dashboard_stats_index
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_rnd_job_progress_columns'
+down_revision = 'add_rnd_jobs_dashboard_stats_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('rnd_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total_tasks', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('completed_tasks', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('completion_percentage', sa.Float(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('current_step_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(
+            'fk_rnd_jobs_current_step_id', 'rnd_progress_steps', ['current_step_id'], ['id']
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('rnd_jobs', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_rnd_jobs_current_step_id', type_='foreignkey')
+        batch_op.drop_column('current_step_id')
+        batch_op.drop_column('completion_percentage')
+        batch_op.drop_column('completed_tasks')
+        batch_op.drop_column('total_tasks')
@@ -0,0 +1,28 @@
+"""add_rnd_jobs_dashboard_stats_index
+
+Index komposit (started_at, status, sample_type) untuk agregasi dashboard-stats R&D;
+menggantikan idx_rnd_jobs_started_at (started_at tetap kolom pertama).
+
+Revision ID: add_rnd_jobs_dashboard_stats_index
+Revises: add_period_filter_indexes
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_rnd_jobs_dashboard_stats_index'
+down_revision = 'add_period_filter_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('idx_rnd_jobs_started_status_type', 'rnd_jobs', ['started_at', 'status', 'sample_type'])
+    op.drop_index('idx_rnd_jobs_started_at', table_name='rnd_jobs')
+
+
+def downgrade():
+    op.create_index('idx_rnd_jobs_started_at', 'rnd_jobs', ['started_at'])
+    op.drop_index('idx_rnd_jobs_started_status_type', table_name='rnd_jobs')
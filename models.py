@@ -4,6 +4,7 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, time, timedelta
 import pytz
 from sqlalchemy import func, and_, or_
+from sqlalchemy.dialects import mysql
 from plate_mappings import PlateTypeMapping
 
 # SQLAlchemy instance will be provided by app.py
@@ -131,6 +132,13 @@ class User(UserMixin, db.Model):
 # Definisi Model Database
 class CTPProductionLog(db.Model):
     __tablename__ = 'ctp_production_logs'
+    __table_args__ = (
+        # Pemakaian plate per shift (kartu stock) - GROUP BY plate_type_material
+        db.Index('idx_ctp_production_logs_date_shift_plate', 'log_date', 'ctp_shift', 'plate_type_material'),
+        # Pencarian tabel KPI: exact match nomor WO / MC
+        db.Index('idx_ctp_production_logs_wo_number', 'wo_number'),
+        db.Index('idx_ctp_production_logs_mc_number', 'mc_number'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     log_date = db.Column(db.Date, nullable=False)
@@ -363,6 +371,10 @@ class CTPProductionLog(db.Model):
 
 class PlateAdjustmentRequest(db.Model):
     __tablename__ = 'plate_adjustment_requests'
+    __table_args__ = (
+        db.Index('idx_plate_adjustment_requests_tanggal', 'tanggal'),
+        db.Index('idx_plate_adjustment_requests_adjustment_start', 'adjustment_start_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     tanggal = db.Column(db.Date, nullable=False)
@@ -592,6 +604,9 @@ class CalibrationReference(db.Model):
 
 class ChemicalBonCTP(db.Model):
     __tablename__ = 'chemical_bon_ctp'
+    __table_args__ = (
+        db.Index('idx_chemical_bon_ctp_tanggal', 'tanggal'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     bon_number = db.Column(db.String(255), nullable=False)
@@ -605,6 +620,8 @@ class ChemicalBonCTP(db.Model):
     jumlah = db.Column(db.Integer, nullable=False)
     wo_number = db.Column(db.String(255), nullable=True)  # WO number yang dipilih secara random
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(jakarta_tz))
+    # Versi data untuk cache export (services/export_cache.py)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(jakarta_tz), onupdate=lambda: datetime.now(jakarta_tz))
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     
     # Relationship dengan User
@@ -628,8 +645,58 @@ class ChemicalBonCTP(db.Model):
 
 # Stock calculation and management functions integrated into models
 
-class KartuStockPlateFuji(db.Model):
+class PlateStockUsageMixin:
+    """
+    Hitung pemakaian plate batch untuk kartu stock per brand
+    Model pemakai mendefinisikan PLATE_TYPE_MAPPING {item_code: plate_type_material}
+    """
+
+    @classmethod
+    def calculate_usage_batch(cls, tanggal, shift):
+        """
+        Hitung pemakaian semua item plate brand ini untuk satu shift dengan satu query
+        GROUP BY plate_type_material (index log_date, ctp_shift, plate_type_material)
+
+        Returns:
+            dict - {item_code: jumlah pemakaian}
+        """
+        item_codes = {plate_type: item_code for item_code, plate_type in cls.PLATE_TYPE_MAPPING.items()}
+        rows = db.session.query(
+            CTPProductionLog.plate_type_material,
+            func.sum(
+                func.coalesce(CTPProductionLog.num_plate_good, 0) +
+                func.coalesce(CTPProductionLog.num_plate_not_good, 0)
+            )
+        ).filter(
+            CTPProductionLog.log_date == tanggal,
+            CTPProductionLog.ctp_shift == f"Shift {shift}",
+            CTPProductionLog.plate_type_material.in_(list(item_codes))
+        ).group_by(CTPProductionLog.plate_type_material).all()
+
+        usage = {item_code: 0 for item_code in cls.PLATE_TYPE_MAPPING}
+        for plate_type, total in rows:
+            usage[item_codes[plate_type]] = total or 0
+        return usage
+
+    @classmethod
+    def update_stocks(cls, stocks):
+        """Perbarui pemakaian dan stok akhir banyak row sekaligus (satu query per shift, di memory)"""
+        usage_by_shift = {}
+        for stock in stocks:
+            key = (stock.tanggal, stock.shift)
+            if key not in usage_by_shift:
+                usage_by_shift[key] = cls.calculate_usage_batch(*key)
+            stock.jumlah_pemakaian = usage_by_shift[key].get(stock.item_code, 0)
+            stock.jumlah_stock_akhir = stock.jumlah_stock_awal - stock.jumlah_pemakaian + stock.jumlah_incoming
+
+
+class KartuStockPlateFuji(PlateStockUsageMixin, db.Model):
     __tablename__ = 'kartu_stock_plate_fuji'
+    __table_args__ = (
+        # Ledger: baca per shift, dan cari/carry forward per item secara kronologis
+        db.Index('idx_kartu_stock_plate_fuji_period', 'tanggal', 'shift'),
+        db.Index('idx_kartu_stock_plate_fuji_item_period', 'item_code', 'tanggal', 'shift'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     tanggal = db.Column(db.Date, nullable=False)
@@ -672,71 +739,6 @@ class KartuStockPlateFuji(db.Model):
         self.jumlah_pemakaian = self.calculate_usage()
         self.jumlah_stock_akhir = self.jumlah_stock_awal - self.jumlah_pemakaian + self.jumlah_incoming
 
-    @classmethod
-    def get_previous_shift_stock(cls, tanggal, shift, item_code):
-        """
-        Gets the last known stock count for an item by finding the single most recent record
-        based on a chronological ordering of date and shift.
-        """
-        # A more robust query to find the last record
-        prev_record = cls.query.filter(
-            cls.item_code == item_code,
-            # Filter for records that are chronologically before the current date and shift
-            (cls.tanggal < tanggal) |
-            ((cls.tanggal == tanggal) & (cls.shift < shift))
-        ).order_by(
-            cls.tanggal.desc(),
-            cls.shift.desc()
-        ).first()
-
-        return prev_record.jumlah_stock_akhir if prev_record else 0
-
-    @classmethod
-    def get_or_create_stocks(cls, tanggal, shift, user_id):
-        stocks = cls.query.filter_by(tanggal=tanggal, shift=shift).all()
-        
-        if not stocks:
-            stocks = []
-            for item_code, item_name in cls.PLATE_TYPE_MAPPING.items():
-                prev_stock = cls.get_previous_shift_stock(tanggal, shift, item_code)
-                
-                # Logika yang ada sekarang untuk membuat baris baru
-                if item_code in PlateTypeMapping.FUJI_PLATES:
-                    jumlah_per_box = 30 if '1630' not in item_name else 15
-                else: # Fallback untuk Saphira atau lainnya, meskipun ini seharusnya tidak terjadi di kelas Fuji
-                    if '1055 PN' in item_name or '1030 PN' in item_name:
-                        jumlah_per_box = 40
-                    elif '1630' in item_name:
-                        jumlah_per_box = 30
-                    else:
-                        jumlah_per_box = 50
-                
-                new_stock = cls(
-                    tanggal=tanggal,
-                    shift=shift,
-                    item_code=item_code,
-                    item_name=item_name,
-                    jumlah_stock_awal=prev_stock,
-                    jumlah_pemakaian=0,
-                    jumlah_incoming=0,
-                    jumlah_stock_akhir=prev_stock,
-                    jumlah_per_box=jumlah_per_box,
-                    confirmed_by=user_id
-                )
-                db.session.add(new_stock)
-                stocks.append(new_stock)
-            
-            db.session.commit()
-        
-        # Perbaikan utama: Perbarui jumlah_stock_awal untuk semua entri yang sudah ada
-        for stock in stocks:
-            stock.jumlah_stock_awal = cls.get_previous_shift_stock(tanggal, shift, stock.item_code)
-            stock.update_stock() # Panggil update_stock() setelah stock awal diperbarui
-            db.session.add(stock)
-        
-        db.session.commit()
-        return stocks
-
     def to_dict(self):
         """Konversi data stok ke dictionary untuk respons API, termasuk konversi box/pcs"""
         stock_awal_box = self.jumlah_stock_awal // self.jumlah_per_box
@@ -768,6 +770,11 @@ class KartuStockPlateFuji(db.Model):
 
 class KartuStockChemicalFuji(db.Model):
     __tablename__ = 'kartu_stock_chemical_fuji'
+    __table_args__ = (
+        # Ledger: baca per shift, dan cari/carry forward per item secara kronologis
+        db.Index('idx_kartu_stock_chemical_fuji_period', 'tanggal', 'shift'),
+        db.Index('idx_kartu_stock_chemical_fuji_item_period', 'item_code', 'tanggal', 'shift'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     tanggal = db.Column(db.Date, nullable=False)
@@ -841,52 +848,6 @@ class KartuStockChemicalFuji(db.Model):
         self.jumlah_pemakaian = self.calculate_usage()
         self.jumlah_stock_akhir = self.jumlah_stock_awal + self.jumlah_incoming - self.jumlah_pemakaian
 
-    @classmethod
-    def get_previous_shift_stock(cls, tanggal, shift, item_code):
-        prev_record = None
-        if shift == '2':
-            prev_record = cls.query.filter_by(tanggal=tanggal, item_code=item_code, shift='1').first()
-        elif shift == '1':
-            prev_tanggal = tanggal - timedelta(days=1)
-            prev_record = cls.query.filter_by(tanggal=prev_tanggal, item_code=item_code, shift='2').first()
-        
-        return prev_record.jumlah_stock_akhir if prev_record else 0
-
-    @classmethod
-    def get_or_create_stocks(cls, tanggal, shift, user_id):
-        stocks = cls.query.filter_by(tanggal=tanggal, shift=shift).all()
-
-        if not stocks:
-            stocks = []
-            for item_code, item_name in cls.CHEMICAL_TYPE_MAPPING.items():
-                prev_stock = cls.get_previous_shift_stock(tanggal, shift, item_code)
-                new_stock = cls(
-                    tanggal=tanggal,
-                    shift=shift,
-                    item_code=item_code,
-                    item_name=item_name,
-                    jumlah_stock_awal=prev_stock,
-                    jumlah_pemakaian=0,
-                    jumlah_incoming=0,
-                    jumlah_stock_akhir=prev_stock,
-                    confirmed_by=user_id
-                )
-                db.session.add(new_stock)
-                stocks.append(new_stock)
-            
-            db.session.commit()
-            
-        # Ini adalah bagian yang paling penting!
-        # Memastikan stok awal selalu diperbarui dari data terbaru,
-        # bahkan jika barisnya sudah ada di database.
-        for stock in stocks:
-            stock.jumlah_stock_awal = cls.get_previous_shift_stock(tanggal, shift, stock.item_code)
-            stock.update_stock() # Hitung ulang jumlah_stock_akhir
-            db.session.add(stock)
-
-        db.session.commit()
-        return stocks
-
     def to_dict(self):
         return {
             'id': self.id,
@@ -902,8 +863,13 @@ class KartuStockChemicalFuji(db.Model):
             'confirmed_by': self.user.name if self.user else None
         }
     
-class KartuStockPlateSaphira(db.Model):
+class KartuStockPlateSaphira(PlateStockUsageMixin, db.Model):
     __tablename__ = 'kartu_stock_plate_saphira'
+    __table_args__ = (
+        # Ledger: baca per shift, dan cari/carry forward per item secara kronologis
+        db.Index('idx_kartu_stock_plate_saphira_period', 'tanggal', 'shift'),
+        db.Index('idx_kartu_stock_plate_saphira_item_period', 'item_code', 'tanggal', 'shift'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     tanggal = db.Column(db.Date, nullable=False)
@@ -946,71 +912,6 @@ class KartuStockPlateSaphira(db.Model):
         self.jumlah_pemakaian = self.calculate_usage()
         self.jumlah_stock_akhir = self.jumlah_stock_awal - self.jumlah_pemakaian + self.jumlah_incoming
 
-    @classmethod
-    def get_previous_shift_stock(cls, tanggal, shift, item_code):
-        """
-        Gets the last known stock count for an item by finding the single most recent record
-        based on a chronological ordering of date and shift.
-        """
-        # A more robust query to find the last record
-        prev_record = cls.query.filter(
-            cls.item_code == item_code,
-            # Filter for records that are chronologically before the current date and shift
-            (cls.tanggal < tanggal) |
-            ((cls.tanggal == tanggal) & (cls.shift < shift))
-        ).order_by(
-            cls.tanggal.desc(),
-            cls.shift.desc()
-        ).first()
-
-        return prev_record.jumlah_stock_akhir if prev_record else 0
-
-    @classmethod
-    def get_or_create_stocks(cls, tanggal, shift, user_id):
-        stocks = cls.query.filter_by(tanggal=tanggal, shift=shift).all()
-        
-        if not stocks:
-            stocks = []
-            for item_code, item_name in cls.PLATE_TYPE_MAPPING.items():
-                prev_stock = cls.get_previous_shift_stock(tanggal, shift, item_code)
-                
-                # Logika yang ada sekarang untuk membuat baris baru
-                if item_code in PlateTypeMapping.FUJI_PLATES:
-                    jumlah_per_box = 30 if '1630' not in item_name else 15
-                else: # Fallback untuk Saphira atau lainnya, meskipun ini seharusnya tidak terjadi di kelas Fuji
-                    if '1055 PN' in item_name or '1030 PN' in item_name:
-                        jumlah_per_box = 40
-                    elif '1630' in item_name:
-                        jumlah_per_box = 30
-                    else:
-                        jumlah_per_box = 50
-                
-                new_stock = cls(
-                    tanggal=tanggal,
-                    shift=shift,
-                    item_code=item_code,
-                    item_name=item_name,
-                    jumlah_stock_awal=prev_stock,
-                    jumlah_pemakaian=0,
-                    jumlah_incoming=0,
-                    jumlah_stock_akhir=prev_stock,
-                    jumlah_per_box=jumlah_per_box,
-                    confirmed_by=user_id
-                )
-                db.session.add(new_stock)
-                stocks.append(new_stock)
-            
-            db.session.commit()
-        
-        # Perbaikan utama: Perbarui jumlah_stock_awal untuk semua entri yang sudah ada
-        for stock in stocks:
-            stock.jumlah_stock_awal = cls.get_previous_shift_stock(tanggal, shift, stock.item_code)
-            stock.update_stock() # Panggil update_stock() setelah stock awal diperbarui
-            db.session.add(stock)
-        
-        db.session.commit()
-        return stocks
-
     def to_dict(self):
         """Konversi data stok ke dictionary untuk respons API, termasuk konversi box/pcs"""
         stock_awal_box = self.jumlah_stock_awal // self.jumlah_per_box
@@ -1042,6 +943,11 @@ class KartuStockPlateSaphira(db.Model):
 
 class KartuStockChemicalSaphira(db.Model):
     __tablename__ = 'kartu_stock_chemical_saphira'
+    __table_args__ = (
+        # Ledger: baca per shift, dan cari/carry forward per item secara kronologis
+        db.Index('idx_kartu_stock_chemical_saphira_period', 'tanggal', 'shift'),
+        db.Index('idx_kartu_stock_chemical_saphira_item_period', 'item_code', 'tanggal', 'shift'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     tanggal = db.Column(db.Date, nullable=False)
@@ -1116,52 +1022,6 @@ class KartuStockChemicalSaphira(db.Model):
         self.jumlah_pemakaian = self.calculate_usage()
         self.jumlah_stock_akhir = self.jumlah_stock_awal + self.jumlah_incoming - self.jumlah_pemakaian
         
-    @classmethod
-    def get_previous_shift_stock(cls, tanggal, shift, item_code):
-        prev_record = None
-        if shift == '2':
-            prev_record = cls.query.filter_by(tanggal=tanggal, item_code=item_code, shift='1').first()
-        elif shift == '1':
-            prev_tanggal = tanggal - timedelta(days=1)
-            prev_record = cls.query.filter_by(tanggal=prev_tanggal, item_code=item_code, shift='2').first()
-        
-        return prev_record.jumlah_stock_akhir if prev_record else 0
-
-    @classmethod
-    def get_or_create_stocks(cls, tanggal, shift, user_id):
-        stocks = cls.query.filter_by(tanggal=tanggal, shift=shift).all()
-
-        if not stocks:
-            stocks = []
-            for item_code, item_name in cls.CHEMICAL_TYPE_MAPPING.items():
-                prev_stock = cls.get_previous_shift_stock(tanggal, shift, item_code)
-                new_stock = cls(
-                    tanggal=tanggal,
-                    shift=shift,
-                    item_code=item_code,
-                    item_name=item_name,
-                    jumlah_stock_awal=prev_stock,
-                    jumlah_pemakaian=0,
-                    jumlah_incoming=0,
-                    jumlah_stock_akhir=prev_stock,
-                    confirmed_by=user_id
-                )
-                db.session.add(new_stock)
-                stocks.append(new_stock)
-            
-            db.session.commit()
-            
-        # Bagian perbaikan utama:
-        # Memastikan stok awal selalu diperbarui dari data terbaru,
-        # bahkan jika barisnya sudah ada di database.
-        for stock in stocks:
-            stock.jumlah_stock_awal = cls.get_previous_shift_stock(tanggal, shift, stock.item_code)
-            stock.update_stock() # Hitung ulang jumlah_stock_akhir
-            db.session.add(stock)
-
-        db.session.commit()
-        return stocks
-
     def to_dict(self):
         return {
             'id': self.id,
@@ -1209,6 +1069,9 @@ class BonPlate(db.Model):
 
 class PlateBonRequest(db.Model):
     __tablename__ = 'plate_bon_requests'
+    __table_args__ = (
+        db.Index('idx_plate_bon_requests_tanggal', 'tanggal'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     tanggal = db.Column(db.Date, nullable=False)
@@ -1256,6 +1119,10 @@ class CTPMachine(db.Model):
 
 class CTPProblemLog(db.Model):
     __tablename__ = 'ctp_problem_logs'
+    __table_args__ = (
+        db.Index('idx_ctp_problem_logs_problem_date', 'problem_date'),
+        db.Index('idx_ctp_problem_logs_machine_date', 'machine_id', 'problem_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     machine_id = db.Column(db.Integer, db.ForeignKey('ctp_machines.id'), nullable=False)
@@ -1570,6 +1437,10 @@ class UniversalNotification(db.Model):
     Menyimpan notifikasi global yang akan dikirim ke multiple users
     """
     __tablename__ = 'universal_notifications'
+    __table_args__ = (
+        # Keyset pagination (created_at, id) di get_user_notifications
+        db.Index('idx_universal_notifications_created_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -1601,10 +1472,12 @@ class UniversalNotification(db.Model):
     triggered_by = db.relationship('User', backref=db.backref('triggered_notifications', lazy='dynamic'))
     recipients = db.relationship('NotificationRecipient', backref='notification', lazy=True, cascade='all, delete-orphan')
     
-    def to_dict(self, include_recipient_status=None):
+    def to_dict(self, include_recipient_status=None, recipient_status=None):
         """
         Convert to dict
         include_recipient_status: jika user_id diberikan, include is_read status untuk user itu
+        recipient_status: tuple (is_read, read_at) yang sudah di-select bersama notifikasi
+                          (tanpa query tambahan)
         """
         # Parse metadata JSON if available
         metadata = None
@@ -1629,7 +1502,11 @@ class UniversalNotification(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
         
-        if include_recipient_status:
+        if recipient_status is not None:
+            is_read, read_at = recipient_status
+            data['is_read'] = is_read
+            data['read_at'] = read_at.isoformat() if read_at else None
+        elif include_recipient_status:
             recipient = NotificationRecipient.query.filter_by(
                 notification_id=self.id,
                 user_id=include_recipient_status
@@ -1648,6 +1525,11 @@ class NotificationRecipient(db.Model):
     Setiap user memiliki status read/unread tersendiri
     """
     __tablename__ = 'notification_recipients'
+    __table_args__ = (
+        db.UniqueConstraint('notification_id', 'user_id', name='uq_notification_recipient_user'),
+        # Covering index untuk list/unread count per user
+        db.Index('idx_notification_recipients_user_read', 'user_id', 'is_read', 'notification_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -1675,3 +1557,223 @@ class NotificationRecipient(db.Model):
             'read_at': self.read_at.isoformat() if self.read_at else None,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+
+
+class NotificationOutbox(db.Model):
+    """
+    Outbox untuk dispatch notifikasi secara asynchronous
+    Request handler hanya insert row di sini (dalam transaksi yang sama),
+    OutboxWorker yang menjalankan NotificationDispatcher di background
+    """
+    __tablename__ = 'notification_outbox'
+    __table_args__ = (
+        db.Index('idx_notification_outbox_due', 'status', 'next_attempt_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Nama method NotificationDispatcher, e.g. 'dispatch_rnd_job_created'
+    dispatch_name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON kwargs untuk dispatcher
+    
+    # Mencegah notifikasi ganda untuk event yang sama (e.g. 'rnd_job_completed:12')
+    dedupe_key = db.Column(db.String(150), nullable=True, unique=True)
+    
+    # pending -> processing -> done / failed (setelah max attempts)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(jakarta_tz).replace(tzinfo=None))
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'dispatch_name': self.dispatch_name,
+            'dedupe_key': self.dedupe_key,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class NotificationUnreadCounter(db.Model):
+    """
+    Jumlah notifikasi unread per user, di-maintain di transaksi yang sama dengan
+    perubahan notification_recipients (add_recipients / mark_as_read / mark_all_as_read)
+    Row yang belum ada berarti belum di-materialize - dihitung ulang dari notification_recipients
+    """
+    __tablename__ = 'notification_unread_counters'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True, autoincrement=False)
+    unread_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(jakarta_tz), onupdate=lambda: datetime.now(jakarta_tz))
+
+
+class UniversalNotificationArchive(db.Model):
+    """
+    Arsip universal_notifications yang sudah dibaca semua recipient-nya
+    Diisi oleh NotificationArchiveService supaya tabel utama tetap kecil
+    ID sama dengan ID asli; tidak ada foreign key supaya arsip tidak menahan delete user
+    """
+    __tablename__ = 'universal_notifications_archive'
+    __table_args__ = (
+        db.Index('idx_universal_notifications_archive_created', 'created_at'),
+        db.Index('idx_universal_notifications_archive_resource', 'related_resource_type', 'related_resource_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    notification_type = db.Column(db.String(50), nullable=False)
+    title = db.Column(db.String(255), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    related_resource_type = db.Column(db.String(50), nullable=False)
+    related_resource_id = db.Column(db.Integer, nullable=False)
+    triggered_by_user_id = db.Column(db.Integer, nullable=False)
+    notification_metadata = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, nullable=False)
+
+
+class NotificationRecipientArchive(db.Model):
+    """Arsip notification_recipients milik notifikasi yang sudah diarsip"""
+    __tablename__ = 'notification_recipients_archive'
+    __table_args__ = (
+        db.Index('idx_notification_recipients_archive_user', 'user_id', 'notification_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    notification_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    is_read = db.Column(db.Boolean, default=True)
+    read_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, nullable=False)
+
+
+class CTPProductionDailyRollup(db.Model):
+    """
+    Rekap harian ctp_production_logs per (tanggal, shift, group, mesin CTP, mesin cetak, jenis plate)
+    Di-maintain incremental setiap log di-insert/update/delete (services/ctp_production_rollup.py),
+    dipakai dashboard supaya tidak meng-agregasi ulang tabel log yang lebar
+    """
+    __tablename__ = 'ctp_production_daily_rollup'
+    __table_args__ = (
+        db.UniqueConstraint(
+            'log_date', 'ctp_shift', 'ctp_group', 'ctp_machine', 'print_machine', 'plate_type_material',
+            name='uq_ctp_production_daily_rollup_key'
+        ),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    log_date = db.Column(db.Date, nullable=False)
+    ctp_shift = db.Column(db.String(50), nullable=False)
+    ctp_group = db.Column(db.String(50), nullable=False)
+    ctp_machine = db.Column(db.String(50), nullable=False)
+    print_machine = db.Column(db.String(50), nullable=False)
+    plate_type_material = db.Column(db.String(100), nullable=False)
+    
+    num_plate_good = db.Column(db.Integer, nullable=False, default=0)
+    num_plate_not_good = db.Column(db.Integer, nullable=False, default=0)
+    log_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(jakarta_tz), onupdate=lambda: datetime.now(jakarta_tz))
+
+
+class CTPProductionLogSearchToken(db.Model):
+    """
+    Token pencarian ctp_production_logs (kata dari kolom teks, lowercase tanpa aksen) untuk tabel KPI
+    Di-maintain setiap log di-insert/update/delete (services/ctp_search.py);
+    pencarian = prefix match pada token (pakai primary key), bukan LIKE '%q%' di tabel log
+    """
+    __tablename__ = 'ctp_production_log_search_tokens'
+    __table_args__ = (
+        db.Index('idx_ctp_production_log_search_tokens_log_id', 'log_id'),
+    )
+    
+    # Binary collation: primary key membandingkan token persis (sudah di-fold di tokenize)
+    token = db.Column(
+        db.String(64).with_variant(mysql.VARCHAR(64, collation='utf8mb4_bin'), 'mysql'), primary_key=True
+    )
+    log_id = db.Column(db.Integer, db.ForeignKey('ctp_production_logs.id', ondelete='CASCADE'), primary_key=True)
+
+
+class ExportJob(db.Model):
+    """
+    Export besar yang dijalankan di background (services/export_jobs.py)
+    POST hanya insert row di sini; ExportJobWorker me-render ke file artifact di disk lokal,
+    client polling status (progress row) lalu download. Row + artifact dihapus setelah expires_at
+    """
+    __tablename__ = 'export_jobs'
+    __table_args__ = (
+        db.Index('idx_export_jobs_status_updated', 'status', 'updated_at'),
+        db.Index('idx_export_jobs_expires', 'expires_at'),
+    )
+    
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex, tidak bisa ditebak
+    export_type = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.Text, nullable=False)  # JSON filter (key terurut)
+    requested_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    
+    # Hash (export_type, params[, user]); inflight_key = dedupe_key selama queued/running,
+    # NULL setelah selesai -> unique constraint menjamin satu job in-flight per filter
+    dedupe_key = db.Column(db.String(64), nullable=False)
+    inflight_key = db.Column(db.String(64), nullable=True, unique=True)
+    
+    # queued -> running -> done / failed
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    rows_processed = db.Column(db.Integer, nullable=False, default=0)
+    rows_total = db.Column(db.Integer, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    
+    artifact_path = db.Column(db.String(500), nullable=True)
+    filename = db.Column(db.String(255), nullable=True)
+    mimetype = db.Column(db.String(100), nullable=True)
+    file_size = db.Column(db.BigInteger, nullable=True)
+    
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(jakarta_tz).replace(tzinfo=None))
+    started_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=True)  # heartbeat progress worker
+    finished_at = db.Column(db.DateTime, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=True)
+    
+    def to_dict(self):
+        progress = None
+        if self.status == 'done':
+            progress = 100
+        elif self.rows_total:
+            progress = min(round(self.rows_processed * 100 / self.rows_total), 99)
+        return {
+            'id': self.id,
+            'export_type': self.export_type,
+            'status': self.status,
+            'rows_processed': self.rows_processed,
+            'rows_total': self.rows_total,
+            'progress': progress,
+            'error': self.error,
+            'filename': self.filename,
+            'file_size': self.file_size,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None
+        }
+
+
+class ExportJobRequester(db.Model):
+    """
+    User yang ikut memakai export job hasil dedupe (selain requested_by)
+    Job non-per-user dibagi antar user dengan filter sama; setiap user yang POST boleh polling/download
+    """
+    __tablename__ = 'export_job_requesters'
+    
+    job_id = db.Column(db.String(32), db.ForeignKey('export_jobs.id', ondelete='CASCADE'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
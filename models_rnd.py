@@ -61,6 +61,9 @@ class RNDProgressTask(db.Model):
 class RNDJob(db.Model):
     """Model for R&D jobs with multi-PIC progress tracking"""
     __tablename__ = 'rnd_jobs'
+    __table_args__ = (
+        db.Index('idx_rnd_jobs_started_status_type', 'started_at', 'status', 'sample_type'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     job_id = db.Column(db.String(20), nullable=False, unique=True)  # Auto-generated job ID
@@ -74,6 +77,11 @@ class RNDJob(db.Model):
     notes = db.Column(db.Text, nullable=True)
     is_full_process = db.Column(db.Boolean, nullable=False, default=False)  # Flag to indicate if job follows full process workflow
     flow_configuration_id = db.Column(db.Integer, db.ForeignKey('rnd_flow_configurations.id'), nullable=True)  # Link to dynamic flow configuration
+    # Progress tersimpan (di-maintain RNDJobProgressService setiap task/assignment berubah)
+    total_tasks = db.Column(db.Integer, nullable=False, default=0)
+    completed_tasks = db.Column(db.Integer, nullable=False, default=0)
+    completion_percentage = db.Column(db.Float, nullable=False, default=0)
+    current_step_id = db.Column(db.Integer, db.ForeignKey('rnd_progress_steps.id'), nullable=True)  # Step pertama yang belum completed
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(jakarta_tz))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(jakarta_tz), onupdate=lambda: datetime.now(jakarta_tz))
     
@@ -81,6 +89,7 @@ class RNDJob(db.Model):
     progress_assignments = db.relationship('RNDJobProgressAssignment', backref='job', lazy=True, cascade='all, delete-orphan')
     evidence_files = db.relationship('RNDEvidenceFile', backref='job', cascade='all, delete-orphan', lazy='dynamic')
     flow_configuration = db.relationship('RNDFlowConfiguration', backref='jobs')
+    current_step = db.relationship('RNDProgressStep', foreign_keys=[current_step_id])
     
     def to_dict(self):
         return {
@@ -97,56 +106,21 @@ class RNDJob(db.Model):
             'is_full_process': self.is_full_process,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'completion_percentage': self.completion_percentage,
+            'total_tasks': self.total_tasks or 0,
+            'completed_tasks': self.completed_tasks or 0,
+            'completion_percentage': self.completion_percentage or 0,
+            'current_step_id': self.current_step_id,
             'current_progress_step': self.current_progress_step,
             'flow_configuration_id': self.flow_configuration_id  # Add flow configuration ID
         }
     
-    @property
-    def completion_percentage(self):
-        """Calculate completion percentage based on task completion and auto-sync status"""
-        if not self.progress_assignments:
-            return 0
-        
-        # Calculate based on TASK completion, not assignment status
-        total_tasks = 0
-        completed_tasks = 0
-        
-        for assignment in self.progress_assignments:
-            for task_assign in assignment.task_assignments:
-                total_tasks += 1
-                if task_assign.status == 'completed':
-                    completed_tasks += 1
-        
-        pct = round((completed_tasks / total_tasks) * 100, 2) if total_tasks > 0 else 0
-        
-        # AUTO-SYNC FORWARD: If completion is 100% and status is not completed, update it
-        if pct == 100 and self.status != 'completed':
-            print(f"DEBUG (property): Auto-syncing {self.job_id} - 100% completion detected, updating status to completed")
-            self.status = 'completed'
-            if not self.finished_at:
-                self.finished_at = datetime.now(jakarta_tz)
-            # Mark for update
-            self.updated_at = datetime.now(jakarta_tz)
-        
-        # AUTO-SYNC REVERSE: If completion is < 100% and status is completed, reset it
-        elif pct < 100 and self.status == 'completed':
-            print(f"DEBUG (property): Auto-syncing {self.job_id} - completion {pct}% < 100%, resetting status to in_progress")
-            self.status = 'in_progress'
-            self.finished_at = None  # Clear finished_at since job is no longer complete
-            # Mark for update
-            self.updated_at = datetime.now(jakarta_tz)
-        
-        return pct
-    
     @property
     def current_progress_step(self):
-        """Get current active progress step"""
-        if not self.progress_assignments:
+        """Get current active progress step (step tersimpan di current_step_id)"""
+        if not self.current_step_id:
             return None
-        # Find the first non-completed step
-        for assignment in sorted(self.progress_assignments, key=lambda x: x.progress_step.step_order):
-            if assignment.status != 'completed':
+        for assignment in self.progress_assignments:
+            if assignment.progress_step_id == self.current_step_id:
                 return {
                     'step_name': assignment.progress_step.name,
                     'pic_name': assignment.pic.name if assignment.pic else None,
@@ -283,6 +257,7 @@ class RNDEvidenceFile(db.Model):
     file_path = db.Column(db.String(500), nullable=False)
     file_type = db.Column(db.String(10), nullable=False)  # photo, pdf, docx, xlsx
     file_size = db.Column(db.Integer, nullable=False)  # in bytes
+    content_sha256 = db.Column(db.String(64), nullable=True, index=True)  # Hash isi file (key cache thumbnail + dedupe blob)
     evidence_type = db.Column(db.String(20), nullable=False)  # step_completion, task_completion
     uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     uploaded_at = db.Column(db.DateTime, default=lambda: datetime.now(jakarta_tz))
@@ -306,6 +281,7 @@ class RNDEvidenceFile(db.Model):
             'file_path': self.file_path,
             'file_type': self.file_type,
             'file_size': self.file_size,
+            'content_sha256': self.content_sha256,
             'evidence_type': self.evidence_type,
             'uploaded_by': self.uploaded_by,
             'uploader_name': self.uploader.name if self.uploader else None,
@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from flask import Blueprint, jsonify, request, render_template, send_file, current_app
+from flask import Blueprint, jsonify, request, render_template, send_file, current_app, url_for
 from flask_login import login_required, current_user
 from functools import wraps
 from models import db, User, UniversalNotification
@@ -9,12 +9,22 @@ from models_rnd import (
     RNDJobNote, RNDFlowConfiguration, RNDFlowStep
 )
 from models_rnd_external import RNDExternalTime
-from services.notification_service import NotificationDispatcher
+from services.evidence_storage import evidence_storage, EvidenceUploadError, UploadOffsetMismatch
+from services.evidence_thumbnails import (
+    evidence_thumbnails, source_kind, thumbnail_key, THUMBNAIL_SIZES, THUMBNAIL_FORMATS,
+    DEFAULT_SIZE as DEFAULT_THUMBNAIL_SIZE
+)
+from services.export_jobs import register_export
+from services.notification_outbox import NotificationOutboxService
+from services.period_filter import period_filters, period_range
+from services.rnd_dashboard_service import RNDDashboardService
+from services.rnd_flow_graph import RNDFlowGraphCache
+from services.rnd_job_list_service import RNDJobListService, InvalidListParamError
+from services.rnd_job_progress import RNDJobProgressService
+from services.xlsx_export import XLSX_MIMETYPE
 from werkzeug.utils import secure_filename
 import os
 import pytz
-import io
-from PIL import Image
 from sqlalchemy import and_, or_, func, text
 import logging
 
@@ -27,6 +37,10 @@ rnd_cloudsphere_bp = Blueprint('rnd_cloudsphere', __name__, url_prefix='/rnd-clo
 # Jakarta timezone
 jakarta_tz = pytz.timezone('Asia/Jakarta')
 
+# Thumbnail evidence: URL ber-versi (?v=key) di-cache browser 1 tahun; batch maksimal 200 id
+THUMBNAIL_IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+MAX_THUMBNAIL_BATCH = 200
+
 # Helper function to generate job ID
 def generate_rnd_job_id():
     """Generate unique job ID with format RND-YYYYMMDD-XXX"""
@@ -63,23 +77,6 @@ def require_rnd_access(f):
         return f(*args, **kwargs)
     return decorated_function
 
-# Helper function to ensure job status is synced with completion
-def sync_job_status(job):
-    """
-    Ensure job.status is synced with completion_percentage.
-    Triggers the auto-sync property and commits if changes were made.
-    """
-    try:
-        # Access completion_percentage triggers auto-sync property
-        pct = job.completion_percentage
-        
-        # If property made changes, commit them
-        if db.session.is_modified(job):
-            db.session.commit()
-            print(f"DEBUG: Job status synced for {job.job_id}: {pct}% completion, status={job.status}")
-    except Exception as e:
-        print(f"ERROR in sync_job_status: {e}")
-
 # R&D Cloudsphere Routes
 @rnd_cloudsphere_bp.route('/')
 @login_required
@@ -150,7 +147,7 @@ def get_dashboard_available_months():
             months = db.session.query(
                 func.extract('month', RNDJob.started_at).label('month')
             ).filter(
-                func.extract('year', RNDJob.started_at) == year
+                *period_filters(RNDJob.started_at, year)
             ).distinct().order_by(func.extract('month', RNDJob.started_at)).all()
         
         month_list = [int(m.month) for m in months if m.month]
@@ -170,122 +167,15 @@ def get_dashboard_available_months():
 @login_required
 @require_rnd_access
 def get_dashboard_stats_filtered():
-    """Get dashboard stats for specific month/year"""
+    """Get dashboard stats for specific month/year (tanpa year = semua data, seperti CTP dashboard)"""
     try:
         year = request.args.get('year', type=int)
         month = request.args.get('month', type=int)
-        
-        # Debug logging
-        print(f"DEBUG: Dashboard stats API called with year={year}, month={month}")
-        
-        # If no year provided, return all data (like CTP dashboard)
-        if not year:
-            # Return overall stats without date filtering
-            # Base query - no role filtering, all users with RND access can see all data
-            jobs_query = RNDJob.query
-           
-            total_jobs = jobs_query.count()
-           
-            # Jobs by status
-            in_progress = jobs_query.filter_by(status='in_progress').count()
-            completed = jobs_query.filter_by(status='completed').count()
-            rejected = jobs_query.filter_by(status='rejected').count()
-           
-            # Jobs by priority
-            high_priority = jobs_query.filter_by(priority_level='high').count()
-            middle_priority = jobs_query.filter_by(priority_level='middle').count()
-            low_priority = jobs_query.filter_by(priority_level='low').count()
-           
-            # Recent jobs (last 7 days)
-            seven_days_ago = datetime.now(jakarta_tz) - timedelta(days=7)
-            recent_jobs = jobs_query.filter(RNDJob.created_at >= seven_days_ago).count()
-           
-            # Jobs by sample type
-            blank_jobs = jobs_query.filter_by(sample_type='Blank').count()
-            rohs_icb_jobs = jobs_query.filter_by(sample_type='RoHS ICB').count()
-            rohs_ribbon_jobs = jobs_query.filter_by(sample_type='RoHS Ribbon').count()
-           
-            # Overdue jobs: finished_at > deadline_at (completed jobs that missed deadline)
-            # FIXED: Add null check for deadline_at to be consistent with SLA calculation
-            overdue_jobs = jobs_query.filter(
-                RNDJob.status == 'completed',
-                RNDJob.deadline_at.isnot(None),  # Only count jobs that have a deadline
-                RNDJob.finished_at > RNDJob.deadline_at
-            ).count()
-           
-            result_data = {
-                'total_jobs': total_jobs,
-                'in_progress': in_progress,
-                'completed': completed,
-                'completed_jobs': completed,  # Add field name expected by frontend
-                'rejected': rejected,
-                'blank_jobs': blank_jobs,
-                'rohs_icb_jobs': rohs_icb_jobs,  # Fixed field name
-                'rohs_ribbon_jobs': rohs_ribbon_jobs,
-                'overdue_jobs': overdue_jobs
-            }
-           
-            print(f"DEBUG: Dashboard stats result: {result_data}")
-           
-            return jsonify({
-                'success': True,
-                'data': result_data
-            })
-        
-        # Build date range
-        start_date = jakarta_tz.localize(datetime(year, month if month else 1, 1))
-        
-        if month:
-            # Specific month
-            if month == 12:
-                end_date = jakarta_tz.localize(datetime(year + 1, 1, 1))
-            else:
-                end_date = jakarta_tz.localize(datetime(year, month + 1, 1))
-        else:
-            # Whole year
-            end_date = jakarta_tz.localize(datetime(year + 1, 1, 1))
-        
-        print(f"DEBUG: Stats filter - year: {year}, month: {month}")
-        print(f"DEBUG: Stats date range: {start_date} to {end_date}")
-        
-        # Base query for period
-        jobs_query = RNDJob.query.filter(
-            RNDJob.started_at >= start_date,
-            RNDJob.started_at < end_date
-        )
-        
-        # Calculate metrics
-        total_jobs = jobs_query.count()
-        blank_jobs = jobs_query.filter_by(sample_type='Blank').count()
-        rohs_icb_jobs = jobs_query.filter_by(sample_type='RoHS ICB').count()
-        rohs_ribbon_jobs = jobs_query.filter_by(sample_type='RoHS Ribbon').count()
-        completed = jobs_query.filter_by(status='completed').count()
-        in_progress = jobs_query.filter_by(status='in_progress').count()
-        rejected = jobs_query.filter_by(status='rejected').count()
-        
-        print(f"DEBUG: Stats calculated - total: {total_jobs}, blank: {blank_jobs}, rohs_icb: {rohs_icb_jobs}, rohs_ribbon: {rohs_ribbon_jobs}, completed: {completed}")
-        
-        # Overdue jobs: finished_at > deadline_at (completed jobs that missed deadline)
-        # FIXED: Add null check for deadline_at to be consistent with SLA calculation
-        overdue_jobs = jobs_query.filter(
-            RNDJob.status == 'completed',
-            RNDJob.deadline_at.isnot(None),  # Only count jobs that have a deadline
-            RNDJob.finished_at > RNDJob.deadline_at
-        ).count()
-        
+
+        # Satu SELECT SUM(CASE ...) untuk semua counter, di-cache per (year, month)
         return jsonify({
             'success': True,
-            'data': {
-                'total_jobs': total_jobs,
-                'in_progress': in_progress,
-                'completed': completed,
-                'completed_jobs': completed,  # Add field name expected by frontend
-                'rejected': rejected,
-                'blank_jobs': blank_jobs,
-                'rohs_icb_jobs': rohs_icb_jobs,  # Fixed field name
-                'rohs_ribbon_jobs': rohs_ribbon_jobs,
-                'overdue_jobs': overdue_jobs
-            }
+            'data': RNDDashboardService.get_job_stats(year, month)
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -328,11 +218,7 @@ def get_dashboard_trend():
         else:
             if month:
                 # Single month
-                start_date = jakarta_tz.localize(datetime(year, month, 1))
-                if month == 12:
-                    end_date = jakarta_tz.localize(datetime(year + 1, 1, 1))
-                else:
-                    end_date = jakarta_tz.localize(datetime(year, month + 1, 1))
+                start_date, end_date = period_range(year, month, as_datetime=True)
                 
                 print(f"DEBUG: Single month filter - year: {year}, month: {month}")
                 print(f"DEBUG: Date range: {start_date} to {end_date}")
@@ -358,8 +244,7 @@ def get_dashboard_trend():
                 rohs_ribbon = [d.rohs_ribbon or 0 for d in daily_data]
             else:
                 # Whole year - monthly data
-                start_date = jakarta_tz.localize(datetime(year, 1, 1))
-                end_date = jakarta_tz.localize(datetime(year + 1, 1, 1))
+                start_date, end_date = period_range(year, as_datetime=True)
             
                 print(f"DEBUG: Whole year filter - year: {year}")
                 print(f"DEBUG: Date range: {start_date} to {end_date}")
@@ -430,16 +315,8 @@ def get_dashboard_stage_distribution():
                 'data': data
             })
         
-        # Build date range
-        start_date = jakarta_tz.localize(datetime(year, month if month else 1, 1))
-        
-        if month:
-            if month == 12:
-                end_date = jakarta_tz.localize(datetime(year + 1, 1, 1))
-            else:
-                end_date = jakarta_tz.localize(datetime(year, month + 1, 1))
-        else:
-            end_date = jakarta_tz.localize(datetime(year + 1, 1, 1))
+        # Build date range (setengah terbuka, waktu Jakarta)
+        start_date, end_date = period_range(year, month, as_datetime=True)
         
         print(f"DEBUG: Stage distribution filter - year: {year}, month: {month}")
         print(f"DEBUG: Stage distribution date range: {start_date} to {end_date}")
@@ -502,16 +379,8 @@ def get_dashboard_sla():
                 }
             })
         
-        # Build date range
-        start_date = jakarta_tz.localize(datetime(year, month if month else 1, 1))
-        
-        if month:
-            if month == 12:
-                end_date = jakarta_tz.localize(datetime(year + 1, 1, 1))
-            else:
-                end_date = jakarta_tz.localize(datetime(year, month + 1, 1))
-        else:
-            end_date = jakarta_tz.localize(datetime(year + 1, 1, 1))
+        # Build date range (setengah terbuka, waktu Jakarta)
+        start_date, end_date = period_range(year, month, as_datetime=True)
         
         print(f"DEBUG: SLA filter - year: {year}, month: {month}")
         print(f"DEBUG: SLA date range: {start_date} to {end_date}")
@@ -558,18 +427,8 @@ def get_dashboard_performance_indicators():
             # Get all completed jobs without date filtering, but only full process jobs
             completed_jobs = RNDJob.query.filter_by(status='completed', is_full_process=True).all()
         else:
-            # Build date range
-            start_date = jakarta_tz.localize(datetime(year, month if month else 1, 1))
-            
-            if month:
-                # Specific month
-                if month == 12:
-                    end_date = jakarta_tz.localize(datetime(year + 1, 1, 1))
-                else:
-                    end_date = jakarta_tz.localize(datetime(year, month + 1, 1))
-            else:
-                # Whole year
-                end_date = jakarta_tz.localize(datetime(year + 1, 1, 1))
+            # Build date range (setengah terbuka, waktu Jakarta)
+            start_date, end_date = period_range(year, month, as_datetime=True)
             
             # Get completed jobs for period (only full process jobs)
             completed_jobs = RNDJob.query.filter(
@@ -641,18 +500,8 @@ def get_dashboard_job_distribution():
             # Get all jobs without date filtering
             jobs_query = RNDJob.query
         else:
-            # Build date range
-            start_date = jakarta_tz.localize(datetime(year, month if month else 1, 1))
-            
-            if month:
-                # Specific month
-                if month == 12:
-                    end_date = jakarta_tz.localize(datetime(year + 1, 1, 1))
-                else:
-                    end_date = jakarta_tz.localize(datetime(year, month + 1, 1))
-            else:
-                # Whole year
-                end_date = jakarta_tz.localize(datetime(year + 1, 1, 1))
+            # Build date range (setengah terbuka, waktu Jakarta)
+            start_date, end_date = period_range(year, month, as_datetime=True)
             
             # Get jobs for period
             jobs_query = RNDJob.query.filter(
@@ -734,343 +583,70 @@ def get_dashboard_job_distribution():
 @login_required
 @require_rnd_access
 def get_dashboard_individual_scores():
-    """Get individual productivity scores for RND users (total days per stage)"""
+    """Get individual productivity scores for RND users (average days per stage)
+
+    Query params:
+        year, month: filter periode berdasarkan finished_at assignment
+        explain: '1' untuk menulis rincian per assignment ke log (debug perhitungan)
+    """
     try:
         year = request.args.get('year', type=int)
         month = request.args.get('month', type=int)
-        
-        # DEBUG: Log request parameters
-        print(f"\n{'#'*80}")
-        print(f"# SCORES KPI CALCULATION DEBUG")
-        print(f"{'#'*80}")
-        print(f"Request Parameters: year={year}, month={month}")
-        
-        # Get all RND users (division_id = 6)
-        rnd_users = User.query.filter_by(division_id=6, is_active=True).order_by(User.name).all()
-        print(f"Total RND Users: {len(rnd_users)}")
-        
-        # Define stage mapping: stage_name -> sample_type to find
-        # CHANGED: Map to sample_type instead of step_name
-        # This will calculate ALL steps within that sample_type
-        stage_mapping = {
-            'Design': 'Design',
-            'Mastercard': 'Mastercard',
-            'Blank': 'Blank',
-            'RoHS ICB': 'RoHS ICB',  # Will calculate all 3 steps (Proof, Sample, Quality)
-            'RoHS Ribbon': 'RoHS Ribbon',  # Will calculate all 3 steps (Proof, Sample, Quality)
-            'Polymer Ribbon': 'Polymer Ribbon',
-            'Light-Standard-Dark': 'Light-Standard-Dark Reference'
-        }
-        print(f"Stage Mapping (by sample_type): {len(stage_mapping)} stages")
-        print(f"{'#'*80}\n")
-        
-        users_scores = []
-        
-        for user in rnd_users:
-            user_scores = {
-                'user_id': user.id,
-                'user_name': user.name,
-                'username': user.username,
-                'scores': {
-                    'Design': 0.0,
-                    'Mastercard': 0.0,
-                    'Blank': 0.0,
-                    'RoHS ICB': 0.0,
-                    'RoHS Ribbon': 0.0,
-                    'Polymer Ribbon': 0.0,
-                    'Light-Standard-Dark': 0.0
-                }
-            }
-            
-            # For each stage, calculate total days for ALL steps within that sample_type
-            for stage_name, sample_type in stage_mapping.items():
-                try:
-                    # Get all progress assignments for this user (PIC) for steps in this sample_type
-                    # Filter ONLY by RNDProgressStep.sample_type (not RNDJob.sample_type)
-                    # because a job can work on steps from different sample_types
-                    assignments_query = db.session.query(RNDJobProgressAssignment).filter(
-                        RNDJobProgressAssignment.pic_id == user.id,
-                        RNDProgressStep.sample_type == sample_type
-                    ).join(RNDProgressStep).join(RNDJob)
-                    
-                    # Apply year/month filter if provided
-                    if year:
-                        start_date = jakarta_tz.localize(datetime(year, month if month else 1, 1))
-                        
-                        if month:
-                            if month == 12:
-                                end_date = jakarta_tz.localize(datetime(year + 1, 1, 1))
-                            else:
-                                end_date = jakarta_tz.localize(datetime(year, month + 1, 1))
-                        else:
-                            end_date = jakarta_tz.localize(datetime(year + 1, 1, 1))
-                        
-                        # FIXED: Filter by assignment's finished_at to attribute score to completion month
-                        assignments_query = assignments_query.filter(
-                            RNDJobProgressAssignment.finished_at >= start_date,
-                            RNDJobProgressAssignment.finished_at < end_date
-                        )
-                    
-                    assignments = assignments_query.all()
-                    
-                    # DEBUG: Log assignments found
-                    print(f"\n{'='*80}")
-                    print(f"DEBUG Scores KPI: Stage '{stage_name}' for user '{user.name}' (ID: {user.id})")
-                    print(f"{'='*80}")
-                    print(f"  Filter: Year={year}, Month={month}")
-                    if year:
-                        print(f"  Date Range: {start_date} to {end_date}")
-                    print(f"  Total assignments found: {len(assignments)}")
-                    print(f"  Stage Name (display): {stage_name}")
-                    print(f"  Sample Type (filter): {sample_type}")
-                    
-                    # List all steps that will be included
-                    steps_included = db.session.query(RNDProgressStep.name, RNDProgressStep.step_order).filter(
-                        RNDProgressStep.sample_type == sample_type
-                    ).order_by(RNDProgressStep.step_order).all()
-                    print(f"  Steps included in '{sample_type}':")
-                    for step_name, step_order in steps_included:
-                        print(f"    - #{step_order}: {step_name}")
-                    print(f"{'='*80}")
-                    
-                    # Calculate average duration for this stage (direct duration from started_at to finished_at)
-                    total_days = 0.0
-                    completed_count = 0
-                    
-                    for idx, assignment in enumerate(assignments):
-                        # Only count completed assignments with both start and end times
-                        if assignment.status == 'completed' and assignment.started_at and assignment.finished_at:
-                            job = assignment.job
-                            
-                            # CORRECTED: Calculate duration directly from assignment's started_at to finished_at
-                            # This measures the actual time PIC spent on THIS step
-                            start_time = assignment.started_at
-                            end_time = assignment.finished_at
-                            
-                            # Calculate duration
-                            time_diff = end_time - start_time
-                            days = time_diff.total_seconds() / (24 * 3600)  # Convert to days
-                            hours = time_diff.total_seconds() / 3600  # For reference
-                            minutes = (time_diff.total_seconds() % 3600) / 60  # Minutes part
-                            
-                            # DEBUG: Log this assignment's calculation
-                            completed_count += 1
-                            print(f"  [Job {completed_count}]:")
-                            print(f"    Job ID: {job.job_id}")
-                            print(f"    Assignment ID: {assignment.id}")
-                            print(f"    Started: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
-                            print(f"    Finished: {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
-                            print(f"    Duration: {days:.4f} days ({int(hours)}h {int(minutes)}m)")
-                            print(f"    Status: {assignment.status}")
-                            
-                            total_days += days
-                        else:
-                            # Log skipped assignments
-                            if assignment.status != 'completed':
-                                print(f"  [SKIPPED] Assignment {assignment.id}: status={assignment.status} (not completed)")
-                            elif not assignment.started_at:
-                                print(f"  [SKIPPED] Assignment {assignment.id}: no started_at")
-                            elif not assignment.finished_at:
-                                print(f"  [SKIPPED] Assignment {assignment.id}: no finished_at")
-                    
-                    # Calculate AVERAGE duration (in days)
-                    print(f"{'-'*80}")
-                    print(f"  SUMMARY:")
-                    print(f"  Total completed with duration: {completed_count}")
-                    print(f"  Total days: {total_days:.4f} days")
-                    if completed_count > 0:
-                        average_days = total_days / completed_count
-                        print(f"  Average: {total_days:.4f} ÷ {completed_count} = {average_days:.4f} days/job")
-                        print(f"  Final Score: {round(average_days, 2)} days/job")
-                        user_scores['scores'][stage_name] = round(average_days, 2)
-                    else:
-                        print(f"  No completed assignments found!")
-                        print(f"  Final Score: 0.00 days/job")
-                        user_scores['scores'][stage_name] = 0.0
-                    print(f"{'='*80}\n")
-                    
-                except Exception as e:
-                    print(f"Error calculating score for {user.name} in stage {stage_name}: {e}")
-                    user_scores['scores'][stage_name] = 0.0
-            
-            users_scores.append(user_scores)
-        
-        # DEBUG: Print final results summary
-        print(f"\n{'#'*80}")
-        print(f"# FINAL RESULTS SUMMARY")
-        print(f"{'#'*80}")
-        for user_data in users_scores:
-            print(f"\nUser: {user_data['user_name']} (@{user_data['username']})")
-            print(f"  Scores:")
-            for stage, score in user_data['scores'].items():
-                if score > 0:
-                    print(f"    - {stage}: {score} days/job")
-        print(f"\n{'#'*80}\n")
-        
+
+        users_scores = RNDDashboardService.get_individual_scores(year, month)
+
+        if request.args.get('explain') == '1':
+            RNDDashboardService.log_individual_score_breakdown(year, month)
+
         return jsonify({
             'success': True,
             'data': users_scores
         })
     except Exception as e:
-        print(f"Error in get_dashboard_individual_scores: {str(e)}")
+        logger.error(f"Error in get_dashboard_individual_scores: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @rnd_cloudsphere_bp.route('/api/jobs')
 @login_required
 @require_rnd_access
 def get_rnd_jobs():
-    """Get R&D jobs with filtering and optional pagination"""
+    """
+    Get R&D jobs with filtering and keyset pagination
+
+    Query params:
+        limit (alias per_page): ukuran halaman, default 50, maksimal 200
+        cursor: next_cursor dari halaman sebelumnya
+        fields: daftar field dipisah koma (default semua field)
+        search, status, priority, sample_type, user_id (admin saja)
+    """
     try:
         user = current_user
-        page = request.args.get('page', type=int)
-        per_page = request.args.get('per_page', type=int)
-        search = request.args.get('search', '').strip()
-        status_filter = request.args.get('status', '').strip()
-        priority_filter = request.args.get('priority', '').strip()
-        sample_type_filter = request.args.get('sample_type', '').strip()
-        user_id_filter = request.args.get('user_id', type=int)
-        
-        # Base query with role-based filtering
-        # Admin users can see all jobs, PIC users can only see jobs assigned to them
-        if user.is_admin():
-            # Admin can see all jobs
-            query = RNDJob.query
-        else:
-            # PIC users can only see jobs where they are assigned as PIC
-            query = RNDJob.query.join(RNDJobProgressAssignment).filter(
-                RNDJobProgressAssignment.pic_id == user.id
-            ).distinct()
-        
-        # Additional user_id_filter for admin to filter by specific user
-        if user_id_filter and user.is_admin():
-            query = query.join(RNDJobProgressAssignment).filter(
-                RNDJobProgressAssignment.pic_id == user_id_filter
-            ).distinct()
-        
-        # Apply search filter
-        if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                or_(
-                    RNDJob.job_id.ilike(search_term),
-                    RNDJob.item_name.ilike(search_term),
-                    RNDJob.notes.ilike(search_term)
-                )
-            )
-        
-        # Apply filters directly on RNDJob table (not on RNDJobProgressAssignment)
-        # This ensures filters work for all users including operators
-        if status_filter:
-            query = query.filter(RNDJob.status == status_filter)
-        
-        if priority_filter:
-            query = query.filter(RNDJob.priority_level == priority_filter)
-        
-        if sample_type_filter:
-            query = query.filter(RNDJob.sample_type == sample_type_filter)
-        
-        # Order by created date descending
-        query = query.order_by(RNDJob.created_at.desc())
-        
-        # Check if pagination is requested
-        if page is not None and per_page is not None:
-            # Use pagination
-            pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-            jobs = pagination.items
-            has_pagination = True
-        else:
-            # Return all jobs without pagination
-            jobs = query.all()
-            has_pagination = False
-        
-        jobs_data = []
-        for job in jobs:
-            # Get current progress step info
-            current_progress = job.current_progress_step
-           
-            # Get all PIC assignments for this job
-            pic_assignments = []
-            try:
-                for assignment in job.progress_assignments:
-                    if assignment.pic:
-                        pic_assignments.append({
-                            'step_name': assignment.progress_step.name if assignment.progress_step else 'Unknown',
-                            'pic_name': assignment.pic.name,
-                            'status': assignment.status
-                        })
-            except Exception as e:
-                print(f"Error processing PIC assignments for job {job.id}: {e}")
-                # Ensure we always have pic_assignments even if there's an error
-                pic_assignments = []
-           
-            # Get current PIC name
-            current_pic_name = None
-            if current_progress:
-                try:
-                    current_assignment = RNDJobProgressAssignment.query.filter_by(
-                        job_id=job.id,
-                        progress_step_id=current_progress.get('id')
-                    ).first()
-                    if current_assignment and current_assignment.pic:
-                        current_pic_name = current_assignment.pic.name
-                except Exception as e:
-                    print(f"Error getting current PIC for job {job.id}: {e}")
-           
-            # Check if job is overdue
-            is_overdue = False
-            if job.deadline_at:
-                # Ensure both datetimes are timezone-aware for proper comparison
-                now = datetime.now(jakarta_tz)
-                if job.deadline_at.tzinfo is None:
-                    # If deadline is naive, assume it's in Jakarta timezone
-                    deadline = jakarta_tz.localize(job.deadline_at)
-                else:
-                    deadline = job.deadline_at
-                 
-                is_overdue = now > deadline and job.status != 'completed'
-           
-            # IMPORTANT: Sync job status before adding to response
-            # This triggers the auto-sync property and commits changes if needed
-            sync_job_status(job)
-            
-            jobs_data.append({
-                'id': job.id,
-                'job_id': job.job_id,
-                'item_name': job.item_name,
-                'sample_type': job.sample_type,
-                'priority_level': job.priority_level,
-                'deadline_at': job.deadline_at.strftime('%Y-%m-%d %H:%M') if job.deadline_at else None,
-                'status': job.status,
-                'completion_percentage': job.completion_percentage or 0,
-                'current_progress_step': current_progress,
-                'current_pic_name': current_pic_name,
-                'pic_assignments': pic_assignments,  # All PIC assignments
-                'is_overdue': is_overdue,
-                'is_full_process': job.is_full_process,
-                'started_at': job.started_at.strftime('%Y-%m-%d %H:%M') if job.started_at else None,
-                'finished_at': job.finished_at.strftime('%Y-%m-%d %H:%M') if job.finished_at else None,
-                'created_at': job.created_at.strftime('%Y-%m-%d %H:%M') if job.created_at else None
-            })
-        
-        response_data = {
+        fields = RNDJobListService.parse_fields(request.args.get('fields', '').strip())
+        limit = RNDJobListService.parse_limit(request.args.get('limit', request.args.get('per_page')))
+        cursor = RNDJobListService.parse_cursor(request.args.get('cursor'))
+
+        # Admin melihat semua job (bisa difilter user_id), PIC hanya job yang ia pegang
+        query = RNDJobListService.build_query(
+            user,
+            search=request.args.get('search', '').strip(),
+            status=request.args.get('status', '').strip(),
+            priority=request.args.get('priority', '').strip(),
+            sample_type=request.args.get('sample_type', '').strip(),
+            pic_id=request.args.get('user_id', type=int)
+        )
+        page = RNDJobListService.list_jobs(query, fields, limit=limit, cursor=cursor)
+
+        return jsonify({
             'success': True,
-            'data': jobs_data
-        }
-        
-        # Add pagination data only if pagination is used
-        if has_pagination:
-            response_data['pagination'] = {
-                'page': page,
-                'per_page': per_page,
-                'total': pagination.total,
-                'pages': pagination.pages,
-                'has_prev': pagination.has_prev,
-                'has_next': pagination.has_next,
-                'prev_num': pagination.prev_num,
-                'next_num': pagination.next_num
+            'data': page['data'],
+            'pagination': {
+                'limit': limit,
+                'next_cursor': page['next_cursor'],
+                'has_next': page['has_next']
             }
-        
-        return jsonify(response_data)
+        })
+    except InvalidListParamError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -1154,20 +730,20 @@ def create_rnd_job():
                 )
                 db.session.add(task_assignment)
         
-        db.session.commit()
+        RNDJobProgressService.refresh(job, sync_status=False)
+        
+        # Queue notification for new job (dikirim worker setelah commit)
+        NotificationOutboxService.enqueue(
+            'dispatch_rnd_job_created',
+            job_db_id=job.id,
+            job_id=job.job_id,
+            item_name=job.item_name,
+            sample_type=job.sample_type,
+            priority_level=job.priority_level,
+            triggered_by_user_id=current_user.id
+        )
         
-        # Send notification for new job
-        try:
-            NotificationDispatcher.dispatch_rnd_job_created(
-                job_db_id=job.id,
-                job_id=job.job_id,
-                item_name=job.item_name,
-                sample_type=job.sample_type,
-                priority_level=job.priority_level,
-                triggered_by_user_id=current_user.id
-            )
-        except Exception as e:
-            logger.error(f"Failed to send RND job created notification: {str(e)}", exc_info=True)
+        db.session.commit()
         
         return jsonify({
             'success': True,
@@ -1253,7 +829,8 @@ def get_rnd_job(job_id):
                 'verified_by': file.verifier.name if file.verifier else None,
                 'verified_at': file.verified_at.strftime('%Y-%m-%d %H:%M') if file.verified_at else None,
                 'job_progress_assignment_id': file.job_progress_assignment_id,
-                'job_task_assignment_id': file.job_task_assignment_id
+                'job_task_assignment_id': file.job_task_assignment_id,
+                'thumbnail_url': evidence_thumbnail_url(file)
             })
         
         job_data = {
@@ -1268,17 +845,15 @@ def get_rnd_job(job_id):
             'status': job.status,
             'notes': job.notes,
             'is_full_process': job.is_full_process,
-            'completion_percentage': job.completion_percentage,
+            'total_tasks': job.total_tasks or 0,
+            'completed_tasks': job.completed_tasks or 0,
+            'completion_percentage': job.completion_percentage or 0,
             'current_progress_step': job.current_progress_step,
             'progress_assignments': progress_assignments,
             'evidence_files': evidence_files,
             'flow_configuration_id': job.flow_configuration_id  # Add flow configuration ID
         }
         
-        # IMPORTANT: Sync job status before sending to frontend
-        # This ensures completion_percentage always matches status
-        sync_job_status(job)
-        
         # DEBUG: Log job data before sending to frontend
         print(f"DEBUG: Job data for job {job_id}:")
         print(f"  - Job status: {job.status}")
@@ -1417,6 +992,9 @@ def update_rnd_job(job_id):
                         for task_assignment in assignment.task_assignments:
                             db.session.delete(task_assignment)
                         db.session.delete(assignment)
+            
+            # Task/assignment berubah -> hitung ulang progress tersimpan
+            RNDJobProgressService.refresh(job)
         
         db.session.commit()
         
@@ -1741,100 +1319,43 @@ def get_next_progress_assignment(progress_assignment):
     """Get the next progress assignment based on flow configuration or fallback to static workflow"""
     job_obj = progress_assignment.job
     
-    # Try to use dynamic flow configuration first
+    # Try to use dynamic flow configuration first (graph di-cache per flow_configuration_id)
     if job_obj.flow_configuration_id:
-        flow_config = RNDFlowConfiguration.query.get(job_obj.flow_configuration_id)
-        if flow_config:
-            # Get flow steps in order
-            flow_steps = RNDFlowStep.query.filter_by(flow_configuration_id=flow_config.id)\
-                .join(RNDProgressStep)\
-                .order_by(RNDFlowStep.step_order)\
-                .all()
-            
-            # Find current step in the flow
-            current_flow_step = None
-            for i, flow_step in enumerate(flow_steps):
-                if flow_step.progress_step_id == progress_assignment.progress_step_id:
-                    current_flow_step = flow_step
-                    current_index = i
-                    break
-            
-            if current_flow_step and current_index + 1 < len(flow_steps):
-                # Find next step in flow
-                next_flow_step = flow_steps[current_index + 1]
-                next_progress_step_id = next_flow_step.progress_step_id
-                
-                # Find assignment with this progress step
-                next_assignment = RNDJobProgressAssignment.query.filter(
-                    RNDJobProgressAssignment.job_id == job_obj.id,
-                    RNDJobProgressAssignment.progress_step_id == next_progress_step_id,
-                    RNDJobProgressAssignment.status == 'pending'
-                ).first()
-                
-                if next_assignment:
-                    print(f"DEBUG: Found next assignment via flow config: {next_assignment.progress_step.name}")
-                    print(f"DEBUG: Current step: {progress_assignment.progress_step.name}")
-                    print(f"DEBUG: Next step: {next_assignment.progress_step.name}")
-                    print(f"DEBUG: Total steps in flow: {len(flow_steps)}")
-                    return next_assignment
-    
-    # Fallback to static workflow if no flow configuration or not found
-    print(f"DEBUG: Using fallback static workflow for {job_obj.sample_type}")
-    
-    # Define the correct order for each sample type workflow
-    workflow_orders = {
-        'RoHS Ribbon': [
-            'Design & Artwork Approval',
-            'Mastercard Release',
-            'Polymer Order',
-            'Polymer Receiving',
-            'Proof Approval',
-            'Sample Production',
-            'Quality Validation'
-        ],
-        'RoHS ICB': [
-            'Design & Artwork Approval',
-            'Mastercard Release',
-            'Proof Approval',
-            'Sample Production',
-            'Quality Validation'
-        ],
-        'Blank': [
-            'Design & Artwork Approval',
-            'Mastercard Release',
-            'Initial Plotter',
-            'Sample Production',
-            'Quality Validation'
-        ]
-    }
-    
-    # Get the order for this sample type
-    step_order = workflow_orders.get(job_obj.sample_type, [])
-    
-    # Find current step index
-    current_step_name = progress_assignment.progress_step.name
-    if current_step_name in step_order:
-        current_index = step_order.index(current_step_name)
-        
-        # Find next step name
-        if current_index + 1 < len(step_order):
-            next_step_name = step_order[current_index + 1]
-            
-            # Find assignment with this step name
-            next_assignment = RNDJobProgressAssignment.query.join(RNDProgressStep).filter(
+        graph = RNDFlowGraphCache.get(job_obj.flow_configuration_id)
+        next_progress_step_id = graph.next_step(progress_assignment.progress_step_id)
+        if next_progress_step_id:
+            # Find assignment with this progress step
+            next_assignment = RNDJobProgressAssignment.query.filter(
                 RNDJobProgressAssignment.job_id == job_obj.id,
-                RNDProgressStep.name == next_step_name,
+                RNDJobProgressAssignment.progress_step_id == next_progress_step_id,
                 RNDJobProgressAssignment.status == 'pending'
             ).first()
             
             if next_assignment:
-                print(f"DEBUG: Found next assignment via static workflow: {next_assignment.progress_step.name}")
-                print(f"DEBUG: Current step: {progress_assignment.progress_step.name}")
-                print(f"DEBUG: Next step: {next_assignment.progress_step.name}")
-                print(f"DEBUG: Total steps in workflow: {len(step_order)}")
+                logger.debug(
+                    f"Next assignment via flow config: {next_assignment.progress_step.name} ({len(graph)} steps)"
+                )
                 return next_assignment
     
-    print("DEBUG: No next assignment found")
+    # Fallback to static workflow if no flow configuration or not found
+    logger.debug(f"Using fallback static workflow for {job_obj.sample_type}")
+    graph = RNDFlowGraphCache.static_graph(job_obj.sample_type)
+    next_step_name = graph.next_step(progress_assignment.progress_step.name) if graph else None
+    if next_step_name:
+        # Find assignment with this step name
+        next_assignment = RNDJobProgressAssignment.query.join(RNDProgressStep).filter(
+            RNDJobProgressAssignment.job_id == job_obj.id,
+            RNDProgressStep.name == next_step_name,
+            RNDJobProgressAssignment.status == 'pending'
+        ).first()
+        
+        if next_assignment:
+            logger.debug(
+                f"Next assignment via static workflow: {next_assignment.progress_step.name} ({len(graph)} steps)"
+            )
+            return next_assignment
+    
+    logger.debug(f"No next assignment found for job {job_obj.id}")
     return None
 
 def is_final_progress_step(progress_assignment):
@@ -1843,66 +1364,16 @@ def is_final_progress_step(progress_assignment):
     
     # Try to use dynamic flow configuration first
     if job_obj.flow_configuration_id:
-        flow_config = RNDFlowConfiguration.query.get(job_obj.flow_configuration_id)
-        if flow_config:
-            # Get flow steps in order
-            flow_steps = RNDFlowStep.query.filter_by(flow_configuration_id=flow_config.id)\
-                .order_by(RNDFlowStep.step_order)\
-                .all()
-            
-            if flow_steps:
-                # Check if current step is the last one
-                last_flow_step = flow_steps[-1]
-                if last_flow_step.progress_step_id == progress_assignment.progress_step_id:
-                    print(f"DEBUG: This is final step via flow config: {progress_assignment.progress_step.name}")
-                    print(f"DEBUG: Total steps in flow: {len(flow_steps)}")
-                    print(f"DEBUG: Last step name: {last_flow_step.progress_step.name}")
-                    return True
+        graph = RNDFlowGraphCache.get(job_obj.flow_configuration_id)
+        if graph.is_final(progress_assignment.progress_step_id):
+            logger.debug(f"Final step via flow config: {progress_assignment.progress_step.name}")
+            return True
     
     # Fallback to static workflow
-    print(f"DEBUG: Using fallback static workflow for final step check: {job_obj.sample_type}")
-    
-    # Define the correct order for each sample type workflow
-    workflow_orders = {
-        'RoHS Ribbon': [
-            'Design & Artwork Approval',
-            'Mastercard Release',
-            'Polymer Order',
-            'Polymer Receiving',
-            'Proof Approval',
-            'Sample Production',
-            'Quality Validation'
-        ],
-        'RoHS ICB': [
-            'Design & Artwork Approval',
-            'Mastercard Release',
-            'Proof Approval',
-            'Sample Production',
-            'Quality Validation'
-        ],
-        'Blank': [
-            'Design & Artwork Approval',
-            'Mastercard Release',
-            'Initial Plotter',
-            'Sample Production',
-            'Quality Validation'
-        ]
-    }
-    
-    # Get the order for this sample type
-    step_order = workflow_orders.get(job_obj.sample_type, [])
-    
-    # Find current step index
-    current_step_name = progress_assignment.progress_step.name
-    if current_step_name in step_order:
-        current_index = step_order.index(current_step_name)
-        
-        # Check if this is the last step
-        if current_index == len(step_order) - 1:
-            print(f"DEBUG: This is final step via static workflow: {progress_assignment.progress_step.name}")
-            print(f"DEBUG: Total steps in workflow: {len(step_order)}")
-            print(f"DEBUG: Step index: {current_index}")
-            return True
+    graph = RNDFlowGraphCache.static_graph(job_obj.sample_type)
+    if graph and graph.is_final(progress_assignment.progress_step.name):
+        logger.debug(f"Final step via static workflow: {progress_assignment.progress_step.name}")
+        return True
     
     return False
 
@@ -2021,24 +1492,12 @@ def complete_rnd_task(task_assignment_id):
                 else:
                     print("DEBUG (complete): No next assignment found")
         
-        db.session.commit()
-        
-        # DEBUG: Verify job status after commit
-        # Get the job object to refresh
+        # Progress tersimpan di rnd_jobs ikut transaksi yang sama (100% -> completed)
         job_obj = progress_assignment.job
-        db.session.refresh(job_obj)
-        print(f"DEBUG (complete): Job status after commit: {job_obj.status}")
-        print(f"DEBUG (complete): Job finished_at after commit: {job_obj.finished_at}")
-        
-        # AUTO-SYNC CHECK: Ensure completion % matches status
-        # This triggers the property which will auto-update status if needed
-        if job_obj.completion_percentage == 100 and job_obj.status != 'completed':
-            print(f"DEBUG (complete): Auto-syncing job status from completion_percentage property")
-            job_obj.status = 'completed'
-            if not job_obj.finished_at:
-                job_obj.finished_at = datetime.now(jakarta_tz)
-            db.session.commit()
-            print(f"DEBUG (complete): Job status after auto-sync: {job_obj.status}")
+        RNDJobProgressService.refresh(job_obj)
+        
+        db.session.commit()
+        logger.debug(f"Job {job_obj.job_id} status after task complete: {job_obj.status} ({job_obj.completion_percentage}%)")
         
         return jsonify({
             'success': True,
@@ -2236,18 +1695,12 @@ def toggle_rnd_task(task_assignment_id):
                 print(f"DEBUG: Error auto-completing external delay: {str(e)}")
             
             try:
-                print(f"DEBUG (toggle notification): Preparing to send step completion notification from toggle route")
-                print(f"DEBUG (toggle notification): Job ID: {progress_assignment.job.id}")
-                print(f"DEBUG (toggle notification): Job job_id: {progress_assignment.job.job_id}")
-                print(f"DEBUG (toggle notification): Step name: {progress_assignment.progress_step.name}")
-                print(f"DEBUG (toggle notification): PIC: {progress_assignment.pic}")
-                if progress_assignment.pic:
-                    print(f"DEBUG (toggle notification): PIC name: {progress_assignment.pic.name}")
-                else:
-                    print(f"DEBUG (toggle notification): PIC is None!")
-                
-                print(f"DEBUG (toggle notification): Calling dispatch_rnd_step_completed...")
-                result = NotificationDispatcher.dispatch_rnd_step_completed(
+                logger.debug(
+                    f"Queueing dispatch_rnd_step_completed for job {progress_assignment.job.job_id} "
+                    f"step '{progress_assignment.progress_step.name}' (PIC: {progress_assignment.pic})"
+                )
+                NotificationOutboxService.enqueue(
+                    'dispatch_rnd_step_completed',
                     job_db_id=progress_assignment.job.id,
                     job_id=progress_assignment.job.job_id,
                     item_name=progress_assignment.job.item_name,
@@ -2255,30 +1708,15 @@ def toggle_rnd_task(task_assignment_id):
                     pic_name=progress_assignment.pic.name if progress_assignment.pic else 'Unknown',
                     triggered_by_user_id=current_user.id
                 )
-                print(f"DEBUG (toggle notification): Notification sent successfully! Result: {result}")
             except Exception as e:
-                print(f"DEBUG (toggle notification): ERROR in dispatch_rnd_step_completed: {str(e)}")
-                logger.error(f"Failed to send RND step completed notification: {str(e)}", exc_info=True)
-        
-        db.session.commit()
+                logger.error(f"Failed to queue RND step completed notification: {str(e)}", exc_info=True)
         
-        # RESET JOB STATUS IF NEEDED
-        # If completion_percentage < 100 and job.status = completed, reset to in_progress
+        # Progress tersimpan di rnd_jobs ikut transaksi yang sama; dihitung lewat SQL
+        # supaya UPDATE raw di atas ikut terbaca (100% -> completed, < 100% -> in_progress)
         job_obj = progress_assignment.job
-        db.session.refresh(job_obj)
-        
-        completion_pct = job_obj.completion_percentage
-        if completion_pct < 100 and job_obj.status == 'completed':
-            print(f"DEBUG: Completion is now {completion_pct}%, resetting job status to in_progress")
-            job_obj.status = 'in_progress'
-            job_obj.finished_at = None  # Clear finished_at since job is no longer complete
-            db.session.commit()
-            print(f"DEBUG: Job status reset to: {job_obj.status}")
+        RNDJobProgressService.refresh(job_obj)
         
-        # DEBUG: Verify job status after commit
-        # Get the job object to refresh
-        job_obj = progress_assignment.job
-        db.session.refresh(job_obj)
+        db.session.commit()
         print(f"DEBUG: Job status after commit: {job_obj.status}")
         print(f"DEBUG: Job finished_at after commit: {job_obj.finished_at}")
         print(f"DEBUG: Job completion_percentage: {job_obj.completion_percentage}%")
@@ -2302,96 +1740,234 @@ def toggle_rnd_task(task_assignment_id):
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# Allowed extensions evidence
+EVIDENCE_PHOTO_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif'}
+EVIDENCE_DOCUMENT_EXTENSIONS = {'pdf', 'docx', 'xlsx', 'doc', 'xls'}
+
+def evidence_file_type(filename):
+    """'photo', 'pdf', 'document', atau None kalau ekstensi tidak diizinkan"""
+    file_extension = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+    if file_extension in EVIDENCE_PHOTO_EXTENSIONS:
+        return 'photo'
+    if file_extension == 'pdf':
+        return 'pdf'
+    if file_extension in EVIDENCE_DOCUMENT_EXTENSIONS:
+        return 'document'
+    return None
+
+def create_evidence_record(blob, filename, file_type, fields):
+    """
+    Buat row RNDEvidenceFile yang mereferensikan blob tersimpan (belum commit)
+
+    Args:
+        blob: StoredBlob dari evidence_storage
+        filename: nama file asli (secure_filename)
+        file_type: hasil evidence_file_type
+        fields: dict/form - job_id, progress_assignment_id, task_assignment_id, evidence_type
+    """
+    timestamp = datetime.now(jakarta_tz).strftime('%Y%m%d_%H%M%S')
+    evidence = RNDEvidenceFile(
+        job_id=fields.get('job_id'),
+        job_progress_assignment_id=fields.get('progress_assignment_id') or None,
+        job_task_assignment_id=fields.get('task_assignment_id') or None,
+        filename=f"rnd_evidence_{timestamp}_{filename}",
+        original_filename=filename,
+        file_path=blob.path,
+        file_type=file_type,
+        file_size=blob.size,
+        content_sha256=blob.sha256,
+        evidence_type=fields.get('evidence_type') or 'step_completion',  # step_completion or task_completion
+        uploaded_by=current_user.id
+    )
+    db.session.add(evidence)
+    return evidence
+
+def queue_evidence_thumbnails(evidences):
+    """Thumbnail dibuat di process pool, request tidak menunggu"""
+    for evidence in evidences:
+        try:
+            evidence_thumbnails.submit(evidence)
+        except Exception as e:
+            logger.error(f"Failed to queue thumbnail for evidence {evidence.id}: {str(e)}")
+
+def evidence_upload_payload(evidence, deduplicated=False):
+    return {
+        'id': evidence.id,
+        'filename': evidence.filename,
+        'original_filename': evidence.original_filename,
+        'file_type': evidence.file_type,
+        'file_size': evidence.file_size,
+        'deduplicated': deduplicated,
+        'thumbnail_url': evidence_thumbnail_url(evidence)
+    }
+
 @rnd_cloudsphere_bp.route('/api/upload-evidence', methods=['POST'])
 @login_required
 @require_rnd_access
 def upload_rnd_evidence():
-    """Upload evidence file for task or progress step completion"""
+    """Upload one or more evidence files for task or progress step completion"""
+    stored = []
     try:
         # Handle both single file and multiple files
-        files = request.files.getlist('files') if 'files' in request.files else []
-        file = request.files.get('file') if 'file' in request.files else None
+        files = request.files.getlist('file') + request.files.getlist('files')
+        files = [f for f in files if f and f.filename]
         
-        # Use the first available file
-        file_to_upload = file if file else (files[0] if files else None)
-        
-        if not file_to_upload:
+        if not files:
             return jsonify({'success': False, 'error': 'No file provided'}), 400
         
-        job_id = request.form.get('job_id')
-        progress_assignment_id = request.form.get('progress_assignment_id')
-        task_assignment_id = request.form.get('task_assignment_id')
-        evidence_type = request.form.get('evidence_type', 'step_completion')  # step_completion or task_completion
-        
-        if not job_id:
+        if not request.form.get('job_id'):
             return jsonify({'success': False, 'error': 'Job ID required'}), 400
         
-        if file.filename == '':
-            return jsonify({'success': False, 'error': 'No file selected'}), 400
+        # Validasi semua file dulu supaya batch tidak tersimpan setengah
+        uploads = []
+        for file in files:
+            filename = secure_filename(file.filename)
+            file_type = evidence_file_type(filename)
+            if file_type is None:
+                return jsonify({'success': False, 'error': f'File type not allowed: {filename}'}), 400
+            uploads.append((file, filename, file_type))
+        
+        # Ditulis per chunk sambil hashing; isi yang sudah ada tidak disimpan dua kali
+        evidences = []
+        for file, filename, file_type in uploads:
+            blob = evidence_storage.store_stream(file.stream, filename)
+            stored.append(blob)
+            evidences.append((create_evidence_record(blob, filename, file_type, request.form), blob.deduplicated))
         
-        # Check file type
-        filename = secure_filename(file_to_upload.filename)
-        file_extension = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
-        
-        # Allowed extensions
-        photo_extensions = {'jpg', 'jpeg', 'png', 'gif'}
-        document_extensions = {'pdf', 'docx', 'xlsx', 'doc', 'xls'}
+        db.session.commit()
+        queue_evidence_thumbnails([evidence for evidence, _ in evidences])
         
-        if file_extension not in photo_extensions and file_extension not in document_extensions:
+        payloads = [evidence_upload_payload(evidence, deduplicated) for evidence, deduplicated in evidences]
+        return jsonify({
+            'success': True,
+            'message': f'{len(payloads)} evidence file(s) uploaded successfully',
+            'data': payloads[0],
+            'files': payloads
+        })
+    except EvidenceUploadError as e:
+        db.session.rollback()
+        discard_unreferenced_blobs(stored)
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        discard_unreferenced_blobs(stored)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def discard_unreferenced_blobs(blobs):
+    """Hapus blob baru dari upload yang gagal (blob hasil dedupe tetap dipakai row lain)"""
+    for blob in blobs:
+        if blob.deduplicated or evidence_storage.is_shared(blob.path):
+            continue
+        try:
+            os.remove(blob.path)
+        except OSError as e:
+            logger.warning(f"Failed to remove orphan evidence blob {blob.path}: {e}")
+
+@rnd_cloudsphere_bp.route('/api/evidence-uploads', methods=['POST'])
+@login_required
+@require_rnd_access
+def create_evidence_upload():
+    """Mulai upload evidence resumable; chunk dikirim ke PUT /api/evidence-uploads/<upload_id>"""
+    try:
+        data = request.get_json() or {}
+        filename = secure_filename(data.get('filename') or '')
+        if not filename:
+            return jsonify({'success': False, 'error': 'No file selected'}), 400
+        if not data.get('job_id'):
+            return jsonify({'success': False, 'error': 'Job ID required'}), 400
+        if evidence_file_type(filename) is None:
             return jsonify({'success': False, 'error': 'File type not allowed'}), 400
         
-        # Determine file type
-        if file_extension in photo_extensions:
-            file_type = 'photo'
-        elif file_extension == 'pdf':
-            file_type = 'pdf'
-        else:
-            file_type = 'document'
-        
-        # Create upload directory if it doesn't exist
-        upload_dir = os.path.join(current_app.config['UPLOADS_PATH'], 'rnd_evidence')
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # Generate unique filename
-        timestamp = datetime.now(jakarta_tz).strftime('%Y%m%d_%H%M%S')
-        unique_filename = f"rnd_evidence_{timestamp}_{filename}"
-        
-        # Save file
-        file_path = os.path.join(upload_dir, unique_filename)
-        file_to_upload.save(file_path)
-        
-        # Save to database
-        evidence = RNDEvidenceFile(
-            job_id=job_id,
-            job_progress_assignment_id=progress_assignment_id if progress_assignment_id else None,
-            job_task_assignment_id=task_assignment_id if task_assignment_id else None,
-            filename=unique_filename,
-            original_filename=filename,
-            file_path=file_path,
-            file_type=file_type,
-            file_size=os.path.getsize(file_path),
-            evidence_type=evidence_type,
-            uploaded_by=current_user.id
-        )
-        
-        db.session.add(evidence)
+        try:
+            total_size = int(data.get('size'))
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': 'File size required'}), 400
+        
+        metadata = {key: data.get(key) for key in (
+            'job_id', 'progress_assignment_id', 'task_assignment_id', 'evidence_type'
+        )}
+        session = evidence_storage.create_session(filename, total_size, current_user.id, metadata)
+        return jsonify({'success': True, 'data': evidence_upload_session_payload(session)}), 201
+    except EvidenceUploadError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def evidence_upload_session_payload(session):
+    return {
+        'upload_id': session['upload_id'],
+        'filename': session['filename'],
+        'size': session['size'],
+        'offset': session['offset'],
+        'chunk_size': session['chunk_size']
+    }
+
+@rnd_cloudsphere_bp.route('/api/evidence-uploads/<upload_id>', methods=['GET'])
+@login_required
+@require_rnd_access
+def get_evidence_upload(upload_id):
+    """Offset yang sudah diterima server (lanjutkan upload dari sini setelah koneksi putus)"""
+    try:
+        session = evidence_storage.get_session(upload_id, current_user.id)
+        return jsonify({'success': True, 'data': evidence_upload_session_payload(session)})
+    except EvidenceUploadError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+
+@rnd_cloudsphere_bp.route('/api/evidence-uploads/<upload_id>', methods=['PUT'])
+@login_required
+@require_rnd_access
+def upload_evidence_chunk(upload_id):
+    """Terima satu chunk (body mentah) mulai di ?offset=N"""
+    try:
+        offset = request.args.get('offset', type=int)
+        new_offset = evidence_storage.write_chunk(upload_id, current_user.id, offset, request.stream)
+        return jsonify({'success': True, 'data': {'upload_id': upload_id, 'offset': new_offset}})
+    except UploadOffsetMismatch as e:
+        return jsonify({'success': False, 'error': str(e), 'offset': e.offset}), 409
+    except EvidenceUploadError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@rnd_cloudsphere_bp.route('/api/evidence-uploads/<upload_id>/complete', methods=['POST'])
+@login_required
+@require_rnd_access
+def complete_evidence_upload(upload_id):
+    """Selesaikan upload resumable: hash, dedupe, simpan row evidence"""
+    blob = None
+    try:
+        blob, session = evidence_storage.complete_session(upload_id, current_user.id)
+        filename = session['filename']
+        evidence = create_evidence_record(blob, filename, evidence_file_type(filename), session['metadata'])
         db.session.commit()
+        queue_evidence_thumbnails([evidence])
         
         return jsonify({
             'success': True,
             'message': 'Evidence uploaded successfully',
-            'data': {
-                'id': evidence.id,
-                'filename': unique_filename,
-                'original_filename': filename,
-                'file_type': file_type,
-                'file_size': evidence.file_size
-            }
+            'data': evidence_upload_payload(evidence, blob.deduplicated)
         })
+    except UploadOffsetMismatch as e:
+        return jsonify({'success': False, 'error': str(e), 'offset': e.offset}), 409
+    except EvidenceUploadError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
+        if blob is not None:
+            discard_unreferenced_blobs([blob])
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@rnd_cloudsphere_bp.route('/api/evidence-uploads/<upload_id>', methods=['DELETE'])
+@login_required
+@require_rnd_access
+def abort_evidence_upload(upload_id):
+    """Batalkan upload resumable dan hapus chunk yang sudah diterima"""
+    try:
+        evidence_storage.abort_session(upload_id, current_user.id)
+        return jsonify({'success': True, 'message': 'Upload cancelled'})
+    except EvidenceUploadError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+
 @rnd_cloudsphere_bp.route('/api/verify-evidence/<int:evidence_id>', methods=['POST'])
 @login_required
 @require_rnd_access
@@ -2434,119 +2010,109 @@ def download_rnd_evidence(evidence_id):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def _thumbnail_format():
+    """format= eksplisit, atau WebP kalau browser menerimanya (Accept), selain itu JPEG"""
+    fmt = request.args.get('format', '').lower()
+    if fmt:
+        return fmt
+    return 'webp' if 'image/webp' in request.headers.get('Accept', '') else 'jpeg'
+
+def evidence_thumbnail_url(evidence, size=DEFAULT_THUMBNAIL_SIZE, fmt=None):
+    """URL thumbnail versi content-addressed (?v=key) - boleh di-cache browser selamanya"""
+    if source_kind(evidence.file_type, evidence.original_filename) is None:
+        return None
+    params = {'size': size, 'v': thumbnail_key(evidence)[:16]}
+    if fmt:
+        params['format'] = fmt
+    return url_for('rnd_cloudsphere.get_evidence_thumbnail', evidence_id=evidence.id, **params)
+
 @rnd_cloudsphere_bp.route('/api/evidence-thumbnail/<int:evidence_id>')
 @login_required
 @require_rnd_access
 def get_evidence_thumbnail(evidence_id):
-    """Get evidence file thumbnail"""
+    """
+    Get evidence file thumbnail dari cache lokal
+
+    Query params:
+        size: sm (200px, default) / md (480px) / lg (1024px)
+        format: webp / jpeg (default mengikuti header Accept)
+        v: versi key dari evidence_thumbnail_url; kalau cocok response immutable
+    """
     try:
         evidence = RNDEvidenceFile.query.get_or_404(evidence_id)
-        
-        # Check if thumbnail already exists
-        thumbnail_path = evidence.file_path.replace('.', '_thumb.')
-        if not thumbnail_path.endswith('_thumb.jpg'):
-            # Handle files with multiple extensions
-            base_path = evidence.file_path.rsplit('.', 1)[0]
-            thumbnail_path = f"{base_path}_thumb.jpg"
-        
-        if os.path.exists(thumbnail_path):
-            return send_file(thumbnail_path, mimetype='image/jpeg')
-        
-        # Generate thumbnail if it doesn't exist
-        try:
-            from PIL import Image
-            import io
-            
-            # Handle PDF files
-            if evidence.file_type.lower() == 'pdf' or evidence.original_filename.lower().endswith('.pdf'):
-                return generate_pdf_thumbnail(evidence.file_path, thumbnail_path)
-            
-            # Only generate thumbnails for image files
-            elif evidence.file_type.lower() in ['jpg', 'jpeg', 'png', 'bmp', 'gif', 'webp', 'photo']:
-                # Open image and create thumbnail
-                with Image.open(evidence.file_path) as img:
-                    # Convert to RGB if necessary
-                    if img.mode in ('RGBA', 'P'):
-                        img = img.convert('RGB')
-                    
-                    # Create thumbnail
-                    img.thumbnail((200, 200), Image.Resampling.LANCZOS)
-                    
-                    # Save thumbnail
-                    img.save(thumbnail_path, 'JPEG', quality=85)
-                
-                return send_file(thumbnail_path, mimetype='image/jpeg')
-            else:
-                # Return default icon for non-image, non-PDF files
-                return send_file('static/img/image-placeholder.png', mimetype='image/png')
-            
-        except Exception as e:
-            print(f"Error generating thumbnail for {evidence.file_path}: {e}")
-            # Return default image if thumbnail generation fails
-            return send_file('static/img/image-placeholder.png', mimetype='image/png')
+        size = request.args.get('size', DEFAULT_THUMBNAIL_SIZE)
+        fmt = _thumbnail_format()
+        if size not in THUMBNAIL_SIZES or fmt not in THUMBNAIL_FORMATS:
+            return jsonify({'success': False, 'error': 'Invalid thumbnail size or format'}), 400
+        
+        path = None
+        if source_kind(evidence.file_type, evidence.original_filename):
+            # Normalnya sudah dibuat saat upload; evidence lama dijadwalkan di background tanpa
+            # menahan thread request - client mengambil ulang setelah 'ready' di endpoint batch
+            path = evidence_thumbnails.get_path(evidence, size, fmt)
+        
+        if not path:
+            # Non-image/PDF, gagal, atau belum selesai: placeholder yang tidak boleh di-cache
+            response = send_file('static/img/image-placeholder.png', mimetype='image/png')
+            response.headers['Cache-Control'] = 'no-store'
+            return response
+        
+        key_version = thumbnail_key(evidence)[:16]
+        response = send_file(path, mimetype=THUMBNAIL_FORMATS[fmt][2], conditional=True)
+        if request.args.get('v') == key_version:
+            response.cache_control.max_age = THUMBNAIL_IMMUTABLE_MAX_AGE
+            response.cache_control.public = False
+            response.cache_control.private = True
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.max_age = 86400
+            response.cache_control.private = True
+        response.vary.add('Accept')
+        return response
             
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-def generate_pdf_thumbnail(pdf_path, thumbnail_path):
-    """Generate thumbnail for PDF file using first page"""
+@rnd_cloudsphere_bp.route('/api/evidence-thumbnails')
+@login_required
+@require_rnd_access
+def get_evidence_thumbnails_batch():
+    """
+    URL thumbnail untuk banyak evidence sekaligus (gallery), tanpa menunggu render
+
+    Query params:
+        ids: id evidence dipisah koma (maksimal 200)
+        size, format: lihat get_evidence_thumbnail
+
+    Returns:
+        data: [{'id', 'thumbnail_url', 'ready'}] - ready False = sedang dibuat di background
+    """
     try:
-        import fitz  # PyMuPDF
-        import os
-        
-        # Open PDF file
-        pdf_document = fitz.open(pdf_path)
-        
-        # Get first page
-        first_page = pdf_document[0]
-        
-        # Render page to image (pixmap)
-        # Use higher resolution for better quality
-        mat = fitz.Matrix(2.0, 2.0)  # 2x zoom for better quality
-        pix = first_page.get_pixmap(matrix=mat)
-        
-        # Convert to PIL Image
-        img_data = pix.tobytes("ppm")
-        img = Image.open(io.BytesIO(img_data))
-        
-        # Create thumbnail
-        img.thumbnail((200, 200), Image.Resampling.LANCZOS)
-        
-        # Save thumbnail
-        img.save(thumbnail_path, 'JPEG', quality=85)
-        
-        # Close PDF document
-        pdf_document.close()
-        
-        return send_file(thumbnail_path, mimetype='image/jpeg')
-    
-    except ImportError:
-        # If PyMuPDF is not available, try with pdf2image
         try:
-            from pdf2image import convert_from_path
-            
-            # Convert first page to image
-            images = convert_from_path(pdf_path, first_page=0, last_page=1, dpi=150)
-            if images:
-                img = images[0]
-                
-                # Create thumbnail
-                img.thumbnail((200, 200), Image.Resampling.LANCZOS)
-                
-                # Save thumbnail
-                img.save(thumbnail_path, 'JPEG', quality=85)
-                
-                return send_file(thumbnail_path, mimetype='image/jpeg')
-        
-        except ImportError:
-            print("Neither PyMuPDF nor pdf2image is available for PDF thumbnail generation")
-            # Return default PDF icon
-            return send_file('static/img/image-placeholder.png', mimetype='image/png')
-    
+            ids = [int(value) for value in request.args.get('ids', '').split(',') if value.strip()]
+        except ValueError:
+            return jsonify({'success': False, 'error': 'ids must be a comma separated list of integers'}), 400
+        if len(ids) > MAX_THUMBNAIL_BATCH:
+            return jsonify({'success': False, 'error': f'Maximum {MAX_THUMBNAIL_BATCH} ids per request'}), 400
+        size = request.args.get('size', DEFAULT_THUMBNAIL_SIZE)
+        fmt = _thumbnail_format()
+        if size not in THUMBNAIL_SIZES or fmt not in THUMBNAIL_FORMATS:
+            return jsonify({'success': False, 'error': 'Invalid thumbnail size or format'}), 400
+        
+        evidences = RNDEvidenceFile.query.filter(RNDEvidenceFile.id.in_(ids)).all() if ids else []
+        data = []
+        for evidence in evidences:
+            url = evidence_thumbnail_url(evidence, size, fmt)
+            ready = False
+            if url:
+                ready = evidence_thumbnails.is_ready(thumbnail_key(evidence), size, fmt)
+                if not ready:
+                    evidence_thumbnails.submit(evidence)
+            data.append({'id': evidence.id, 'thumbnail_url': url, 'ready': ready})
+        
+        return jsonify({'success': True, 'data': data})
     except Exception as e:
-        print(f"Error generating PDF thumbnail for {pdf_path}: {e}")
-        # Return default PDF icon
-        return send_file('static/img/image-placeholder.png', mimetype='image/png')
+        return jsonify({'success': False, 'error': str(e)}), 500
 
 @rnd_cloudsphere_bp.route('/api/evidence/<int:evidence_id>', methods=['DELETE'])
 @login_required
@@ -2560,16 +2126,12 @@ def delete_rnd_evidence(evidence_id):
         if not current_user.is_admin() and current_user.id != evidence.uploaded_by:
             return jsonify({'success': False, 'error': 'You do not have permission to delete this evidence'}), 403
         
-        # Delete physical file
-        try:
-            if os.path.exists(evidence.file_path):
-                os.remove(evidence.file_path)
-        except Exception as e:
-            print(f"Error deleting file {evidence.file_path}: {e}")
-        
-        # Delete database record
+        # Row dihapus dulu; file fisik baru dihapus setelah commit dan hanya kalau blob-nya
+        # tidak direferensikan evidence lain (dedupe)
+        file_path = evidence.file_path
         db.session.delete(evidence)
         db.session.commit()
+        evidence_storage.remove_blob_if_unreferenced(file_path)
         
         return jsonify({
             'success': True,
@@ -2639,6 +2201,31 @@ def reject_rnd_job(job_id):
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def _can_export_job_pdf(user, job_id):
+    """Admin, atau user yang di-assign ke job"""
+    if user.is_admin():
+        return True
+    return RNDJobProgressAssignment.query.filter(
+        and_(
+            RNDJobProgressAssignment.job_id == job_id,
+            RNDJobProgressAssignment.pic_id == user.id
+        )
+    ).first() is not None
+
+def _export_job_pdf(job, user):
+    """
+    Returns:
+        tuple - (BytesIO PDF, nama file download)
+    """
+    # Generate PDF using the export service
+    from services.rnd_pdf_export_service import RNDPDFExportService
+    pdf_service = RNDPDFExportService(db.session)
+    pdf_buffer = pdf_service.export_job_to_pdf(job.id, user.role, user.id)
+    
+    # Generate filename
+    filename = f"RND_Job_{job.job_id}_{datetime.now(jakarta_tz).strftime('%Y%m%d_%H%M%S')}.pdf"
+    return pdf_buffer, filename
+
 @rnd_cloudsphere_bp.route('/api/jobs/<int:job_id>/export/pdf')
 @login_required
 @require_rnd_access
@@ -2646,31 +2233,16 @@ def export_rnd_job_pdf(job_id):
     """Export R&D job details as PDF with role-based security"""
     try:
         # Check if user has access to this job
-        if not current_user.is_admin():
-            # Check if user is assigned to this job
-            user_assigned = RNDJobProgressAssignment.query.filter(
-                and_(
-                    RNDJobProgressAssignment.job_id == job_id,
-                    RNDJobProgressAssignment.pic_id == current_user.id
-                )
-            ).first()
-            
-            if not user_assigned:
-                return jsonify({
-                    'success': False,
-                    'error': 'Access denied. You are not assigned to this job.'
-                }), 403
-        
-        # Generate PDF using the export service
-        from services.rnd_pdf_export_service import RNDPDFExportService
-        pdf_service = RNDPDFExportService(db.session)
-        pdf_buffer = pdf_service.export_job_to_pdf(job_id, current_user.role, current_user.id)
+        if not _can_export_job_pdf(current_user, job_id):
+            return jsonify({
+                'success': False,
+                'error': 'Access denied. You are not assigned to this job.'
+            }), 403
         
         # Get job for filename
         job = RNDJob.query.get_or_404(job_id)
         
-        # Generate filename
-        filename = f"RND_Job_{job.job_id}_{datetime.now(jakarta_tz).strftime('%Y%m%d_%H%M%S')}.pdf"
+        pdf_buffer, filename = _export_job_pdf(job, current_user)
         
         # Return PDF as downloadable file
         return send_file(
@@ -3050,22 +2622,20 @@ def add_job_note(job_id):
         )
         
         db.session.add(note)
-        db.session.commit()
         
-        # Dispatch notification to job PICs + admins (excluding the note author)
-        try:
-            NotificationDispatcher.dispatch_team_note_new(
-                job_db_id=job.id,
-                job_id=job.job_id,
-                item_name=job.item_name,
-                note_author_id=current_user.id,
-                note_author_name=current_user.name,
-                note_content=note_content,
-                triggered_by_user_id=current_user.id
-            )
-        except Exception as e:
-            logger.error(f"Error dispatching team note notification: {str(e)}")
-            # Don't fail the note creation if notification dispatch fails
+        # Queue notification to job PICs + admins (excluding the note author)
+        NotificationOutboxService.enqueue(
+            'dispatch_team_note_new',
+            job_db_id=job.id,
+            job_id=job.job_id,
+            item_name=job.item_name,
+            note_author_id=current_user.id,
+            note_author_name=current_user.name,
+            note_content=note_content,
+            triggered_by_user_id=current_user.id
+        )
+        
+        db.session.commit()
         
         return jsonify({
             'success': True,
@@ -3277,6 +2847,7 @@ def create_flow_configuration():
                 db.session.add(flow_step)
         
         db.session.commit()
+        RNDFlowGraphCache.invalidate(config.id)
         
         return jsonify({
             'success': True,
@@ -3382,6 +2953,7 @@ def init_default_flow_configurations():
             created_configs.append(config.to_dict())
         
         db.session.commit()
+        RNDFlowGraphCache.invalidate()
         
         return jsonify({
             'success': True,
@@ -3446,6 +3018,7 @@ def update_flow_configuration(config_id):
                     db.session.add(flow_step)
         
         db.session.commit()
+        RNDFlowGraphCache.invalidate(config_id)
         
         return jsonify({
             'success': True,
@@ -3479,6 +3052,7 @@ def delete_flow_configuration(config_id):
         
         db.session.delete(config)
         db.session.commit()
+        RNDFlowGraphCache.invalidate(config_id)
         
         return jsonify({
             'success': True,
@@ -3510,6 +3084,7 @@ def set_default_flow_configuration(config_id):
         config.updated_at = datetime.now(jakarta_tz)
         
         db.session.commit()
+        RNDFlowGraphCache.invalidate(config_id)
         
         return jsonify({
             'success': True,
@@ -3529,33 +3104,21 @@ def get_job_final_step(job_id):
         
         # Try to use dynamic flow configuration first
         if job.flow_configuration_id:
-            flow_config = RNDFlowConfiguration.query.get(job.flow_configuration_id)
-            if flow_config:
-                # Get flow steps in order
-                flow_steps = RNDFlowStep.query.filter_by(flow_configuration_id=flow_config.id)\
-                    .join(RNDProgressStep)\
-                    .order_by(RNDFlowStep.step_order)\
-                    .all()
+            graph = RNDFlowGraphCache.get(job.flow_configuration_id)
+            if graph.final_step:
+                final_step = db.session.get(RNDProgressStep, graph.final_step)
+                logger.debug(
+                    f"Job {job_id} flow config {job.flow_configuration_id}: "
+                    f"{len(graph)} steps, final step {final_step.name}"
+                )
                 
-                if flow_steps:
-                    # Get the last step
-                    last_flow_step = flow_steps[-1]
-                    final_step = RNDProgressStep.query.get(last_flow_step.progress_step_id)
-                    
-                    # DEBUG: Log flow configuration details
-                    print(f"DEBUG (get_job_final_step): Job ID {job_id} using flow configuration:")
-                    print(f"  - Flow config ID: {flow_config.id}")
-                    print(f"  - Flow config name: {flow_config.name}")
-                    print(f"  - Total steps in flow: {len(flow_steps)}")
-                    print(f"  - Final step: {final_step.name}")
-                    
-                    return jsonify({
-                        'success': True,
-                        'data': {
-                            'final_step_name': final_step.name,
-                            'flow_configuration_used': True
-                        }
-                    })
+                return jsonify({
+                    'success': True,
+                    'data': {
+                        'final_step_name': final_step.name,
+                        'flow_configuration_used': True
+                    }
+                })
         
         # Fallback to static workflow
         sample_type = job.sample_type
@@ -3569,11 +3132,10 @@ def get_job_final_step(job_id):
         
         final_step_name = final_steps.get(sample_type, 'Quality Validation')
         
-        # DEBUG: Log fallback details
-        print(f"DEBUG (get_job_final_step): Job ID {job_id} using fallback static workflow:")
-        print(f"  - Sample type: {sample_type}")
-        print(f"  - Final step from static mapping: {final_step_name}")
-        print(f"  - Flow configuration ID: {job.flow_configuration_id}")
+        logger.debug(
+            f"Job {job_id} using fallback static workflow: sample type {sample_type}, "
+            f"final step {final_step_name}, flow configuration {job.flow_configuration_id}"
+        )
         
         return jsonify({
             'success': True,
@@ -3677,6 +3239,7 @@ def force_complete_job(job_id):
                     pa.finished_at = datetime.now(jakarta_tz)
                     print(f"DEBUG (force_complete): Force completing assignment: {pa.progress_step.name}")
             
+            RNDJobProgressService.refresh(job, sync_status=False)
             db.session.commit()
             
             # Refresh and verify
@@ -3761,10 +3324,12 @@ def complete_job_if_ready(job_id):
                 pa.status = 'completed'
                 pa.finished_at = datetime.now(jakarta_tz)
 
-        db.session.commit()
-        
-        # Send notification for job completion
+        RNDJobProgressService.refresh(job, sync_status=False)
+
+        # Queue notification for job completion
         send_rnd_job_completed_notification(job)
+        
+        db.session.commit()
 
         # Refresh and return
         db.session.refresh(job)
@@ -3782,32 +3347,80 @@ def complete_job_if_ready(job_id):
 
 
 def send_rnd_job_completed_notification(job):
-    """Helper function to send RND job completed notification - only once per job"""
+    """Helper function to queue RND job completed notification - only once per job
+    
+    Must be called before the caller commits, so the outbox row is part of the same transaction.
+    """
     try:
         if job.status == 'completed' and job.finished_at:
             # Check if we already sent a completion notification for this job to avoid duplicates
-            from services.notification_service import NotificationService
             existing_notification = UniversalNotification.query.filter_by(
                 notification_type='rnd_job_completed',
                 related_resource_id=job.id
             ).first()
             
-            # Only send if no previous notification exists
+            # Only queue if no previous notification exists (dedupe_key covers still-pending ones)
             if not existing_notification:
-                NotificationDispatcher.dispatch_rnd_job_completed(
+                NotificationOutboxService.enqueue(
+                    'dispatch_rnd_job_completed',
+                    dedupe_key=f'rnd_job_completed:{job.id}',
                     job_db_id=job.id,
                     job_id=job.job_id,
                     item_name=job.item_name,
                     sample_type=job.sample_type,
                     triggered_by_user_id=current_user.id
                 )
-                print(f"DEBUG: Sent job completion notification for job {job.id}")
+                logger.debug(f"Queued job completion notification for job {job.id}")
             else:
-                print(f"DEBUG: Job completion notification already sent for job {job.id}, skipping duplicate")
+                logger.debug(f"Job completion notification already sent for job {job.id}, skipping duplicate")
     except Exception as e:
-        logger.error(f"Failed to send RND job completed notification: {str(e)}", exc_info=True)
+        logger.error(f"Failed to queue RND job completed notification: {str(e)}", exc_info=True)
 
 
+def _parse_excel_export_filters(args):
+    """
+    Filter export Excel dari query string (start_date, end_date, sample_type, status)
+
+    Raises:
+        ValueError - format tanggal salah
+    """
+    filters = {}
+    
+    # Date range filters
+    start_date_str = args.get('start_date')
+    end_date_str = args.get('end_date')
+    
+    if start_date_str:
+        try:
+            # Parse date string (expecting YYYY-MM-DD format)
+            start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
+        except ValueError:
+            raise ValueError('Invalid start date format. Use YYYY-MM-DD')
+        # Convert to Jakarta timezone
+        filters['start_date'] = jakarta_tz.localize(start_date)
+    
+    if end_date_str:
+        try:
+            # Parse date string (expecting YYYY-MM-DD format)
+            end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
+        except ValueError:
+            raise ValueError('Invalid end date format. Use YYYY-MM-DD')
+        # Add one day to make it inclusive
+        end_date = end_date.replace(hour=23, minute=59, second=59)
+        # Convert to Jakarta timezone
+        filters['end_date'] = jakarta_tz.localize(end_date)
+    
+    # Other filters
+    sample_type = (args.get('sample_type') or '').strip()
+    if sample_type:
+        filters['sample_type'] = sample_type
+    
+    status = (args.get('status') or '').strip()
+    if status:
+        filters['status'] = status
+    
+    return filters
+
 @rnd_cloudsphere_bp.route('/api/jobs/export/excel')
 @login_required
 @require_rnd_access
@@ -3815,44 +3428,10 @@ def export_rnd_jobs_excel():
     """Export RND jobs to Excel format with comprehensive data"""
     try:
         # Parse filters from request
-        filters = {}
-        
-        # Date range filters
-        start_date_str = request.args.get('start_date')
-        end_date_str = request.args.get('end_date')
-        
-        if start_date_str:
-            try:
-                # Parse date string (expecting YYYY-MM-DD format)
-                start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-                # Convert to Jakarta timezone
-                if start_date.tzinfo is None:
-                    start_date = jakarta_tz.localize(start_date)
-                filters['start_date'] = start_date
-            except ValueError:
-                return jsonify({'success': False, 'error': 'Invalid start date format. Use YYYY-MM-DD'}), 400
-        
-        if end_date_str:
-            try:
-                # Parse date string (expecting YYYY-MM-DD format)
-                end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
-                # Add one day to make it inclusive
-                end_date = end_date.replace(hour=23, minute=59, second=59)
-                # Convert to Jakarta timezone
-                if end_date.tzinfo is None:
-                    end_date = jakarta_tz.localize(end_date)
-                filters['end_date'] = end_date
-            except ValueError:
-                return jsonify({'success': False, 'error': 'Invalid end date format. Use YYYY-MM-DD'}), 400
-        
-        # Other filters
-        sample_type = request.args.get('sample_type', '').strip()
-        if sample_type:
-            filters['sample_type'] = sample_type
-        
-        status = request.args.get('status', '').strip()
-        if status:
-            filters['status'] = status
+        try:
+            filters = _parse_excel_export_filters(request.args)
+        except ValueError as ve:
+            return jsonify({'success': False, 'error': str(ve)}), 400
         
         # Generate Excel file
         from services.rnd_excel_export_service import RNDExcelExportService
@@ -3887,3 +3466,31 @@ def export_rnd_jobs_excel():
             'success': False,
             'error': f'Error exporting Excel file: {str(e)}'
         }), 500
+
+# Export background (services/export_jobs.py): POST /export-jobs dengan type di bawah
+def _can_export_jobs(user, params):
+    return user.can_access_rnd()
+
+def _can_export_job_pdf_params(user, params):
+    return user.can_access_rnd() and _can_export_job_pdf(user, int(params['job_id']))
+
+def _validate_job_pdf_params(params):
+    if not str(params.get('job_id', '')).isdigit():
+        raise ValueError('job_id is required')
+
+@register_export('rnd_jobs_excel', validate=_parse_excel_export_filters, authorize=_can_export_jobs)
+def _render_jobs_excel_job(job):
+    from services.rnd_excel_export_service import RNDExcelExportService
+    export_service = RNDExcelExportService(db.session, jakarta_tz)
+    excel_buffer = export_service.export_jobs_to_excel(_parse_excel_export_filters(job.params), progress=job.update)
+    return job.save_buffer(excel_buffer, export_service.generate_filename(), XLSX_MIMETYPE)
+
+@register_export('rnd_job_pdf', validate=_validate_job_pdf_params, authorize=_can_export_job_pdf_params, per_user=True)
+def _render_job_pdf_job(job):
+    rnd_job = db.session.get(RNDJob, int(job.params['job_id']))
+    if rnd_job is None:
+        raise ValueError(f"Job with ID {job.params['job_id']} not found")
+    job.update(0, 1)
+    pdf_buffer, filename = _export_job_pdf(rnd_job, job.user)
+    job.update(1)
+    return job.save_buffer(pdf_buffer, filename, 'application/pdf')
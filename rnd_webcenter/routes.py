@@ -1,15 +1,24 @@
-from flask import render_template, jsonify, request, current_app, session
+from flask import render_template, jsonify, request, current_app, session, Response, stream_with_context
 from flask_login import login_required
 from . import rnd_webcenter_bp
-from .services import FileExplorerService
+from .services import FileExplorerService, directory_cache, directory_crawler
+from .search_index import search_indexer, SEARCH_MODES
 from .utils import get_file_icon, format_file_size, sanitize_path
+import json
 import logging
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+MAX_SEARCH_PAGE_SIZE = 500
+
+@rnd_webcenter_bp.record_once
+def configure_directory_crawler(state):
+    """Batas thread pool / concurrency per share dari config app"""
+    directory_crawler.init_app(state.app)
+
 def get_file_explorer_service():
-    """Get file explorer service with custom path if available"""
+    """Get file explorer service with custom path if available (listing di-cache per proses)"""
     custom_path = session.get('custom_network_path')
     return FileExplorerService(custom_path)
 
@@ -47,12 +56,33 @@ def api_directory():
             'error': str(e)
         }), 500
 
+@rnd_webcenter_bp.route('/api/directory/stream')
+@login_required
+def api_directory_stream():
+    """API endpoint for directory listing as NDJSON (batch pertama tampil sebelum listing selesai)"""
+    sanitized_path = sanitize_path(request.args.get('path', ''))
+    service = get_file_explorer_service()
+    
+    def generate():
+        for event in service.stream_directory_contents(sanitized_path):
+            yield json.dumps(event) + '\n'
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no'}
+    )
+
 @rnd_webcenter_bp.route('/api/search')
 @login_required
 def api_search():
     """API endpoint for file search"""
     query = request.args.get('q', '').strip()
     path = request.args.get('path', '')
+    extension = request.args.get('ext', '').strip() or None
+    mode = request.args.get('mode', 'substring')
+    page = max(request.args.get('page', 1, type=int) or 1, 1)
+    per_page = min(max(request.args.get('per_page', 100, type=int) or 100, 1), MAX_SEARCH_PAGE_SIZE)
     
     # Sanitize inputs
     sanitized_query = query.strip()
@@ -64,10 +94,16 @@ def api_search():
             'error': 'Search query is required'
         }), 400
     
+    if mode not in SEARCH_MODES:
+        return jsonify({
+            'success': False,
+            'error': f"mode must be one of: {', '.join(SEARCH_MODES)}"
+        }), 400
+    
     try:
         logger.info(f"Searching for '{sanitized_query}' in '{sanitized_path}'")
         service = get_file_explorer_service()
-        results = service.search_files(sanitized_query, sanitized_path)
+        results = service.search_files(sanitized_query, sanitized_path, extension, mode, page, per_page)
         logger.info(f"Search completed, found {results.get('files', 0)} files and {results.get('folders', 0)} folders")
         return jsonify({
             'success': True,
@@ -212,4 +248,18 @@ def api_accessibility():
         return jsonify({
             'success': False,
             'error': str(e)
-        }), 500
\ No newline at end of file
+        }), 500
+
+@rnd_webcenter_bp.route('/api/cache-stats')
+@login_required
+def api_cache_stats():
+    """API endpoint for directory cache hit/miss counters and filename index status"""
+    service = get_file_explorer_service()
+    index = search_indexer.get(service.network_service.base_path)
+    return jsonify({
+        'success': True,
+        'data': {
+            **directory_cache.stats(),
+            'searchIndex': index.status() if index else None
+        }
+    })
@@ -0,0 +1,433 @@
+"""
+RND WebCenter Filename Index
+Index nama file share EPSON di SQLite lokal (FTS5, tokenizer trigram) supaya
+/rnd-webcenter/api/search tidak menjalankan os.walk ke network share untuk setiap query.
+
+Crawler background menyimpan per direktori mtime terakhir yang di-scan. Refresh berikutnya
+hanya stat direktori; direktori yang mtime-nya sama tidak di-listing ulang (file yang
+diedit di tempat tidak mengubah mtime direktori - pakai --full sesekali dari cron).
+Crawl di beberapa proses tidak jalan bersamaan: lease disimpan di file index.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import click
+from flask.cli import AppGroup
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_INTERVAL_MINUTES = 30
+# Lease crawl; diperpanjang setiap commit batch, diambil alih proses lain kalau kedaluwarsa
+CRAWL_LEASE_SECONDS = 600
+CRAWL_COMMIT_EVERY_DIRS = 200
+# Tokenizer trigram hanya bisa mencari substring >= 3 karakter; lebih pendek pakai instr()
+MIN_TRIGRAM_QUERY_LENGTH = 3
+SEARCH_MODES = ('substring', 'prefix')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    name_lower TEXT NOT NULL,
+    extension TEXT NOT NULL,
+    is_dir INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_entries_parent ON entries(parent, is_dir);
+CREATE INDEX IF NOT EXISTS ix_entries_name_lower ON entries(name_lower);
+CREATE INDEX IF NOT EXISTS ix_entries_extension ON entries(extension);
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    crawled_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    name_lower, content='entries', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts(rowid, name_lower) VALUES (new.id, new.name_lower);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, name_lower) VALUES ('delete', old.id, old.name_lower);
+END;
+"""
+
+
+def _subtree_range(relative_path):
+    """Batas path untuk semua entry di bawah relative_path ('/' + 1 = '0'), bisa pakai index"""
+    return f"{relative_path}/", f"{relative_path}0"
+
+
+class FilenameIndex:
+    """Index nama file untuk satu base path (share)"""
+
+    def __init__(self, base_path, index_path):
+        self.base_path = base_path
+        self.index_path = index_path
+        self._owner = f"{os.getpid()}:{threading.get_ident()}"
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        conn = sqlite3.connect(self.index_path, timeout=10, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')  # search tetap jalan selama crawler menulis
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(SCHEMA)
+        return conn
+
+    def _full_path(self, relative_path):
+        if not relative_path:
+            return self.base_path
+        return os.path.join(self.base_path, *relative_path.split('/'))
+
+    # ---------------------------------------------------------------- status
+
+    def _meta(self, conn, key):
+        row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row['value'] if row else None
+
+    def status(self):
+        """Waktu crawl lengkap terakhir dan jumlah entry"""
+        if not os.path.exists(self.index_path):
+            return {'completed_at': None, 'entries': 0, 'directories': 0}
+        conn = self._connect()
+        try:
+            completed_at = self._meta(conn, 'completed_at')
+            return {
+                'completed_at': float(completed_at) if completed_at else None,
+                'entries': conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0],
+                'directories': conn.execute('SELECT COUNT(*) FROM directories').fetchone()[0]
+            }
+        finally:
+            conn.close()
+
+    def covers(self, relative_path=''):
+        """True kalau index sudah pernah crawl lengkap dan relative_path ada di dalamnya"""
+        if not os.path.exists(self.index_path):
+            return False
+        conn = self._connect()
+        try:
+            if self._meta(conn, 'completed_at') is None:
+                return False
+            if not relative_path:
+                return True
+            return conn.execute(
+                'SELECT 1 FROM directories WHERE path = ?', (relative_path,)
+            ).fetchone() is not None
+        finally:
+            conn.close()
+
+    # ----------------------------------------------------------------- crawl
+
+    def _acquire_lease(self, conn):
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            lease = self._meta(conn, 'crawl_lease')
+            if lease:
+                owner, expires_at = lease.rsplit('|', 1)
+                if owner != self._owner and float(expires_at) > now:
+                    conn.execute('ROLLBACK')
+                    return False
+            conn.execute(
+                'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                ('crawl_lease', f"{self._owner}|{now + CRAWL_LEASE_SECONDS}")
+            )
+            conn.execute('COMMIT')
+            return True
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _release_lease(self, conn):
+        conn.execute("DELETE FROM meta WHERE key = 'crawl_lease' AND value LIKE ?", (f"{self._owner}|%",))
+
+    def _remove_subtree(self, conn, relative_path):
+        """Hapus entry + direktori relative_path beserta semua isinya dari index"""
+        low, high = _subtree_range(relative_path)
+        removed = conn.execute(
+            'DELETE FROM entries WHERE path = ? OR (path >= ? AND path < ?)', (relative_path, low, high)
+        ).rowcount
+        conn.execute(
+            'DELETE FROM directories WHERE path = ? OR (path >= ? AND path < ?)', (relative_path, low, high)
+        )
+        return removed
+
+    def _rescan(self, conn, relative_path, full_path, mtime_ns):
+        """
+        Listing ulang satu direktori dan sinkronkan entry-nya
+
+        Returns:
+            tuple - (list path subdirektori, jumlah entry yang dihapus)
+        """
+        known = {
+            row['path'] for row in conn.execute('SELECT path FROM entries WHERE parent = ?', (relative_path,))
+        }
+        seen = set()
+        subdirectories = []
+        rows = []
+        with os.scandir(full_path) as entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                    stat = entry.stat()
+                except OSError as e:
+                    logger.warning(f"Index crawl: cannot stat {entry.path}: {e}")
+                    continue
+                path = f"{relative_path}/{entry.name}" if relative_path else entry.name
+                seen.add(path)
+                if is_dir:
+                    subdirectories.append(path)
+                extension = '' if is_dir else os.path.splitext(entry.name)[1].lower()
+                rows.append((
+                    path, relative_path, entry.name, entry.name.lower(), extension,
+                    int(is_dir), 0 if is_dir else stat.st_size, stat.st_mtime
+                ))
+
+        conn.executemany(
+            """
+            INSERT INTO entries (path, parent, name, name_lower, extension, is_dir, size, mtime)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(path) DO UPDATE SET
+                extension = excluded.extension, is_dir = excluded.is_dir,
+                size = excluded.size, mtime = excluded.mtime
+            """,
+            rows
+        )
+        removed = sum(self._remove_subtree(conn, path) for path in known - seen)
+        conn.execute(
+            'INSERT OR REPLACE INTO directories (path, mtime_ns, crawled_at) VALUES (?, ?, ?)',
+            (relative_path, mtime_ns, time.time())
+        )
+        return subdirectories, removed
+
+    def refresh(self, full=False):
+        """
+        Crawl share dan perbarui index. Direktori yang mtime-nya tidak berubah dilewati
+        (kecuali full=True); subdirektorinya tetap dicek.
+
+        Returns:
+            dict - statistik crawl, atau None kalau proses lain sedang crawl
+        """
+        started = time.monotonic()
+        conn = self._connect()
+        try:
+            if not self._acquire_lease(conn):
+                logger.info(f"Filename index crawl already running elsewhere for {self.base_path}")
+                return None
+
+            stats = {'directories': 0, 'rescanned': 0, 'removed': 0}
+            stack = ['']
+            conn.execute('BEGIN')
+            while stack:
+                relative_path = stack.pop()
+                full_path = self._full_path(relative_path)
+                try:
+                    mtime_ns = os.stat(full_path).st_mtime_ns
+                except OSError:
+                    if not relative_path:
+                        raise
+                    stats['removed'] += self._remove_subtree(conn, relative_path)
+                    continue
+
+                known = conn.execute(
+                    'SELECT mtime_ns FROM directories WHERE path = ?', (relative_path,)
+                ).fetchone()
+                if known and known['mtime_ns'] == mtime_ns and not full:
+                    stack.extend(row['path'] for row in conn.execute(
+                        'SELECT path FROM entries WHERE parent = ? AND is_dir = 1', (relative_path,)
+                    ))
+                else:
+                    try:
+                        subdirectories, removed = self._rescan(conn, relative_path, full_path, mtime_ns)
+                    except OSError as e:
+                        logger.warning(f"Index crawl: cannot list {full_path}: {e}")
+                        continue
+                    stack.extend(subdirectories)
+                    stats['rescanned'] += 1
+                    stats['removed'] += removed
+
+                stats['directories'] += 1
+                if stats['directories'] % CRAWL_COMMIT_EVERY_DIRS == 0:
+                    conn.execute('COMMIT')
+                    self._acquire_lease(conn)
+                    conn.execute('BEGIN')
+
+            conn.execute(
+                'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', ('completed_at', str(time.time()))
+            )
+            self._release_lease(conn)
+            conn.execute('COMMIT')
+            stats['elapsed_seconds'] = round(time.monotonic() - started, 2)
+            logger.info(f"Filename index refreshed for {self.base_path}: {stats}")
+            return stats
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            self._release_lease(conn)
+            raise
+        finally:
+            conn.close()
+
+    # ---------------------------------------------------------------- search
+
+    def search(self, query, relative_path='', extension=None, mode='substring', limit=100, offset=0):
+        """
+        Cari nama file/folder di index
+
+        Args:
+            query: teks yang dicari (case-insensitive)
+            relative_path: batasi ke subtree ini ('' = seluruh share)
+            extension: misal 'pdf' / '.pdf'
+            mode: 'substring' (default) atau 'prefix'
+            limit, offset: paging
+
+        Returns:
+            tuple - (list sqlite3.Row, total)
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+
+        needle = query.lower()
+        clauses, params = [], []
+        if mode == 'prefix':
+            clauses.append('name_lower >= ? AND name_lower < ?')
+            params += [needle, needle + '\uffff']
+        elif len(needle) >= MIN_TRIGRAM_QUERY_LENGTH:
+            clauses.append('id IN (SELECT rowid FROM entries_fts WHERE entries_fts MATCH ?)')
+            params.append('"' + needle.replace('"', '""') + '"')
+        else:
+            clauses.append('instr(name_lower, ?) > 0')
+            params.append(needle)
+        if extension:
+            clauses.append('extension = ?')
+            params.append('.' + extension.lower().lstrip('.'))
+        if relative_path:
+            clauses.append('path >= ? AND path < ?')
+            params += list(_subtree_range(relative_path))
+
+        where = ' AND '.join(clauses)
+        conn = self._connect()
+        try:
+            total = conn.execute(f'SELECT COUNT(*) FROM entries WHERE {where}', params).fetchone()[0]
+            rows = conn.execute(
+                f"""
+                SELECT path, name, extension, is_dir, size, mtime FROM entries
+                WHERE {where}
+                ORDER BY is_dir DESC, name_lower
+                LIMIT ? OFFSET ?
+                """,
+                params + [limit, offset]
+            ).fetchall()
+            return rows, total
+        finally:
+            conn.close()
+
+
+class FilenameIndexScheduler:
+    """
+    Crawler in-process: refresh index setiap N menit (run pertama segera setelah request
+    pertama). Nonaktif kalau RND_WEBCENTER_INDEX_INTERVAL_MINUTES = 0 (pakai cron + CLI).
+    """
+
+    def __init__(self):
+        self.app = None
+        self.index_dir = None
+        self.paths = []
+        self._indexes = {}
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.last_run = None
+
+    def init_app(self, app):
+        from .services import DEFAULT_NETWORK_PATH
+
+        self.app = app
+        self.index_dir = app.config.get('RND_WEBCENTER_INDEX_DIR') or os.path.join(
+            app.instance_path, 'rnd_webcenter_index'
+        )
+        self.paths = app.config.get('RND_WEBCENTER_INDEX_PATHS') or [DEFAULT_NETWORK_PATH]
+        app.extensions['rnd_webcenter_index'] = self
+        if app.config.get('RND_WEBCENTER_INDEX_INTERVAL_MINUTES', DEFAULT_INDEX_INTERVAL_MINUTES) > 0:
+            app.before_request(self.ensure_started)
+
+    def get(self, base_path):
+        """FilenameIndex untuk base_path, atau None kalau share ini tidak di-index"""
+        if self.index_dir is None or base_path not in self.paths:
+            return None
+        with self._lock:
+            index = self._indexes.get(base_path)
+            if index is None:
+                digest = hashlib.sha1(base_path.encode('utf-8')).hexdigest()[:16]
+                index = FilenameIndex(base_path, os.path.join(self.index_dir, f"{digest}.sqlite3"))
+                self._indexes[base_path] = index
+            return index
+
+    def ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._loop,
+                name='rnd-webcenter-indexer',
+                daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_once(self, full=False):
+        results = {}
+        for base_path in self.paths:
+            try:
+                results[base_path] = self.get(base_path).refresh(full=full)
+            except Exception as e:
+                logger.error(f"Filename index refresh failed for {base_path}: {str(e)}")
+                results[base_path] = {'error': str(e)}
+        self.last_run = {'finished_at': time.time(), 'results': results}
+        return results
+
+    def _loop(self):
+        interval = self.app.config.get(
+            'RND_WEBCENTER_INDEX_INTERVAL_MINUTES', DEFAULT_INDEX_INTERVAL_MINUTES
+        ) * 60
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(interval)
+
+
+search_indexer = FilenameIndexScheduler()
+
+rnd_webcenter_cli = AppGroup('rnd-webcenter', help='Maintenance RND WebCenter (index nama file)')
+
+
+@rnd_webcenter_cli.command('index')
+@click.option('--full', is_flag=True, help='Listing ulang semua direktori (bukan hanya yang mtime-nya berubah)')
+def index_command(full):
+    """Crawl share dan perbarui index nama file"""
+    for base_path, stats in search_indexer.run_once(full=full).items():
+        click.echo(f"{base_path}: {stats if stats is not None else 'crawl already running elsewhere'}")
+
+
+@rnd_webcenter_cli.command('index-status')
+def index_status_command():
+    """Tampilkan status index nama file"""
+    for base_path in search_indexer.paths:
+        click.echo(f"{base_path}: {search_indexer.get(base_path).status()}")
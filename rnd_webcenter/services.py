@@ -1,19 +1,214 @@
 import os
+import sqlite3
+import threading
 import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
 import logging
 
+from .search_index import search_indexer
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Jumlah listing direktori yang disimpan per proses (LRU)
+DIRECTORY_CACHE_MAX_ENTRIES = 2048
+# Listing dimuat ulang setelah umur ini walau mtime direktori sama
+# (mtime direktori tidak berubah kalau isi file di dalamnya diedit)
+DIRECTORY_CACHE_MAX_AGE = 300
+
+
+class DirectoryCache:
+    """
+    Cache listing direktori per proses, dipakai bersama semua request dan user.
+    Key (base_path, relative_path); entry valid selama mtime direktori sama, jadi klik
+    folder yang tidak berubah cukup satu os.stat ke share, bukan listing + stat per item.
+    """
+
+    def __init__(self, max_entries: int = DIRECTORY_CACHE_MAX_ENTRIES,
+                 max_age: float = DIRECTORY_CACHE_MAX_AGE):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries = OrderedDict()  # key -> (mtime_ns, loaded_at, items)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, base_path: str, relative_path: str, full_path: str,
+            loader: Callable[[str], List[Dict]]) -> List[Dict]:
+        """
+        Listing dari cache, atau loader(full_path) kalau belum ada / direktori berubah.
+        Item yang dikembalikan dipakai bersama, jangan diubah.
+
+        Raises:
+            OSError - direktori tidak ada / tidak bisa diakses
+        """
+        mtime = os.stat(full_path).st_mtime_ns
+        items = self.lookup(base_path, relative_path, mtime)
+        if items is None:
+            # mtime diambil sebelum listing: perubahan selama listing terdeteksi di request berikutnya
+            items = loader(full_path)
+            self.store(base_path, relative_path, mtime, items)
+        return items
+
+    def lookup(self, base_path: str, relative_path: str, mtime_ns: int) -> Optional[List[Dict]]:
+        """Listing yang di-cache untuk mtime direktori ini, atau None (dihitung hit/miss)"""
+        key = (base_path, relative_path)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached and cached[0] == mtime_ns and time.monotonic() - cached[1] < self.max_age:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached[2]
+            self.misses += 1
+            return None
+
+    def store(self, base_path: str, relative_path: str, mtime_ns: int, items: List[Dict]):
+        """Simpan listing lengkap yang di-scan saat direktori ber-mtime mtime_ns"""
+        key = (base_path, relative_path)
+        with self._lock:
+            self._entries[key] = (mtime_ns, time.monotonic(), items)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def is_fresh(self, base_path: str, relative_path: str, full_path: str) -> bool:
+        """True kalau listing ada di cache dan mtime direktori belum berubah"""
+        with self._lock:
+            cached = self._entries.get((base_path, relative_path))
+        if not cached:
+            return False
+        try:
+            return os.stat(full_path).st_mtime_ns == cached[0]
+        except OSError:
+            return False
+
+    def invalidate(self, base_path: Optional[str] = None):
+        """Drop semua listing (atau hanya listing di bawah satu base_path)"""
+        with self._lock:
+            if base_path is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == base_path]:
+                del self._entries[key]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+directory_cache = DirectoryCache()
+
+# Batas stat paralel ke satu share (semua request di proses ini), supaya file server tidak kewalahan
+DEFAULT_SHARE_CONCURRENCY = 8
+DEFAULT_CRAWLER_WORKERS = 16
+# Jumlah entry per task stat (dan per baris NDJSON saat streaming)
+STAT_BATCH_SIZE = 64
+
+
+class ParallelDirectoryCrawler:
+    """
+    Listing direktori dengan stat entry dibagi ke thread pool. os.scandir tetap satu
+    enumerasi berurutan; stat per entry (satu round-trip SMB di mount CIFS) jalan paralel,
+    dibatasi semaphore per share. Hasil keluar per batch sesuai urutan listing sehingga
+    bisa di-stream ke client sebelum seluruh folder selesai.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_CRAWLER_WORKERS,
+                 share_concurrency: int = DEFAULT_SHARE_CONCURRENCY):
+        self.max_workers = max_workers
+        self.share_concurrency = share_concurrency
+        self._executor = None
+        self._share_limits = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_workers = app.config.get('RND_WEBCENTER_CRAWLER_WORKERS', self.max_workers)
+        self.share_concurrency = app.config.get('RND_WEBCENTER_SHARE_CONCURRENCY', self.share_concurrency)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='rnd-webcenter-stat'
+                )
+            return self._executor
+
+    def share_limit(self, base_path: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            limit = self._share_limits.get(base_path)
+            if limit is None:
+                limit = threading.BoundedSemaphore(self.share_concurrency)
+                self._share_limits[base_path] = limit
+            return limit
+
+    def _stat_batch(self, limit, entries, relative_path, build_item) -> List[Dict]:
+        items = []
+        for entry in entries:
+            try:
+                with limit:
+                    is_directory = entry.is_dir()
+                    stat_info = entry.stat()
+            except OSError as e:
+                logger.warning(f"Error accessing {entry.path}: {str(e)}")
+                continue
+            items.append(build_item(entry.name, relative_path, is_directory, stat_info))
+        return items
+
+    def iter_batches(self, base_path: str, full_path: str, relative_path: str,
+                     build_item: Callable, batch_size: int = STAT_BATCH_SIZE) -> Iterator[List[Dict]]:
+        """
+        Yield list item per batch (urutan listing). build_item(name, relative_path,
+        is_directory, stat_info) membuat dict item.
+
+        Raises:
+            OSError - direktori tidak bisa di-listing
+        """
+        executor = self._get_executor()
+        limit = self.share_limit(base_path)
+        pending = deque()
+        batch = []
+        with os.scandir(full_path) as entries:
+            for entry in entries:
+                batch.append(entry)
+                if len(batch) < batch_size:
+                    continue
+                pending.append(executor.submit(self._stat_batch, limit, batch, relative_path, build_item))
+                batch = []
+                # Keluarkan batch yang sudah selesai di depan antrian; batasi batch in-flight
+                while pending and (pending[0].done() or len(pending) >= self.max_workers):
+                    yield pending.popleft().result()
+        if batch:
+            pending.append(executor.submit(self._stat_batch, limit, batch, relative_path, build_item))
+        while pending:
+            yield pending.popleft().result()
+
+
+directory_crawler = ParallelDirectoryCrawler()
+
+DEFAULT_NETWORK_PATH = r"\\172.27.168.10\Data_Design\PT. Epson\00.DATA BASE EPSON"
+
+
 class NetworkDriveService:
     """Service for accessing network drive files"""
     
     def __init__(self, custom_path: Optional[str] = None):
-        self.default_path = r"\\172.27.168.10\Data_Design\PT. Epson\00.DATA BASE EPSON"
+        self.default_path = DEFAULT_NETWORK_PATH
         self.base_path = custom_path if custom_path else self.default_path
-        self.cache = {}
+        self.cache = {}  # hasil search; listing direktori memakai directory_cache (per proses)
         self.cache_timeout = 300  # 5 minutes
         
         # Log the path for debugging
@@ -22,11 +217,14 @@ class NetworkDriveService:
     def update_path(self, custom_path: str):
         """Update the base path to a custom path"""
         self.base_path = custom_path
-        self.cache.clear()  # Clear cache when path changes
+        self.cache.clear()  # Clear cache when path changes (listing direktori di-key per base_path)
         logger.info(f"Updated network drive path to: {self.base_path}")
     
     def is_accessible(self) -> bool:
         """Check if network drive is accessible"""
+        # Root sudah ter-listing dan tidak berubah: cukup satu stat, bukan listing ulang
+        if directory_cache.is_fresh(self.base_path, '', self.base_path):
+            return True
         try:
             # Try to access the network drive with multiple methods
             # First, try to list the directory
@@ -61,95 +259,91 @@ class NetworkDriveService:
             logger.error(f"Test path not accessible: {test_path}, Error: {str(e)}")
             return False
     
+    @staticmethod
+    def _normalize(relative_path: str) -> str:
+        """Path relatif dengan pemisah '/' (sanitize_path menghasilkan '\\')"""
+        return '/'.join(part for part in relative_path.replace('\\', '/').split('/') if part)
+    
+    def _full_path(self, relative_path: str) -> str:
+        """Path absolut di share untuk path relatif"""
+        relative_path = self._normalize(relative_path)
+        if not relative_path:
+            return self.base_path
+        return os.path.join(self.base_path, *relative_path.split('/'))
+    
     def list_directory(self, relative_path: str = "") -> List[Dict]:
-        """List files and directories in specified path"""
-        # Check cache first
-        cache_key = f"list_{relative_path}"
-        current_time = time.time()
-        
-        if cache_key in self.cache:
-            cached_data, cached_time = self.cache[cache_key]
-            if current_time - cached_time < self.cache_timeout:
-                logger.debug(f"Using cached data for {relative_path}")
-                return cached_data
-        
+        """List files and directories in specified path (lewat directory_cache)"""
+        relative_path = self._normalize(relative_path)
+        full_path = self._full_path(relative_path)
         try:
-            # Construct full path
-            if relative_path:
-                full_path = os.path.join(self.base_path, relative_path.replace('/', '\\'))
-            else:
-                full_path = self.base_path
-            
-            logger.debug(f"Attempting to list directory: {full_path}")
-           
-            # List directory contents
-            items = []
-           
-            if os.path.exists(full_path):
-                try:
-                    for item in os.listdir(full_path):
-                        item_path = os.path.join(full_path, item)
-                     
-                        try:
-                            stat_info = os.stat(item_path)
-                            is_directory = os.path.isdir(item_path)
-                           
-                            # Get file extension for icon mapping
-                            file_ext = ""
-                            if not is_directory:
-                                file_ext = Path(item).suffix.lower()
-                           
-                            # Format file size
-                            size_bytes = stat_info.st_size
-                            size_formatted = self._format_file_size(size_bytes)
-                           
-                            # Get modified time
-                            modified_time = time.strftime(
-                                '%Y-%m-%d %H:%M',
-                                time.localtime(stat_info.st_mtime)
-                            )
-                           
-                            # Construct relative path for this item
-                            item_relative_path = os.path.join(relative_path, item).replace('\\', '/') if relative_path else item
-                           
-                            items.append({
-                                'name': item,
-                                'path': item_relative_path,
-                                'isDirectory': is_directory,
-                                'size': size_bytes,
-                                'sizeFormatted': size_formatted,
-                                'modified': modified_time,
-                                'extension': file_ext,
-                                'type': self._get_file_type(file_ext),
-                                'icon': self._get_file_icon(file_ext, is_directory)
-                            })
-                        except (OSError, PermissionError) as e:
-                            logger.warning(f"Error accessing {item_path}: {str(e)}")
-                            continue
-                except Exception as e:
-                    logger.error(f"Unexpected error listing directory {full_path}: {str(e)}")
-                    # Return empty list but don't fail completely
-                    items = []
-            else:
-                logger.warning(f"Path does not exist: {full_path}")
-                items = []
-            
-            # Cache the results
-            self.cache[cache_key] = (items, current_time)
-            
-            # Sort items: directories first, then files, both alphabetically
-            items.sort(key=lambda x: (not x['isDirectory'], x['name'].lower()))
-            
-            return items
-            
+            return directory_cache.get(
+                self.base_path, relative_path, full_path,
+                lambda path: self._scan_directory(path, relative_path)
+            )
+        except FileNotFoundError:
+            logger.warning(f"Path does not exist: {full_path}")
+            return []
         except Exception as e:
             logger.error(f"Error listing directory {relative_path}: {str(e)}")
             return []
     
+    def _scan_directory(self, full_path: str, relative_path: str) -> List[Dict]:
+        """Listing satu direktori (stat paralel lewat directory_crawler)"""
+        logger.debug(f"Scanning directory: {full_path}")
+        items = [
+            item
+            for batch in directory_crawler.iter_batches(self.base_path, full_path, relative_path, self._build_item)
+            for item in batch
+        ]
+        
+        # Sort items: directories first, then files, both alphabetically
+        items.sort(key=lambda x: (not x['isDirectory'], x['name'].lower()))
+        return items
+    
+    def iter_directory(self, relative_path: str = "") -> Iterator[Tuple[List[Dict], str]]:
+        """
+        Listing bertahap untuk streaming: yield (batch item, sumber 'cache' atau 'scan').
+        Listing yang selesai di-scan disimpan ke directory_cache.
+
+        Raises:
+            OSError - direktori tidak ada / tidak bisa diakses
+        """
+        relative_path = self._normalize(relative_path)
+        full_path = self._full_path(relative_path)
+        mtime = os.stat(full_path).st_mtime_ns
+        cached = directory_cache.lookup(self.base_path, relative_path, mtime)
+        if cached is not None:
+            yield cached, 'cache'
+            return
+        
+        items = []
+        for batch in directory_crawler.iter_batches(self.base_path, full_path, relative_path, self._build_item):
+            items.extend(batch)
+            yield batch, 'scan'
+        items.sort(key=lambda x: (not x['isDirectory'], x['name'].lower()))
+        directory_cache.store(self.base_path, relative_path, mtime, items)
+    
+    def _build_item(self, name: str, relative_path: str, is_directory: bool, stat_info) -> Dict:
+        """Item listing dari hasil scandir/stat"""
+        # Get file extension for icon mapping
+        file_ext = "" if is_directory else Path(name).suffix.lower()
+        size_bytes = stat_info.st_size
+        return {
+            'name': name,
+            'path': f"{relative_path}/{name}" if relative_path else name,
+            'isDirectory': is_directory,
+            'size': size_bytes,
+            'sizeFormatted': self._format_file_size(size_bytes),
+            'modified': time.strftime('%Y-%m-%d %H:%M', time.localtime(stat_info.st_mtime)),
+            'extension': file_ext,
+            'type': self._get_file_type(file_ext),
+            'icon': self._get_file_icon(file_ext, is_directory)
+        }
+    
     def get_file_info(self, relative_path: str) -> Optional[Dict]:
         """Get detailed file information"""
         try:
-            full_path = os.path.join(self.base_path, relative_path.replace('/', '\\'))
+            full_path = self._full_path(relative_path)
             
             if not os.path.exists(full_path):
                 return None
@@ -188,10 +382,47 @@ class NetworkDriveService:
             logger.error(f"Error getting file info for {relative_path}: {str(e)}")
             return None
     
-    def search_files(self, query: str, relative_path: str = "") -> List[Dict]:
-        """Search files by name"""
+    def search_files(self, query: str, relative_path: str = "", extension: Optional[str] = None,
+                     mode: str = 'substring', limit: int = 100, offset: int = 0) -> Tuple[List[Dict], int, str]:
+        """
+        Search files by name: dari index nama file kalau share/path sudah ter-index,
+        selain itu live walk (os.walk) ke share
+
+        Returns:
+            tuple - (items halaman ini, total hasil, sumber 'index' atau 'live')
+        """
+        relative_path = self._normalize(relative_path)
+        index = search_indexer.get(self.base_path)
+        if index is not None and index.covers(relative_path):
+            try:
+                rows, total = index.search(query, relative_path, extension, mode, limit, offset)
+                return [self._index_item(row) for row in rows], total, 'index'
+            except (sqlite3.Error, OSError) as e:
+                logger.error(f"Filename index search failed, falling back to live walk: {str(e)}")
+
+        results = self._live_search(query, relative_path, extension, mode)
+        return results[offset:offset + limit], len(results), 'live'
+    
+    def _index_item(self, row) -> Dict:
+        """Item hasil search (format sama dengan get_file_info) dari row index"""
+        is_directory = bool(row['is_dir'])
+        return {
+            'name': row['name'],
+            'path': row['path'],
+            'isDirectory': is_directory,
+            'size': row['size'],
+            'sizeFormatted': self._format_file_size(row['size']),
+            'modified': time.strftime('%Y-%m-%d %H:%M', time.localtime(row['mtime'])),
+            'extension': row['extension'],
+            'type': self._get_file_type(row['extension']),
+            'icon': self._get_file_icon(row['extension'], is_directory)
+        }
+    
+    def _live_search(self, query: str, relative_path: str, extension: Optional[str], mode: str) -> List[Dict]:
+        """Recursive search langsung ke share (path yang belum ter-index)"""
+        extension = '.' + extension.lower().lstrip('.') if extension else None
         # Check cache first
-        cache_key = f"search_{relative_path}_{query.lower()}"
+        cache_key = f"search_{relative_path}_{query.lower()}_{extension}_{mode}"
         current_time = time.time()
         
         if cache_key in self.cache:
@@ -200,13 +431,14 @@ class NetworkDriveService:
                 logger.debug(f"Using cached search results for {query} in {relative_path}")
                 return cached_data
         
+        def matches(name):
+            name_lower = name.lower()
+            if extension and Path(name).suffix.lower() != extension:
+                return False
+            return name_lower.startswith(query_lower) if mode == 'prefix' else query_lower in name_lower
+        
         try:
-            # Construct full path
-            if relative_path:
-                full_path = os.path.join(self.base_path, relative_path.replace('/', '\\'))
-            else:
-                full_path = self.base_path
-            
+            full_path = self._full_path(relative_path)
             results = []
             query_lower = query.lower()
             
@@ -214,22 +446,13 @@ class NetworkDriveService:
             for root, dirs, files in os.walk(full_path):
                 # Calculate relative path from base
                 rel_root = os.path.relpath(root, self.base_path).replace('\\', '/')
+                rel_root = '' if rel_root == '.' else rel_root
                 
-                # Search in directories
-                for dir_name in dirs:
-                    if query_lower in dir_name.lower():
-                        dir_relative_path = os.path.join(rel_root, dir_name).replace('\\', '/')
-                        dir_info = self.get_file_info(dir_relative_path)
-                        if dir_info:
-                            results.append(dir_info)
-                
-                # Search in files
-                for file_name in files:
-                    if query_lower in file_name.lower():
-                        file_relative_path = os.path.join(rel_root, file_name).replace('\\', '/')
-                        file_info = self.get_file_info(file_relative_path)
-                        if file_info:
-                            results.append(file_info)
+                for name in (dirs if not extension else []) + files:
+                    if matches(name):
+                        item_info = self.get_file_info(f"{rel_root}/{name}" if rel_root else name)
+                        if item_info:
+                            results.append(item_info)
             
             # Sort results
             results.sort(key=lambda x: (not x['isDirectory'], x['name'].lower()))
@@ -359,6 +582,37 @@ class FileExplorerService:
                 'error': str(e)
             }
     
+    def stream_directory_contents(self, path: str) -> Iterator[Dict]:
+        """
+        Event listing bertahap untuk NDJSON: 'items' per batch (urutan listing, belum
+        di-sort), lalu 'done' dengan statistik, atau 'error'
+        """
+        folders = files = total_size = 0
+        source = 'scan'
+        try:
+            for items, source in self.network_service.iter_directory(path):
+                for item in items:
+                    if item['isDirectory']:
+                        folders += 1
+                    else:
+                        files += 1
+                        total_size += item['size']
+                yield {'type': 'items', 'items': items}
+        except Exception as e:
+            logger.error(f"Error streaming directory {path}: {str(e)}")
+            yield {'type': 'error', 'error': str(e)}
+            return
+        
+        yield {
+            'type': 'done',
+            'path': path,
+            'folders': folders,
+            'files': files,
+            'totalSize': total_size,
+            'totalSizeFormatted': self.network_service._format_file_size(total_size),
+            'source': source
+        }
+    
     def navigate_to_path(self, path: str) -> Dict:
         """Navigate to specific path"""
         # Validate path
@@ -377,8 +631,9 @@ class FileExplorerService:
         
         return self.get_directory_contents(path)
     
-    def search_files(self, query: str, path: str = "") -> Dict:
-        """Search files by name"""
+    def search_files(self, query: str, path: str = "", extension: Optional[str] = None,
+                     mode: str = 'substring', page: int = 1, per_page: int = 100) -> Dict:
+        """Search files by name (paged)"""
         if not query.strip():
             return {
                 'path': path,
@@ -386,6 +641,7 @@ class FileExplorerService:
                 'items': [],
                 'folders': 0,
                 'files': 0,
+                'total': 0,
                 'totalSize': 0,
                 'totalSizeFormatted': '0 B',
                 'accessible': self.network_service.is_accessible(),
@@ -393,9 +649,11 @@ class FileExplorerService:
             }
         
         try:
-            items = self.network_service.search_files(query, path)
+            items, total, source = self.network_service.search_files(
+                query, path, extension, mode, limit=per_page, offset=(page - 1) * per_page
+            )
             
-            # Calculate search statistics
+            # Statistik untuk halaman ini; jumlah semua hasil ada di 'total'
             folders = [item for item in items if item['isDirectory']]
             files = [item for item in items if not item['isDirectory']]
             
@@ -405,6 +663,11 @@ class FileExplorerService:
                 'items': items,
                 'folders': len(folders),
                 'files': len(files),
+                'total': total,
+                'page': page,
+                'perPage': per_page,
+                'hasNext': page * per_page < total,
+                'source': source,
                 'totalSize': sum(item['size'] for item in files),
                 'totalSizeFormatted': self.network_service._format_file_size(sum(item['size'] for item in files)),
                 'accessible': self.network_service.is_accessible()
@@ -417,6 +680,7 @@ class FileExplorerService:
                 'items': [],
                 'folders': 0,
                 'files': 0,
+                'total': 0,
                 'totalSize': 0,
                 'totalSizeFormatted': '0 B',
                 'accessible': False,
@@ -0,0 +1,190 @@
+"""
+Sidebar Badge Count Service
+Menghitung jumlah adjustment/bon per status untuk badge sidebar (/api/check-notifications)
+dengan satu query GROUP BY per tabel, hasilnya di-cache sebentar di memory proses
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from sqlalchemy import func
+from models import db, PlateAdjustmentRequest, PlateBonRequest
+from services.notification_hub import NotificationHub, BADGE_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+# Berapa lama hasil hitungan boleh dipakai ulang sebelum query ke database lagi
+BADGE_CACHE_TTL_SECONDS = 5
+
+CTP_STATES = ['proses_ctp', 'proses_plate', 'antar_plate']
+PDND_STATES = ['menunggu_adjustment_pdnd', 'proses_adjustment_pdnd']
+DESIGN_STATES = ['menunggu_adjustment_design', 'proses_adjustment_design']
+MOUNTING_STATES = ['menunggu_adjustment', 'proses_adjustment', 'ditolakctp']
+CURVE_STATES = ['menunggu_adjustment_curve', 'proses_adjustment_curve', 'ditolakmounting']
+DECLINED_BY_MOUNTING = 'ditolakmounting'
+
+ADJUSTMENT_STATES = sorted(set(
+    CTP_STATES + PDND_STATES + DESIGN_STATES + MOUNTING_STATES + CURVE_STATES
+))
+
+
+class BadgeCountService:
+    """
+    Engine hitungan badge sidebar
+    - Satu query COUNT(*) GROUP BY status, is_epson untuk plate_adjustment_requests
+    - Satu query COUNT(*) GROUP BY status untuk plate_bon_requests
+    - Cache hasil selama BADGE_CACHE_TTL_SECONDS, di-drop saat ada perubahan status
+    - Divisi yang berubah di-push ke NotificationHub (channel 'badges')
+    """
+
+    _lock = threading.Lock()
+    _cached = None  # (payload, etag, expires_at)
+    _published = None  # payload terakhir yang di-push ke hub
+
+    @staticmethod
+    def _count_adjustments():
+        """Return dict {(status, is_epson): count} untuk status yang relevan"""
+        rows = (
+            db.session.query(
+                PlateAdjustmentRequest.status,
+                PlateAdjustmentRequest.is_epson,
+                func.count(PlateAdjustmentRequest.id)
+            )
+            .filter(PlateAdjustmentRequest.status.in_(ADJUSTMENT_STATES))
+            .group_by(PlateAdjustmentRequest.status, PlateAdjustmentRequest.is_epson)
+            .all()
+        )
+        return {(status, is_epson): count for status, is_epson, count in rows}
+
+    @staticmethod
+    def _count_bons():
+        """Return dict {status: count} untuk status CTP"""
+        rows = (
+            db.session.query(PlateBonRequest.status, func.count(PlateBonRequest.id))
+            .filter(PlateBonRequest.status.in_(CTP_STATES))
+            .group_by(PlateBonRequest.status)
+            .all()
+        )
+        return {status: count for status, count in rows}
+
+    @staticmethod
+    def _bucket(adjustment_counts, states, epson_filter=None):
+        """
+        Jumlahkan hitungan adjustment untuk list status
+
+        epson_filter: dict {status: bool} - status tertentu hanya dihitung untuk
+        nilai is_epson yang cocok (misal 'ditolakmounting' dipisah PDND/Design)
+        """
+        totals = {}
+        for (status, is_epson), count in adjustment_counts.items():
+            if status not in states:
+                continue
+            if epson_filter and status in epson_filter and is_epson is not epson_filter[status]:
+                continue
+            totals[status] = totals.get(status, 0) + count
+        return totals
+
+    @staticmethod
+    def _as_status_list(totals):
+        """Format {status: count} menjadi list [{'status', 'count'}] yang dipakai sidebar JS"""
+        return [
+            {'status': status, 'count': totals[status]}
+            for status in sorted(totals)
+            if totals[status] > 0
+        ]
+
+    @classmethod
+    def compute_counts(cls):
+        """
+        Hitung ulang semua badge dari database (2 query)
+
+        Returns:
+            dict - {division_key: [{'status': str, 'count': int}, ...]}
+        """
+        adjustment_counts = cls._count_adjustments()
+        bon_counts = cls._count_bons()
+
+        pdnd_states = PDND_STATES + [DECLINED_BY_MOUNTING]
+        design_states = DESIGN_STATES + [DECLINED_BY_MOUNTING]
+
+        return {
+            'ctp_adjustment': cls._as_status_list(cls._bucket(adjustment_counts, CTP_STATES)),
+            'ctp_bon': cls._as_status_list(bon_counts),
+            'pdnd': cls._as_status_list(cls._bucket(
+                adjustment_counts, pdnd_states, {DECLINED_BY_MOUNTING: False}
+            )),
+            'design': cls._as_status_list(cls._bucket(
+                adjustment_counts, design_states, {DECLINED_BY_MOUNTING: True}
+            )),
+            'mounting': cls._as_status_list(cls._bucket(adjustment_counts, MOUNTING_STATES)),
+            'curve': cls._as_status_list(cls._bucket(adjustment_counts, CURVE_STATES)),
+        }
+
+    @staticmethod
+    def make_etag(payload):
+        """ETag stabil dari isi payload"""
+        raw = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def peek(cls):
+        """
+        Return (payload, etag) dari cache kalau masih berlaku, tanpa query database
+        Returns None kalau cache kosong atau sudah expired
+        """
+        with cls._lock:
+            cached = cls._cached
+        if cached and cached[2] > time.monotonic():
+            return cached[0], cached[1]
+        return None
+
+    @classmethod
+    def get_counts(cls):
+        """
+        Return (payload, etag), query database hanya kalau cache expired
+
+        Returns:
+            tuple - (dict payload, str etag)
+        """
+        cached = cls.peek()
+        if cached:
+            return cached
+
+        payload = cls.compute_counts()
+        etag = cls.make_etag(payload)
+        with cls._lock:
+            cls._cached = (payload, etag, time.monotonic() + BADGE_CACHE_TTL_SECONDS)
+        return payload, etag
+
+    @classmethod
+    def invalidate(cls):
+        """Drop cache - dipanggil setelah commit perubahan status adjustment/bon"""
+        with cls._lock:
+            cls._cached = None
+        logger.debug("Badge count cache invalidated")
+
+    @classmethod
+    def refresh_and_publish(cls):
+        """
+        Drop cache, hitung ulang, lalu push divisi yang berubah ke subscriber SSE
+        Dipanggil setelah commit perubahan status adjustment/bon
+        Error di sini hanya di-log supaya tidak menggagalkan route yang sudah commit
+        """
+        cls.invalidate()
+        try:
+            payload, etag = cls.get_counts()
+            with cls._lock:
+                previous = cls._published
+                cls._published = payload
+
+            changed = {
+                key: statuses for key, statuses in payload.items()
+                if previous is None or previous.get(key) != statuses
+            }
+            if changed:
+                NotificationHub.publish(BADGE_CHANNEL, 'badges', {'etag': etag, 'changed': changed})
+        except Exception as e:
+            logger.error(f"Error publishing badge counts: {str(e)}")
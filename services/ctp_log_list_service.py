@@ -0,0 +1,197 @@
+"""
+CTP Log List Service
+Serializer tabel KPI CTP (/get-kpi-data) dengan projection + keyset pagination:
+- view=summary / fields= hanya me-load kolom yang dirender tabel (load_only), bukan ~90 kolom
+  density (cyan/magenta/.../j x 20/25/40/50/75/80/linear) per row
+- view=density / full untuk detail satu log (/api/kpi_ctp/<id>), dimuat saat dibuka
+- cursor = (nilai kolom sort, id) row terakhir; halaman berikutnya tanpa OFFSET
+"""
+
+import base64
+import json
+from datetime import date, datetime, time
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import load_only
+
+from models import CTPProductionLog
+
+# Urutan sama dengan CTPProductionLog.to_dict()
+FIELDS = tuple(column.key for column in CTPProductionLog.__table__.columns)
+DENSITY_FIELDS = tuple(field for field in FIELDS if field.endswith(('_percent', '_linear')))
+# Kolom yang dirender tabel KPI (+ created_at untuk aturan edit 24 jam)
+SUMMARY_FIELDS = (
+    'id', 'log_date', 'ctp_group', 'ctp_shift', 'ctp_pic', 'ctp_machine', 'wo_number', 'mc_number',
+    'is_g7', 'print_machine', 'remarks_job', 'item_name', 'plate_type_material', 'paper_type', 'raster',
+    'num_plate_good', 'num_plate_not_good', 'created_at'
+)
+VIEWS = {
+    'summary': SUMMARY_FIELDS,
+    'density': ('id',) + DENSITY_FIELDS,
+    'full': FIELDS,
+}
+
+DEFAULT_SORT_COLUMN = 'log_date'
+MAX_PAGE_SIZE = 500
+
+
+class InvalidListParamError(ValueError):
+    """Parameter list KPI CTP tidak valid (view/fields/cursor)"""
+
+
+def _format_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, time):
+        return value.strftime('%H:%M')
+    return value
+
+
+class CTPLogListService:
+    """Projection + keyset pagination untuk CTPProductionLog"""
+
+    @staticmethod
+    def parse_fields(view=None, fields=None):
+        """
+        fields=a,b,c menang atas view; tanpa keduanya = semua kolom (seperti to_dict)
+
+        Returns:
+            tuple - nama kolom, urutan to_dict, selalu termasuk id
+
+        Raises:
+            InvalidListParamError - view / field tidak dikenal
+        """
+        if fields:
+            requested = {field.strip() for field in fields.split(',') if field.strip()}
+            unknown = requested - set(FIELDS)
+            if unknown:
+                raise InvalidListParamError(f"Unknown fields: {', '.join(sorted(unknown))}")
+            requested.add('id')
+            return tuple(field for field in FIELDS if field in requested)
+        if not view:
+            return FIELDS
+        if view not in VIEWS:
+            raise InvalidListParamError(f"view must be one of: {', '.join(VIEWS)}")
+        return VIEWS[view]
+
+    @staticmethod
+    def parse_per_page(per_page):
+        """Ukuran halaman 1..MAX_PAGE_SIZE (per_page tidak valid jatuh ke batas terdekat)"""
+        return min(max(per_page or 1, 1), MAX_PAGE_SIZE)
+
+    @staticmethod
+    def parse_sort(sort_by, sort_order):
+        """Kolom sort yang tidak dikenal jatuh ke log_date (perilaku lama), arah default desc"""
+        if sort_by not in FIELDS:
+            sort_by = DEFAULT_SORT_COLUMN
+        return sort_by, 'asc' if sort_order == 'asc' else 'desc'
+
+    @staticmethod
+    def encode_cursor(sort_by, sort_order, value, log_id):
+        """Cursor keyset (nilai kolom sort, id) row terakhir halaman"""
+        if isinstance(value, (date, time)):
+            value = value.isoformat()  # presisi penuh (detik), bukan format tampilan
+        raw = json.dumps([sort_by, sort_order, value, log_id])
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor, sort_by, sort_order):
+        """
+        Returns:
+            tuple - (nilai kolom sort dalam tipe Python kolom, id), atau None kalau cursor kosong
+
+        Raises:
+            InvalidListParamError - cursor rusak atau dibuat untuk urutan lain
+        """
+        if not cursor:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+            cursor_sort, cursor_order, value, log_id = json.loads(raw)
+            if (cursor_sort, cursor_order) != (sort_by, sort_order):
+                raise ValueError('sort changed')
+            if value is not None:
+                python_type = getattr(CTPProductionLog, sort_by).type.python_type
+                if python_type is date:
+                    value = date.fromisoformat(value)
+                elif python_type is time:
+                    value = time.fromisoformat(value)
+                elif python_type is datetime:
+                    value = datetime.fromisoformat(value)
+            return value, int(log_id)
+        except Exception:
+            raise InvalidListParamError(f"Invalid cursor: {cursor}")
+
+    @staticmethod
+    def _after_cursor(column, sort_order, value, log_id):
+        """
+        Row sesudah (value, log_id) dalam urutan (column, id). NULL dianggap paling kecil
+        (MySQL / SQLite): di awal saat asc, di akhir saat desc.
+        """
+        id_column = CTPProductionLog.id
+        if sort_order == 'asc':
+            if value is None:
+                return or_(column.isnot(None), and_(column.is_(None), id_column > log_id))
+            return or_(column > value, and_(column == value, id_column > log_id))
+        if value is None:
+            return and_(column.is_(None), id_column < log_id)
+        return or_(column < value, and_(column == value, id_column < log_id), column.is_(None))
+
+    @staticmethod
+    def list_logs(query, fields, sort_by, sort_order, per_page=30, offset=0, cursor=None):
+        """
+        Satu halaman log KPI CTP
+
+        Args:
+            query: query CTPProductionLog yang sudah difilter (tanpa order)
+            fields: tuple kolom (parse_fields)
+            sort_by, sort_order: dari parse_sort; id dipakai sebagai tie-breaker
+            per_page: int - ukuran halaman
+            offset: int - dipakai kalau tidak ada cursor (lompat ke halaman tertentu)
+            cursor: str - next_cursor halaman sebelumnya
+
+        Returns:
+            dict - {'data': [...], 'next_cursor': str|None, 'has_next': bool}
+        """
+        column = getattr(CTPProductionLog, sort_by)
+        loaded = set(fields) | {'id', sort_by}
+        query = query.options(load_only(*[getattr(CTPProductionLog, field) for field in FIELDS if field in loaded]))
+
+        position = CTPLogListService.decode_cursor(cursor, sort_by, sort_order)
+        if position is not None:
+            query = query.filter(CTPLogListService._after_cursor(column, sort_order, *position))
+        elif offset:
+            query = query.offset(offset)
+
+        if sort_order == 'asc':
+            query = query.order_by(column.asc(), CTPProductionLog.id.asc())
+        else:
+            query = query.order_by(column.desc(), CTPProductionLog.id.desc())
+        logs = query.limit(per_page + 1).all()
+
+        has_next = len(logs) > per_page
+        logs = logs[:per_page]
+        next_cursor = None
+        if has_next:
+            last = logs[-1]
+            next_cursor = CTPLogListService.encode_cursor(sort_by, sort_order, getattr(last, sort_by), last.id)
+        return {
+            'data': [CTPLogListService.serialize(log, fields) for log in logs],
+            'next_cursor': next_cursor,
+            'has_next': has_next
+        }
+
+    @staticmethod
+    def get_log(log_id, fields):
+        """Satu log dengan kolom fields saja (mis. blok density untuk detail), None kalau tidak ada"""
+        log = CTPProductionLog.query.options(
+            load_only(*[getattr(CTPProductionLog, field) for field in fields])
+        ).filter(CTPProductionLog.id == log_id).first()
+        return CTPLogListService.serialize(log, fields) if log else None
+
+    @staticmethod
+    def serialize(log, fields):
+        """Dict satu log, format sama dengan to_dict(); hanya membaca kolom yang di-load"""
+        return {field: _format_value(getattr(log, field)) for field in fields}
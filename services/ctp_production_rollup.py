@@ -0,0 +1,208 @@
+"""
+CTP Production Daily Rollup
+Rekap ctp_production_logs per (tanggal, shift, group, mesin CTP, mesin cetak, jenis plate)
+di tabel ctp_production_daily_rollup. Rollup di-update di transaksi yang sama setiap log
+di-insert/update/delete (session event before_flush), sehingga dashboard bulanan cukup
+membaca puluhan row rekap, bukan puluhan ribu row log.
+
+Backfill / perbaikan: 'flask ctp-rollup backfill [--from YYYY-MM-DD --to YYYY-MM-DD]'
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime
+
+import click
+import pytz
+from flask.cli import AppGroup
+from sqlalchemy import delete, event, func, insert, literal, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models import db, CTPProductionLog, CTPProductionDailyRollup
+from services.period_filter import period_filters
+
+logger = logging.getLogger(__name__)
+jakarta_tz = pytz.timezone('Asia/Jakarta')
+
+ROLLUP_KEY = ['log_date', 'ctp_shift', 'ctp_group', 'ctp_machine', 'print_machine', 'plate_type_material']
+LOG_FIELDS = ROLLUP_KEY + ['num_plate_good', 'num_plate_not_good']
+
+
+class CTPProductionRollupService:
+    """Maintain dan query ctp_production_daily_rollup"""
+
+    @staticmethod
+    def period_filters(year=None, month=None, plate_type=None):
+        """
+        Filter rollup untuk periode dashboard; tahun/bulan jadi range tanggal (pakai index)
+
+        Returns:
+            list - SQLAlchemy filter expressions
+        """
+        filters = period_filters(CTPProductionDailyRollup.log_date, year, month)
+        if plate_type:
+            filters.append(CTPProductionDailyRollup.plate_type_material.ilike(f'{plate_type}%'))
+        return filters
+
+    @staticmethod
+    def apply_delta(key, good, not_good, count):
+        """
+        Tambahkan selisih ke satu row rollup (UPDATE, atau INSERT kalau belum ada)
+        Tidak commit - ikut transaksi log produksi
+        """
+        if not (good or not_good or count):
+            return
+
+        key_filter = [getattr(CTPProductionDailyRollup, column) == value for column, value in zip(ROLLUP_KEY, key)]
+        now = datetime.now(jakarta_tz)
+        result = db.session.execute(
+            update(CTPProductionDailyRollup).where(*key_filter).values(
+                num_plate_good=CTPProductionDailyRollup.num_plate_good + good,
+                num_plate_not_good=CTPProductionDailyRollup.num_plate_not_good + not_good,
+                log_count=CTPProductionDailyRollup.log_count + count,
+                updated_at=now
+            ).execution_options(synchronize_session=False)
+        )
+
+        if result.rowcount == 0:
+            if count <= 0:
+                # Log lama yang belum pernah di-backfill; backfill akan merapikan
+                logger.warning(f"CTP production rollup row missing for {key}, run 'flask ctp-rollup backfill'")
+                return
+            dialect_name = db.session.get_bind().dialect.name
+            db.session.execute(
+                CTPProductionRollupService._insert_statement(dialect_name, key, good, not_good, count, now)
+            )
+        elif count < 0:
+            db.session.execute(
+                delete(CTPProductionDailyRollup).where(*key_filter, CTPProductionDailyRollup.log_count <= 0)
+                .execution_options(synchronize_session=False)
+            )
+
+    @staticmethod
+    def _insert_statement(dialect_name, key, good, not_good, count, now):
+        """
+        INSERT row rollup baru. Dua session yang menulis log pertama untuk key yang sama bisa
+        sama-sama UPDATE 0 row; yang kalah kena uq_ctp_production_daily_rollup_key dan
+        menggagalkan simpan log. Pakai upsert dialect: row yang sudah dibuat session lain ditambah
+        selisih milik session ini
+
+        Args:
+            dialect_name: str - 'mysql' / 'sqlite' (dialect lain: INSERT biasa)
+        """
+        values = dict(
+            zip(ROLLUP_KEY, key), num_plate_good=good, num_plate_not_good=not_good, log_count=count, updated_at=now
+        )
+        conflict_values = {
+            'num_plate_good': CTPProductionDailyRollup.num_plate_good + good,
+            'num_plate_not_good': CTPProductionDailyRollup.num_plate_not_good + not_good,
+            'log_count': CTPProductionDailyRollup.log_count + count,
+            'updated_at': now
+        }
+        if dialect_name == 'mysql':
+            return mysql_insert(CTPProductionDailyRollup).values(**values).on_duplicate_key_update(**conflict_values)
+        if dialect_name == 'sqlite':
+            return sqlite_insert(CTPProductionDailyRollup).values(**values).on_conflict_do_update(
+                index_elements=ROLLUP_KEY, set_=conflict_values
+            )
+        return insert(CTPProductionDailyRollup).values(**values)
+
+    @staticmethod
+    def backfill(start=None, end=None):
+        """
+        Bangun ulang rollup dari ctp_production_logs (INSERT ... SELECT GROUP BY)
+
+        Args:
+            start: date - tanggal awal (inklusif), None = semua
+            end: date - tanggal akhir (inklusif), None = semua
+
+        Returns:
+            int - jumlah row rollup yang dibuat
+        """
+        log_filters, rollup_filters = [], []
+        if start:
+            log_filters.append(CTPProductionLog.log_date >= start)
+            rollup_filters.append(CTPProductionDailyRollup.log_date >= start)
+        if end:
+            log_filters.append(CTPProductionLog.log_date <= end)
+            rollup_filters.append(CTPProductionDailyRollup.log_date <= end)
+
+        try:
+            db.session.execute(
+                delete(CTPProductionDailyRollup).where(*rollup_filters)
+                .execution_options(synchronize_session=False)
+            )
+            key_columns = [getattr(CTPProductionLog, column) for column in ROLLUP_KEY]
+            result = db.session.execute(
+                insert(CTPProductionDailyRollup).from_select(
+                    ROLLUP_KEY + ['num_plate_good', 'num_plate_not_good', 'log_count', 'updated_at'],
+                    select(
+                        *key_columns,
+                        func.coalesce(func.sum(CTPProductionLog.num_plate_good), 0),
+                        func.coalesce(func.sum(CTPProductionLog.num_plate_not_good), 0),
+                        func.count(CTPProductionLog.id),
+                        literal(datetime.now(jakarta_tz), db.DateTime)
+                    ).where(*log_filters).group_by(*key_columns)
+                )
+            )
+            db.session.commit()
+            return result.rowcount
+
+        except Exception as e:
+            logger.error(f"Error backfilling CTP production rollup: {str(e)}")
+            db.session.rollback()
+            raise
+
+
+def _log_values(obj):
+    return {field: getattr(obj, field) for field in LOG_FIELDS}
+
+
+@event.listens_for(Session, 'before_flush')
+def _apply_rollup_deltas(session, flush_context, instances):
+    """Perubahan CTPProductionLog masuk rollup di flush yang sama"""
+    new = [obj for obj in session.new if isinstance(obj, CTPProductionLog)]
+    dirty = [
+        obj for obj in session.dirty
+        if isinstance(obj, CTPProductionLog) and session.is_modified(obj, include_collections=False)
+    ]
+    deleted = [obj for obj in session.deleted if isinstance(obj, CTPProductionLog)]
+    if not (new or dirty or deleted):
+        return
+
+    deltas = defaultdict(lambda: [0, 0, 0])  # key -> [good, not_good, log_count]
+
+    def add(values, sign):
+        key = tuple(values[column] for column in ROLLUP_KEY)
+        delta = deltas[key]
+        delta[0] += sign * (values['num_plate_good'] or 0)
+        delta[1] += sign * (values['num_plate_not_good'] or 0)
+        delta[2] += sign
+
+    # Nilai lama diambil dari database supaya update yang memindah tanggal/shift/grup benar
+    changed_ids = [obj.id for obj in dirty + deleted if obj.id is not None]
+    if changed_ids:
+        columns = [getattr(CTPProductionLog, field) for field in LOG_FIELDS]
+        for row in db.session.query(CTPProductionLog.id, *columns).filter(CTPProductionLog.id.in_(changed_ids)):
+            add(dict(zip(LOG_FIELDS, row[1:])), -1)
+    for obj in new + dirty:
+        add(_log_values(obj), 1)
+
+    for key, (good, not_good, count) in deltas.items():
+        CTPProductionRollupService.apply_delta(key, good, not_good, count)
+
+
+ctp_rollup_cli = AppGroup('ctp-rollup', help='Maintenance rekap harian produksi CTP')
+
+
+@ctp_rollup_cli.command('backfill')
+@click.option('--from', 'date_from', default=None, help='Tanggal awal (YYYY-MM-DD), default semua')
+@click.option('--to', 'date_to', default=None, help='Tanggal akhir (YYYY-MM-DD), default semua')
+def backfill_command(date_from, date_to):
+    """Bangun ulang ctp_production_daily_rollup dari ctp_production_logs"""
+    start = datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else None
+    end = datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else None
+    rows = CTPProductionRollupService.backfill(start, end)
+    click.echo(f"Rebuilt {rows} rollup rows")
@@ -0,0 +1,249 @@
+"""
+CTP KPI Search - Token Index untuk /get-kpi-data
+Kata-kata dari kolom teks ctp_production_logs (WO, MC, PIC, item, remarks, ...) disimpan
+lowercase tanpa aksen di ctp_production_log_search_tokens. Pencarian tabel KPI menjadi prefix match
+per kata pada token (index), bukan OR 20 ILIKE '%q%' + CAST yang selalu full scan.
+
+- Query satu kata yang persis nomor WO / MC / id -> lookup index langsung
+- Query tanggal (YYYY-MM-DD / YYYY-MM) -> range log_date
+- count=estimate menghitung paling banyak ESTIMATE_COUNT_CAP row (paginasi dalam tanpa COUNT penuh)
+
+Token di-maintain di flush yang sama dengan perubahan log (session event after_flush).
+Backfill / perbaikan: 'flask ctp-search rebuild'
+"""
+
+import logging
+import re
+import unicodedata
+from datetime import date
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import delete, event, func, insert, inspect, or_, select
+from sqlalchemy.orm import Session
+
+from models import db, CTPProductionLog, CTPProductionLogSearchToken
+from services.period_filter import period_range
+
+logger = logging.getLogger(__name__)
+
+# Kolom teks yang bisa dicari dari tabel KPI
+SEARCH_TOKEN_COLUMNS = (
+    'wo_number', 'mc_number', 'ctp_pic', 'ctp_machine', 'remarks_job', 'item_name',
+    'plate_type_material', 'paper_type', 'raster', 'not_good_reason', 'note'
+)
+MAX_TOKEN_LENGTH = 64
+# Kata 1 karakter diabaikan kalau query punya kata yang lebih panjang (prefix terlalu luas)
+MIN_TERM_LENGTH = 2
+ESTIMATE_COUNT_CAP = 1000
+COUNT_MODES = ('exact', 'estimate', 'none')
+REBUILD_BATCH_SIZE = 2000
+
+_WORD_PATTERN = re.compile(r'[^\W_]+')
+# "L3210" juga di-index sebagai "l" dan "3210" supaya nomor di tengah kode tetap ketemu
+_RUN_PATTERN = re.compile(r'[^\W\d_]+|\d+')
+_DATE_PATTERN = re.compile(r'^(\d{4})-(\d{1,2})(?:-(\d{1,2}))?$')
+
+
+class InvalidSearchParamError(ValueError):
+    """Parameter pencarian KPI tidak valid (count mode)"""
+
+
+def fold(text):
+    """
+    Casefold + buang aksen ('Café' -> 'cafe'), sama dengan perbandingan collation MySQL default
+    Token yang beda hanya di huruf besar/aksen jadi satu token sebelum deduplikasi,
+    jadi tidak bentrok di primary key (token, log_id)
+    """
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(*values):
+    """
+    Token pencarian dari nilai kolom
+
+    Returns:
+        set - kata ter-fold (maks MAX_TOKEN_LENGTH) + potongan huruf/angka dari kata campuran
+    """
+    tokens = set()
+    for value in values:
+        if value is None:
+            continue
+        for word in _WORD_PATTERN.findall(fold(str(value))):
+            tokens.add(word[:MAX_TOKEN_LENGTH])
+            runs = _RUN_PATTERN.findall(word)
+            if len(runs) > 1:
+                tokens.update(run[:MAX_TOKEN_LENGTH] for run in runs)
+    return tokens
+
+
+def log_tokens(log):
+    return tokenize(*(getattr(log, column) for column in SEARCH_TOKEN_COLUMNS))
+
+
+class CTPSearchService:
+    """Filter pencarian + hitung total untuk tabel KPI CTP"""
+
+    @staticmethod
+    def _date_filter(query):
+        match = _DATE_PATTERN.match(query)
+        if not match:
+            return None
+        year, month, day = (int(part) if part else None for part in match.groups())
+        try:
+            if day:
+                start = date(year, month, day)
+                return CTPProductionLog.log_date == start
+            start, end = period_range(year, month)
+        except (TypeError, ValueError):
+            return None
+        return CTPProductionLog.log_date >= start, CTPProductionLog.log_date < end
+
+    @staticmethod
+    def _exact_filter(query):
+        """Nomor WO / MC / id persis sama (pakai index); None kalau query lebih dari satu kata"""
+        if not query or any(char.isspace() for char in query):
+            return None
+        clauses = [CTPProductionLog.wo_number == query, CTPProductionLog.mc_number == query]
+        if query.isdigit() and len(query) <= 9:
+            clauses.append(CTPProductionLog.id == int(query))
+        return or_(*clauses)
+
+    @staticmethod
+    def _token_filters(query):
+        terms = list(dict.fromkeys(_WORD_PATTERN.findall(fold(query))))
+        if any(len(term) >= MIN_TERM_LENGTH for term in terms):
+            terms = [term for term in terms if len(term) >= MIN_TERM_LENGTH]
+        # Semua kata harus ketemu (di kolom mana saja); token hanya huruf/angka, aman untuk LIKE
+        return [
+            CTPProductionLog.id.in_(
+                select(CTPProductionLogSearchToken.log_id)
+                .where(CTPProductionLogSearchToken.token.like(term[:MAX_TOKEN_LENGTH] + '%'))
+            )
+            for term in terms
+        ]
+
+    @staticmethod
+    def search_filters(query):
+        """
+        Filter untuk teks pencarian tabel KPI
+
+        Returns:
+            list - SQLAlchemy filter expressions (kosong kalau query kosong)
+        """
+        query = (query or '').strip()
+        if not query:
+            return []
+
+        date_filter = CTPSearchService._date_filter(query)
+        if date_filter is not None:
+            return list(date_filter) if isinstance(date_filter, tuple) else [date_filter]
+
+        exact = CTPSearchService._exact_filter(query)
+        if exact is not None:
+            # Satu lookup index; kalau ada yang persis sama, tidak perlu token search
+            if db.session.execute(select(CTPProductionLog.id).where(exact).limit(1)).first():
+                return [exact]
+
+        return CTPSearchService._token_filters(query)
+
+    @staticmethod
+    def count(query, mode='exact', offset=0, per_page=30):
+        """
+        Total row untuk paginasi
+
+        Args:
+            query: ORM query yang sudah difilter
+            mode: 'exact' (COUNT penuh), 'estimate' (COUNT dibatasi), 'none'
+            offset, per_page: halaman yang diminta (batas estimate minimal 10 halaman ke depan)
+
+        Returns:
+            tuple - (total atau None, True kalau total hanya batas bawah)
+        """
+        if mode not in COUNT_MODES:
+            raise InvalidSearchParamError(f"count must be one of: {', '.join(COUNT_MODES)}")
+        if mode == 'none':
+            return None, True
+
+        ids = query.order_by(None).with_entities(CTPProductionLog.id)
+        if mode == 'exact':
+            return db.session.execute(select(func.count()).select_from(ids.subquery())).scalar(), False
+
+        cap = max(ESTIMATE_COUNT_CAP, offset + per_page * 10)
+        counted = db.session.execute(
+            select(func.count()).select_from(ids.limit(cap + 1).subquery())
+        ).scalar()
+        if counted > cap:
+            return cap, True
+        return counted, False
+
+    @staticmethod
+    def rebuild(batch_size=REBUILD_BATCH_SIZE):
+        """
+        Bangun ulang ctp_production_log_search_tokens dari ctp_production_logs
+
+        Returns:
+            tuple - (jumlah log, jumlah token)
+        """
+        try:
+            db.session.execute(delete(CTPProductionLogSearchToken))
+            columns = [getattr(CTPProductionLog, column) for column in SEARCH_TOKEN_COLUMNS]
+            last_id, logs, tokens = 0, 0, 0
+            while True:
+                rows = db.session.execute(
+                    select(CTPProductionLog.id, *columns)
+                    .where(CTPProductionLog.id > last_id)
+                    .order_by(CTPProductionLog.id)
+                    .limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+                values = [{'token': token, 'log_id': row[0]} for row in rows for token in tokenize(*row[1:])]
+                if values:
+                    db.session.execute(insert(CTPProductionLogSearchToken), values)
+                db.session.commit()
+                last_id = rows[-1][0]
+                logs += len(rows)
+                tokens += len(values)
+            return logs, tokens
+
+        except Exception as e:
+            logger.error(f"Error rebuilding CTP search tokens: {str(e)}")
+            db.session.rollback()
+            raise
+
+
+@event.listens_for(Session, 'after_flush')
+def _sync_search_tokens(session, flush_context):
+    """Token log baru/berubah/terhapus disinkronkan di transaksi yang sama (id log sudah ada)"""
+    new = [obj for obj in session.new if isinstance(obj, CTPProductionLog)]
+    dirty = [
+        obj for obj in session.dirty
+        if isinstance(obj, CTPProductionLog)
+        and any(inspect(obj).attrs[column].history.has_changes() for column in SEARCH_TOKEN_COLUMNS)
+    ]
+    deleted = [obj for obj in session.deleted if isinstance(obj, CTPProductionLog)]
+    if not (new or dirty or deleted):
+        return
+
+    connection = session.connection()
+    stale_ids = [obj.id for obj in dirty + deleted]
+    if stale_ids:
+        connection.execute(
+            delete(CTPProductionLogSearchToken).where(CTPProductionLogSearchToken.log_id.in_(stale_ids))
+        )
+    values = [{'token': token, 'log_id': obj.id} for obj in new + dirty for token in log_tokens(obj)]
+    if values:
+        connection.execute(insert(CTPProductionLogSearchToken), values)
+
+
+ctp_search_cli = AppGroup('ctp-search', help='Maintenance index pencarian tabel KPI CTP')
+
+
+@ctp_search_cli.command('rebuild')
+@click.option('--batch-size', type=int, default=REBUILD_BATCH_SIZE, help='Jumlah log per transaksi')
+def rebuild_command(batch_size):
+    """Bangun ulang ctp_production_log_search_tokens dari ctp_production_logs"""
+    logs, tokens = CTPSearchService.rebuild(batch_size)
+    click.echo(f"Indexed {logs} logs into {tokens} search tokens")
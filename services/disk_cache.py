@@ -0,0 +1,101 @@
+"""
+Disk Cache - Batas Ukuran Cache File Lokal (LRU)
+Dipakai cache thumbnail evidence dan cache export periode tertutup. File cache disimpan di
+<cache_dir>/<shard>/<nama file>; kalau total ukuran melewati batas, entry dengan mtime paling
+lama dihapus. Hit menyentuh mtime (paling sering sekali per TOUCH_INTERVAL_SECONDS).
+"""
+
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Setelah eviction total cache turun ke persentase ini dari batas (supaya tidak evict tiap write)
+CACHE_EVICT_TARGET_RATIO = 0.9
+# Hit hanya menyentuh mtime kalau sudah lebih lama dari ini (hemat syscall)
+TOUCH_INTERVAL_SECONDS = 3600
+
+
+def touch_if_stale(path, mtime):
+    """LRU: file yang masih dipakai tidak di-evict"""
+    if time.time() - mtime > TOUCH_INTERVAL_SECONDS:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+
+class ShardedLRUCacheMixin:
+    """
+    Batas ukuran cache di self.cache_dir (self.max_bytes), LRU berdasarkan mtime
+
+    Kelas pemakai menyediakan cache_dir, max_bytes, _lock (threading.Lock) dan
+    _cache_bytes (estimasi total ukuran, None = belum di-scan).
+    """
+
+    CACHE_LABEL = 'Disk cache'
+    # File dengan suffix ini (metadata) dihapus lebih dulu dalam satu entry dan mtime-nya
+    # tidak dihitung untuk LRU
+    REMOVE_FIRST_SUFFIX = None
+
+    @staticmethod
+    def cache_entry_key(filename):
+        """File dengan key yang sama di-evict bersama; default satu file satu entry"""
+        return filename
+
+    def _account(self, written):
+        """Tambah estimasi ukuran cache; evict kalau melewati batas"""
+        with self._lock:
+            if self._cache_bytes is not None:
+                self._cache_bytes += written
+            over_limit = self._cache_bytes is None or self._cache_bytes > self.max_bytes
+        if over_limit:
+            self.enforce_limit()
+
+    def enforce_limit(self):
+        """
+        Scan cache; kalau total > max_bytes hapus entry dengan mtime paling lama
+        sampai total <= CACHE_EVICT_TARGET_RATIO x max_bytes
+
+        Returns:
+            int - jumlah entry yang dihapus
+        """
+        first_suffix = self.REMOVE_FIRST_SUFFIX
+        entries = {}  # key -> [mtime, size, paths]
+        total = 0
+        if os.path.isdir(self.cache_dir):
+            for shard in os.scandir(self.cache_dir):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    if not entry.is_file() or entry.name.endswith('.tmp'):
+                        continue
+                    stat = entry.stat()
+                    cached = entries.setdefault(self.cache_entry_key(entry.name), [0, 0, []])
+                    if not (first_suffix and entry.name.endswith(first_suffix)):
+                        cached[0] = max(cached[0], stat.st_mtime)  # metadata tidak disentuh saat hit
+                    cached[1] += stat.st_size
+                    cached[2].append(entry.path)
+                    total += stat.st_size
+
+        removed = 0
+        if total > self.max_bytes:
+            target = self.max_bytes * CACHE_EVICT_TARGET_RATIO
+            for _, entry_size, paths in sorted(entries.values(), key=lambda cached: cached[0]):
+                if total <= target:
+                    break
+                if first_suffix:
+                    paths = sorted(paths, key=lambda path: not path.endswith(first_suffix))
+                try:
+                    for path in paths:
+                        os.remove(path)
+                    total -= entry_size
+                    removed += 1
+                except OSError:
+                    pass
+            logger.info(f"{self.CACHE_LABEL}: evicted {removed} entries, {total} bytes remaining")
+
+        with self._lock:
+            self._cache_bytes = total
+        return removed
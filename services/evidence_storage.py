@@ -0,0 +1,304 @@
+"""
+Evidence Storage - Streaming, Deduplicated Evidence Upload
+File evidence R&D ditulis per chunk ukuran tetap sambil menghitung SHA-256, dan isi yang
+sama disimpan sekali sebagai blob (UPLOADS_PATH/rnd_evidence/blobs/<sha[:2]>/<sha>.<ext>)
+yang direferensikan banyak row RNDEvidenceFile (proof PDF yang sama di banyak task/job).
+
+Upload resumable (Wi-Fi plant sering putus):
+    1. create_session      -> upload_id
+    2. write_chunk(offset) -> offset baru; kalau putus, get_session memberi offset terakhir
+    3. complete_session    -> hash + dedupe + pindah ke share
+Chunk di-staging di disk lokal (bukan network share); share hanya ditulis sekali per isi
+file yang belum pernah ada.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+import uuid
+
+from models_rnd import RNDEvidenceFile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_UPLOAD_BYTES = 200 * 1024 * 1024
+# Session upload yang tidak disentuh selama ini dihapus
+UPLOAD_SESSION_TTL_SECONDS = 24 * 3600
+
+_UPLOAD_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class EvidenceUploadError(ValueError):
+    """Upload evidence tidak valid (session tidak ada, ukuran salah, terlalu besar)"""
+
+
+class UploadOffsetMismatch(EvidenceUploadError):
+    """Chunk dikirim dari offset yang belum diterima server; client harus lanjut dari offset"""
+
+    def __init__(self, offset):
+        super().__init__(f"Upload offset mismatch, resume from {offset}")
+        self.offset = offset
+
+
+class StoredBlob:
+    """Hasil simpan: lokasi blob di share, ukuran, SHA-256, dan apakah memakai blob yang sudah ada"""
+
+    __slots__ = ('path', 'size', 'sha256', 'deduplicated')
+
+    def __init__(self, path, size, sha256, deduplicated):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self.deduplicated = deduplicated
+
+
+def _extension(filename):
+    return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+
+
+class EvidenceStorage:
+    """Simpan file evidence ke blob content-addressed + session upload resumable"""
+
+    def __init__(self):
+        self.uploads_path = None
+        self.staging_dir = None
+        self.chunk_size = DEFAULT_CHUNK_SIZE
+        self.max_bytes = DEFAULT_MAX_UPLOAD_BYTES
+
+    def init_app(self, app):
+        self.uploads_path = app.config.get('UPLOADS_PATH')
+        self.staging_dir = app.config.get('EVIDENCE_UPLOAD_STAGING_DIR') or os.path.join(
+            app.instance_path, 'evidence_uploads'
+        )
+        self.chunk_size = app.config.get('EVIDENCE_UPLOAD_CHUNK_SIZE', self.chunk_size)
+        self.max_bytes = app.config.get('EVIDENCE_UPLOAD_MAX_BYTES', self.max_bytes)
+        app.extensions['evidence_storage'] = self
+
+    # ------------------------------------------------------------------ blobs
+
+    def blob_path(self, sha256, extension=''):
+        name = f"{sha256}.{extension}" if extension else sha256
+        return os.path.join(self.uploads_path, 'rnd_evidence', 'blobs', sha256[:2], name)
+
+    @staticmethod
+    def find_existing_blob(sha256):
+        """Path file yang sudah tersimpan dengan isi yang sama (dari row evidence lain), atau None"""
+        rows = RNDEvidenceFile.query.with_entities(RNDEvidenceFile.file_path).filter(
+            RNDEvidenceFile.content_sha256 == sha256
+        ).distinct().all()
+        for (file_path,) in rows:
+            if os.path.exists(file_path):
+                return file_path
+        return None
+
+    def _commit_blob(self, staged_path, sha256, size, filename):
+        """Pindahkan file staging ke blob di share, kecuali isi yang sama sudah ada"""
+        existing = self.find_existing_blob(sha256)
+        target = existing or self.blob_path(sha256, _extension(filename))
+        if existing and not os.path.exists(target):
+            # Dihapus delete evidence sejak find_existing_blob: tulis ulang sebagai blob baru
+            target = self.blob_path(sha256, _extension(filename))
+        if os.path.exists(target):
+            os.remove(staged_path)
+            logger.info(f"Evidence upload deduplicated: {filename} -> {target}")
+            return StoredBlob(target, size, sha256, True)
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        partial = f"{target}.{uuid.uuid4().hex}.partial"
+        try:
+            with open(staged_path, 'rb') as source, open(partial, 'wb') as destination:
+                shutil.copyfileobj(source, destination, self.chunk_size)
+            os.replace(partial, target)  # pembaca tidak pernah melihat blob setengah jadi
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        os.remove(staged_path)
+        return StoredBlob(target, size, sha256, False)
+
+    def store_stream(self, stream, filename):
+        """
+        Simpan satu stream (FileStorage.stream) per chunk sambil hashing
+
+        Returns:
+            StoredBlob
+        """
+        os.makedirs(self.staging_dir, exist_ok=True)
+        staged_path = os.path.join(self.staging_dir, f"{uuid.uuid4().hex}.stream")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(staged_path, 'wb') as target:
+                while True:
+                    chunk = stream.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise EvidenceUploadError(f"File too large (max {self.max_bytes // (1024 * 1024)} MB)")
+                    digest.update(chunk)
+                    target.write(chunk)
+            return self._commit_blob(staged_path, digest.hexdigest(), size, filename)
+        except Exception:
+            if os.path.exists(staged_path):
+                os.remove(staged_path)
+            raise
+
+    # ------------------------------------------------------- upload sessions
+
+    def _session_paths(self, upload_id):
+        if not upload_id or not _UPLOAD_ID_PATTERN.match(upload_id):
+            raise EvidenceUploadError('Invalid upload id')
+        base = os.path.join(self.staging_dir, upload_id)
+        return f"{base}.json", f"{base}.part"
+
+    def create_session(self, filename, total_size, user_id, metadata=None):
+        """
+        Mulai upload resumable
+
+        Args:
+            filename: nama file asli (sudah di-secure_filename)
+            total_size: int - ukuran file total (byte)
+            user_id: pemilik session (hanya ia yang boleh melanjutkan)
+            metadata: dict - field evidence (job_id, assignment, evidence_type)
+
+        Returns:
+            dict - session (upload_id, offset, size, chunk_size)
+        """
+        if total_size is None or total_size <= 0:
+            raise EvidenceUploadError('File size required')
+        if total_size > self.max_bytes:
+            raise EvidenceUploadError(f"File too large (max {self.max_bytes // (1024 * 1024)} MB)")
+
+        os.makedirs(self.staging_dir, exist_ok=True)
+        self.cleanup_stale()
+        upload_id = uuid.uuid4().hex
+        meta_path, part_path = self._session_paths(upload_id)
+        open(part_path, 'wb').close()
+        with open(meta_path, 'w', encoding='utf-8') as meta_file:
+            json.dump({
+                'filename': filename,
+                'size': total_size,
+                'user_id': user_id,
+                'metadata': metadata or {},
+                'created_at': time.time()
+            }, meta_file)
+        return self.get_session(upload_id, user_id)
+
+    def get_session(self, upload_id, user_id):
+        """Status session: offset = byte yang sudah diterima (lanjutkan upload dari sini)"""
+        meta_path, part_path = self._session_paths(upload_id)
+        try:
+            with open(meta_path, encoding='utf-8') as meta_file:
+                session = json.load(meta_file)
+        except (OSError, ValueError):
+            raise EvidenceUploadError('Upload session not found or expired')
+        if session['user_id'] != user_id:
+            raise EvidenceUploadError('Upload session not found or expired')
+
+        session.update({
+            'upload_id': upload_id,
+            'offset': os.path.getsize(part_path) if os.path.exists(part_path) else 0,
+            'chunk_size': self.chunk_size
+        })
+        return session
+
+    def write_chunk(self, upload_id, user_id, offset, stream):
+        """
+        Tulis chunk mulai di offset. Offset <= yang sudah diterima boleh (kirim ulang chunk
+        yang response-nya hilang); offset di depan itu ditolak dengan offset yang benar.
+
+        Returns:
+            int - offset baru
+        """
+        session = self.get_session(upload_id, user_id)
+        if offset is None or offset < 0 or offset > session['offset']:
+            raise UploadOffsetMismatch(session['offset'])
+
+        _, part_path = self._session_paths(upload_id)
+        position = offset
+        with open(part_path, 'r+b') as target:
+            target.seek(offset)
+            while True:
+                chunk = stream.read(self.chunk_size)
+                if not chunk:
+                    break
+                if position + len(chunk) > session['size']:
+                    raise EvidenceUploadError('Chunk exceeds declared file size')
+                target.write(chunk)
+                position += len(chunk)
+        return max(position, session['offset'])
+
+    def complete_session(self, upload_id, user_id):
+        """
+        Selesaikan upload: cek ukuran, hash file staging, dedupe, pindah ke share
+
+        Returns:
+            tuple - (StoredBlob, session dict)
+        """
+        session = self.get_session(upload_id, user_id)
+        if session['offset'] != session['size']:
+            raise UploadOffsetMismatch(session['offset'])
+
+        meta_path, part_path = self._session_paths(upload_id)
+        digest = hashlib.sha256()
+        with open(part_path, 'rb') as staged:
+            for chunk in iter(lambda: staged.read(self.chunk_size), b''):
+                digest.update(chunk)
+        blob = self._commit_blob(part_path, digest.hexdigest(), session['size'], session['filename'])
+        os.remove(meta_path)
+        return blob, session
+
+    def abort_session(self, upload_id, user_id):
+        self.get_session(upload_id, user_id)
+        for path in self._session_paths(upload_id):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def cleanup_stale(self):
+        """Hapus file staging yang tidak disentuh lebih dari UPLOAD_SESSION_TTL_SECONDS"""
+        if not os.path.isdir(self.staging_dir):
+            return 0
+        cutoff = time.time() - UPLOAD_SESSION_TTL_SECONDS
+        removed = 0
+        for entry in os.scandir(self.staging_dir):
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                pass
+        return removed
+
+    @staticmethod
+    def is_shared(file_path, exclude_id=None):
+        """True kalau file_path masih dipakai row evidence lain (jangan hapus file fisiknya)"""
+        query = RNDEvidenceFile.query.filter(RNDEvidenceFile.file_path == file_path)
+        if exclude_id is not None:
+            query = query.filter(RNDEvidenceFile.id != exclude_id)
+        return query.first() is not None
+
+    def remove_blob_if_unreferenced(self, file_path):
+        """
+        Hapus file fisik evidence yang row-nya sudah di-commit terhapus, kecuali masih dipakai
+        row lain (dedupe). Panggil setelah commit: upload yang men-dedupe ke blob ini sebelumnya
+        sudah terlihat di is_shared, dan upload sesudahnya mengecek ulang keberadaan file
+
+        Returns:
+            bool - True kalau file dihapus
+        """
+        if not file_path or self.is_shared(file_path) or not os.path.exists(file_path):
+            return False
+        try:
+            os.remove(file_path)
+        except OSError as e:
+            logger.warning(f"Failed to remove evidence blob {file_path}: {str(e)}")
+            return False
+        return True
+
+
+evidence_storage = EvidenceStorage()
@@ -0,0 +1,256 @@
+"""
+Evidence Thumbnails - Background Thumbnail/Preview Generation
+Thumbnail evidence R&D (beberapa ukuran, WebP + JPEG) dibuat oleh process pool saat upload,
+bukan di thread request saat GET pertama. Hasilnya disimpan di cache lokal yang
+content-addressed (key = SHA-256 isi file), bukan di samping file asli di network share,
+dengan batas ukuran total (LRU berdasarkan mtime; hit menyentuh mtime).
+
+Karena key mengikuti isi file, URL thumbnail yang membawa ?v=<key> aman di-cache browser
+selamanya (Cache-Control immutable).
+"""
+
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from services.disk_cache import ShardedLRUCacheMixin, touch_if_stale
+
+logger = logging.getLogger(__name__)
+
+# Nama ukuran -> sisi terpanjang (px)
+THUMBNAIL_SIZES = {'sm': 200, 'md': 480, 'lg': 1024}
+DEFAULT_SIZE = 'sm'
+
+# Format -> (format Pillow, ekstensi, mimetype)
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', 'webp', 'image/webp'),
+    'jpeg': ('JPEG', 'jpg', 'image/jpeg'),
+}
+THUMBNAIL_QUALITY = 82
+
+IMAGE_FILE_TYPES = {'jpg', 'jpeg', 'png', 'bmp', 'gif', 'webp', 'photo'}
+
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+def source_kind(file_type, original_filename=''):
+    """'pdf', 'image', atau None kalau file tidak punya thumbnail"""
+    file_type = (file_type or '').lower()
+    if file_type == 'pdf' or (original_filename or '').lower().endswith('.pdf'):
+        return 'pdf'
+    if file_type in IMAGE_FILE_TYPES:
+        return 'image'
+    return None
+
+
+def thumbnail_key(evidence):
+    """
+    Key cache: SHA-256 isi file (content_sha256 saat upload). Evidence lama tanpa hash
+    memakai hash dari path + ukuran + waktu upload (tidak perlu membaca file di share).
+    """
+    if getattr(evidence, 'content_sha256', None):
+        return evidence.content_sha256
+    fingerprint = f"{evidence.file_path}|{evidence.file_size}|{evidence.uploaded_at}"
+    return hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()
+
+
+def thumbnail_path(cache_dir, key, size, fmt):
+    """Lokasi thumbnail di cache: <cache_dir>/<2 char pertama key>/<key>_<size>.<ext>"""
+    return os.path.join(cache_dir, key[:2], f"{key}_{size}.{THUMBNAIL_FORMATS[fmt][1]}")
+
+
+def _open_source(source_path, kind, max_side):
+    """Buka file sumber sebagai PIL Image RGB, cukup besar untuk ukuran terbesar"""
+    from PIL import Image
+
+    if kind == 'pdf':
+        try:
+            import fitz  # PyMuPDF
+        except ImportError:
+            from pdf2image import convert_from_path
+            pages = convert_from_path(source_path, first_page=1, last_page=1, size=max_side)
+            if not pages:
+                raise ValueError(f"PDF has no pages: {source_path}")
+            return pages[0].convert('RGB')
+
+        with fitz.open(source_path) as pdf_document:
+            page = pdf_document[0]
+            # Rasterize langsung ke resolusi yang dibutuhkan, bukan 2x lalu diperkecil
+            zoom = max_side / max(page.rect.width, page.rect.height, 1)
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            return Image.open(io.BytesIO(pix.tobytes('ppm'))).convert('RGB')
+
+    img = Image.open(source_path)
+    # JPEG bisa di-decode langsung di skala kecil (jauh lebih cepat untuk foto kamera)
+    img.draft('RGB', (max_side, max_side))
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    return img
+
+
+def render_thumbnails(source_path, kind, cache_dir, key):
+    """
+    Buat semua ukuran x format thumbnail untuk satu file. Dijalankan di process pool.
+
+    Returns:
+        int - total byte yang ditulis ke cache
+    """
+    from PIL import Image
+
+    img = _open_source(source_path, kind, max(THUMBNAIL_SIZES.values()))
+    os.makedirs(os.path.join(cache_dir, key[:2]), exist_ok=True)
+
+    written = 0
+    # Dari ukuran terbesar ke terkecil, tiap ukuran diperkecil dari hasil sebelumnya
+    for size, max_side in sorted(THUMBNAIL_SIZES.items(), key=lambda item: -item[1]):
+        img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        for fmt, (pil_format, _, _) in THUMBNAIL_FORMATS.items():
+            target = thumbnail_path(cache_dir, key, size, fmt)
+            tmp_path = f"{target}.{os.getpid()}.tmp"
+            img.save(tmp_path, pil_format, quality=THUMBNAIL_QUALITY)
+            os.replace(tmp_path, target)  # atomic: pembaca tidak pernah melihat file setengah jadi
+            written += os.path.getsize(target)
+    img.close()
+    return written
+
+
+class EvidenceThumbnailService(ShardedLRUCacheMixin):
+    """
+    Antrian thumbnail evidence: submit() saat upload, get_path() saat GET
+
+    EVIDENCE_THUMBNAIL_WORKERS = 0 menjalankan render langsung di thread pemanggil
+    (untuk development/test tanpa process pool).
+    """
+
+    CACHE_LABEL = 'Evidence thumbnail cache'
+
+    def __init__(self, max_workers=2):
+        self.cache_dir = None
+        self.max_bytes = DEFAULT_CACHE_MAX_BYTES
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = {}  # key -> Future
+        self._cache_bytes = None  # estimasi total ukuran cache (None = belum di-scan)
+
+    def init_app(self, app):
+        self.cache_dir = app.config.get('EVIDENCE_THUMBNAIL_CACHE_DIR') or os.path.join(
+            app.instance_path, 'evidence_thumbnails'
+        )
+        self.max_bytes = app.config.get('EVIDENCE_THUMBNAIL_CACHE_MAX_BYTES', self.max_bytes)
+        self.max_workers = app.config.get('EVIDENCE_THUMBNAIL_WORKERS', self.max_workers)
+        app.extensions['evidence_thumbnails'] = self
+
+    def _get_executor(self):
+        if self.max_workers <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                # spawn: aman dipakai dari proses web yang punya banyak thread
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def is_ready(self, key, size=DEFAULT_SIZE, fmt='webp'):
+        return os.path.exists(thumbnail_path(self.cache_dir, key, size, fmt))
+
+    def submit(self, evidence):
+        """
+        Jadwalkan pembuatan thumbnail (tidak menunggu). Job yang sama tidak dijalankan dua kali.
+
+        Returns:
+            Future atau None (file tanpa thumbnail / sudah ada di cache)
+        """
+        kind = source_kind(evidence.file_type, evidence.original_filename)
+        if kind is None:
+            return None
+        key = thumbnail_key(evidence)
+        if all(self.is_ready(key, size, fmt) for size in THUMBNAIL_SIZES for fmt in THUMBNAIL_FORMATS):
+            return None
+
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            future = Future()
+            self._pending[key] = future
+
+        args = (evidence.file_path, kind, self.cache_dir, key)
+        executor = self._get_executor()
+        if executor is None:
+            self._finish(key, future, *self._run_inline(args))
+            return future
+
+        try:
+            worker_future = executor.submit(render_thumbnails, *args)
+        except BrokenProcessPool:
+            # Worker mati (misal OOM); lepas pool lama lalu buat pool baru
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False)
+            worker_future = self._get_executor().submit(render_thumbnails, *args)
+        worker_future.add_done_callback(lambda done: self._on_worker_done(key, future, done))
+        return future
+
+    def _on_worker_done(self, key, future, done):
+        error = done.exception()
+        self._finish(key, future, None if error else done.result(), error)
+
+    @staticmethod
+    def _run_inline(args):
+        try:
+            return render_thumbnails(*args), None
+        except Exception as e:
+            return None, e
+
+    def _finish(self, key, future, written, error):
+        with self._lock:
+            self._pending.pop(key, None)
+        if error is not None:
+            logger.warning(f"Thumbnail generation failed for {key}: {error}")
+            future.set_exception(error)
+            return
+        future.set_result(written)
+        self._account(written or 0)
+
+    def get_path(self, evidence, size=DEFAULT_SIZE, fmt='webp', wait=None):
+        """
+        Path thumbnail di cache. Kalau belum ada, dijadwalkan di background; wait (detik) hanya
+        untuk pemanggil non-request (CLI/test) - route mengembalikan placeholder tanpa menunggu.
+
+        Returns:
+            str atau None (belum siap / gagal / file tanpa thumbnail)
+        """
+        key = thumbnail_key(evidence)
+        path = thumbnail_path(self.cache_dir, key, size, fmt)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            future = self.submit(evidence)
+            if future is None or not wait:
+                return path if os.path.exists(path) else None
+            try:
+                future.result(timeout=wait)
+            except Exception:
+                return None
+            return path if os.path.exists(path) else None
+
+        touch_if_stale(path, mtime)
+        return path
+
+
+evidence_thumbnails = EvidenceThumbnailService()
@@ -0,0 +1,244 @@
+"""
+Export Cache - Cache Hasil Export Periode Tertutup
+Laporan bulan lalu (KPI CTP, stock opname, chemical bon, log problem CTP) praktis tidak berubah,
+tapi setiap download supervisor menjalankan ulang query + render. Hasil export periode tertutup
+disimpan di cache lokal yang content-addressed:
+
+    key = SHA-256(endpoint, filter ternormalisasi, versi data)
+
+Versi data = fingerprint tabel sumber dalam rentang filter (jumlah row, max(updated_at), max(id)),
+jadi koreksi data lama otomatis menghasilkan key baru; file lama tidak dipakai lagi dan
+akhirnya ter-evict. Hit dikirim langsung dari disk (send_file) dengan ETag = key dan
+Last-Modified = waktu file dibuat, sehingga browser bisa revalidasi dengan 304.
+
+Batas ukuran total cache: LRU berdasarkan mtime (hit menyentuh mtime), helper yang sama
+dengan cache thumbnail evidence (services/disk_cache.py).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import namedtuple
+from datetime import date, datetime
+
+import click
+import pytz
+from flask import send_file
+from flask.cli import AppGroup
+from sqlalchemy import func
+
+from services.disk_cache import ShardedLRUCacheMixin, touch_if_stale
+from services.export_jobs import normalize_params
+
+logger = logging.getLogger(__name__)
+jakarta_tz = pytz.timezone('Asia/Jakarta')
+
+DEFAULT_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+META_SUFFIX = '.json'
+# Ikut masuk key: naikkan kalau layout/isi laporan yang di-cache berubah
+CACHE_FORMAT_VERSION = 1
+
+CachedExport = namedtuple('CachedExport', 'key path filename mimetype created_at')
+
+
+def is_closed_period(last_day):
+    """
+    Periode tertutup = berakhir sebelum bulan berjalan (waktu Jakarta)
+
+    Args:
+        last_day: date/datetime - hari terakhir periode (inklusif)
+    """
+    if last_day is None:
+        return False
+    if isinstance(last_day, datetime):
+        last_day = last_day.date()
+    today = datetime.now(jakarta_tz).date()
+    return last_day < today.replace(day=1)
+
+
+def data_fingerprint(query, model):
+    """
+    Fingerprint row query sumber export: [jumlah row, max(updated_at), max(id)]
+
+    Insert menambah count/max(id), update menggeser max(updated_at), delete mengurangi count.
+    Cukup satu query agregat (memakai index kolom tanggal filter), tanpa membaca row.
+    """
+    count, last_update, last_id = query.with_entities(
+        func.count(model.id), func.max(model.updated_at), func.max(model.id)
+    ).order_by(None).one()
+    if isinstance(last_update, (date, datetime)):
+        last_update = last_update.isoformat()
+    return [count, last_update, last_id]
+
+
+class ExportCacheService(ShardedLRUCacheMixin):
+    """
+    Cache file export di <cache_dir>/<2 char pertama key>/<key>.<ext> + metadata <key>.json
+
+    Pemakaian:
+        key = export_cache.cache_key('export.export_kpi_ctp', filters, version)
+        entry = export_cache.get(key)
+        if entry is None:
+            entry = export_cache.put_file(key, path, download_name, mimetype)
+        return export_cache.send(entry)
+    """
+
+    CACHE_LABEL = 'Export cache'
+    # Metadata dulu: entry tidak pernah terlihat tanpa file
+    REMOVE_FIRST_SUFFIX = META_SUFFIX
+
+    def __init__(self):
+        self.cache_dir = None
+        self.max_bytes = DEFAULT_CACHE_MAX_BYTES
+        self._lock = threading.Lock()
+        self._cache_bytes = None  # estimasi total ukuran cache (None = belum di-scan)
+
+    def init_app(self, app):
+        self.cache_dir = app.config.get('EXPORT_CACHE_DIR') or os.path.join(app.instance_path, 'export_cache')
+        self.max_bytes = app.config.get('EXPORT_CACHE_MAX_BYTES', self.max_bytes)
+        app.extensions['export_cache'] = self
+
+    @property
+    def enabled(self):
+        """False sebelum init_app atau kalau EXPORT_CACHE_MAX_MB = 0 (cache dimatikan)"""
+        return bool(self.cache_dir) and self.max_bytes > 0
+
+    @staticmethod
+    def cache_key(endpoint, filters, version):
+        """
+        Args:
+            endpoint: str - nama export (endpoint route)
+            filters: dict - filter export; nilai kosong diabaikan
+            version: list/dict JSON-serializable - versi data (data_fingerprint)
+        """
+        raw = json.dumps(
+            [CACHE_FORMAT_VERSION, endpoint, normalize_params(filters), version], sort_keys=True, default=str
+        )
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _paths(self, key, extension=''):
+        shard = os.path.join(self.cache_dir, key[:2])
+        return os.path.join(shard, f"{key}{extension}"), os.path.join(shard, f"{key}{META_SUFFIX}")
+
+    def get(self, key):
+        """
+        Returns:
+            CachedExport atau None kalau belum ada di cache
+        """
+        _, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as meta_file:
+                meta = json.load(meta_file)
+            path, _ = self._paths(key, meta['extension'])
+            mtime = os.stat(path).st_mtime
+        except (OSError, ValueError, KeyError):
+            return None
+
+        touch_if_stale(path, mtime)
+        return CachedExport(
+            key, path, meta['filename'], meta['mimetype'], datetime.fromtimestamp(meta['created_at'], pytz.utc)
+        )
+
+    def put_file(self, key, source_path, filename, mimetype, copy=False):
+        """
+        Simpan file hasil export ke cache (atomic: pembaca tidak pernah melihat file setengah jadi)
+
+        Args:
+            source_path: str - file hasil render; dipindah ke cache kecuali copy=True
+            filename: str - nama file download
+        """
+        path, meta_path = self._paths(key, os.path.splitext(filename)[1])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            if copy:
+                shutil.copyfile(source_path, tmp_path)
+            else:
+                shutil.move(source_path, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return self._write_meta(key, path, meta_path, filename, mimetype)
+
+    def put_buffer(self, key, buffer, filename, mimetype):
+        """Simpan hasil export in-memory (BytesIO) ke cache"""
+        path, meta_path = self._paths(key, os.path.splitext(filename)[1])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        buffer.seek(0)
+        try:
+            with open(tmp_path, 'wb') as cached:
+                shutil.copyfileobj(buffer, cached)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        buffer.seek(0)
+        return self._write_meta(key, path, meta_path, filename, mimetype)
+
+    def _write_meta(self, key, path, meta_path, filename, mimetype):
+        # Metadata ditulis setelah file data: get() hanya melihat entry yang lengkap
+        created_at = time.time()
+        tmp_path = f"{meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as meta_file:
+            json.dump({
+                'filename': filename,
+                'mimetype': mimetype,
+                'extension': os.path.splitext(path)[1],
+                'created_at': created_at
+            }, meta_file)
+        os.replace(tmp_path, meta_path)
+        self._account(os.path.getsize(path))
+        return CachedExport(key, path, filename, mimetype, datetime.fromtimestamp(created_at, pytz.utc))
+
+    @staticmethod
+    def send(entry, hit=True):
+        """
+        Response download dari cache; If-None-Match / If-Modified-Since yang cocok dijawab 304
+
+        Args:
+            hit: bool - untuk header X-Export-Cache (HIT / MISS)
+        """
+        response = send_file(
+            entry.path, mimetype=entry.mimetype, as_attachment=True, download_name=entry.filename,
+            conditional=True, etag=entry.key, last_modified=entry.created_at
+        )
+        response.headers['X-Export-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+    @staticmethod
+    def cache_entry_key(filename):
+        # <key>.<ext> + <key>.json di-evict bersama
+        return os.path.splitext(filename)[0]
+
+    def clear(self):
+        """Hapus seluruh isi cache"""
+        if os.path.isdir(self.cache_dir):
+            shutil.rmtree(self.cache_dir)
+        with self._lock:
+            self._cache_bytes = 0
+
+
+export_cache = ExportCacheService()
+
+
+export_cache_cli = AppGroup('export-cache', help='Maintenance cache export periode tertutup')
+
+
+@export_cache_cli.command('evict')
+def evict_command():
+    """Terapkan batas ukuran cache export (LRU)"""
+    removed = export_cache.enforce_limit()
+    click.echo(f"Evicted {removed} cached exports")
+
+
+@export_cache_cli.command('clear')
+def clear_command():
+    """Kosongkan seluruh cache export"""
+    export_cache.clear()
+    click.echo("Export cache cleared")
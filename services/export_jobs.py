@@ -0,0 +1,426 @@
+"""
+Export Jobs - Background Export Queue
+Export besar (KPI CTP, stock opname, R&D) tidak lagi di-render di request (kena timeout proxy):
+POST /export-jobs hanya insert row ExportJob, ExportJobWorker (thread pool in-process)
+me-render ke file artifact di disk lokal sambil mencatat progress (rows_processed/rows_total),
+client polling GET /export-jobs/<id> lalu download /export-jobs/<id>/download.
+
+- filter yang sama (dan user yang sama untuk export per-user) dijadikan satu job in-flight;
+  user yang ikut memakai job itu dicatat di export_job_requesters supaya bisa polling/download
+- artifact + row dihapus setelah TTL ('flask export-jobs cleanup' atau saat enqueue berikutnya)
+- job 'queued' yang belum dijalankan proses ini (misal setelah restart) di-submit ulang saat di-poll
+
+Jenis export didaftarkan modul route-nya dengan @register_export.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import click
+import pytz
+from flask.cli import AppGroup
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, ExportJob, ExportJobRequester, User
+
+logger = logging.getLogger(__name__)
+jakarta_tz = pytz.timezone('Asia/Jakarta')
+
+DEFAULT_TTL_MINUTES = 60
+# Progress ditulis ke database paling sering sekali per interval ini
+PROGRESS_INTERVAL_SECONDS = 1.0
+# Job 'running' tanpa heartbeat progress selama ini dianggap worker-nya mati
+STALE_RUNNING_SECONDS = 600
+ACTIVE_STATUSES = ('queued', 'running')
+
+ExportType = namedtuple('ExportType', 'name render validate authorize per_user')
+ExportArtifact = namedtuple('ExportArtifact', 'path filename mimetype')
+
+EXPORT_TYPES = {}
+
+
+def _now():
+    """Waktu Jakarta tanpa tzinfo (sama dengan yang disimpan di kolom DateTime)"""
+    return datetime.now(jakarta_tz).replace(tzinfo=None)
+
+
+def register_export(name, validate=None, authorize=None, per_user=False):
+    """
+    Daftarkan renderer export background
+
+    Args:
+        name: str - export_type yang dikirim client
+        validate: callable(params) - raise ValueError kalau filter tidak valid (400 saat POST)
+        authorize: callable(user, params) -> bool - False = 403 saat POST
+        per_user: bool - hasil tergantung user (role/assignment), job tidak dibagi antar user
+
+    Renderer: callable(ExportJobContext) -> ExportArtifact (file di context.artifact_dir)
+    """
+    def decorator(render):
+        EXPORT_TYPES[name] = ExportType(name, render, validate, authorize, per_user)
+        return render
+    return decorator
+
+
+class ExportJobError(Exception):
+    """Request export job ditolak; status = HTTP status untuk response"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def normalize_params(params):
+    """Filter sebagai dict str -> str tanpa nilai kosong (kunci dedupe stabil)"""
+    return {
+        str(key): str(value).strip()
+        for key, value in (params or {}).items()
+        if value is not None and str(value).strip() != ''
+    }
+
+
+def dedupe_key(export_type, params, user_id=None):
+    raw = json.dumps([export_type, params, user_id], sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class ExportJobContext:
+    """
+    Yang diterima renderer: filter, user peminta, folder artifact, dan pencatat progress.
+    Progress ditulis lewat koneksi database terpisah (throttled) supaya tidak mengganggu
+    query yield_per renderer di session utama.
+    """
+
+    def __init__(self, job_id, params, user, artifact_dir):
+        self.job_id = job_id
+        self.params = params
+        self.user = user
+        self.artifact_dir = artifact_dir
+        self.rows_processed = 0
+        self.rows_total = None
+        self._last_write = 0.0
+
+    def update(self, processed=None, total=None, force=False):
+        """Catat progress; ditulis ke database kalau force atau sudah lewat PROGRESS_INTERVAL_SECONDS"""
+        if processed is not None:
+            self.rows_processed = processed
+        if total is not None:
+            self.rows_total = total
+            force = True
+        now = time.monotonic()
+        if not force and now - self._last_write < PROGRESS_INTERVAL_SECONDS:
+            return
+        self._last_write = now
+        with db.engine.begin() as connection:
+            connection.execute(
+                update(ExportJob.__table__)
+                .where(ExportJob.__table__.c.id == self.job_id)
+                .values(rows_processed=self.rows_processed, rows_total=self.rows_total, updated_at=_now())
+            )
+
+    def track(self, items, total=None):
+        """Iterasi items sambil menghitung progress per item"""
+        if total is not None:
+            self.update(0, total)
+        for item in items:
+            yield item
+            self.update(self.rows_processed + 1)
+
+    def save_buffer(self, buffer, filename, mimetype):
+        """Simpan hasil export in-memory (BytesIO) sebagai artifact"""
+        path = os.path.join(self.artifact_dir, f"{self.job_id}{os.path.splitext(filename)[1]}")
+        buffer.seek(0)
+        with open(path, 'wb') as artifact:
+            shutil.copyfileobj(buffer, artifact)
+        return ExportArtifact(path, filename, mimetype)
+
+
+class ExportJobService:
+    """Enqueue, status, dan cleanup export job (perlu app context)"""
+
+    @staticmethod
+    def enqueue(export_type, params, user):
+        """
+        Buat export job, atau kembalikan job in-flight dengan filter yang sama
+
+        Returns:
+            tuple - (ExportJob, True kalau job baru)
+
+        Raises:
+            ExportJobError - jenis export tidak dikenal / filter tidak valid / tidak punya akses
+        """
+        spec = EXPORT_TYPES.get(export_type)
+        if spec is None:
+            raise ExportJobError(f"Unknown export type: {export_type}")
+        params = normalize_params(params)
+        if spec.validate:
+            try:
+                spec.validate(params)
+            except ValueError as e:
+                raise ExportJobError(str(e))
+        if spec.authorize and not spec.authorize(user, params):
+            raise ExportJobError('Access denied for this export', status=403)
+
+        ExportJobService.cleanup_expired()
+        ExportJobService.recover_stale()
+
+        key = dedupe_key(export_type, params, user.id if spec.per_user else None)
+        existing = ExportJob.query.filter_by(inflight_key=key).first()
+        if existing is not None:
+            return ExportJobService._join_job(existing, user), False
+
+        job = ExportJob(
+            id=uuid.uuid4().hex,
+            export_type=export_type,
+            params=json.dumps(params, sort_keys=True),
+            requested_by=user.id,
+            dedupe_key=key,
+            inflight_key=key,
+            status='queued',
+            rows_processed=0
+        )
+        db.session.add(job)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Request lain dengan filter sama menang duluan
+            db.session.rollback()
+            existing = ExportJob.query.filter_by(inflight_key=key).first()
+            if existing is None:
+                raise
+            return ExportJobService._join_job(existing, user), False
+
+        export_job_worker.submit(job.id)
+        return job, True
+
+    @staticmethod
+    def _join_job(job, user):
+        """Catat user sebagai pemakai job in-flight hasil dedupe (boleh polling/download)"""
+        if job.requested_by == user.id or db.session.get(ExportJobRequester, (job.id, user.id)) is not None:
+            return job
+        db.session.add(ExportJobRequester(job_id=job.id, user_id=user.id))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Request paralel user yang sama sudah mencatatnya
+            db.session.rollback()
+        return job
+
+    @staticmethod
+    def _can_read(job, user):
+        if job.requested_by == user.id or user.is_admin():
+            return True
+        return db.session.get(ExportJobRequester, (job.id, user.id)) is not None
+
+    @staticmethod
+    def get_job(job_id, user):
+        """
+        Job yang di-request user (sendiri atau lewat dedupe; admin boleh melihat semua); job queued
+        yang belum dijalankan proses ini di-submit ulang, job running tanpa heartbeat ditandai gagal
+
+        Returns:
+            ExportJob atau None
+        """
+        job = db.session.get(ExportJob, job_id)
+        if job is None or not ExportJobService._can_read(job, user):
+            return None
+        if job.status == 'queued':
+            export_job_worker.submit(job.id)
+        elif job.status == 'running' and ExportJobService._is_stale(job):
+            ExportJobService.recover_stale()
+            db.session.refresh(job)
+        return job
+
+    @staticmethod
+    def _is_stale(job):
+        heartbeat = job.updated_at or job.started_at
+        return heartbeat is not None and heartbeat < _now() - timedelta(seconds=STALE_RUNNING_SECONDS)
+
+    @staticmethod
+    def recover_stale():
+        """Job 'running' tanpa heartbeat (worker mati/restart) ditandai gagal"""
+        now = _now()
+        cutoff = now - timedelta(seconds=STALE_RUNNING_SECONDS)
+        result = db.session.execute(
+            update(ExportJob)
+            .where(ExportJob.status == 'running', ExportJob.updated_at < cutoff)
+            .values(
+                status='failed', inflight_key=None, error='Export worker stopped', finished_at=now,
+                expires_at=now + timedelta(minutes=export_job_worker.ttl_minutes)
+            )
+        )
+        db.session.commit()
+        if result.rowcount:
+            logger.warning(f"Marked {result.rowcount} stale export jobs as failed")
+        return result.rowcount
+
+    @staticmethod
+    def cleanup_expired():
+        """
+        Hapus artifact + row job yang sudah lewat expires_at
+
+        Returns:
+            int - jumlah job yang dihapus
+        """
+        expired = ExportJob.query.filter(ExportJob.expires_at < _now()).all()
+        removed = []
+        for job in expired:
+            if job.artifact_path and os.path.exists(job.artifact_path):
+                try:
+                    os.remove(job.artifact_path)
+                except OSError as e:
+                    logger.warning(f"Failed to remove export artifact {job.artifact_path}: {str(e)}")
+                    continue
+            removed.append(job)
+        if removed:
+            db.session.execute(
+                delete(ExportJobRequester).where(ExportJobRequester.job_id.in_([job.id for job in removed]))
+            )
+            for job in removed:
+                db.session.delete(job)
+        db.session.commit()
+        if removed:
+            logger.info(f"Removed {len(removed)} expired export jobs")
+        return len(removed)
+
+
+class ExportJobWorker:
+    """
+    Thread pool yang menjalankan renderer export
+
+    EXPORT_JOB_WORKERS = 0 menjalankan job langsung di thread pemanggil
+    (untuk development/test tanpa thread pool).
+    """
+
+    def __init__(self, max_workers=2, ttl_minutes=DEFAULT_TTL_MINUTES):
+        self.app = None
+        self.artifact_dir = None
+        self.max_workers = max_workers
+        self.ttl_minutes = ttl_minutes
+        self._executor = None
+        self._lock = threading.Lock()
+        self._submitted = set()  # id job yang sudah di-submit proses ini
+
+    def init_app(self, app):
+        self.app = app
+        self.artifact_dir = app.config.get('EXPORT_JOB_DIR') or os.path.join(app.instance_path, 'export_jobs')
+        self.max_workers = app.config.get('EXPORT_JOB_WORKERS', self.max_workers)
+        self.ttl_minutes = app.config.get('EXPORT_JOB_TTL_MINUTES', self.ttl_minutes)
+        app.extensions['export_jobs'] = self
+
+    def _get_executor(self):
+        if self.max_workers <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='export-job')
+            return self._executor
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def submit(self, job_id):
+        """Jadwalkan job (sekali per proses; klaim di database mencegah job jalan dua kali)"""
+        with self._lock:
+            if job_id in self._submitted:
+                return
+            self._submitted.add(job_id)
+
+        executor = self._get_executor()
+        if executor is None:
+            self.run_job(job_id)
+            return
+        executor.submit(self._run_in_context, job_id)
+
+    def _run_in_context(self, job_id):
+        with self.app.app_context():
+            try:
+                self.run_job(job_id)
+            except Exception as e:
+                logger.error(f"Export job {job_id} crashed: {str(e)}")
+            finally:
+                db.session.remove()
+
+    def claim(self, job_id):
+        now = _now()
+        result = db.session.execute(
+            update(ExportJob)
+            .where(ExportJob.id == job_id, ExportJob.status == 'queued')
+            .values(status='running', started_at=now, updated_at=now)
+        )
+        db.session.commit()
+        return result.rowcount == 1
+
+    def run_job(self, job_id):
+        """
+        Klaim lalu render satu job; hasil/ error dicatat di row job
+
+        Returns:
+            bool - True kalau artifact berhasil dibuat
+        """
+        try:
+            if not self.claim(job_id):
+                return False
+            job = db.session.get(ExportJob, job_id)
+            spec = EXPORT_TYPES.get(job.export_type)
+            user = db.session.get(User, job.requested_by) if job.requested_by else None
+            context = ExportJobContext(job_id, json.loads(job.params), user, self.artifact_dir)
+            os.makedirs(self.artifact_dir, exist_ok=True)
+            if spec is None:
+                raise ValueError(f"Unknown export type: {job.export_type}")
+
+            artifact = spec.render(context)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Export job {job_id} failed: {str(e)}")
+            self._finish(job_id, status='failed', error=str(e)[:2000])
+            return False
+        finally:
+            with self._lock:
+                self._submitted.discard(job_id)
+
+        self._finish(
+            job_id, status='done', artifact_path=artifact.path, filename=artifact.filename,
+            mimetype=artifact.mimetype, file_size=os.path.getsize(artifact.path),
+            rows_processed=context.rows_processed, rows_total=context.rows_total
+        )
+        return True
+
+    def _finish(self, job_id, **values):
+        now = _now()
+        db.session.execute(
+            update(ExportJob)
+            .where(ExportJob.id == job_id)
+            .values(
+                inflight_key=None, updated_at=now, finished_at=now,
+                expires_at=now + timedelta(minutes=self.ttl_minutes), **values
+            )
+        )
+        db.session.commit()
+
+
+export_job_worker = ExportJobWorker()
+
+
+export_jobs_cli = AppGroup('export-jobs', help='Maintenance antrian export background')
+
+
+@export_jobs_cli.command('cleanup')
+def cleanup_command():
+    """Hapus artifact + row export job yang sudah kedaluwarsa dan tandai job macet sebagai gagal"""
+    stale = ExportJobService.recover_stale()
+    removed = ExportJobService.cleanup_expired()
+    click.echo(f"Removed {removed} expired export jobs, marked {stale} stale jobs as failed")
@@ -0,0 +1,424 @@
+"""
+Kartu Stock Ledger - Stok plate/chemical CTP yang di-maintain secara incremental
+Row kartu_stock_* per (tanggal, shift, item_code) adalah ledger-nya:
+- Pemakaian plate di-apply saat CTPProductionLog di-insert/update/delete
+- Pemakaian chemical di-apply saat ChemicalBonCTP di-insert/update/delete
+- Incoming dan stok awal (input admin) di-apply lewat apply_delta / set_opening_balance
+- Setiap perubahan ikut di-carry forward ke shift sesudahnya (stock awal & akhir)
+- Saat shift ditutup (confirm stock / 'flask kartu-stock close-shift'), row shift
+  berikutnya dibuka dengan stok awal = stok akhir shift yang ditutup
+
+Semua perubahan terjadi di transaksi yang sama dengan perubahan sumbernya, sehingga
+GET /api/kartu-stock cukup membaca row yang ada tanpa menghitung ulang atau menulis.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from itertools import groupby
+
+import click
+import pytz
+from flask.cli import AppGroup
+from sqlalchemy import and_, event, insert, or_, update
+from sqlalchemy.orm import Session, joinedload
+
+from models import (
+    db, CTPProductionLog, ChemicalBonCTP, KartuStockPlateFuji, KartuStockPlateSaphira,
+    KartuStockChemicalFuji, KartuStockChemicalSaphira
+)
+from plate_mappings import PlateTypeMapping
+
+logger = logging.getLogger(__name__)
+jakarta_tz = pytz.timezone('Asia/Jakarta')
+
+SHIFTS = ['1', '2']
+
+# Batas shift CTP (sama dengan calculate_usage chemical): Shift 1 06:45-18:45, Shift 2 18:45-06:45
+SHIFT_1_START = time(6, 45)
+SHIFT_2_START = time(18, 45)
+
+PLATE_MODELS = {'fuji': KartuStockPlateFuji, 'saphira': KartuStockPlateSaphira}
+CHEMICAL_MODELS = {'fuji': KartuStockChemicalFuji, 'saphira': KartuStockChemicalSaphira}
+BRAND_MODELS = {
+    'fuji': [KartuStockPlateFuji, KartuStockChemicalFuji],
+    'saphira': [KartuStockPlateSaphira, KartuStockChemicalSaphira]
+}
+LEDGER_MODELS = [KartuStockChemicalFuji, KartuStockChemicalSaphira, KartuStockPlateFuji, KartuStockPlateSaphira]
+
+# plate_type_material di ctp_production_logs -> (model kartu stock, item_code)
+PLATE_ITEMS = {
+    plate_type: (model, item_code)
+    for model in PLATE_MODELS.values()
+    for item_code, plate_type in model.PLATE_TYPE_MAPPING.items()
+}
+
+# item_code chemical bon -> model kartu stock
+CHEMICAL_ITEMS = {
+    item_code: model
+    for model in CHEMICAL_MODELS.values()
+    for item_code in model.CHEMICAL_TYPE_MAPPING
+}
+
+
+def item_catalog(model):
+    """Mapping item_code -> item_name untuk model kartu stock"""
+    if hasattr(model, 'PLATE_TYPE_MAPPING'):
+        return model.PLATE_TYPE_MAPPING
+    return model.CHEMICAL_TYPE_MAPPING
+
+
+def default_per_box(item_code, item_name):
+    """Isi per box plate: Fuji 30 (1630: 15), Saphira PN 40, Saphira 1630 30, lainnya 50"""
+    if item_code in PlateTypeMapping.FUJI_PLATES:
+        return 30 if '1630' not in item_name else 15
+    if '1055 PN' in item_name or '1030 PN' in item_name:
+        return 40
+    if '1630' in item_name:
+        return 30
+    return 50
+
+
+def next_shift(tanggal, shift):
+    """(tanggal, shift) sesudahnya: Shift 1 -> Shift 2 hari yang sama, Shift 2 -> Shift 1 besok"""
+    if shift == '1':
+        return tanggal, '2'
+    return tanggal + timedelta(days=1), '1'
+
+
+def shift_for_timestamp(moment):
+    """
+    (tanggal, shift) kartu stock untuk sebuah timestamp waktu Jakarta
+    Jam 00:00-06:44 masih termasuk Shift 2 hari sebelumnya
+    """
+    clock = moment.time()
+    if SHIFT_1_START <= clock < SHIFT_2_START:
+        return moment.date(), '1'
+    if clock >= SHIFT_2_START:
+        return moment.date(), '2'
+    return moment.date() - timedelta(days=1), '2'
+
+
+def _after(model, tanggal, shift):
+    """Filter row yang secara kronologis sesudah (tanggal, shift)"""
+    return or_(model.tanggal > tanggal, and_(model.tanggal == tanggal, model.shift > shift))
+
+
+def _before(model, tanggal, shift):
+    """Filter row yang secara kronologis sebelum (tanggal, shift)"""
+    return or_(model.tanggal < tanggal, and_(model.tanggal == tanggal, model.shift < shift))
+
+
+class KartuStockLedger:
+    """
+    Operasi ledger kartu stock
+    Semua method tulis tidak commit - ikut transaksi caller
+    """
+
+    @staticmethod
+    def previous_closing_stock(model, item_code, tanggal, shift):
+        """Stok akhir row terakhir sebelum (tanggal, shift), 0 kalau belum ada (index item_code, tanggal, shift)"""
+        closing = db.session.query(model.jumlah_stock_akhir).filter(
+            model.item_code == item_code,
+            _before(model, tanggal, shift)
+        ).order_by(model.tanggal.desc(), model.shift.desc()).limit(1).scalar()
+        return closing or 0
+
+    @staticmethod
+    def ensure_row(model, item_code, tanggal, shift, user_id=None, item_name=None, jumlah_per_box=None):
+        """
+        Pastikan row ledger (tanggal, shift, item_code) ada; row baru dibuka dengan
+        stok awal = stok akhir shift sebelumnya
+
+        Returns:
+            int - ID row
+        """
+        row_id = db.session.query(model.id).filter(
+            model.tanggal == tanggal,
+            model.shift == shift,
+            model.item_code == item_code
+        ).limit(1).scalar()
+        if row_id:
+            return row_id
+
+        opening = KartuStockLedger.previous_closing_stock(model, item_code, tanggal, shift)
+        item_name = item_name or item_catalog(model).get(item_code, item_code)
+        values = {
+            'tanggal': tanggal,
+            'shift': shift,
+            'item_code': item_code,
+            'item_name': item_name,
+            'jumlah_stock_awal': opening,
+            'jumlah_pemakaian': 0,
+            'jumlah_incoming': 0,
+            'jumlah_stock_akhir': opening,
+            'confirmed_by': user_id
+        }
+        if hasattr(model, 'jumlah_per_box'):
+            values['jumlah_per_box'] = jumlah_per_box or default_per_box(item_code, item_name)
+        if model is KartuStockChemicalSaphira:
+            # Kolom confirmed_at chemical Saphira punya default; row ledger baru belum dikonfirmasi
+            values['confirmed_at'] = None
+
+        return db.session.execute(insert(model).values(**values)).inserted_primary_key[0]
+
+    @staticmethod
+    def apply_delta(model, item_code, tanggal, shift, usage=0, incoming=0, incoming_shift=None, user_id=None):
+        """
+        Tambahkan pemakaian/incoming ke row (tanggal, shift) lalu carry forward
+        selisih stok ke semua shift sesudahnya (dua UPDATE)
+        """
+        if not usage and not incoming:
+            return
+
+        row_id = KartuStockLedger.ensure_row(model, item_code, tanggal, shift, user_id=user_id)
+        net = incoming - usage
+        values = {
+            'jumlah_pemakaian': model.jumlah_pemakaian + usage,
+            'jumlah_incoming': model.jumlah_incoming + incoming,
+            'jumlah_stock_akhir': model.jumlah_stock_akhir + net
+        }
+        if incoming_shift:
+            values['incoming_shift'] = incoming_shift
+        db.session.execute(
+            update(model).where(model.id == row_id).values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        KartuStockLedger._carry_forward(model, item_code, tanggal, shift, net)
+
+    @staticmethod
+    def set_opening_balance(model, item_code, tanggal, shift, amount, user_id=None, item_name=None, jumlah_per_box=None):
+        """Set stok awal (input admin) dan carry forward selisihnya ke shift sesudahnya"""
+        row_id = KartuStockLedger.ensure_row(
+            model, item_code, tanggal, shift, user_id=user_id,
+            item_name=item_name, jumlah_per_box=jumlah_per_box
+        )
+        current = db.session.query(model.jumlah_stock_awal).filter(model.id == row_id).scalar()
+        diff = amount - (current or 0)
+        if not diff:
+            return
+        db.session.execute(
+            update(model).where(model.id == row_id).values(
+                jumlah_stock_awal=model.jumlah_stock_awal + diff,
+                jumlah_stock_akhir=model.jumlah_stock_akhir + diff
+            ).execution_options(synchronize_session=False)
+        )
+        KartuStockLedger._carry_forward(model, item_code, tanggal, shift, diff)
+
+    @staticmethod
+    def _carry_forward(model, item_code, tanggal, shift, net):
+        if not net:
+            return
+        db.session.execute(
+            update(model).where(
+                model.item_code == item_code,
+                _after(model, tanggal, shift)
+            ).values(
+                jumlah_stock_awal=model.jumlah_stock_awal + net,
+                jumlah_stock_akhir=model.jumlah_stock_akhir + net
+            ).execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def open_shift(models, tanggal, shift, user_id=None):
+        """Buka row semua item untuk (tanggal, shift) di model-model yang diberikan"""
+        for model in models:
+            for item_code in item_catalog(model):
+                KartuStockLedger.ensure_row(model, item_code, tanggal, shift, user_id=user_id)
+
+    @staticmethod
+    def close_shift(tanggal, shift, models=None, user_id=None):
+        """
+        Tutup shift: pastikan row shift ini lengkap lalu buka shift berikutnya
+        dengan stok awal = stok akhir shift ini
+
+        Returns:
+            tuple - (tanggal, shift) yang dibuka
+        """
+        models = models or LEDGER_MODELS
+        KartuStockLedger.open_shift(models, tanggal, shift, user_id=user_id)
+        opened = next_shift(tanggal, shift)
+        KartuStockLedger.open_shift(models, *opened, user_id=user_id)
+        return opened
+
+    @staticmethod
+    def get_shift_stocks(model, tanggal, shift):
+        """
+        Baca ledger satu shift tanpa menulis apapun
+
+        Item yang row-nya belum dibuka (shift belum berjalan) ditampilkan dengan stok
+        awal = stok akhir terakhir, sebagai object transient yang tidak masuk session
+
+        Returns:
+            list - object model, urut sesuai katalog item
+        """
+        rows = {
+            row.item_code: row for row in model.query.options(joinedload(model.user)).filter(
+                model.tanggal == tanggal,
+                model.shift == shift
+            )
+        }
+
+        stocks = []
+        for item_code, item_name in item_catalog(model).items():
+            row = rows.pop(item_code, None)
+            if row is None:
+                opening = KartuStockLedger.previous_closing_stock(model, item_code, tanggal, shift)
+                row = model(
+                    tanggal=tanggal, shift=shift, item_code=item_code, item_name=item_name,
+                    jumlah_stock_awal=opening, jumlah_pemakaian=0, jumlah_incoming=0,
+                    jumlah_stock_akhir=opening, confirmed_at=None
+                )
+                if hasattr(model, 'jumlah_per_box'):
+                    row.jumlah_per_box = default_per_box(item_code, item_name)
+            stocks.append(row)
+
+        # Item di luar katalog (input manual) tetap ditampilkan
+        stocks.extend(rows.values())
+        return stocks
+
+    @staticmethod
+    def rebuild(models=None):
+        """
+        Hitung ulang seluruh ledger dari sumbernya (maintenance / verifikasi)
+        Pemakaian plate dihitung per shift dengan update_stocks (satu query GROUP BY per shift),
+        chemical dengan calculate_usage; stok awal mengikuti stok akhir row sebelumnya
+        (row pertama tiap item mempertahankan stok awalnya)
+
+        Returns:
+            dict - {'rows': int, 'corrected': int}
+        """
+        result = {'rows': 0, 'corrected': 0}
+        for model in models or LEDGER_MODELS:
+            previous_closing = {}
+            rows = model.query.order_by(model.tanggal, model.shift, model.item_code, model.id).all()
+            for _, shift_rows in groupby(rows, key=lambda row: (row.tanggal, row.shift)):
+                shift_rows = list(shift_rows)
+                before = [(row.jumlah_stock_awal, row.jumlah_pemakaian, row.jumlah_stock_akhir) for row in shift_rows]
+                for row in shift_rows:
+                    if row.item_code in previous_closing:
+                        row.jumlah_stock_awal = previous_closing[row.item_code]
+
+                if hasattr(model, 'update_stocks'):
+                    model.update_stocks(shift_rows)
+                else:
+                    for row in shift_rows:
+                        row.update_stock()
+
+                for row, old in zip(shift_rows, before):
+                    previous_closing[row.item_code] = row.jumlah_stock_akhir
+                    result['rows'] += 1
+                    if old != (row.jumlah_stock_awal, row.jumlah_pemakaian, row.jumlah_stock_akhir):
+                        result['corrected'] += 1
+        return result
+
+
+class LedgerDeltaCollector:
+    """
+    Kumpulkan perubahan pemakaian dari CTPProductionLog / ChemicalBonCTP yang akan di-flush
+    lalu apply ke ledger di transaksi yang sama (session event before_flush)
+    """
+
+    PLATE_FIELDS = ['log_date', 'ctp_shift', 'plate_type_material', 'num_plate_good', 'num_plate_not_good']
+    BON_FIELDS = ['tanggal', 'item_code', 'jumlah', 'created_at']
+
+    def __init__(self):
+        self.deltas = defaultdict(int)  # (model, item_code, tanggal, shift) -> usage
+
+    @staticmethod
+    def _committed_rows(model, fields, objects):
+        """Nilai kolom yang saat ini ada di database untuk object yang berubah/dihapus"""
+        ids = [obj.id for obj in objects if obj.id is not None]
+        if not ids:
+            return {}
+        columns = [getattr(model, field) for field in fields]
+        return {
+            row[0]: dict(zip(fields, row[1:]))
+            for row in db.session.query(model.id, *columns).filter(model.id.in_(ids))
+        }
+
+    def add_plate_usage(self, values, sign):
+        target = PLATE_ITEMS.get(values['plate_type_material'])
+        ctp_shift = values['ctp_shift'] or ''
+        if not target or not values['log_date'] or not ctp_shift.startswith('Shift '):
+            return
+        model, item_code = target
+        usage = (values['num_plate_good'] or 0) + (values['num_plate_not_good'] or 0)
+        self.deltas[(model, item_code, values['log_date'], ctp_shift[len('Shift '):])] += sign * usage
+
+    def add_chemical_usage(self, values, sign):
+        model = CHEMICAL_ITEMS.get(values['item_code'])
+        if not model or not values['tanggal'] or values['created_at'] is None:
+            return
+        # Bon dihitung di shift berdasarkan jam pembuatan, di tanggal bon
+        moment = datetime.combine(values['tanggal'], values['created_at'].time())
+        tanggal, shift = shift_for_timestamp(moment)
+        self.deltas[(model, values['item_code'], tanggal, shift)] += sign * (values['jumlah'] or 0)
+
+    def collect(self, session):
+        for model, fields, add in (
+            (CTPProductionLog, self.PLATE_FIELDS, self.add_plate_usage),
+            (ChemicalBonCTP, self.BON_FIELDS, self.add_chemical_usage),
+        ):
+            new = [obj for obj in session.new if isinstance(obj, model)]
+            dirty = [
+                obj for obj in session.dirty
+                if isinstance(obj, model) and session.is_modified(obj, include_collections=False)
+            ]
+            deleted = [obj for obj in session.deleted if isinstance(obj, model)]
+
+            if model is ChemicalBonCTP:
+                for obj in new:
+                    if obj.created_at is None:
+                        # Samakan dengan default kolom supaya shift bon sudah pasti saat di-ledger
+                        obj.created_at = datetime.now(jakarta_tz)
+
+            committed = self._committed_rows(model, fields, dirty + deleted)
+            for obj in dirty + deleted:
+                if obj.id in committed:
+                    add(committed[obj.id], -1)
+            for obj in new + dirty:
+                add({field: getattr(obj, field) for field in fields}, 1)
+
+    def apply(self):
+        for (model, item_code, tanggal, shift), usage in self.deltas.items():
+            if usage:
+                KartuStockLedger.apply_delta(model, item_code, tanggal, shift, usage=usage)
+
+
+@event.listens_for(Session, 'before_flush')
+def _apply_ledger_deltas(session, flush_context, instances):
+    """Pemakaian dari log produksi / bon chemical masuk ledger di flush yang sama"""
+    if not any(isinstance(obj, (CTPProductionLog, ChemicalBonCTP))
+               for obj in list(session.new) + list(session.dirty) + list(session.deleted)):
+        return
+    collector = LedgerDeltaCollector()
+    collector.collect(session)
+    collector.apply()
+
+
+kartu_stock_cli = AppGroup('kartu-stock', help='Maintenance ledger kartu stock CTP')
+
+
+@kartu_stock_cli.command('close-shift')
+@click.option('--date', 'date_str', default=None, help='Tanggal shift yang ditutup (YYYY-MM-DD), default shift sebelum sekarang')
+@click.option('--shift', default=None, type=click.Choice(SHIFTS))
+def close_shift_command(date_str, shift):
+    """Tutup shift dan buka shift berikutnya dengan stok awal = stok akhir (untuk cron)"""
+    if date_str and shift:
+        tanggal = datetime.strptime(date_str, '%Y-%m-%d').date()
+    else:
+        # Dijalankan setelah pergantian shift: tutup shift yang baru saja selesai
+        current = shift_for_timestamp(datetime.now(jakarta_tz).replace(tzinfo=None))
+        tanggal, shift = (current[0], '1') if current[1] == '2' else (current[0] - timedelta(days=1), '2')
+    opened = KartuStockLedger.close_shift(tanggal, shift)
+    db.session.commit()
+    click.echo(f"Closed {tanggal} shift {shift}, opened {opened[0]} shift {opened[1]}")
+
+
+@kartu_stock_cli.command('rebuild')
+def rebuild_command():
+    """Hitung ulang seluruh ledger kartu stock dari log produksi dan bon chemical"""
+    result = KartuStockLedger.rebuild()
+    db.session.commit()
+    click.echo(f"Checked {result['rows']} ledger rows, corrected {result['corrected']}")
@@ -0,0 +1,301 @@
+"""
+Notification Archive - Retention untuk universal_notifications
+Notifikasi yang sudah dibaca semua recipient-nya dan lebih tua dari N hari dipindah
+(per batch) ke universal_notifications_archive / notification_recipients_archive,
+supaya tabel utama tetap kecil berapapun lama sistem berjalan.
+
+Dijalankan lewat CLI ('flask notifications archive', cocok untuk cron / Task Scheduler)
+atau scheduler in-process (NOTIFICATION_ARCHIVE_INTERVAL_HOURS > 0).
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+import click
+import pytz
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, exists, insert, literal, select
+
+from models import (
+    db, User, UniversalNotification, NotificationRecipient, NotificationUnreadCounter,
+    UniversalNotificationArchive, NotificationRecipientArchive
+)
+
+logger = logging.getLogger(__name__)
+jakarta_tz = pytz.timezone('Asia/Jakarta')
+
+DEFAULT_ARCHIVE_AFTER_DAYS = 90
+DEFAULT_BATCH_SIZE = 1000
+
+NOTIFICATION_COLUMNS = [
+    'id', 'notification_type', 'title', 'message', 'related_resource_type',
+    'related_resource_id', 'triggered_by_user_id', 'notification_metadata',
+    'created_at', 'updated_at'
+]
+RECIPIENT_COLUMNS = ['id', 'notification_id', 'user_id', 'is_read', 'read_at', 'created_at', 'updated_at']
+
+
+def _now():
+    """Waktu Jakarta tanpa tzinfo (sama dengan yang disimpan di kolom DateTime)"""
+    return datetime.now(jakarta_tz).replace(tzinfo=None)
+
+
+class NotificationArchiveService:
+    """
+    Pindahkan notifikasi lama yang sudah dibaca ke tabel arsip
+    - Satu batch = satu transaksi (INSERT ... SELECT ke arsip lalu DELETE dari tabel utama)
+    - Notifikasi yang masih punya recipient unread tidak pernah diarsip,
+      jadi notification_unread_counters tidak berubah
+    """
+
+    @staticmethod
+    def find_archivable_ids(cutoff, limit):
+        """
+        ID notifikasi yang dibuat sebelum cutoff dan tidak punya recipient unread
+
+        Returns:
+            list[int]
+        """
+        has_unread = exists().where(
+            NotificationRecipient.notification_id == UniversalNotification.id,
+            NotificationRecipient.is_read == False
+        )
+        return [
+            notification_id for (notification_id,) in db.session.query(UniversalNotification.id).filter(
+                UniversalNotification.created_at < cutoff,
+                ~has_unread
+            ).order_by(UniversalNotification.id).limit(limit)
+        ]
+
+    @staticmethod
+    def archive_batch(notification_ids):
+        """
+        Pindahkan satu batch notifikasi (beserta recipient-nya) ke arsip, lalu commit
+
+        Recipient yang di-copy/di-delete hanya yang is_read=True; kalau ada recipient unread
+        yang masuk di tengah batch, DELETE notifikasi gagal di foreign key dan batch di-rollback.
+
+        Returns:
+            tuple - (jumlah notifikasi, jumlah recipient) yang dipindah
+        """
+        if not notification_ids:
+            return 0, 0
+
+        archived_at = literal(_now(), db.DateTime)
+        try:
+            db.session.execute(
+                insert(UniversalNotificationArchive).from_select(
+                    NOTIFICATION_COLUMNS + ['archived_at'],
+                    select(*[getattr(UniversalNotification, c) for c in NOTIFICATION_COLUMNS], archived_at)
+                    .where(UniversalNotification.id.in_(notification_ids))
+                )
+            )
+            db.session.execute(
+                insert(NotificationRecipientArchive).from_select(
+                    RECIPIENT_COLUMNS + ['archived_at'],
+                    select(*[getattr(NotificationRecipient, c) for c in RECIPIENT_COLUMNS], archived_at)
+                    .where(
+                        NotificationRecipient.notification_id.in_(notification_ids),
+                        NotificationRecipient.is_read == True
+                    )
+                )
+            )
+            recipients = db.session.execute(
+                delete(NotificationRecipient).where(
+                    NotificationRecipient.notification_id.in_(notification_ids),
+                    NotificationRecipient.is_read == True
+                ).execution_options(synchronize_session=False)
+            ).rowcount
+            notifications = db.session.execute(
+                delete(UniversalNotification).where(
+                    UniversalNotification.id.in_(notification_ids)
+                ).execution_options(synchronize_session=False)
+            ).rowcount
+            db.session.commit()
+            return notifications, recipients
+
+        except Exception:
+            db.session.rollback()
+            raise
+
+    @staticmethod
+    def archive_read_notifications(older_than_days=DEFAULT_ARCHIVE_AFTER_DAYS,
+                                   batch_size=DEFAULT_BATCH_SIZE, max_batches=None):
+        """
+        Arsipkan semua notifikasi yang memenuhi syarat, batch demi batch
+
+        Args:
+            older_than_days: int - umur minimal notifikasi (dari created_at)
+            batch_size: int - jumlah notifikasi per transaksi
+            max_batches: int - batasi jumlah batch per run (None = sampai habis)
+
+        Returns:
+            dict - {'notifications', 'recipients', 'batches', 'elapsed_seconds', 'rows_per_second'}
+        """
+        cutoff = _now() - timedelta(days=older_than_days)
+        stats = {'notifications': 0, 'recipients': 0, 'batches': 0}
+        started = time.monotonic()
+
+        while max_batches is None or stats['batches'] < max_batches:
+            notification_ids = NotificationArchiveService.find_archivable_ids(cutoff, batch_size)
+            if not notification_ids:
+                break
+
+            notifications, recipients = NotificationArchiveService.archive_batch(notification_ids)
+            stats['notifications'] += notifications
+            stats['recipients'] += recipients
+            stats['batches'] += 1
+            logger.info(
+                f"Archived batch {stats['batches']}: {notifications} notifications, {recipients} recipients"
+            )
+            if len(notification_ids) < batch_size:
+                break
+
+        elapsed = time.monotonic() - started
+        rows = stats['notifications'] + stats['recipients']
+        stats['elapsed_seconds'] = round(elapsed, 3)
+        stats['rows_per_second'] = round(rows / elapsed, 1) if elapsed > 0 else float(rows)
+        logger.info(
+            f"Notification archive finished: {stats['notifications']} notifications, "
+            f"{stats['recipients']} recipients in {stats['elapsed_seconds']}s "
+            f"({stats['rows_per_second']} rows/s)"
+        )
+        return stats
+
+    @staticmethod
+    def rebuild_unread_counters():
+        """
+        Hitung ulang notification_unread_counters untuk semua user dari notification_recipients
+        (maintenance / verifikasi; normalnya counter di-maintain di transaksi notifikasi)
+
+        Returns:
+            dict - {'users': int, 'corrected': int}
+        """
+        try:
+            actual = {user_id: 0 for (user_id,) in db.session.query(User.id)}
+            actual.update(db.session.query(
+                NotificationRecipient.user_id,
+                db.func.count(NotificationRecipient.id)
+            ).filter(NotificationRecipient.is_read == False).group_by(NotificationRecipient.user_id).all())
+
+            counters = {counter.user_id: counter for counter in NotificationUnreadCounter.query.all()}
+            now = datetime.now(jakarta_tz)
+            corrected = 0
+            for user_id, unread_count in actual.items():
+                counter = counters.get(user_id)
+                if counter is None:
+                    db.session.add(NotificationUnreadCounter(
+                        user_id=user_id, unread_count=unread_count, updated_at=now
+                    ))
+                    corrected += 1
+                elif counter.unread_count != unread_count:
+                    logger.warning(
+                        f"Unread counter drift for user {user_id}: {counter.unread_count} -> {unread_count}"
+                    )
+                    counter.unread_count = unread_count
+                    corrected += 1
+
+            db.session.commit()
+            return {'users': len(actual), 'corrected': corrected}
+
+        except Exception as e:
+            logger.error(f"Error rebuilding unread counters: {str(e)}")
+            db.session.rollback()
+            raise
+
+
+class NotificationArchiveScheduler:
+    """
+    Scheduler hook in-process: jalankan archive_read_notifications setiap N jam
+    Nonaktif kalau NOTIFICATION_ARCHIVE_INTERVAL_HOURS = 0 (pakai cron + CLI)
+    Kalau lebih dari satu proses menjalankan batch yang sama, insert ke arsip bentrok
+    di primary key dan batch tersebut di-rollback - run berikutnya melanjutkan
+    """
+
+    def __init__(self):
+        self.app = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.last_run = None
+
+    def init_app(self, app):
+        self.app = app
+        if app.config.get('NOTIFICATION_ARCHIVE_INTERVAL_HOURS', 0) > 0:
+            app.before_request(self.ensure_started)
+
+    def ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._loop,
+                name='notification-archive-scheduler',
+                daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_once(self):
+        """Satu run archive dengan konfigurasi app; harus dipanggil di dalam app context"""
+        config = self.app.config
+        stats = NotificationArchiveService.archive_read_notifications(
+            older_than_days=config.get('NOTIFICATION_ARCHIVE_AFTER_DAYS', DEFAULT_ARCHIVE_AFTER_DAYS),
+            batch_size=config.get('NOTIFICATION_ARCHIVE_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+        )
+        self.last_run = {'finished_at': _now().isoformat(), **stats}
+        return stats
+
+    def _loop(self):
+        interval = self.app.config['NOTIFICATION_ARCHIVE_INTERVAL_HOURS'] * 3600
+        while not self._stop.wait(interval):
+            try:
+                with self.app.app_context():
+                    try:
+                        self.run_once()
+                    finally:
+                        db.session.remove()
+            except Exception as e:
+                logger.error(f"Scheduled notification archive failed: {str(e)}")
+
+
+archive_scheduler = NotificationArchiveScheduler()
+
+notifications_cli = AppGroup('notifications', help='Maintenance notifikasi (archive, unread counter)')
+
+
+@notifications_cli.command('archive')
+@click.option('--days', type=click.IntRange(min=0), default=None, help='Umur minimal notifikasi yang diarsip (hari)')
+@click.option('--batch-size', type=click.IntRange(min=1), default=None, help='Jumlah notifikasi per transaksi')
+@click.option('--max-batches', type=int, default=None, help='Batasi jumlah batch untuk run ini')
+def archive_command(days, batch_size, max_batches):
+    """Pindahkan notifikasi lama yang sudah dibaca ke tabel arsip"""
+    # --days 0 valid (arsipkan semua yang sudah dibaca): hanya None yang jatuh ke config
+    if days is None:
+        days = current_app.config.get('NOTIFICATION_ARCHIVE_AFTER_DAYS', DEFAULT_ARCHIVE_AFTER_DAYS)
+    if batch_size is None:
+        batch_size = current_app.config.get('NOTIFICATION_ARCHIVE_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    stats = NotificationArchiveService.archive_read_notifications(
+        older_than_days=days,
+        batch_size=batch_size,
+        max_batches=max_batches
+    )
+    click.echo(
+        f"Archived {stats['notifications']} notifications and {stats['recipients']} recipients "
+        f"in {stats['batches']} batches, {stats['elapsed_seconds']}s ({stats['rows_per_second']} rows/s)"
+    )
+
+
+@notifications_cli.command('rebuild-unread-counters')
+def rebuild_unread_counters_command():
+    """Hitung ulang notification_unread_counters dari notification_recipients"""
+    result = NotificationArchiveService.rebuild_unread_counters()
+    click.echo(f"Checked {result['users']} users, corrected {result['corrected']} counters")
@@ -0,0 +1,211 @@
+"""
+Notification Push Hub
+Publish/subscribe in-process untuk push event notifikasi ke client via SSE
+(/api/notifications/stream), menggantikan polling badge dan unread count
+
+Backend bisa diganti (set_backend) supaya deployment multi-worker bisa memakai
+broker lokal terpisah; default-nya InProcessBackend yang cukup untuk 1 worker
+
+Tiap stream SSE menahan satu thread worker sampai STREAM_MAX_SECONDS, jadi endpoint ini
+butuh worker gthread/gevent; jumlah stream terbuka per proses dibatasi StreamLimiter dan
+client di atas batas kembali ke polling
+"""
+
+import abc
+import json
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Channel untuk badge sidebar (semua user), dan prefix channel per user
+BADGE_CHANNEL = 'badges'
+USER_CHANNEL_PREFIX = 'user:'
+
+# Batas antrian per subscriber - client yang lambat tidak boleh menahan memory
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Default batas stream SSE terbuka per proses (NOTIFICATION_STREAM_MAX_CONNECTIONS)
+DEFAULT_MAX_STREAMS = 20
+
+
+def user_channel(user_id):
+    """Nama channel untuk event milik satu user"""
+    return f"{USER_CHANNEL_PREFIX}{user_id}"
+
+
+class Subscription:
+    """
+    Satu koneksi subscriber (satu EventSource di browser)
+    Menerima message dari semua channel yang di-subscribe
+    """
+
+    def __init__(self, backend, channels):
+        self.backend = backend
+        self.channels = list(channels)
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.closed = False
+
+    def deliver(self, message):
+        """Dipanggil backend saat ada message; drop kalau antrian penuh"""
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            logger.warning(f"Dropping push message for slow subscriber on {self.channels}")
+
+    def get(self, timeout=None):
+        """
+        Tunggu message berikutnya
+
+        Returns:
+            dict {'event', 'data'} atau None kalau timeout
+        """
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.backend.unsubscribe(self)
+
+
+class HubBackend(abc.ABC):
+    """
+    Interface backend hub
+    Implementasi lain (misal broker lokal untuk multi-worker) wajib implement 3 method ini
+    """
+
+    @abc.abstractmethod
+    def publish(self, channel, message):
+        """Kirim message ke semua subscriber channel; return jumlah penerima"""
+
+    @abc.abstractmethod
+    def subscribe(self, channels):
+        """Daftarkan subscriber baru untuk channels; return Subscription"""
+
+    @abc.abstractmethod
+    def unsubscribe(self, subscription):
+        """Lepas subscription dari semua channel-nya"""
+
+
+class InProcessBackend(HubBackend):
+    """
+    Backend default: subscriber disimpan di memory proses
+    Cocok untuk single Werkzeug / gunicorn worker (gthread)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}  # channel -> set(Subscription)
+
+    def publish(self, channel, message):
+        with self._lock:
+            targets = list(self._subscribers.get(channel, ()))
+        for subscription in targets:
+            subscription.deliver(message)
+        return len(targets)
+
+    def subscribe(self, channels):
+        subscription = Subscription(self, channels)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def subscriber_count(self):
+        with self._lock:
+            return len({sub for subs in self._subscribers.values() for sub in subs})
+
+
+class NotificationHub:
+    """
+    Facade publish/subscribe yang dipakai service dan routes
+    - publish(channel, event, data)
+    - subscribe([channel, ...]) -> Subscription
+    """
+
+    _backend = InProcessBackend()
+
+    @classmethod
+    def set_backend(cls, backend):
+        """Ganti backend (dipanggil saat startup, sebelum ada subscriber)"""
+        cls._backend = backend
+        logger.info(f"Notification hub backend set to {type(backend).__name__}")
+
+    @classmethod
+    def get_backend(cls):
+        return cls._backend
+
+    @classmethod
+    def publish(cls, channel, event, data):
+        """
+        Publish event ke channel; error di backend tidak boleh menggagalkan request
+
+        Returns:
+            int - jumlah subscriber yang menerima (0 kalau gagal)
+        """
+        try:
+            return cls._backend.publish(channel, {'event': event, 'data': data}) or 0
+        except Exception as e:
+            logger.error(f"Error publishing {event} to {channel}: {str(e)}")
+            return 0
+
+    @classmethod
+    def subscribe(cls, channels):
+        return cls._backend.subscribe(channels)
+
+
+class StreamLimiter:
+    """
+    Batas jumlah stream SSE yang terbuka bersamaan di satu proses
+    Stream di atas batas ditolak supaya thread worker tetap tersisa untuk request biasa
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._open = 0
+
+    def try_acquire(self, max_streams):
+        """
+        Ambil satu slot stream
+
+        Args:
+            max_streams: batas stream terbuka per proses
+
+        Returns:
+            bool - False kalau batas sudah tercapai
+        """
+        with self._lock:
+            if self._open >= max_streams:
+                return False
+            self._open += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self._open = max(self._open - 1, 0)
+
+    def open_count(self):
+        with self._lock:
+            return self._open
+
+
+stream_limiter = StreamLimiter()
+
+
+def format_sse(event, data):
+    """Format satu event Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
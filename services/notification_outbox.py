@@ -0,0 +1,379 @@
+"""
+Notification Outbox - Asynchronous Dispatch Queue
+Request handler hanya menulis row NotificationOutbox di transaksinya sendiri;
+OutboxWorker (thread pool in-process) menjalankan NotificationDispatcher di background,
+dengan retry + exponential backoff. Karena antrian disimpan di database,
+dispatch yang belum selesai tetap jalan setelah restart.
+"""
+
+import json
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytz
+from sqlalchemy import event, func, update
+from sqlalchemy.orm import Session
+
+from models import db, NotificationOutbox
+from services.notification_service import DEFERRED_PUBLISH_KEY, NotificationDispatcher, NotificationService
+
+logger = logging.getLogger(__name__)
+jakarta_tz = pytz.timezone('Asia/Jakarta')
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 600
+
+# Row 'processing' lebih lama dari ini dianggap worker-nya mati dan diambil ulang
+STALE_PROCESSING_SECONDS = 300
+
+
+def _now():
+    """Waktu Jakarta tanpa tzinfo (sama dengan yang disimpan di kolom DateTime)"""
+    return datetime.now(jakarta_tz).replace(tzinfo=None)
+
+
+def backoff_seconds(attempts):
+    """Delay sebelum retry ke-n: 5s, 10s, 20s, ... maksimal BACKOFF_MAX_SECONDS"""
+    return min(BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0)), BACKOFF_MAX_SECONDS)
+
+
+class NotificationOutboxService:
+    """
+    Enqueue dispatch notifikasi ke outbox
+    Tidak commit - row ikut transaksi request handler
+    """
+
+    @staticmethod
+    def enqueue(dispatch_name, dedupe_key=None, **kwargs):
+        """
+        Tambahkan dispatch ke outbox (di session yang sedang aktif)
+
+        Args:
+            dispatch_name: str - nama method NotificationDispatcher (e.g. 'dispatch_rnd_job_created')
+            dedupe_key: str - kalau diisi, enqueue diabaikan bila key yang sama sudah ada
+            **kwargs: argumen untuk method dispatcher (harus JSON serializable)
+
+        Returns:
+            NotificationOutbox object, atau None kalau sudah pernah di-enqueue
+        """
+        if not dispatch_name.startswith('dispatch_') or not hasattr(NotificationDispatcher, dispatch_name):
+            raise ValueError(f"Unknown notification dispatcher: {dispatch_name}")
+
+        if dedupe_key and db.session.query(NotificationOutbox.id).filter_by(dedupe_key=dedupe_key).first():
+            logger.info(f"Outbox entry {dedupe_key} already queued, skipping")
+            return None
+
+        entry = NotificationOutbox(
+            dispatch_name=dispatch_name,
+            payload=json.dumps(kwargs),
+            dedupe_key=dedupe_key,
+            status='pending',
+            attempts=0,
+            next_attempt_at=_now()
+        )
+        db.session.add(entry)
+        db.session.info['notification_outbox_pending'] = True
+        return entry
+
+    @staticmethod
+    def get_queue_depth():
+        """
+        Returns:
+            dict - {'pending': int, 'processing': int, 'failed': int}
+        """
+        rows = db.session.query(NotificationOutbox.status, func.count(NotificationOutbox.id)).filter(
+            NotificationOutbox.status.in_(['pending', 'processing', 'failed'])
+        ).group_by(NotificationOutbox.status).all()
+        depth = {'pending': 0, 'processing': 0, 'failed': 0}
+        depth.update({status: count for status, count in rows})
+        return depth
+
+
+class OutboxMetrics:
+    """Counter dan latency (enqueue -> selesai) dispatch di proses ini"""
+
+    def __init__(self, window=500):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.processed = 0
+        self.failed = 0
+        self.retried = 0
+
+    def record_success(self, latency_seconds):
+        with self._lock:
+            self.processed += 1
+            self._latencies.append(latency_seconds)
+
+    def record_retry(self):
+        with self._lock:
+            self.retried += 1
+
+    def record_failure(self):
+        with self._lock:
+            self.failed += 1
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            processed, failed, retried = self.processed, self.failed, self.retried
+
+        def percentile(pct):
+            if not latencies:
+                return None
+            index = min(len(latencies) - 1, int(round(pct / 100 * (len(latencies) - 1))))
+            return round(latencies[index], 3)
+
+        return {
+            'processed': processed,
+            'failed': failed,
+            'retried': retried,
+            'latency_avg_seconds': round(sum(latencies) / len(latencies), 3) if latencies else None,
+            'latency_p95_seconds': percentile(95),
+            'latency_max_seconds': round(latencies[-1], 3) if latencies else None
+        }
+
+
+class OutboxWorker:
+    """
+    Background worker: poller thread mengambil row outbox yang sudah jatuh tempo
+    dan menjalankannya di ThreadPoolExecutor
+
+    Klaim row memakai UPDATE ... WHERE status='pending' sehingga aman bila ada
+    lebih dari satu proses (misal reloader Werkzeug atau beberapa worker gunicorn)
+    """
+
+    def __init__(self, max_workers=4, poll_interval=2.0):
+        self.app = None
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.metrics = OutboxMetrics()
+        self._executor = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._in_flight = 0
+
+    def init_app(self, app):
+        """
+        Register worker ke app; thread baru dijalankan saat request pertama
+        (supaya command CLI seperti 'flask db upgrade' tidak ikut menjalankan worker)
+        """
+        self.app = app
+        self.max_workers = app.config.get('NOTIFICATION_OUTBOX_WORKERS', self.max_workers)
+        if app.config.get('NOTIFICATION_OUTBOX_ENABLED', True):
+            app.before_request(self.ensure_started)
+
+    @property
+    def in_flight(self):
+        with self._lock:
+            return self._in_flight
+
+    def ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix='notification-outbox'
+            )
+            self._thread = threading.Thread(
+                target=self._poll_loop,
+                name='notification-outbox-poller',
+                daemon=True
+            )
+            self._thread.start()
+        logger.info(f"Notification outbox worker started ({self.max_workers} threads)")
+
+    def stop(self, wait=True):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10 if wait else 0)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def wake(self):
+        """Bangunkan poller tanpa menunggu poll_interval"""
+        self._wake.set()
+
+    def _poll_loop(self):
+        while not self._stop.is_set():
+            claimed = 0
+            try:
+                with self.app.app_context():
+                    try:
+                        self.recover_stale()
+                        free_slots = self.max_workers - self.in_flight
+                        if free_slots > 0:
+                            for entry_id in self.claim_due(limit=free_slots):
+                                self._submit(entry_id)
+                                claimed += 1
+                    finally:
+                        db.session.remove()
+            except Exception as e:
+                logger.error(f"Notification outbox poll error: {str(e)}")
+
+            if not claimed:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _submit(self, entry_id):
+        with self._lock:
+            self._in_flight += 1
+
+        def run():
+            try:
+                with self.app.app_context():
+                    try:
+                        self.run_entry(entry_id)
+                    finally:
+                        db.session.remove()
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                self._wake.set()
+
+        self._executor.submit(run)
+
+    def recover_stale(self):
+        """Kembalikan row 'processing' yang tertinggal (worker mati/restart) ke 'pending'"""
+        cutoff = _now() - timedelta(seconds=STALE_PROCESSING_SECONDS)
+        result = db.session.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.status == 'processing', NotificationOutbox.started_at < cutoff)
+            .values(status='pending', next_attempt_at=_now())
+        )
+        db.session.commit()
+        if result.rowcount:
+            logger.warning(f"Recovered {result.rowcount} stale notification outbox entries")
+
+    def claim_due(self, limit):
+        """
+        Klaim sampai `limit` row pending yang sudah jatuh tempo
+
+        Returns:
+            list[int] - ID row yang berhasil diklaim proses ini
+        """
+        now = _now()
+        candidate_ids = [
+            entry_id for (entry_id,) in db.session.query(NotificationOutbox.id).filter(
+                NotificationOutbox.status == 'pending',
+                NotificationOutbox.next_attempt_at <= now
+            ).order_by(NotificationOutbox.id).limit(limit)
+        ]
+
+        claimed = []
+        for entry_id in candidate_ids:
+            result = db.session.execute(
+                update(NotificationOutbox)
+                .where(NotificationOutbox.id == entry_id, NotificationOutbox.status == 'pending')
+                .values(
+                    status='processing',
+                    started_at=now,
+                    attempts=NotificationOutbox.attempts + 1
+                )
+            )
+            if result.rowcount == 1:
+                claimed.append(entry_id)
+        db.session.commit()
+        return claimed
+
+    def run_entry(self, entry_id):
+        """
+        Jalankan satu dispatch yang sudah diklaim; retry dengan backoff kalau gagal
+
+        Notifikasi + recipient yang dibuat dispatcher dan status 'done' entry di-commit dalam
+        satu transaksi, jadi dispatch yang gagal di tengah jalan tidak meninggalkan notifikasi
+        yang akan dibuat ulang (ganda) saat retry.
+
+        Returns:
+            bool - True kalau dispatch berhasil
+        """
+        entry = db.session.get(NotificationOutbox, entry_id)
+        if entry is None or entry.status != 'processing':
+            return False
+
+        dispatch_name = entry.dispatch_name
+        payload = json.loads(entry.payload)
+        created_at = entry.created_at
+
+        deferred_publish = []
+        db.session.info[DEFERRED_PUBLISH_KEY] = deferred_publish
+        try:
+            getattr(NotificationDispatcher, dispatch_name)(**payload)
+            entry = db.session.get(NotificationOutbox, entry_id)
+            entry.status = 'done'
+            entry.finished_at = _now()
+            entry.last_error = None
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            entry = db.session.get(NotificationOutbox, entry_id)
+            entry.last_error = str(e)[:2000]
+            if entry.attempts >= MAX_ATTEMPTS:
+                entry.status = 'failed'
+                entry.finished_at = _now()
+                self.metrics.record_failure()
+                logger.error(f"Outbox entry {entry_id} ({dispatch_name}) failed permanently: {str(e)}")
+            else:
+                entry.status = 'pending'
+                entry.next_attempt_at = _now() + timedelta(seconds=backoff_seconds(entry.attempts))
+                self.metrics.record_retry()
+                logger.warning(
+                    f"Outbox entry {entry_id} ({dispatch_name}) attempt {entry.attempts} failed, "
+                    f"retry at {entry.next_attempt_at}: {str(e)}"
+                )
+            db.session.commit()
+            return False
+        finally:
+            db.session.info.pop(DEFERRED_PUBLISH_KEY, None)
+
+        for user_ids, notification_id in deferred_publish:
+            NotificationService.publish_unread_counts(user_ids, notification_id=notification_id)
+
+        if created_at:
+            self.metrics.record_success((entry.finished_at - created_at).total_seconds())
+        return True
+
+    def run_pending(self, limit=100):
+        """
+        Proses row yang jatuh tempo secara synchronous di thread ini
+        (untuk test/maintenance; harus dipanggil di dalam app context)
+
+        Returns:
+            int - jumlah dispatch yang berhasil
+        """
+        return sum(1 for entry_id in self.claim_due(limit) if self.run_entry(entry_id))
+
+    def get_metrics(self):
+        """Queue depth (database) + counter/latency proses ini; perlu app context"""
+        data = self.metrics.snapshot()
+        data['queue_depth'] = NotificationOutboxService.get_queue_depth()
+        data['in_flight'] = self.in_flight
+        data['worker_running'] = self._thread is not None and self._thread.is_alive()
+        return data
+
+
+outbox_worker = OutboxWorker()
+
+
+@event.listens_for(Session, 'after_commit')
+def _wake_outbox_after_commit(session):
+    """Row outbox baru terlihat oleh worker setelah transaksi request commit"""
+    if session.info.pop('notification_outbox_pending', False):
+        outbox_worker.wake()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_outbox_flag(session):
+    session.info.pop('notification_outbox_pending', None)
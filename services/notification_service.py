@@ -3,15 +3,25 @@ Universal Notification Service for Impact 360
 Handles creation and distribution of notifications across all modules
 """
 
+import base64
 import json
 import logging
 from datetime import datetime
 import pytz
-from models import db, UniversalNotification, NotificationRecipient, User, Division
+from sqlalchemy import case, exists, insert, literal, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import joinedload
+from models import db, UniversalNotification, NotificationRecipient, NotificationUnreadCounter, User, Division
+from services.notification_hub import NotificationHub, user_channel
 
 logger = logging.getLogger(__name__)
 jakarta_tz = pytz.timezone('Asia/Jakarta')
 
+# Kunci session.info: kalau ada, add_recipients tidak commit dan push SSE-nya ditunda
+# (dipakai OutboxWorker supaya dispatch + status outbox jadi satu transaksi)
+DEFERRED_PUBLISH_KEY = 'notification_deferred_publish'
+
 
 class NotificationService:
     """
@@ -74,35 +84,58 @@ class NotificationService:
     @staticmethod
     def add_recipients(notification_id, user_ids):
         """
-        Add recipients untuk notifikasi
+        Add recipients untuk notifikasi (bulk fan-out)
+        
+        Satu query IN untuk user yang sudah jadi recipient, lalu satu bulk insert
+        untuk sisanya - jumlah round trip tetap, berapapun jumlah user.
+        Duplikat (notification_id, user_id) juga ditolak oleh unique constraint di database.
         
         Args:
             notification_id: int - ID notifikasi
             user_ids: list[int] - List of user IDs
         
         Returns:
-            list - Created NotificationRecipient objects
+            list[int] - User IDs yang baru ditambahkan sebagai recipient
         """
         try:
-            recipients = []
-            for user_id in user_ids:
-                # Avoid duplicates
-                existing = NotificationRecipient.query.filter_by(
-                    notification_id=notification_id,
-                    user_id=user_id
-                ).first()
-                
-                if not existing:
-                    recipient = NotificationRecipient(
-                        notification_id=notification_id,
-                        user_id=user_id
-                    )
-                    db.session.add(recipient)
-                    recipients.append(recipient)
+            unique_ids = list(dict.fromkeys(user_ids))  # Remove duplicates, keep order
+            if not unique_ids:
+                return []
+            
+            existing_ids = {
+                user_id for (user_id,) in db.session.query(NotificationRecipient.user_id).filter(
+                    NotificationRecipient.notification_id == notification_id,
+                    NotificationRecipient.user_id.in_(unique_ids)
+                )
+            }
+            
+            now = datetime.now(jakarta_tz)
+            new_ids = [user_id for user_id in unique_ids if user_id not in existing_ids]
+            if new_ids:
+                db.session.execute(insert(NotificationRecipient), [
+                    {
+                        'notification_id': notification_id,
+                        'user_id': user_id,
+                        'is_read': False,
+                        'created_at': now,
+                        'updated_at': now
+                    }
+                    for user_id in new_ids
+                ])
+                NotificationService._adjust_unread_counters(new_ids, 1)
+            
+            deferred = db.session.info.get(DEFERRED_PUBLISH_KEY)
+            if deferred is not None:
+                # Commit + push dilakukan pemanggil (OutboxWorker) setelah seluruh dispatch berhasil
+                db.session.flush()
+                deferred.append((new_ids, notification_id))
+                return new_ids
             
             db.session.commit()
-            logger.info(f"Added {len(recipients)} recipients to notification {notification_id}")
-            return recipients
+            logger.info(f"Added {len(new_ids)} recipients to notification {notification_id}")
+            
+            NotificationService.publish_unread_counts(new_ids, notification_id=notification_id)
+            return new_ids
             
         except Exception as e:
             logger.error(f"Error adding recipients: {str(e)}")
@@ -128,10 +161,15 @@ class NotificationService:
             ).first()
             
             if recipient:
+                was_unread = not recipient.is_read
                 recipient.is_read = True
                 recipient.read_at = datetime.now(jakarta_tz)
+                if was_unread:
+                    db.session.flush()
+                    NotificationService._adjust_unread_counters([user_id], -1)
                 db.session.commit()
                 logger.info(f"Marked notification {notification_id} as read for user {user_id}")
+                NotificationService.publish_unread_counts([user_id])
                 return True
             
             return False
@@ -163,8 +201,16 @@ class NotificationService:
                 NotificationRecipient.read_at: now
             })
             
+            db.session.execute(
+                update(NotificationUnreadCounter)
+                .where(NotificationUnreadCounter.user_id == user_id)
+                .values(unread_count=0, updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            
             db.session.commit()
             logger.info(f"Marked {updated} notifications as read for user {user_id}")
+            NotificationService.publish_unread_counts([user_id])
             return updated
             
         except Exception as e:
@@ -173,37 +219,155 @@ class NotificationService:
             raise
     
     @staticmethod
-    def get_user_notifications(user_id, limit=50, offset=0, include_read=True):
+    def _adjust_unread_counters(user_ids, delta):
+        """
+        Tambah/kurangi notification_unread_counters di transaksi yang sedang aktif
+        Harus dipanggil setelah perubahan notification_recipients di-flush, karena user
+        yang belum punya row counter dihitung ulang dari notification_recipients
+        
+        Args:
+            user_ids: list[int]
+            delta: int - +1 untuk notifikasi baru, -1 untuk mark as read
+        """
+        if not user_ids:
+            return
+        
+        now = datetime.now(jakarta_tz)
+        new_count = NotificationUnreadCounter.unread_count + delta
+        result = db.session.execute(
+            update(NotificationUnreadCounter)
+            .where(NotificationUnreadCounter.user_id.in_(user_ids))
+            .values(unread_count=case((new_count < 0, 0), else_=new_count), updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        
+        if result.rowcount < len(user_ids):
+            NotificationService._materialize_unread_counters(user_ids, now, delta)
+    
+    @staticmethod
+    def _materialize_unread_counters(user_ids, now, delta):
+        """
+        INSERT ... SELECT counter untuk user yang belum punya row (satu statement)
+        User tanpa notifikasi unread tidak dapat row - get_unread_counts menganggapnya 0
+        """
+        dialect_name = db.session.get_bind().dialect.name
+        db.session.execute(
+            NotificationService._materialize_counter_statement(dialect_name, user_ids, now, delta)
+        )
+    
+    @staticmethod
+    def _materialize_counter_statement(dialect_name, user_ids, now, delta):
+        """
+        Dua worker yang fan-out ke user yang sama bisa sama-sama lolos NOT EXISTS; yang kalah
+        kena duplicate key. Pakai upsert dialect: row yang sudah dibuat transaksi lain cukup
+        ditambah delta milik transaksi ini (bukan IntegrityError yang me-rollback fan-out)
+        
+        Args:
+            dialect_name: str - 'mysql' / 'sqlite' (dialect lain: INSERT biasa)
+            delta: int - increment yang diterapkan ke row counter hasil transaksi lain
+        """
+        has_counter = exists().where(NotificationUnreadCounter.user_id == NotificationRecipient.user_id)
+        columns = ['user_id', 'unread_count', 'updated_at']
+        unread_select = select(
+            NotificationRecipient.user_id,
+            db.func.count(NotificationRecipient.id),
+            literal(now, db.DateTime)
+        ).where(
+            NotificationRecipient.user_id.in_(user_ids),
+            NotificationRecipient.is_read == False,
+            ~has_counter
+        ).group_by(NotificationRecipient.user_id)
+        
+        new_count = NotificationUnreadCounter.unread_count + delta
+        conflict_values = {'unread_count': case((new_count < 0, 0), else_=new_count), 'updated_at': now}
+        if dialect_name == 'mysql':
+            return mysql_insert(NotificationUnreadCounter).from_select(
+                columns, unread_select
+            ).on_duplicate_key_update(**conflict_values)
+        if dialect_name == 'sqlite':
+            return sqlite_insert(NotificationUnreadCounter).from_select(
+                columns, unread_select
+            ).on_conflict_do_update(index_elements=['user_id'], set_=conflict_values)
+        return insert(NotificationUnreadCounter).from_select(columns, unread_select)
+    
+    @staticmethod
+    def encode_cursor(created_at, notification_id):
+        """Cursor keyset (created_at, id) untuk halaman berikutnya"""
+        raw = f"{created_at.isoformat()}|{notification_id}"
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+    
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        Returns:
+            tuple - (datetime created_at, int notification_id)
+        
+        Raises:
+            ValueError - cursor tidak valid
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+            created_at, notification_id = raw.rsplit('|', 1)
+            return datetime.fromisoformat(created_at), int(notification_id)
+        except Exception:
+            raise ValueError(f"Invalid cursor: {cursor}")
+    
+    @staticmethod
+    def get_user_notifications(user_id, limit=50, offset=0, include_read=True, cursor=None):
         """
         Get notifikasi untuk user
         
+        Satu statement per halaman: status recipient dan nama pembuat ikut di-select,
+        diurutkan (created_at, id) supaya bisa keyset pagination tanpa OFFSET.
+        
         Args:
             user_id: int
             limit: int - Max results
-            offset: int - Pagination offset
+            offset: int - Pagination offset (diabaikan kalau cursor diberikan)
             include_read: bool - Include read notifications
+            cursor: str - Cursor dari encode_cursor (item terakhir halaman sebelumnya)
         
         Returns:
             list - Notifications with user's read status
         """
         try:
             query = (
-                db.session.query(UniversalNotification)
+                db.session.query(
+                    UniversalNotification,
+                    NotificationRecipient.is_read,
+                    NotificationRecipient.read_at
+                )
                 .join(NotificationRecipient)
+                .options(joinedload(UniversalNotification.triggered_by))
                 .filter(NotificationRecipient.user_id == user_id)
             )
             
             if not include_read:
                 query = query.filter(NotificationRecipient.is_read == False)
             
-            notifications = query.order_by(
-                UniversalNotification.created_at.desc()
-            ).limit(limit).offset(offset).all()
+            if cursor:
+                cursor_created_at, cursor_id = NotificationService.decode_cursor(cursor)
+                query = query.filter(db.or_(
+                    UniversalNotification.created_at < cursor_created_at,
+                    db.and_(
+                        UniversalNotification.created_at == cursor_created_at,
+                        UniversalNotification.id < cursor_id
+                    )
+                ))
+            
+            query = query.order_by(
+                UniversalNotification.created_at.desc(),
+                UniversalNotification.id.desc()
+            ).limit(limit)
+            
+            if not cursor and offset:
+                query = query.offset(offset)
             
             # Build response dengan recipient status
             result = []
-            for notif in notifications:
-                data = notif.to_dict(include_recipient_status=user_id)
+            for notif, is_read, read_at in query.all():
+                data = notif.to_dict(recipient_status=(is_read, read_at))
+                data['cursor'] = NotificationService.encode_cursor(notif.created_at, notif.id)
                 result.append(data)
             
             return result
@@ -224,17 +388,74 @@ class NotificationService:
             int - Unread count
         """
         try:
-            count = db.session.query(db.func.count(NotificationRecipient.id)).filter(
-                NotificationRecipient.user_id == user_id,
-                NotificationRecipient.is_read == False
-            ).scalar()
-            
-            return count or 0
+            return NotificationService.get_unread_counts([user_id])[user_id]
             
         except Exception as e:
             logger.error(f"Error getting unread count: {str(e)}")
             raise
 
+    
+    @staticmethod
+    def get_unread_counts(user_ids):
+        """
+        Get unread count untuk banyak user sekaligus
+        
+        Dibaca dari notification_unread_counters (lookup primary key); user yang
+        belum punya row counter dihitung dengan satu query GROUP BY ke notification_recipients
+        
+        Args:
+            user_ids: list[int]
+        
+        Returns:
+            dict - {user_id: unread_count}
+        """
+        counts = {user_id: 0 for user_id in user_ids}
+        if not counts:
+            return counts
+        
+        materialized = dict(db.session.query(
+            NotificationUnreadCounter.user_id,
+            NotificationUnreadCounter.unread_count
+        ).filter(NotificationUnreadCounter.user_id.in_(list(counts))).all())
+        counts.update(materialized)
+        
+        missing = [user_id for user_id in counts if user_id not in materialized]
+        if missing:
+            rows = db.session.query(
+                NotificationRecipient.user_id,
+                db.func.count(NotificationRecipient.id)
+            ).filter(
+                NotificationRecipient.user_id.in_(missing),
+                NotificationRecipient.is_read == False
+            ).group_by(NotificationRecipient.user_id).all()
+            
+            for user_id, count in rows:
+                counts[user_id] = count
+        return counts
+    
+    @staticmethod
+    def publish_unread_counts(user_ids, notification_id=None):
+        """
+        Push unread count terbaru ke channel SSE masing-masing user
+        Dipanggil setelah commit; error hanya di-log supaya tidak menggagalkan caller
+        
+        Args:
+            user_ids: list[int]
+            notification_id: int - notifikasi baru yang memicu push (opsional)
+        """
+        if not user_ids:
+            return
+        
+        try:
+            counts = NotificationService.get_unread_counts(user_ids)
+            for user_id, unread_count in counts.items():
+                NotificationHub.publish(user_channel(user_id), 'unread_count', {
+                    'unread_count': unread_count,
+                    'notification_id': notification_id
+                })
+        except Exception as e:
+            logger.error(f"Error publishing unread counts: {str(e)}")
+
 
 class NotificationDispatcher:
     """
@@ -277,33 +498,29 @@ class NotificationDispatcher:
                 notification_metadata=notification_metadata
             )
             
-            # Get users dari division
-            division_users = User.query.filter_by(
-                division_id=division_id,
-                is_active=True
-            ).all()
-            
-            user_ids = [user.id for user in division_users]
-            
-            # Add admin users juga
+            # Get user IDs dari division (+ admin users juga) dalam satu query
+            audience = User.division_id == division_id
             if include_admins:
-                admin_users = User.query.filter_by(
-                    role='admin',
-                    is_active=True
-                ).all()
-                admin_ids = [user.id for user in admin_users]
-                user_ids = list(set(user_ids + admin_ids))  # Remove duplicates
+                audience = db.or_(audience, User.role == 'admin')
+            
+            user_ids = [
+                user_id for (user_id,) in db.session.query(User.id).filter(
+                    audience,
+                    User.is_active == True
+                )
+            ]
             
             # Add recipients
-            NotificationService.add_recipients(notification.id, user_ids)
+            notification_id = notification.id  # Simpan sebelum commit (hindari refresh query)
+            NotificationService.add_recipients(notification_id, user_ids)
             
             logger.info(
-                f"Dispatched notification {notification.id} to {len(user_ids)} users "
+                f"Dispatched notification {notification_id} to {len(user_ids)} users "
                 f"in division {division_id}"
             )
             
             return {
-                'notification_id': notification.id,
+                'notification_id': notification_id,
                 'recipient_count': len(user_ids)
             }
             
@@ -342,20 +559,21 @@ class NotificationDispatcher:
             
             logger.info(f"send_to_admins: Notification created with id={notification.id}")
             
-            admin_users = User.query.filter_by(
-                role='admin',
-                is_active=True
-            ).all()
-            
-            user_ids = [user.id for user in admin_users]
+            user_ids = [
+                user_id for (user_id,) in db.session.query(User.id).filter_by(
+                    role='admin',
+                    is_active=True
+                )
+            ]
             logger.info(f"send_to_admins: Found {len(user_ids)} admin users")
             
-            NotificationService.add_recipients(notification.id, user_ids)
+            notification_id = notification.id  # Simpan sebelum commit (hindari refresh query)
+            NotificationService.add_recipients(notification_id, user_ids)
             
-            logger.info(f"Dispatched notification {notification.id} to {len(user_ids)} admins")
+            logger.info(f"Dispatched notification {notification_id} to {len(user_ids)} admins")
             
             return {
-                'notification_id': notification.id,
+                'notification_id': notification_id,
                 'recipient_count': len(user_ids)
             }
             
@@ -395,14 +613,15 @@ class NotificationDispatcher:
                 notification_metadata=metadata
             )
             
-            NotificationService.add_recipients(notification.id, user_ids)
+            notification_id = notification.id  # Simpan sebelum commit (hindari refresh query)
+            NotificationService.add_recipients(notification_id, user_ids)
             
             logger.info(
-                f"Dispatched notification {notification.id} to {len(user_ids)} specific users"
+                f"Dispatched notification {notification_id} to {len(user_ids)} specific users"
             )
             
             return {
-                'notification_id': notification.id,
+                'notification_id': notification_id,
                 'recipient_count': len(user_ids)
             }
             
@@ -752,15 +971,16 @@ class NotificationDispatcher:
             )
             
             # Add recipients (PICs + admins, excluding author)
-            NotificationService.add_recipients(notification.id, recipient_ids)
+            notification_id = notification.id  # Simpan sebelum commit (hindari refresh query)
+            NotificationService.add_recipients(notification_id, recipient_ids)
             
             logger.info(
-                f"Dispatched team note notification {notification.id} for job {job_id} "
+                f"Dispatched team note notification {notification_id} for job {job_id} "
                 f"to {len(recipient_ids)} recipients (excluding author {note_author_id})"
             )
             
             return {
-                'notification_id': notification.id,
+                'notification_id': notification_id,
                 'recipient_count': len(recipient_ids)
             }
             
@@ -0,0 +1,115 @@
+"""
+Period Filter - Filter periode dashboard/export yang bisa memakai index
+Predicate extract('year'/'month', kolom) == x tidak sargable di MySQL (selalu full table scan).
+Helper di sini mengubah (year, month, date_from, date_to) menjadi range setengah terbuka
+'kolom >= start AND kolom < end' dalam waktu Jakarta - sama dengan nilai yang disimpan
+di kolom Date/DateTime - sehingga index di kolom tanggal bisa dipakai.
+
+Contoh:
+    query.filter(*period_filters(CTPProductionLog.log_date, year=2026, month=3))
+    -> log_date >= '2026-03-01' AND log_date < '2026-04-01'
+"""
+
+from datetime import date, datetime, time, timedelta
+
+import pytz
+from sqlalchemy import DateTime, extract
+
+jakarta_tz = pytz.timezone('Asia/Jakarta')
+
+
+class InvalidPeriodError(ValueError):
+    """Parameter periode tidak valid (tahun/bulan bukan angka, format tanggal salah)"""
+
+
+def _to_int(value, name):
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise InvalidPeriodError(f"Invalid {name}: {value}")
+
+
+def _to_date(value, name):
+    """date / datetime (aware dikonversi ke Jakarta) / string 'YYYY-MM-DD' -> date"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(jakarta_tz)
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise InvalidPeriodError(f"Invalid {name} format: {value}. Use YYYY-MM-DD")
+
+
+def period_range(year=None, month=None, date_from=None, date_to=None, as_datetime=False):
+    """
+    Hitung batas periode setengah terbuka [start, end)
+
+    Args:
+        year: int/str - tahun (opsional)
+        month: int/str - bulan 1-12; hanya membentuk range kalau year juga diisi
+        date_from: date/str - tanggal awal (inklusif)
+        date_to: date/str - tanggal akhir (inklusif, jadi end = date_to + 1 hari)
+        as_datetime: bool - kembalikan datetime naive jam 00:00 (untuk kolom DateTime)
+
+    Returns:
+        tuple - (start, end) berupa date/datetime, masing-masing None kalau tidak dibatasi
+    """
+    year = _to_int(year, 'year')
+    month = _to_int(month, 'month')
+    if month is not None and not 1 <= month <= 12:
+        raise InvalidPeriodError(f"Invalid month: {month}")
+
+    start = end = None
+    if year:
+        start = date(year, month or 1, 1)
+        if month and month < 12:
+            end = date(year, month + 1, 1)
+        else:
+            end = date(year + 1, 1, 1)
+
+    date_from = _to_date(date_from, 'date_from')
+    date_to = _to_date(date_to, 'date_to')
+    if date_from and (start is None or date_from > start):
+        start = date_from
+    if date_to:
+        date_end = date_to + timedelta(days=1)
+        if end is None or date_end < end:
+            end = date_end
+
+    if as_datetime:
+        start = datetime.combine(start, time.min) if start else None
+        end = datetime.combine(end, time.min) if end else None
+    return start, end
+
+
+def period_filters(column, year=None, month=None, date_from=None, date_to=None):
+    """
+    Filter periode untuk satu kolom tanggal
+
+    Args:
+        column: kolom Date/DateTime model (e.g. CTPProductionLog.log_date)
+        year, month, date_from, date_to: lihat period_range
+
+    Returns:
+        list - SQLAlchemy filter expressions (kosong kalau tidak ada filter)
+    """
+    start, end = period_range(year, month, date_from, date_to, as_datetime=isinstance(column.type, DateTime))
+
+    filters = []
+    if start is not None:
+        filters.append(column >= start)
+    if end is not None:
+        filters.append(column < end)
+
+    month = _to_int(month, 'month')
+    if month and not _to_int(year, 'year'):
+        # Bulan tanpa tahun (semua tahun) tidak bisa jadi satu range; tetap pakai extract
+        filters.append(extract('month', column) == month)
+    return filters
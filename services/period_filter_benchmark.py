@@ -0,0 +1,117 @@
+"""
+Benchmark filter periode: bandingkan query plan + waktu eksekusi predicate lama
+(extract('year'/'month', kolom) == x) dengan range setengah terbuka dari period_filters,
+untuk setiap endpoint yang difilter per periode.
+
+Jalankan di database produksi/staging setelah 'flask db upgrade':
+    flask period-filter benchmark --year 2026 --month 3
+"""
+
+import time
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import extract, func, select
+
+from models import (
+    db, CTPProductionLog, CTPProductionDailyRollup, PlateAdjustmentRequest, PlateBonRequest,
+    ChemicalBonCTP, CTPProblemLog
+)
+from models_rnd import RNDJob
+from services.period_filter import period_filters
+
+# (endpoint, kolom tanggal yang difilter)
+PERIOD_ENDPOINTS = [
+    ('/api/chemical-bon-ctp/list', ChemicalBonCTP.tanggal),
+    ('/get-mounting-dashboard-data', PlateAdjustmentRequest.adjustment_start_at),
+    ('/get-kpi-data, /get-stock-opname-data, /api/ctp-not-good-by-machine', CTPProductionLog.log_date),
+    ('/get-ctp-kpi-data (downtime proof)', PlateAdjustmentRequest.tanggal),
+    ('/get-ctp-kpi-data (downtime produksi)', PlateBonRequest.tanggal),
+    ('/get-ctp-plate-usage*, /get-ctp-kpi-data (total)', CTPProductionDailyRollup.log_date),
+    ('/api/ctp-problem-logs, /export-ctp-logs', CTPProblemLog.problem_date),
+    ('/rnd-cloudsphere/api/dashboard-*', RNDJob.started_at),
+]
+
+
+def legacy_filters(column, year=None, month=None):
+    """Predicate lama (tidak sargable), hanya untuk pembanding"""
+    filters = []
+    if year:
+        filters.append(extract('year', column) == year)
+    if month:
+        filters.append(extract('month', column) == month)
+    return filters
+
+
+def _driver_params(compiled):
+    """Bind params sebagai string ISO supaya bisa dikirim langsung ke driver (EXPLAIN)"""
+    def convert(value):
+        return value.isoformat(sep=' ') if hasattr(value, 'hour') else (
+            value.isoformat() if hasattr(value, 'isoformat') else value
+        )
+    if compiled.positional:
+        return tuple(convert(compiled.params[name]) for name in compiled.positiontup)
+    return {name: convert(value) for name, value in compiled.params.items()}
+
+
+def explain(stmt):
+    """
+    Query plan untuk satu statement (EXPLAIN di MySQL, EXPLAIN QUERY PLAN di SQLite)
+
+    Returns:
+        list[str] - satu baris per langkah plan
+    """
+    connection = db.session.connection()
+    compiled = stmt.compile(dialect=connection.dialect)
+    prefix = 'EXPLAIN QUERY PLAN' if connection.dialect.name == 'sqlite' else 'EXPLAIN'
+    result = connection.exec_driver_sql(f"{prefix} {compiled}", _driver_params(compiled))
+    if connection.dialect.name == 'sqlite':
+        return [row[-1] for row in result]
+    return [
+        f"{row._mapping.get('table')}: type={row._mapping.get('type')} key={row._mapping.get('key')} "
+        f"rows={row._mapping.get('rows')} extra={row._mapping.get('Extra')}"
+        for row in result
+    ]
+
+
+def benchmark_period_filters(year, month=None):
+    """
+    Bandingkan plan dan waktu COUNT(*) per endpoint, predicate lama vs range
+
+    Returns:
+        list[dict] - {'endpoint', 'table', 'before': {...}, 'after': {...}}
+    """
+    report = []
+    for endpoint, column in PERIOD_ENDPOINTS:
+        entry = {'endpoint': endpoint, 'table': column.class_.__tablename__}
+        for label, filters in (
+            ('before', legacy_filters(column, year, month)),
+            ('after', period_filters(column, year, month)),
+        ):
+            stmt = select(func.count()).select_from(column.class_).where(*filters)
+            started = time.perf_counter()
+            count = db.session.execute(stmt).scalar()
+            entry[label] = {
+                'rows': count,
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+                'plan': explain(stmt)
+            }
+        report.append(entry)
+    return report
+
+
+period_filter_cli = AppGroup('period-filter', help='Diagnostik filter periode (tahun/bulan)')
+
+
+@period_filter_cli.command('benchmark')
+@click.option('--year', type=int, required=True, help='Tahun yang difilter')
+@click.option('--month', type=int, default=None, help='Bulan yang difilter (opsional)')
+def benchmark_command(year, month):
+    """Tampilkan query plan dan waktu tiap endpoint sebelum/sesudah range filter"""
+    for entry in benchmark_period_filters(year, month):
+        click.echo(f"\n{entry['endpoint']} [{entry['table']}]")
+        for label in ('before', 'after'):
+            result = entry[label]
+            click.echo(f"  {label:<6} {result['rows']} rows, {result['elapsed_ms']} ms")
+            for line in result['plan']:
+                click.echo(f"         {line}")
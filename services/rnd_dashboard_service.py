@@ -0,0 +1,239 @@
+"""
+RND Dashboard Service
+Agregasi KPI dashboard R&D dengan query set-based (GROUP BY / SUM(CASE) di database),
+bukan loop per user x per stage atau satu COUNT per counter di Python.
+"""
+
+import logging
+import threading
+import time
+
+from sqlalchemy import case, event, func, literal_column
+from sqlalchemy.orm import Session
+
+from models import db, User
+from models_rnd import RNDJob, RNDProgressStep, RNDJobProgressAssignment
+from services.period_filter import period_filters
+
+logger = logging.getLogger(__name__)
+
+RND_DIVISION_ID = 6
+
+# Nama stage di dashboard -> RNDProgressStep.sample_type
+# (satu stage menghitung SEMUA step di sample_type tersebut, misal RoHS ICB: Proof, Sample, Quality)
+SCORE_STAGES = {
+    'Design': 'Design',
+    'Mastercard': 'Mastercard',
+    'Blank': 'Blank',
+    'RoHS ICB': 'RoHS ICB',
+    'RoHS Ribbon': 'RoHS Ribbon',
+    'Polymer Ribbon': 'Polymer Ribbon',
+    'Light-Standard-Dark': 'Light-Standard-Dark Reference'
+}
+
+SECONDS_PER_DAY = 24 * 3600
+
+# Cache stats per (year, month); di-drop saat ada RNDJob yang berubah di proses ini,
+# TTL menjaga proses lain (multi worker) tidak membaca angka basi terlalu lama
+DASHBOARD_STATS_CACHE_TTL_SECONDS = 60
+
+
+def seconds_between(start, end):
+    """Selisih detik end - start sebagai SQL expression (MySQL TIMESTAMPDIFF, SQLite julianday)"""
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return (func.julianday(end) - func.julianday(start)) * SECONDS_PER_DAY
+    return func.timestampdiff(literal_column('SECOND'), start, end)
+
+
+class RNDDashboardService:
+    """Query KPI dashboard R&D"""
+
+    _stats_lock = threading.Lock()
+    _stats_cache = {}  # (year, month) -> (data, expires_at)
+
+    @staticmethod
+    def compute_job_stats(year=None, month=None):
+        """
+        Semua counter kartu dashboard dalam satu SELECT (SUM(CASE ...))
+
+        Args:
+            year: int - filter tahun started_at (None = semua data)
+            month: int - filter bulan (hanya dipakai kalau year diisi)
+
+        Returns:
+            dict - total_jobs, in_progress, completed, completed_jobs, rejected,
+                   blank_jobs, rohs_icb_jobs, rohs_ribbon_jobs, overdue_jobs
+        """
+        def count_if(condition):
+            return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+        overdue = (
+            (RNDJob.status == 'completed')
+            & RNDJob.deadline_at.isnot(None)
+            & (RNDJob.finished_at > RNDJob.deadline_at)
+        )
+        query = db.session.query(
+            func.count(RNDJob.id).label('total_jobs'),
+            count_if(RNDJob.status == 'in_progress').label('in_progress'),
+            count_if(RNDJob.status == 'completed').label('completed'),
+            count_if(RNDJob.status == 'rejected').label('rejected'),
+            count_if(RNDJob.sample_type == 'Blank').label('blank_jobs'),
+            count_if(RNDJob.sample_type == 'RoHS ICB').label('rohs_icb_jobs'),
+            count_if(RNDJob.sample_type == 'RoHS Ribbon').label('rohs_ribbon_jobs'),
+            count_if(overdue).label('overdue_jobs')
+        )
+        if year:
+            query = query.filter(*period_filters(RNDJob.started_at, year, month))
+
+        row = query.one()
+        return {
+            'total_jobs': int(row.total_jobs),
+            'in_progress': int(row.in_progress),
+            'completed': int(row.completed),
+            'completed_jobs': int(row.completed),  # Field name expected by frontend
+            'rejected': int(row.rejected),
+            'blank_jobs': int(row.blank_jobs),
+            'rohs_icb_jobs': int(row.rohs_icb_jobs),
+            'rohs_ribbon_jobs': int(row.rohs_ribbon_jobs),
+            'overdue_jobs': int(row.overdue_jobs)
+        }
+
+    @classmethod
+    def get_job_stats(cls, year=None, month=None):
+        """compute_job_stats dengan cache per (year, month)"""
+        key = (year, month if year else None)
+        now = time.monotonic()
+        with cls._stats_lock:
+            cached = cls._stats_cache.get(key)
+        if cached and cached[1] > now:
+            return cached[0]
+
+        data = cls.compute_job_stats(year, month)
+        with cls._stats_lock:
+            cls._stats_cache[key] = (data, now + DASHBOARD_STATS_CACHE_TTL_SECONDS)
+        return data
+
+    @classmethod
+    def invalidate_job_stats(cls):
+        """Drop semua cache stats - dipanggil setelah commit yang mengubah RNDJob"""
+        with cls._stats_lock:
+            cls._stats_cache.clear()
+        logger.debug("RND dashboard stats cache invalidated")
+
+    @staticmethod
+    def _completed_assignment_filters(year=None, month=None):
+        """
+        Assignment selesai (punya started_at & finished_at) di stage yang dihitung;
+        periode berdasarkan finished_at supaya skor masuk ke bulan penyelesaian
+        """
+        filters = [
+            RNDJobProgressAssignment.status == 'completed',
+            RNDJobProgressAssignment.started_at.isnot(None),
+            RNDJobProgressAssignment.finished_at.isnot(None),
+            RNDProgressStep.sample_type.in_(list(SCORE_STAGES.values()))
+        ]
+        if year:
+            filters += period_filters(RNDJobProgressAssignment.finished_at, year, month)
+        return filters
+
+    @staticmethod
+    def get_individual_scores(year=None, month=None):
+        """
+        Rata-rata durasi (hari) assignment per PIC per stage
+
+        Satu query GROUP BY (pic_id, sample_type) untuk AVG durasi + satu query user RND,
+        lalu di-pivot di memory.
+
+        Args:
+            year: int - filter tahun finished_at (opsional)
+            month: int - filter bulan (hanya dipakai kalau year diisi)
+
+        Returns:
+            list[dict] - [{'user_id', 'user_name', 'username', 'scores': {stage: avg_days}}]
+        """
+        duration = seconds_between(RNDJobProgressAssignment.started_at, RNDJobProgressAssignment.finished_at)
+        rows = db.session.query(
+            RNDJobProgressAssignment.pic_id,
+            RNDProgressStep.sample_type,
+            func.avg(duration).label('avg_seconds')
+        ).join(
+            RNDProgressStep, RNDProgressStep.id == RNDJobProgressAssignment.progress_step_id
+        ).filter(
+            *RNDDashboardService._completed_assignment_filters(year, month)
+        ).group_by(
+            RNDJobProgressAssignment.pic_id, RNDProgressStep.sample_type
+        ).all()
+
+        averages = {(pic_id, sample_type): avg_seconds for pic_id, sample_type, avg_seconds in rows}
+
+        rnd_users = User.query.filter_by(division_id=RND_DIVISION_ID, is_active=True).order_by(User.name).all()
+        users_scores = []
+        for user in rnd_users:
+            scores = {}
+            for stage_name, sample_type in SCORE_STAGES.items():
+                avg_seconds = averages.get((user.id, sample_type))
+                scores[stage_name] = round(float(avg_seconds) / SECONDS_PER_DAY, 2) if avg_seconds is not None else 0.0
+            users_scores.append({
+                'user_id': user.id,
+                'user_name': user.name,
+                'username': user.username,
+                'scores': scores
+            })
+        return users_scores
+
+    @staticmethod
+    def log_individual_score_breakdown(year=None, month=None):
+        """
+        Rincian per assignment yang masuk perhitungan skor, ditulis ke logger (mode ?explain=1)
+        Satu query join job + step + PIC, tanpa lazy load per row.
+
+        Returns:
+            int - jumlah assignment yang di-log
+        """
+        rows = db.session.query(
+            RNDJobProgressAssignment.id,
+            RNDJobProgressAssignment.started_at,
+            RNDJobProgressAssignment.finished_at,
+            RNDJob.job_id,
+            RNDProgressStep.sample_type,
+            RNDProgressStep.name,
+            User.name
+        ).join(
+            RNDProgressStep, RNDProgressStep.id == RNDJobProgressAssignment.progress_step_id
+        ).join(
+            RNDJob, RNDJob.id == RNDJobProgressAssignment.job_id
+        ).join(
+            User, User.id == RNDJobProgressAssignment.pic_id
+        ).filter(
+            User.division_id == RND_DIVISION_ID,
+            *RNDDashboardService._completed_assignment_filters(year, month)
+        ).order_by(
+            User.name, RNDProgressStep.sample_type, RNDJobProgressAssignment.finished_at
+        ).all()
+
+        logger.info(f"Individual scores breakdown (year={year}, month={month}): {len(rows)} assignments")
+        for assignment_id, started_at, finished_at, job_id, sample_type, step_name, pic_name in rows:
+            days = (finished_at - started_at).total_seconds() / SECONDS_PER_DAY
+            logger.info(
+                f"  {pic_name} | {sample_type} / {step_name} | job {job_id} assignment {assignment_id} | "
+                f"{started_at:%Y-%m-%d %H:%M} -> {finished_at:%Y-%m-%d %H:%M} = {days:.4f} days"
+            )
+        return len(rows)
+
+
+@event.listens_for(Session, 'before_flush')
+def _mark_rnd_job_changes(session, flush_context, instances):
+    """Tandai session kalau ada RNDJob dibuat/diubah/dihapus (create, update, complete job)"""
+    if any(isinstance(obj, RNDJob) for obj in list(session.new) + list(session.dirty) + list(session.deleted)):
+        session.info['rnd_job_stats_dirty'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_stats_after_commit(session):
+    if session.info.pop('rnd_job_stats_dirty', False):
+        RNDDashboardService.invalidate_job_stats()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_stats_flag(session):
+    session.info.pop('rnd_job_stats_dirty', None)
@@ -21,12 +21,13 @@ class RNDExcelExportService:
         global jakarta_tz
         jakarta_tz = timezone or jakarta_tz
     
-    def export_jobs_to_excel(self, filters=None):
+    def export_jobs_to_excel(self, filters=None, progress=None):
         """
         Export RND jobs to Excel with comprehensive data including progress steps
         
         Args:
             filters (dict): Optional filters for date range, sample type, status
+            progress (callable): Optional progress(rows_processed, rows_total) per job row
             
         Returns:
             io.BytesIO: Excel file buffer
@@ -74,6 +75,9 @@ class RNDExcelExportService:
             # Add data rows
             row_num = 2  # Start from row 2 (after headers)
             
+            if progress:
+                progress(0, len(jobs))
+            
             for i, job in enumerate(jobs, start=1):
                 row_data = self._create_job_row(job, job_progress_map.get(job.id, []), max_progress_steps, i)
                 
@@ -84,6 +88,8 @@ class RNDExcelExportService:
                     self._apply_cell_styling(cell, col_num, value)
                 
                 row_num += 1
+                if progress:
+                    progress(i)
             
             # Apply column formatting
             self._apply_column_formatting(ws, max_progress_steps)
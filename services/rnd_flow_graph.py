@@ -0,0 +1,138 @@
+"""
+RND Flow Graph Cache
+Urutan step workflow R&D di-compile sekali menjadi graph (urutan step, map next/prev,
+step final) dan disimpan per proses, keyed by flow_configuration_id. Complete/toggle task
+cukup lookup dictionary + satu query assignment, tidak query RNDFlowConfiguration dan
+semua RNDFlowStep setiap kali.
+
+Cache di-invalidate oleh route create/update/delete/set-default flow configuration
+(setelah commit). TTL menjaga worker lain (multi proses) tidak memakai graph lama
+terlalu lama.
+"""
+
+import logging
+import threading
+import time
+
+from sqlalchemy import select
+
+from models import db
+from models_rnd import RNDFlowStep
+
+logger = logging.getLogger(__name__)
+
+FLOW_GRAPH_CACHE_TTL_SECONDS = 300
+
+# Workflow statis (fallback kalau job tidak punya flow configuration), urut nama step
+STATIC_WORKFLOW_ORDERS = {
+    'RoHS Ribbon': [
+        'Design & Artwork Approval',
+        'Mastercard Release',
+        'Polymer Order',
+        'Polymer Receiving',
+        'Proof Approval',
+        'Sample Production',
+        'Quality Validation'
+    ],
+    'RoHS ICB': [
+        'Design & Artwork Approval',
+        'Mastercard Release',
+        'Proof Approval',
+        'Sample Production',
+        'Quality Validation'
+    ],
+    'Blank': [
+        'Design & Artwork Approval',
+        'Mastercard Release',
+        'Initial Plotter',
+        'Sample Production',
+        'Quality Validation'
+    ]
+}
+
+
+class FlowGraph:
+    """Urutan step yang sudah di-compile; node = progress_step_id (flow) atau nama step (statis)"""
+
+    __slots__ = ('steps', 'next_map', 'prev_map', 'final_step', 'version')
+
+    def __init__(self, steps, version=0):
+        self.steps = tuple(steps)
+        self.next_map = dict(zip(self.steps, self.steps[1:]))
+        self.prev_map = dict(zip(self.steps[1:], self.steps))
+        self.final_step = self.steps[-1] if self.steps else None
+        self.version = version
+
+    def next_step(self, step):
+        return self.next_map.get(step)
+
+    def prev_step(self, step):
+        return self.prev_map.get(step)
+
+    def is_final(self, step):
+        return self.final_step is not None and step == self.final_step
+
+    def __len__(self):
+        return len(self.steps)
+
+
+STATIC_WORKFLOW_GRAPHS = {
+    sample_type: FlowGraph(step_names) for sample_type, step_names in STATIC_WORKFLOW_ORDERS.items()
+}
+
+
+class RNDFlowGraphCache:
+    """Cache graph flow configuration per proses"""
+
+    _lock = threading.Lock()
+    _graphs = {}  # flow_configuration_id -> (FlowGraph, expires_at)
+    _version = 0
+
+    @classmethod
+    def get(cls, flow_configuration_id):
+        """
+        Graph untuk satu flow configuration (query hanya saat cache miss)
+
+        Returns:
+            FlowGraph - kosong (len 0) kalau flow tidak punya step / tidak ada
+        """
+        now = time.monotonic()
+        with cls._lock:
+            cached = cls._graphs.get(flow_configuration_id)
+            version = cls._version
+        if cached and cached[1] > now:
+            return cached[0]
+
+        step_ids = db.session.execute(
+            select(RNDFlowStep.progress_step_id)
+            .where(RNDFlowStep.flow_configuration_id == flow_configuration_id)
+            .order_by(RNDFlowStep.step_order, RNDFlowStep.id)
+        ).scalars().all()
+        graph = FlowGraph(step_ids, version)
+
+        with cls._lock:
+            # Jangan simpan graph yang di-load sebelum invalidate selesai
+            if cls._version == version:
+                cls._graphs[flow_configuration_id] = (graph, now + FLOW_GRAPH_CACHE_TTL_SECONDS)
+        return graph
+
+    @staticmethod
+    def static_graph(sample_type):
+        """Graph workflow statis (nama step) untuk sample type, None kalau tidak ada"""
+        return STATIC_WORKFLOW_GRAPHS.get(sample_type)
+
+    @classmethod
+    def invalidate(cls, flow_configuration_id=None):
+        """Drop graph satu flow configuration (atau semua) - panggil setelah commit"""
+        with cls._lock:
+            cls._version += 1
+            if flow_configuration_id is None:
+                cls._graphs.clear()
+            else:
+                cls._graphs.pop(flow_configuration_id, None)
+        logger.debug(f"RND flow graph cache invalidated ({flow_configuration_id or 'all'})")
+
+    @classmethod
+    def version(cls):
+        with cls._lock:
+            return cls._version
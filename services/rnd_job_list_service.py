@@ -0,0 +1,213 @@
+"""
+RND Job List Service
+Serializer list job R&D (/rnd-cloudsphere/api/jobs) tanpa N+1:
+- job, assignment, step dan PIC di-load dalam jumlah query tetap
+  (1 SELECT job + 1 selectinload assignment yang join step & PIC), berapapun ukuran halaman
+- pagination wajib dengan keyset cursor (id job terakhir), bukan OFFSET / semua job sekaligus
+- fields= untuk memilih kolom yang dirender view (kanban/tabel)
+"""
+
+from datetime import datetime
+
+import pytz
+from sqlalchemy import or_, select
+from sqlalchemy.orm import joinedload, load_only, selectinload
+
+from models_rnd import RNDJob, RNDJobProgressAssignment
+
+jakarta_tz = pytz.timezone('Asia/Jakarta')
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Field response -> kolom RNDJob yang dibutuhkan
+FIELD_COLUMNS = {
+    'id': ['id'],
+    'job_id': ['job_id'],
+    'item_name': ['item_name'],
+    'sample_type': ['sample_type'],
+    'priority_level': ['priority_level'],
+    'deadline_at': ['deadline_at'],
+    'status': ['status'],
+    'total_tasks': ['total_tasks'],
+    'completed_tasks': ['completed_tasks'],
+    'completion_percentage': ['completion_percentage'],
+    'current_progress_step': ['current_step_id'],
+    'current_pic_name': ['current_step_id'],
+    'pic_assignments': ['current_step_id'],
+    'is_overdue': ['deadline_at', 'status'],
+    'is_full_process': ['is_full_process'],
+    'started_at': ['started_at'],
+    'finished_at': ['finished_at'],
+    'created_at': ['created_at'],
+}
+
+# Field yang butuh progress_assignments (+ step + PIC)
+ASSIGNMENT_FIELDS = {'current_progress_step', 'current_pic_name', 'pic_assignments'}
+
+
+class InvalidListParamError(ValueError):
+    """Parameter list job tidak valid (fields/limit/cursor)"""
+
+
+def _format_datetime(value):
+    return value.strftime('%Y-%m-%d %H:%M') if value else None
+
+
+class RNDJobListService:
+    """Query + serializer list job R&D"""
+
+    @staticmethod
+    def parse_fields(fields):
+        """
+        fields=a,b,c -> set field; kosong = semua field
+
+        Raises:
+            InvalidListParamError - ada field yang tidak dikenal
+        """
+        if not fields:
+            return set(FIELD_COLUMNS)
+        requested = {field.strip() for field in fields.split(',') if field.strip()}
+        unknown = requested - set(FIELD_COLUMNS)
+        if unknown:
+            raise InvalidListParamError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        return requested | {'id'}
+
+    @staticmethod
+    def parse_limit(limit):
+        """limit (default DEFAULT_PAGE_SIZE, maksimal MAX_PAGE_SIZE)"""
+        if limit in (None, ''):
+            return DEFAULT_PAGE_SIZE
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            raise InvalidListParamError(f"Invalid limit: {limit}")
+        if limit < 1:
+            raise InvalidListParamError(f"Invalid limit: {limit}")
+        return min(limit, MAX_PAGE_SIZE)
+
+    @staticmethod
+    def parse_cursor(cursor):
+        """cursor = id job terakhir di halaman sebelumnya"""
+        if cursor in (None, ''):
+            return None
+        try:
+            return int(cursor)
+        except (TypeError, ValueError):
+            raise InvalidListParamError(f"Invalid cursor: {cursor}")
+
+    @staticmethod
+    def build_query(user, search='', status='', priority='', sample_type='', pic_id=None):
+        """
+        Query job dengan filter role + filter UI (tanpa order/limit)
+
+        PIC (non-admin) hanya melihat job yang ia pegang; filter lewat subquery
+        job_id IN (...) supaya tidak perlu DISTINCT di atas join.
+        """
+        query = RNDJob.query
+        if not user.is_admin():
+            pic_id = user.id
+        if pic_id:
+            query = query.filter(RNDJob.id.in_(
+                select(RNDJobProgressAssignment.job_id).where(RNDJobProgressAssignment.pic_id == pic_id)
+            ))
+
+        if search:
+            search_term = f"%{search}%"
+            query = query.filter(or_(
+                RNDJob.job_id.ilike(search_term),
+                RNDJob.item_name.ilike(search_term),
+                RNDJob.notes.ilike(search_term)
+            ))
+        if status:
+            query = query.filter(RNDJob.status == status)
+        if priority:
+            query = query.filter(RNDJob.priority_level == priority)
+        if sample_type:
+            query = query.filter(RNDJob.sample_type == sample_type)
+        return query
+
+    @staticmethod
+    def list_jobs(query, fields, limit=DEFAULT_PAGE_SIZE, cursor=None):
+        """
+        Satu halaman job, terbaru dulu (id DESC, sama dengan urutan dibuat)
+
+        Args:
+            query: query dari build_query
+            fields: set field (parse_fields)
+            limit: int - ukuran halaman
+            cursor: int - id job terakhir halaman sebelumnya (None = halaman pertama)
+
+        Returns:
+            dict - {'data': [...], 'next_cursor': str|None, 'has_next': bool}
+        """
+        columns = {column for field in fields for column in FIELD_COLUMNS[field]} | {'id'}
+        query = query.options(load_only(*[getattr(RNDJob, column) for column in sorted(columns)]))
+        if fields & ASSIGNMENT_FIELDS:
+            query = query.options(
+                selectinload(RNDJob.progress_assignments).options(
+                    joinedload(RNDJobProgressAssignment.pic),
+                    joinedload(RNDJobProgressAssignment.progress_step)
+                )
+            )
+
+        if cursor is not None:
+            query = query.filter(RNDJob.id < cursor)
+        jobs = query.order_by(RNDJob.id.desc()).limit(limit + 1).all()
+
+        has_next = len(jobs) > limit
+        jobs = jobs[:limit]
+        now = datetime.now(jakarta_tz)
+        return {
+            'data': [RNDJobListService.serialize(job, fields, now) for job in jobs],
+            'next_cursor': str(jobs[-1].id) if has_next else None,
+            'has_next': has_next
+        }
+
+    @staticmethod
+    def serialize(job, fields, now):
+        """Dict satu job; hanya membaca kolom/relationship yang sudah di-load"""
+        data = {}
+        if fields & ASSIGNMENT_FIELDS:
+            current_progress = None
+            current_pic_name = None
+            pic_assignments = []
+            for assignment in job.progress_assignments:
+                step_name = assignment.progress_step.name if assignment.progress_step else 'Unknown'
+                if assignment.pic:
+                    pic_assignments.append({
+                        'step_name': step_name,
+                        'pic_name': assignment.pic.name,
+                        'status': assignment.status
+                    })
+                if job.current_step_id and assignment.progress_step_id == job.current_step_id:
+                    current_pic_name = assignment.pic.name if assignment.pic else None
+                    current_progress = {
+                        'step_name': step_name,
+                        'pic_name': current_pic_name,
+                        'status': assignment.status
+                    }
+            data.update({
+                'current_progress_step': current_progress,
+                'current_pic_name': current_pic_name,
+                'pic_assignments': pic_assignments
+            })
+
+        if 'is_overdue' in fields:
+            is_overdue = False
+            if job.deadline_at:
+                # deadline naive disimpan dalam waktu Jakarta
+                deadline = jakarta_tz.localize(job.deadline_at) if job.deadline_at.tzinfo is None else job.deadline_at
+                is_overdue = now > deadline and job.status != 'completed'
+            data['is_overdue'] = is_overdue
+
+        # Kolom yang tidak diminta tidak di-load (load_only), jangan disentuh
+        for field in fields - data.keys():
+            value = getattr(job, field)
+            if field in ('deadline_at', 'started_at', 'finished_at', 'created_at'):
+                value = _format_datetime(value)
+            elif field in ('total_tasks', 'completed_tasks', 'completion_percentage'):
+                value = value or 0
+            data[field] = value
+
+        return {field: data[field] for field in FIELD_COLUMNS if field in fields}
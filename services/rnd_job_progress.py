@@ -0,0 +1,211 @@
+"""
+RND Job Progress
+Progress job R&D (total_tasks, completed_tasks, completion_percentage, current_step_id)
+disimpan di rnd_jobs dan di-update di transaksi yang sama setiap task/assignment berubah
+(create/update job, complete/toggle task, finalize job). List job cukup membaca kolom,
+tanpa walk progress_assignments x task_assignments per job dan tanpa write saat GET.
+
+Backfill / verifikasi: 'flask rnd-progress backfill' dan 'flask rnd-progress verify'
+"""
+
+import logging
+from datetime import datetime
+
+import click
+import pytz
+from flask.cli import AppGroup
+from sqlalchemy import bindparam, case, func, update
+
+from models import db
+from models_rnd import RNDJob, RNDJobProgressAssignment, RNDJobTaskAssignment, RNDProgressStep
+
+logger = logging.getLogger(__name__)
+jakarta_tz = pytz.timezone('Asia/Jakarta')
+
+PROGRESS_FIELDS = ['total_tasks', 'completed_tasks', 'completion_percentage', 'current_step_id']
+
+
+def _percentage(completed_tasks, total_tasks):
+    return round((completed_tasks / total_tasks) * 100, 2) if total_tasks > 0 else 0
+
+
+class RNDJobProgressService:
+    """Hitung dan simpan progress RNDJob"""
+
+    @staticmethod
+    def _task_counts(job_ids=None):
+        """
+        (job_id, total_tasks, completed_tasks) per job dalam satu GROUP BY
+
+        Args:
+            job_ids: list[int] - batasi ke job tertentu (None = semua job)
+        """
+        query = db.session.query(
+            RNDJobProgressAssignment.job_id,
+            func.count(RNDJobTaskAssignment.id),
+            func.coalesce(func.sum(case((RNDJobTaskAssignment.status == 'completed', 1), else_=0)), 0)
+        ).join(
+            RNDJobTaskAssignment, RNDJobTaskAssignment.job_progress_assignment_id == RNDJobProgressAssignment.id
+        )
+        if job_ids is not None:
+            query = query.filter(RNDJobProgressAssignment.job_id.in_(job_ids))
+        return query.group_by(RNDJobProgressAssignment.job_id).all()
+
+    @staticmethod
+    def _current_steps(job_ids=None):
+        """
+        Step pertama (urut step_order) yang belum completed per job
+
+        Returns:
+            dict - job_id -> progress_step_id
+        """
+        query = db.session.query(
+            RNDJobProgressAssignment.job_id,
+            RNDJobProgressAssignment.progress_step_id
+        ).join(
+            RNDProgressStep, RNDProgressStep.id == RNDJobProgressAssignment.progress_step_id
+        ).filter(
+            RNDJobProgressAssignment.status != 'completed'
+        )
+        if job_ids is not None:
+            query = query.filter(RNDJobProgressAssignment.job_id.in_(job_ids))
+        rows = query.order_by(
+            RNDJobProgressAssignment.job_id, RNDProgressStep.step_order, RNDJobProgressAssignment.id
+        ).all()
+
+        current = {}
+        for job_id, progress_step_id in rows:
+            current.setdefault(job_id, progress_step_id)
+        return current
+
+    @staticmethod
+    def compute(job_id):
+        """
+        Progress satu job langsung dari database (ikut membaca UPDATE raw di transaksi yang sama)
+
+        Returns:
+            dict - total_tasks, completed_tasks, completion_percentage, current_step_id
+        """
+        counts = RNDJobProgressService._task_counts([job_id])
+        total_tasks, completed_tasks = (int(counts[0][1]), int(counts[0][2])) if counts else (0, 0)
+        return {
+            'total_tasks': total_tasks,
+            'completed_tasks': completed_tasks,
+            'completion_percentage': _percentage(completed_tasks, total_tasks),
+            'current_step_id': RNDJobProgressService._current_steps([job_id]).get(job_id)
+        }
+
+    @staticmethod
+    def refresh(job, sync_status=True):
+        """
+        Hitung ulang dan set kolom progress job. Tidak commit - ikut transaksi pemanggil.
+
+        Args:
+            job: RNDJob
+            sync_status: bool - sinkronkan status dengan persentase
+                         (100% -> completed + finished_at, < 100% saat completed -> in_progress)
+
+        Returns:
+            dict - nilai progress yang disimpan
+        """
+        progress = RNDJobProgressService.compute(job.id)
+        for field, value in progress.items():
+            if getattr(job, field) != value:
+                setattr(job, field, value)
+
+        if sync_status and progress['total_tasks'] > 0:
+            if progress['completion_percentage'] == 100 and job.status == 'in_progress':
+                logger.info(f"RND job {job.job_id}: all tasks completed, status -> completed")
+                job.status = 'completed'
+                if not job.finished_at:
+                    job.finished_at = datetime.now(jakarta_tz)
+            elif progress['completion_percentage'] < 100 and job.status == 'completed':
+                logger.info(f"RND job {job.job_id}: completion {progress['completion_percentage']}%, status -> in_progress")
+                job.status = 'in_progress'
+                job.finished_at = None
+        return progress
+
+    @staticmethod
+    def find_mismatches():
+        """
+        Bandingkan kolom tersimpan dengan hasil hitung ulang untuk semua job (3 query)
+
+        Returns:
+            list[dict] - {'id', 'job_id', 'stored': {...}, 'expected': {...}} untuk job yang beda
+        """
+        counts = {job_id: (int(total), int(completed)) for job_id, total, completed in RNDJobProgressService._task_counts()}
+        current_steps = RNDJobProgressService._current_steps()
+
+        mismatches = []
+        for row in db.session.query(RNDJob.id, RNDJob.job_id, *[getattr(RNDJob, field) for field in PROGRESS_FIELDS]):
+            total_tasks, completed_tasks = counts.get(row.id, (0, 0))
+            expected = {
+                'total_tasks': total_tasks,
+                'completed_tasks': completed_tasks,
+                'completion_percentage': _percentage(completed_tasks, total_tasks),
+                'current_step_id': current_steps.get(row.id)
+            }
+            stored = {
+                'total_tasks': row.total_tasks or 0,
+                'completed_tasks': row.completed_tasks or 0,
+                'completion_percentage': row.completion_percentage or 0,
+                'current_step_id': row.current_step_id
+            }
+            if stored != expected:
+                mismatches.append({'id': row.id, 'job_id': row.job_id, 'stored': stored, 'expected': expected})
+        return mismatches
+
+    @staticmethod
+    def backfill():
+        """
+        Tulis ulang kolom progress untuk job yang nilainya beda (executemany UPDATE).
+        Status job tidak diubah dan updated_at dipertahankan.
+
+        Returns:
+            int - jumlah job yang diperbaiki
+        """
+        try:
+            mismatches = RNDJobProgressService.find_mismatches()
+            if mismatches:
+                table = RNDJob.__table__
+                db.session.execute(
+                    update(table).where(table.c.id == bindparam('job_pk')).values(
+                        total_tasks=bindparam('new_total_tasks'),
+                        completed_tasks=bindparam('new_completed_tasks'),
+                        completion_percentage=bindparam('new_completion_percentage'),
+                        current_step_id=bindparam('new_current_step_id'),
+                        updated_at=table.c.updated_at
+                    ),
+                    [
+                        {'job_pk': item['id'], **{f'new_{field}': item['expected'][field] for field in PROGRESS_FIELDS}}
+                        for item in mismatches
+                    ]
+                )
+            db.session.commit()
+            return len(mismatches)
+
+        except Exception as e:
+            logger.error(f"Error backfilling RND job progress: {str(e)}")
+            db.session.rollback()
+            raise
+
+
+rnd_progress_cli = AppGroup('rnd-progress', help='Maintenance progress tersimpan job R&D')
+
+
+@rnd_progress_cli.command('backfill')
+def backfill_command():
+    """Hitung ulang total_tasks/completed_tasks/completion_percentage/current_step_id semua job"""
+    fixed = RNDJobProgressService.backfill()
+    click.echo(f"Updated progress for {fixed} jobs")
+
+
+@rnd_progress_cli.command('verify')
+def verify_command():
+    """Laporkan job yang progress tersimpannya tidak sama dengan hasil hitung ulang (tanpa menulis)"""
+    mismatches = RNDJobProgressService.find_mismatches()
+    for item in mismatches:
+        click.echo(f"{item['job_id']}: stored={item['stored']} expected={item['expected']}")
+    click.echo(f"{len(mismatches)} jobs out of sync" if mismatches else "All job progress columns in sync")
+    if mismatches:
+        raise SystemExit(1)
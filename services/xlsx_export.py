@@ -0,0 +1,170 @@
+"""
+XLSX Export - Streaming Workbook untuk export_routes
+Export tahunan tidak lagi me-load semua row (.all()) lalu membangun Workbook openpyxl
+(satu object per sel + style per sel) di memori dan BytesIO:
+
+- row dibaca per batch dengan yield_per (server-side cursor)
+- xlsxwriter constant_memory: setiap row ditulis ke file sementara begitu row berikutnya
+  dimulai, jadi memori worker tetap kecil berapapun jumlah row
+- format sel dibuat sekali per kombinasi (cache), bukan per sel
+- file jadi di disk lokal di-stream ke client per chunk lalu dihapus
+
+Aturan constant_memory: tulis row berurutan (row yang sudah lewat tidak bisa diubah).
+Merge vertikal di atas row yang sudah ditulis pakai merge_written().
+"""
+
+import logging
+import os
+import tempfile
+
+import xlsxwriter
+from flask import Response, current_app
+
+logger = logging.getLogger(__name__)
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+DEFAULT_BATCH_SIZE = 500
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def iter_query(query, batch_size=DEFAULT_BATCH_SIZE):
+    """Iterasi hasil ORM query per batch (yield_per) tanpa me-load semua row"""
+    return query.yield_per(batch_size)
+
+
+def merge_written(worksheet, first_row, first_col, last_row, last_col):
+    """
+    Merge range yang selnya sudah ditulis (nilai di sel kiri atas, sel lain blank berformat).
+
+    merge_range() menulis ulang semua sel range, yang di constant_memory tidak bisa
+    untuk row yang sudah di-flush; <mergeCells> sendiri hanya metadata yang ditulis
+    saat workbook ditutup, jadi cukup didaftarkan.
+    """
+    if first_row == last_row and first_col == last_col:
+        return
+    worksheet.merge.append([first_row, first_col, last_row, last_col])
+
+
+class StreamingWorkbook:
+    """
+    Workbook xlsxwriter constant_memory di file sementara + response streaming
+
+    Pemakaian:
+        with StreamingWorkbook() as book:
+            sheet = book.add_sheet('Data')
+            ...
+            return book.response('export.xlsx')
+
+    Kalau terjadi error sebelum response(), file sementara dihapus saat keluar dari with.
+    """
+
+    def __init__(self, tmpdir=None):
+        tmpdir = tmpdir or current_app.config.get('EXPORT_TMP_DIR') or None
+        if tmpdir:
+            os.makedirs(tmpdir, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(prefix='export_', suffix='.xlsx', dir=tmpdir)
+        os.close(fd)
+        self.workbook = xlsxwriter.Workbook(self.path, {
+            'constant_memory': True,
+            'tmpdir': tmpdir,
+            # Sama dengan openpyxl: teks URL tetap teks, bukan hyperlink
+            'strings_to_urls': False,
+        })
+        self._formats = {}
+        self._closed = False
+        self._handed_off = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if not self._handed_off:
+            self.discard()
+        return False
+
+    def format(self, **properties):
+        """Format xlsxwriter untuk kombinasi properti ini (dibuat sekali per workbook)"""
+        key = tuple(sorted(properties.items()))
+        cell_format = self._formats.get(key)
+        if cell_format is None:
+            cell_format = self._formats[key] = self.workbook.add_format(properties)
+        return cell_format
+
+    def add_sheet(self, title=None):
+        return self.workbook.add_worksheet(title)
+
+    @staticmethod
+    def set_column_widths(worksheet, widths, first_col=0):
+        """
+        Lebar kolom dalam satuan openpyxl column_dimensions.width (nilai mentah di file).
+        xlsxwriter menambah padding 5/7 karakter ke lebar yang diberikan, jadi dikurangi dulu.
+        """
+        for col, width in enumerate(widths, first_col):
+            worksheet.set_column(col, col, width - 5 / 7)
+
+    def write_rows(self, worksheet, first_row, rows, cell_format=None):
+        """
+        Tulis iterable row (list nilai) mulai first_row
+
+        Returns:
+            int - row berikutnya yang kosong
+        """
+        row_index = first_row
+        for values in rows:
+            worksheet.write_row(row_index, 0, values, cell_format)
+            row_index += 1
+        return row_index
+
+    def close(self):
+        if not self._closed:
+            if not self.workbook.worksheets():
+                self.workbook.add_worksheet('Sheet')  # workbook tanpa sheet tidak valid
+            self.workbook.close()
+            self._closed = True
+            # xlsxwriter hanya menghapus file row sementara untuk sheet yang punya data
+            for worksheet in self.workbook.worksheets():
+                if worksheet.row_data_filename and os.path.exists(worksheet.row_data_filename):
+                    worksheet.row_data_fh.close()
+                    os.remove(worksheet.row_data_filename)
+
+    def discard(self):
+        try:
+            self.close()
+        except Exception as e:
+            logger.warning(f"Error closing discarded export workbook: {str(e)}")
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def detach(self):
+        """
+        Tutup workbook dan serahkan file ke pemanggil (tidak dihapus saat keluar dari with)
+
+        Returns:
+            str - path file xlsx
+        """
+        self.close()
+        self._handed_off = True
+        return self.path
+
+    def response(self, download_name):
+        """Tutup workbook lalu stream file ke client per chunk; file dihapus saat response ditutup"""
+        self.close()
+        self._handed_off = True
+        path = self.path
+        size = os.path.getsize(path)
+
+        def generate():
+            with open(path, 'rb') as exported:
+                for chunk in iter(lambda: exported.read(STREAM_CHUNK_SIZE), b''):
+                    yield chunk
+
+        def cleanup():
+            # Juga dipanggil kalau client putus sebelum semua chunk terkirim
+            if os.path.exists(path):
+                os.remove(path)
+
+        response = Response(generate(), mimetype=XLSX_MIMETYPE, direct_passthrough=True)
+        response.call_on_close(cleanup)
+        response.headers['Content-Disposition'] = f'attachment; filename={download_name}'
+        response.headers['Content-Length'] = str(size)
+        return response
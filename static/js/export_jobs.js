@@ -0,0 +1,58 @@
+/**
+ * Export Jobs - export besar dijalankan di background
+ * POST /impact/export-jobs -> poll status (progress) sampai selesai -> download artifact.
+ * Request tidak lagi menunggu file selesai dibuat (tidak kena timeout proxy).
+ */
+const ExportJobs = {
+    pollInterval: 1500,
+
+    /**
+     * Jalankan export job dan download hasilnya
+     * @param {string} type - jenis export (kpi_ctp, stock_opname, rnd_jobs_excel, rnd_job_pdf)
+     * @param {Object} params - filter export
+     * @param {Function} onProgress - dipanggil dengan object job setiap poll
+     * @returns {Promise<Object>} job yang sudah selesai
+     */
+    async run(type, params = {}, onProgress = null) {
+        const response = await fetch('/impact/export-jobs', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ type, params })
+        });
+        const data = await response.json();
+        if (!response.ok || !data.success) {
+            throw new Error(data.error || 'Gagal memulai export');
+        }
+
+        let job = data.job;
+        while (job.status === 'queued' || job.status === 'running') {
+            if (onProgress) onProgress(job);
+            await new Promise(resolve => setTimeout(resolve, this.pollInterval));
+
+            const statusResponse = await fetch(data.status_url);
+            const statusData = await statusResponse.json();
+            if (!statusResponse.ok || !statusData.success) {
+                throw new Error(statusData.error || 'Export job tidak ditemukan');
+            }
+            job = statusData.job;
+        }
+
+        if (job.status !== 'done') {
+            throw new Error(job.error || 'Export gagal');
+        }
+        if (onProgress) onProgress(job);
+
+        // Response attachment: browser men-download tanpa meninggalkan halaman
+        window.location.href = data.download_url;
+        return job;
+    },
+
+    /**
+     * Teks progress untuk tombol/label, e.g. "Memproses 1200/5000 (24%)"
+     */
+    progressText(job) {
+        if (job.status === 'queued') return 'Menunggu antrian...';
+        if (job.rows_total) return `Memproses ${job.rows_processed}/${job.rows_total} (${job.progress}%)`;
+        return 'Memproses...';
+    }
+};
@@ -17,6 +17,9 @@ let currentSortOrder = 'desc';      // Default sort order (descending)
 let currentPage = 1;
 const perPage = 30;
 let totalPages = 1;
+// Cursor keyset per halaman (dari next_cursor halaman sebelumnya), direset saat filter/sort berubah
+let pageCursors = {};
+let pageCursorKey = '';
 
 // --- Variabel Global untuk Menu Kontekstual ---
 let contextMenu = null; // Menyimpan referensi menu kontekstual agar bisa dihapus
@@ -92,13 +95,29 @@ async function loadKpiData() {
     const yearValue = filterYear.value;
     const g7Value = filterG7 ? filterG7.value : '';
 
-    let url = `/impact/get-kpi-data?search=${encodeURIComponent(searchValue)}&month=${encodeURIComponent(monthValue)}&group=${encodeURIComponent(groupValue)}&year=${encodeURIComponent(yearValue)}&is_g7=${encodeURIComponent(g7Value)}&sort_by=${encodeURIComponent(currentSortColumn)}&sort_order=${encodeURIComponent(currentSortOrder)}&page=${currentPage}&per_page=${perPage}`;
+    const filterParams = `search=${encodeURIComponent(searchValue)}&month=${encodeURIComponent(monthValue)}&group=${encodeURIComponent(groupValue)}&year=${encodeURIComponent(yearValue)}&is_g7=${encodeURIComponent(g7Value)}&sort_by=${encodeURIComponent(currentSortColumn)}&sort_order=${encodeURIComponent(currentSortOrder)}`;
+    if (filterParams !== pageCursorKey) {
+        pageCursors = {};
+        pageCursorKey = filterParams;
+    }
+    // Tabel hanya butuh kolom ringkas; blok density dimuat lewat /api/kpi_ctp/<id> saat detail dibuka
+    let url = `/impact/get-kpi-data?${filterParams}&view=summary&page=${currentPage}&per_page=${perPage}`;
+    if (pageCursors[currentPage]) {
+        url += `&cursor=${encodeURIComponent(pageCursors[currentPage])}`;
+    }
+    // Saat mencari, total cukup estimasi (COUNT dibatasi di server)
+    if (searchValue) {
+        url += '&count=estimate';
+    }
 
     try {
         const response = await fetch(url);
         const result = await response.json();
         const data = result.data || [];
         totalPages = result.pages || 1;
+        if (response.ok && result.next_cursor) {
+            pageCursors[currentPage + 1] = result.next_cursor;
+        }
 
         if (response.ok) {
             // --- REMOVED: Kode untuk menyembunyikan toast 'Memuat data...' di sini
@@ -110,12 +129,18 @@ async function loadKpiData() {
                     row.setAttribute('data-id', item.id);
 
                     // Calculate reversed index for No. column
-                    const totalItems = result.total || (totalPages * perPage);
+                    // (total estimasi tidak bisa dipakai untuk nomor mundur -> nomor urut naik)
                     const itemsPerPage = perPage;
-                    const reversedIndex = totalItems - ((currentPage - 1) * itemsPerPage) - index;
+                    let rowNumber;
+                    if (result.total_estimated) {
+                        rowNumber = (currentPage - 1) * itemsPerPage + index + 1;
+                    } else {
+                        const totalItems = result.total || (totalPages * perPage);
+                        rowNumber = totalItems - ((currentPage - 1) * itemsPerPage) - index;
+                    }
                     // First cell: No.
                     let cellNo = row.insertCell();
-                    cellNo.textContent = reversedIndex;
+                    cellNo.textContent = rowNumber;
 
                     const columns = [
                         'log_date',
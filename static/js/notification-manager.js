@@ -1,5 +1,5 @@
 /**
- * Notification System - Real-time Polling
+ * Notification System - Real-time via Server-Sent Events (polling sebagai fallback)
  * Handles fetching, displaying, and marking notifications as read
  */
 
@@ -9,6 +9,7 @@ class NotificationManager {
         this.pollTimer = null;
         this.isLoading = false;
         this.maxNotificationsDisplay = 999; // Show max 999 notifications in dropdown
+        this.lastUnreadCount = null;
         
         this.init();
     }
@@ -26,8 +27,8 @@ class NotificationManager {
             return;
         }
         
-        // Start polling
-        this.startPolling();
+        // Realtime push (SSE), polling hanya kalau stream tidak tersedia
+        this.startRealtime();
         
         // Load notifications immediately
         this.loadNotifications();
@@ -40,6 +41,26 @@ class NotificationManager {
         console.log('✓ NotificationManager initialized');
     }
 
+    startRealtime() {
+        const stream = window.NotificationStream;
+        if (!stream || !stream.isSupported()) {
+            this.startPolling();
+            return;
+        }
+        
+        stream.onFallback(() => this.startPolling());
+        stream.on('unread_count', (payload) => {
+            const unreadCount = payload.unread_count || 0;
+            const changed = this.lastUnreadCount !== null && unreadCount !== this.lastUnreadCount;
+            this.updateBadge(unreadCount);
+            
+            // Reload list hanya kalau ada notifikasi baru atau count berubah
+            if (payload.notification_id || changed) {
+                this.loadNotifications();
+            }
+        });
+    }
+
     startPolling() {
         // Clear existing timer
         if (this.pollTimer) {
@@ -108,6 +129,8 @@ class NotificationManager {
     updateBadge(count) {
         if (!this.badgeElement) return;
         
+        this.lastUnreadCount = count;
+        
         this.badgeElement.textContent = count > 99 ? '99+' : count;
         
         // Show/hide badge based on count
@@ -308,6 +331,9 @@ class NotificationManager {
 
     destroy() {
         this.stopPolling();
+        if (window.NotificationStream) {
+            window.NotificationStream.close();
+        }
     }
 }
 
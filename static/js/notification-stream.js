@@ -0,0 +1,88 @@
+/**
+ * Notification Stream - Server-Sent Events
+ * Satu EventSource per tab ke /impact/api/notifications/stream,
+ * dipakai bersama oleh NotificationManager (bell) dan SidebarNotification (badge).
+ * Kalau browser tidak support SSE atau koneksi terus gagal, listener fallback
+ * dipanggil supaya masing-masing komponen kembali ke polling.
+ */
+window.NotificationStream = window.NotificationStream || {
+    url: '/impact/api/notifications/stream',
+    eventNames: ['unread_count', 'badges'],
+    source: null,
+    listeners: {},
+    fallbackListeners: [],
+    failures: 0,
+    maxFailures: 3,
+    failed: false,
+
+    isSupported() {
+        return typeof window.EventSource !== 'undefined';
+    },
+
+    on(eventName, callback) {
+        if (!this.listeners[eventName]) {
+            this.listeners[eventName] = [];
+        }
+        this.listeners[eventName].push(callback);
+        this.connect();
+    },
+
+    onFallback(callback) {
+        this.fallbackListeners.push(callback);
+        if (this.failed || !this.isSupported()) {
+            callback();
+        }
+    },
+
+    connect() {
+        if (this.source || this.failed || !this.isSupported()) {
+            return;
+        }
+
+        this.source = new EventSource(this.url);
+
+        this.source.onopen = () => {
+            this.failures = 0;
+        };
+
+        this.source.onerror = () => {
+            // Server menolak stream (503: worker sync atau batas stream penuh) - EventSource
+            // tidak reconnect, langsung kembali ke polling
+            if (this.source && this.source.readyState === EventSource.CLOSED) {
+                this.fallback();
+                return;
+            }
+            // EventSource reconnect otomatis; menyerah setelah beberapa kali gagal berturut-turut
+            this.failures += 1;
+            if (this.failures >= this.maxFailures) {
+                this.fallback();
+            }
+        };
+
+        this.eventNames.forEach(eventName => {
+            this.source.addEventListener(eventName, (event) => {
+                let data = null;
+                try {
+                    data = JSON.parse(event.data);
+                } catch (e) {
+                    return;
+                }
+                (this.listeners[eventName] || []).forEach(callback => callback(data));
+            });
+        });
+    },
+
+    fallback() {
+        if (this.failed) return;
+        this.failed = true;
+        this.close();
+        this.fallbackListeners.forEach(callback => callback());
+    },
+
+    close() {
+        if (this.source) {
+            this.source.close();
+            this.source = null;
+        }
+    }
+};
@@ -1,4 +1,13 @@
 // R&D Cloudsphere Dashboard JavaScript
+
+// Field list job yang dirender kartu kanban (fields= projection di /api/jobs)
+const RND_JOB_CARD_FIELDS = [
+    'id', 'job_id', 'item_name', 'sample_type', 'priority_level', 'status', 'deadline_at',
+    'completion_percentage', 'current_pic_name', 'pic_assignments', 'is_overdue',
+    'started_at', 'created_at'
+];
+const RND_JOBS_PAGE_SIZE = 100;
+
 class RNDCloudsphere {
     constructor() {
         this.filters = {
@@ -16,6 +25,7 @@ class RNDCloudsphere {
         this.loadStats();
         this.loadJobs();
         this.setupEventListeners();
+        this.setupLoadMore();
         this.loadUsers();
     }
 
@@ -112,28 +122,92 @@ class RNDCloudsphere {
     }
 
     async loadJobs() {
+        // Token untuk membatalkan load lama kalau filter berubah di tengah jalan
+        const loadToken = (this.jobsLoadToken = (this.jobsLoadToken || 0) + 1);
+        this.jobsCursor = null;
+        this.toggleLoadMore(false);
         try {
             this.showLoading(true);
-            
-            const params = new URLSearchParams(this.filters);
 
-            const response = await fetch(`/impact/rnd-cloudsphere/api/jobs?${params}`);
-            const data = await response.json();
-            
-            if (data.success) {
-                this.jobs = data.data;
-                this.renderJobs(data.data);
-                if (data.data.length === 0) {
-                    this.showMessage('info', 'No jobs found matching your criteria.');
-                }
-            } else {
-                this.showMessage('error', data.message || 'Failed to load jobs');
+            // Hanya halaman pertama; halaman berikutnya lewat loadMoreJobs (scroll / tombol)
+            const data = await this.fetchJobsPage(null);
+            if (loadToken !== this.jobsLoadToken || !data) return;
+
+            this.jobs = data.data;
+            this.renderJobs(this.jobs);
+            this.setJobsCursor(data.pagination);
+
+            if (this.jobs.length === 0) {
+                this.showMessage('info', 'No jobs found matching your criteria.');
             }
         } catch (error) {
             console.error('Error loading jobs:', error);
             this.showMessage('error', 'Error loading jobs');
         } finally {
-            this.showLoading(false);
+            if (loadToken === this.jobsLoadToken) this.showLoading(false);
+        }
+    }
+
+    async loadMoreJobs() {
+        if (!this.jobsCursor || this.jobsLoadingMore) return;
+        const loadToken = this.jobsLoadToken;
+        const button = document.getElementById('loadMoreJobsBtn');
+        this.jobsLoadingMore = true;
+        if (button) button.disabled = true;
+        try {
+            const data = await this.fetchJobsPage(this.jobsCursor);
+            if (loadToken !== this.jobsLoadToken || !data) return;
+
+            this.jobs = this.jobs.concat(data.data);
+            this.renderJobs(this.jobs);
+            this.setJobsCursor(data.pagination);
+        } catch (error) {
+            console.error('Error loading more jobs:', error);
+            this.showMessage('error', 'Error loading jobs');
+        } finally {
+            this.jobsLoadingMore = false;
+            if (button) button.disabled = false;
+        }
+    }
+
+    async fetchJobsPage(cursor) {
+        // API memakai keyset pagination: halaman berikutnya lewat next_cursor
+        const params = new URLSearchParams(this.filters);
+        params.set('limit', RND_JOBS_PAGE_SIZE);
+        params.set('fields', RND_JOB_CARD_FIELDS.join(','));
+        if (cursor) params.set('cursor', cursor);
+
+        const response = await fetch(`/impact/rnd-cloudsphere/api/jobs?${params}`);
+        const data = await response.json();
+        if (!data.success) {
+            this.showMessage('error', data.error || data.message || 'Failed to load jobs');
+            return null;
+        }
+        return data;
+    }
+
+    setJobsCursor(pagination) {
+        this.jobsCursor = pagination && pagination.has_next ? pagination.next_cursor : null;
+        this.toggleLoadMore(Boolean(this.jobsCursor));
+    }
+
+    toggleLoadMore(show) {
+        const loadMore = document.getElementById('loadMoreJobs');
+        if (loadMore) loadMore.style.display = show ? 'block' : 'none';
+    }
+
+    setupLoadMore() {
+        const loadMore = document.getElementById('loadMoreJobs');
+        const button = document.getElementById('loadMoreJobsBtn');
+        if (!loadMore || !button) return;
+
+        button.addEventListener('click', () => this.loadMoreJobs());
+        // Infinite scroll: ambil halaman berikutnya saat tombol hampir terlihat
+        if ('IntersectionObserver' in window) {
+            const observer = new IntersectionObserver(entries => {
+                if (entries.some(entry => entry.isIntersecting)) this.loadMoreJobs();
+            }, { rootMargin: '200px' });
+            observer.observe(loadMore);
         }
     }
 
@@ -1356,64 +1430,21 @@ async function exportWithFilters() {
             }
         }
 
-        // Build query parameters
-        const params = new URLSearchParams();
-        if (startDate) params.append('start_date', startDate);
-        if (endDate) params.append('end_date', endDate);
-        if (sampleType) params.append('sample_type', sampleType);
+        // Export dijalankan di background (tidak kena timeout), lalu didownload otomatis
+        const params = {};
+        if (startDate) params.start_date = startDate;
+        if (endDate) params.end_date = endDate;
+        if (sampleType) params.sample_type = sampleType;
 
-        // Make export request
-        const response = await fetch(`/impact/rnd-cloudsphere/api/jobs/export/excel?${params.toString()}`);
-        
-        if (response.ok) {
-            // Check if response is empty (no data)
-            const contentLength = response.headers.get('content-length');
-            const contentType = response.headers.get('content-type');
-            
-            // If content type is not Excel, maybe it's an error message
-            if (contentType && !contentType.includes('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')) {
-                const errorData = await response.json();
-                throw new Error(errorData.error || 'No data found');
-            }
-            
-            // Get filename from response headers or generate default
-            const contentDisposition = response.headers.get('content-disposition');
-            let filename = 'RND_Job_Export.xlsx';
-            
-            if (contentDisposition) {
-                const filenameMatch = contentDisposition.match(/filename[^;=\n]*=((['"]).*?\2|[^;\n]*)/);
-                if (filenameMatch && filenameMatch[1]) {
-                    filename = filenameMatch[1].replace(/['"]/g, '');
-                }
-            }
+        await ExportJobs.run('rnd_jobs_excel', params, job => {
+            exportBtn.innerHTML = `<i class="fas fa-spinner fa-spin me-1"></i> ${ExportJobs.progressText(job)}`;
+        });
 
-            // Convert response to blob and download
-            const blob = await response.blob();
-            
-            // Check if blob is empty (size 0)
-            if (blob.size === 0) {
-                throw new Error('No data found');
-            }
-            
-            const url = window.URL.createObjectURL(blob);
-            const a = document.createElement('a');
-            a.href = url;
-            a.download = filename;
-            document.body.appendChild(a);
-            a.click();
-            window.URL.revokeObjectURL(url);
-            document.body.removeChild(a);
-
-            // Show success message and close modal
-            if (rndCloudsphere) {
-                rndCloudsphere.showMessage('success', 'Excel file exported successfully');
-            }
-            bootstrap.Modal.getInstance(document.getElementById('exportModal')).hide();
-        } else {
-            // Handle error response
-            const errorData = await response.json();
-            throw new Error(errorData.error || 'Export failed');
+        // Show success message and close modal
+        if (rndCloudsphere) {
+            rndCloudsphere.showMessage('success', 'Excel file exported successfully');
         }
+        bootstrap.Modal.getInstance(document.getElementById('exportModal')).hide();
 
     } catch (error) {
         console.error('Error exporting Excel:', error);
@@ -663,7 +663,9 @@ class RNDJobDetail {
                         <div class="evidence-card">
                             <div class="preview-container">
                                 ${this.isImageFile(file.file_type) ? `
-                                    <img src="/impact/rnd-cloudsphere/api/evidence-thumbnail/${file.id}"
+                                    <img src="${file.thumbnail_url || `/impact/rnd-cloudsphere/api/evidence-thumbnail/${file.id}`}"
+                                         data-evidence-id="${file.id}"
+                                         loading="lazy"
                                          alt="${file.original_filename}"
                                          class="evidence-thumbnail"
                                          onclick="rndJobDetail.previewFile(${file.id}, '${file.original_filename}', '${file.file_type}')"
@@ -671,7 +673,9 @@ class RNDJobDetail {
                                     <span class="file-type-badge">${file.file_type === 'photo' ? 'PHOTO' : file.file_type.toUpperCase()}</span>
                                 ` : this.isPdfFile(file.file_type) || this.isPdfByFilename(file.original_filename) ? `
                                     <div class="pdf-preview" onclick="rndJobDetail.previewFile(${file.id}, '${file.original_filename}', '${file.file_type}')">
-                                        <img src="/impact/rnd-cloudsphere/api/evidence-thumbnail/${file.id}"
+                                        <img src="${file.thumbnail_url || `/impact/rnd-cloudsphere/api/evidence-thumbnail/${file.id}`}"
+                                             data-evidence-id="${file.id}"
+                                             loading="lazy"
                                              alt="${file.original_filename}"
                                              class="evidence-thumbnail"
                                              onerror="this.style.display='none'; this.nextElementSibling.style.display='flex';">
@@ -736,6 +740,40 @@ class RNDJobDetail {
         
         // Setup drag and drop for completed steps
         this.setupDragAndDrop();
+        this.refreshPendingThumbnails();
+    }
+
+    async refreshPendingThumbnails(attempt = 0) {
+        // Thumbnail yang belum ada di cache dilayani placeholder (no-store) dan dibuat di background;
+        // cek status lewat endpoint batch lalu ganti src setelah siap
+        const images = Array.from(document.querySelectorAll('img.evidence-thumbnail[data-evidence-id]'))
+            .filter(img => !img.dataset.thumbnailReady);
+        if (images.length === 0 || attempt >= 10) return;
+
+        const ids = [...new Set(images.map(img => img.dataset.evidenceId))].slice(0, 200);
+        try {
+            const response = await fetch(`/impact/rnd-cloudsphere/api/evidence-thumbnails?ids=${ids.join(',')}`);
+            const data = await response.json();
+            if (!data.success) return;
+
+            let pending = false;
+            data.data.forEach(item => {
+                images.filter(img => img.dataset.evidenceId === String(item.id)).forEach(img => {
+                    if (!item.thumbnail_url || item.ready) {
+                        img.dataset.thumbnailReady = '1';
+                        // Baru siap setelah render pertama: src lama masih placeholder
+                        if (item.ready && attempt > 0) img.src = item.thumbnail_url;
+                    } else {
+                        pending = true;
+                    }
+                });
+            });
+            if (pending) {
+                setTimeout(() => this.refreshPendingThumbnails(attempt + 1), 2000);
+            }
+        } catch (error) {
+            console.error('Error checking evidence thumbnails:', error);
+        }
     }
 
     setupDragAndDrop() {
@@ -806,28 +844,16 @@ class RNDJobDetail {
                 this.showMessage('info', 'Uploading files...');
             }
             
-            // Upload files one by one to match the API which expects single file
+            // Tiap file di-upload per chunk (resumable); koneksi putus dilanjutkan dari offset terakhir
             let allSuccessful = true;
             let uploadedCount = 0;
             
             for (let i = 0; i < files.length; i++) {
-                const formData = new FormData();
-                formData.append('file', files[i]);
-                formData.append('job_id', this.jobId);
-                formData.append('progress_assignment_id', stepId);
-                formData.append('evidence_type', 'step_completion');
-                
-                const response = await fetch(`/impact/rnd-cloudsphere/api/upload-evidence`, {
-                    method: 'POST',
-                    body: formData
-                });
-
-                const data = await response.json();
-                
-                if (data.success) {
+                try {
+                    await this.uploadEvidenceResumable(files[i], stepId);
                     uploadedCount++;
-                } else {
-                    this.showMessage('error', `Failed to upload ${files[i].name}: ${data.message || 'Unknown error'}`);
+                } catch (error) {
+                    this.showMessage('error', `Failed to upload ${files[i].name}: ${error.message || 'Unknown error'}`);
                     allSuccessful = false;
                 }
             }
@@ -849,6 +875,57 @@ class RNDJobDetail {
         }
     }
 
+    async uploadEvidenceResumable(file, stepId) {
+        const baseUrl = '/impact/rnd-cloudsphere/api/evidence-uploads';
+        const initResponse = await fetch(baseUrl, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                filename: file.name,
+                size: file.size,
+                job_id: this.jobId,
+                progress_assignment_id: stepId,
+                evidence_type: 'step_completion'
+            })
+        });
+        const init = await initResponse.json();
+        if (!init.success) throw new Error(init.error);
+
+        const { upload_id: uploadId, chunk_size: chunkSize } = init.data;
+        let offset = init.data.offset;
+        let retries = 0;
+
+        while (offset < file.size) {
+            try {
+                const response = await fetch(`${baseUrl}/${uploadId}?offset=${offset}`, {
+                    method: 'PUT',
+                    headers: { 'Content-Type': 'application/octet-stream' },
+                    body: file.slice(offset, offset + chunkSize)
+                });
+                const data = await response.json();
+                if (response.status === 409) {
+                    offset = data.offset; // server menerima lebih sedikit dari yang dikira, lanjut dari sana
+                } else if (!data.success) {
+                    throw new Error(data.error);
+                } else {
+                    offset = data.data.offset;
+                    retries = 0;
+                }
+            } catch (error) {
+                if (++retries > 5) throw error;
+                await new Promise(resolve => setTimeout(resolve, 1000 * retries));
+                // Tanya server sampai mana chunk sudah diterima sebelum mencoba lagi
+                const status = await fetch(`${baseUrl}/${uploadId}`).then(r => r.json()).catch(() => null);
+                if (status && status.success) offset = status.data.offset;
+            }
+        }
+
+        const completeResponse = await fetch(`${baseUrl}/${uploadId}/complete`, { method: 'POST' });
+        const completed = await completeResponse.json();
+        if (!completed.success) throw new Error(completed.error);
+        return completed.data;
+    }
+
     setupGlobalPasteListener() {
         // Store reference to current instance for use in event listener
         const self = this;
@@ -1223,28 +1300,8 @@ class RNDJobDetail {
             // Show loading message
             this.showMessage('info', 'Generating PDF...');
             
-            // Create a temporary link element for download
-            const response = await fetch(`/impact/rnd-cloudsphere/api/jobs/${this.jobId}/export/pdf`);
-            
-            if (!response.ok) {
-                const errorData = await response.json();
-                throw new Error(errorData.error || 'Failed to generate PDF');
-            }
-            
-            // Get the blob from response
-            const blob = await response.blob();
-            
-            // Create a download link
-            const url = window.URL.createObjectURL(blob);
-            const link = document.createElement('a');
-            link.href = url;
-            link.download = `RND_Job_${this.job.job_id}_${new Date().toISOString().slice(0, 19).replace(/[:-]/g, '')}.pdf`;
-            document.body.appendChild(link);
-            link.click();
-            document.body.removeChild(link);
-            
-            // Clean up the URL
-            window.URL.revokeObjectURL(url);
+            // PDF dibuat di background lalu didownload otomatis
+            await ExportJobs.run('rnd_job_pdf', { job_id: this.jobId });
             
             this.showMessage('success', 'PDF exported successfully');
         } catch (error) {
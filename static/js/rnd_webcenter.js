@@ -131,17 +131,53 @@ class RNDWebCenter {
         this.showLoadingState();
         
         try {
-            const response = await fetch(`/impact/rnd-webcenter/api/directory?path=${encodeURIComponent(path)}`);
-            const data = await response.json();
+            // NDJSON: batch pertama langsung dirender, folder besar tidak menunggu listing selesai
+            const response = await fetch(`/impact/rnd-webcenter/api/directory/stream?path=${encodeURIComponent(path)}`);
+            if (!response.ok || !response.body) {
+                throw new Error(`HTTP ${response.status}`);
+            }
             
-            if (data.success) {
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let items = [];
+            let lastRender = 0;
+            let done = false;
+            
+            const render = () => {
                 this.currentPath = path;
                 this.updateBreadcrumb(path);
-                this.renderFiles(data.data.items || []);
+                this.renderFiles(items);
                 this.showFileContainer();
-            } else {
-                this.showErrorState(data.error || 'Failed to load directory');
+                lastRender = Date.now();
+            };
+            
+            while (!done) {
+                const chunk = await reader.read();
+                done = chunk.done;
+                buffer += decoder.decode(chunk.value || new Uint8Array(), { stream: !done });
+                const lines = buffer.split('\n');
+                buffer = lines.pop();
+                
+                for (const line of lines) {
+                    if (!line.trim()) continue;
+                    const event = JSON.parse(line);
+                    if (event.type === 'error') {
+                        this.showErrorState(event.error || 'Failed to load directory');
+                        return;
+                    }
+                    if (event.type === 'items') {
+                        items = items.concat(event.items);
+                        if (lastRender === 0 || Date.now() - lastRender > 300) {
+                            render();
+                        }
+                    }
+                }
             }
+            
+            // Directories first, then files, both alphabetically
+            items.sort((a, b) => (b.isDirectory - a.isDirectory) || a.name.toLowerCase().localeCompare(b.name.toLowerCase()));
+            render();
         } catch (error) {
             console.error('Error loading directory:', error);
             this.showErrorState('Network error occurred while loading directory');
@@ -168,7 +204,12 @@ class RNDWebCenter {
         this.showLoadingState();
         
         try {
-            const response = await fetch(`/impact/rnd-webcenter/api/search?q=${encodeURIComponent(this.searchQuery)}&path=${encodeURIComponent(this.currentPath)}`);
+            // "ext:pdf" di query menjadi filter ekstensi
+            const extMatch = this.searchQuery.match(/(?:^|\s)ext:\.?(\w+)/i);
+            const query = this.searchQuery.replace(/(?:^|\s)ext:\.?\w+/ig, ' ').trim() || '.';
+            const params = new URLSearchParams({ q: query, path: this.currentPath, per_page: 200 });
+            if (extMatch) params.set('ext', extMatch[1]);
+            const response = await fetch(`/impact/rnd-webcenter/api/search?${params}`);
             const data = await response.json();
             
             if (data.success) {
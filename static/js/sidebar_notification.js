@@ -1,13 +1,30 @@
  // ...
 const SidebarNotification = {
+    // Badge terakhir per divisi: {division_key: [{status, count}]}
+    badgeData: {},
+    pollTimer: null,
+
     async checkNotifications() {
         try {
             const response = await fetch('/impact/api/check-notifications');
             if (!response.ok) {
                 return;
             }
-            const data = await response.json();
+            this.badgeData = await response.json();
+            this.render(this.badgeData);
+        } catch (error) {
+            // Optional: silent fail in production
+        }
+    },
+
+    // Event 'badges' dari SSE hanya berisi divisi yang berubah
+    applyBadgeChanges(payload) {
+        Object.assign(this.badgeData, payload.changed || {});
+        this.render(this.badgeData);
+    },
 
+    render(data) {
+        try {
             // =========================
             // CTP Production Notifications
             // =========================
@@ -124,9 +141,21 @@ const SidebarNotification = {
     },
 
     startPolling() {
+        if (this.pollTimer) return;
         this.checkNotifications();
         // Check every 10 seconds
-        setInterval(() => this.checkNotifications(), 10000);
+        this.pollTimer = setInterval(() => this.checkNotifications(), 10000);
+    },
+
+    start() {
+        const stream = window.NotificationStream;
+        if (!stream || !stream.isSupported()) {
+            this.startPolling();
+            return;
+        }
+        // Push via SSE; polling hanya sebagai fallback kalau stream gagal
+        stream.onFallback(() => this.startPolling());
+        stream.on('badges', (payload) => this.applyBadgeChanges(payload));
     }
 };
 
@@ -134,5 +163,5 @@ const SidebarNotification = {
 document.addEventListener('DOMContentLoaded', () => {
     // CSS sudah dimuat dari file sidebar_notification.css
     
-    SidebarNotification.startPolling();
+    SidebarNotification.start();
 });
\ No newline at end of file
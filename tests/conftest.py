@@ -0,0 +1,39 @@
+"""
+Fixture bersama: Flask app minimal dengan database sqlite in-memory
+
+Test yang butuh blueprint, login, atau config tambahan meng-override fixture app di
+modulnya sendiri (minta fixture app ini lalu tambahkan yang perlu sebelum request pertama).
+"""
+
+import pytest
+from flask import Flask, g
+from flask_login import LoginManager
+from models import db, User
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SECRET_KEY'] = 'test'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def login_manager(app):
+    """flask_login dengan user loader dari tabel users"""
+    login_manager = LoginManager()
+    login_manager.init_app(app)
+    login_manager.user_loader(lambda user_id: db.session.get(User, int(user_id)))
+
+    # App context fixture dipakai ulang antar request; user login di-cache flask_login di g
+    @app.before_request
+    def reset_login_cache():
+        g.pop('_login_user', None)
+
+    return login_manager
@@ -0,0 +1,86 @@
+"""
+Unit tests for BadgeCountService (sidebar badge counts for /api/check-notifications)
+"""
+
+import pytest
+from datetime import date
+from models import db, PlateAdjustmentRequest, PlateBonRequest
+from services.badge_count_service import BadgeCountService
+
+
+@pytest.fixture
+def app(app):
+    BadgeCountService.invalidate()
+    return app
+
+
+def _adjustment(remarks='ADJUSTMENT FA PROOF', is_epson=False, status=None):
+    adjustment = PlateAdjustmentRequest(
+        tanggal=date(2026, 1, 5), mesin_cetak='SM 102', pic='PIC', remarks=remarks,
+        wo_number='WO1', mc_number='MC1', item_name='Item', paper_type='Art Paper',
+        jumlah_plate=4, is_epson=is_epson
+    )
+    if status:
+        adjustment.status = status
+    db.session.add(adjustment)
+    return adjustment
+
+
+def _bon(status='proses_ctp'):
+    bon = PlateBonRequest(
+        tanggal=date(2026, 1, 5), mesin_cetak='SM 102', pic='PIC', remarks='PRODUKSI',
+        wo_number='WO1', mc_number='MC1', item_name='Item', paper_type='Art Paper',
+        jumlah_plate=4, status=status
+    )
+    db.session.add(bon)
+    return bon
+
+
+class TestBadgeCounts:
+
+    def test_declined_by_mounting_split_by_epson(self, app):
+        _adjustment(is_epson=False, status='ditolakmounting')
+        _adjustment(is_epson=True, status='ditolakmounting')
+        _adjustment(is_epson=True, status='ditolakmounting')
+        db.session.commit()
+
+        counts = BadgeCountService.compute_counts()
+
+        assert counts['pdnd'] == [{'status': 'ditolakmounting', 'count': 1}]
+        assert counts['design'] == [{'status': 'ditolakmounting', 'count': 2}]
+        assert counts['curve'] == [{'status': 'ditolakmounting', 'count': 3}]
+
+    def test_initial_status_buckets(self, app):
+        _adjustment(remarks='ADJUSTMENT FA PROOF', is_epson=False)
+        _adjustment(remarks='ADJUSTMENT FA PROOF', is_epson=True)
+        _adjustment(remarks='ADJUSTMENT CURVE PROOF')
+        _adjustment(status='selesai')
+        _bon()
+        _bon(status='selesai')
+        db.session.commit()
+
+        counts = BadgeCountService.compute_counts()
+
+        assert counts['pdnd'] == [{'status': 'menunggu_adjustment_pdnd', 'count': 1}]
+        assert counts['design'] == [{'status': 'menunggu_adjustment_design', 'count': 1}]
+        assert counts['curve'] == [{'status': 'menunggu_adjustment_curve', 'count': 1}]
+        assert counts['ctp_bon'] == [{'status': 'proses_ctp', 'count': 1}]
+        assert counts['ctp_adjustment'] == []
+        assert counts['mounting'] == []
+
+    def test_cache_reused_until_invalidated(self, app):
+        _bon()
+        db.session.commit()
+        first, first_etag = BadgeCountService.get_counts()
+
+        _bon()
+        db.session.commit()
+        cached, cached_etag = BadgeCountService.get_counts()
+        assert cached_etag == first_etag
+        assert cached['ctp_bon'] == [{'status': 'proses_ctp', 'count': 1}]
+
+        BadgeCountService.invalidate()
+        assert BadgeCountService.peek() is None
+        fresh, fresh_etag = BadgeCountService.get_counts()
+        assert fresh_etag != first_etag
+        assert fresh['ctp_bon'] == [{'status': 'proses_ctp', 'count': 2}]
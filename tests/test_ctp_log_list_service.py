@@ -0,0 +1,89 @@
+"""
+Unit tests for services/ctp_log_list_service.py - projection view/fields dan keyset
+pagination tabel KPI CTP (termasuk kolom sort yang NULL)
+"""
+
+import pytest
+from datetime import date, time
+from models import db, CTPProductionLog
+from services.ctp_log_list_service import (
+    CTPLogListService, InvalidListParamError, DENSITY_FIELDS, SUMMARY_FIELDS
+)
+
+
+def _log(day, wo, good):
+    return CTPProductionLog(
+        log_date=date(2026, 3, day), ctp_group='A', ctp_shift='Shift 1', ctp_pic='PIC', ctp_machine='M1',
+        wo_number=wo, mc_number='MC1', print_machine='P1', remarks_job='NEW', item_name='Item',
+        plate_type_material='FUJI 1030', paper_type='Art', raster='175', num_plate_good=good,
+        cyan_50_percent=50.5, start_time=time(8, 15, 30)
+    )
+
+
+@pytest.fixture
+def logs(app):
+    rows = [
+        _log(1, 'WO-1', 5), _log(1, None, None), _log(2, 'WO-3', 5),
+        _log(2, 'WO-4', None), _log(3, 'WO-5', 1), _log(3, 'WO-6', 9), _log(3, None, 2),
+    ]
+    db.session.add_all(rows)
+    db.session.commit()
+    return rows
+
+
+def _walk(sort_by, sort_order, per_page=2):
+    ids, cursor = [], None
+    while True:
+        db.session.expire_all()
+        page = CTPLogListService.list_logs(
+            CTPProductionLog.query, ('id',), sort_by, sort_order, per_page=per_page, cursor=cursor
+        )
+        ids.extend(item['id'] for item in page['data'])
+        if not page['has_next']:
+            return ids
+        cursor = page['next_cursor']
+
+
+@pytest.mark.parametrize('sort_by', ['log_date', 'wo_number', 'num_plate_good', 'start_time', 'id'])
+@pytest.mark.parametrize('sort_order', ['asc', 'desc'])
+def test_cursor_pages_match_offset_order(logs, sort_by, sort_order):
+    expected = [
+        item['id'] for item in CTPLogListService.list_logs(
+            CTPProductionLog.query, ('id',), sort_by, sort_order, per_page=100
+        )['data']
+    ]
+    assert sorted(expected) == sorted(log.id for log in logs)
+    assert _walk(sort_by, sort_order) == expected
+
+
+def test_projection_views(logs):
+    full = CTPLogListService.list_logs(
+        CTPProductionLog.query, CTPLogListService.parse_fields(), 'id', 'asc', per_page=1
+    )['data'][0]
+    assert full == logs[0].to_dict()
+
+    summary = CTPLogListService.list_logs(
+        CTPProductionLog.query, CTPLogListService.parse_fields('summary'), 'id', 'asc', per_page=1
+    )['data'][0]
+    assert tuple(summary) == SUMMARY_FIELDS and 'cyan_50_percent' not in summary
+
+    density = CTPLogListService.get_log(logs[0].id, CTPLogListService.parse_fields('density'))
+    assert set(density) == {'id', *DENSITY_FIELDS} and density['cyan_50_percent'] == 50.5
+    assert CTPLogListService.get_log(9999, ('id',)) is None
+
+    assert CTPLogListService.parse_fields('summary', 'wo_number') == ('id', 'wo_number')
+    with pytest.raises(InvalidListParamError):
+        CTPLogListService.parse_fields('compact')
+    with pytest.raises(InvalidListParamError):
+        CTPLogListService.parse_fields(fields='password')
+
+
+def test_cursor_bound_to_sort(logs):
+    page = CTPLogListService.list_logs(CTPProductionLog.query, ('id',), 'log_date', 'desc', per_page=2)
+    with pytest.raises(InvalidListParamError):
+        CTPLogListService.list_logs(
+            CTPProductionLog.query, ('id',), 'log_date', 'asc', cursor=page['next_cursor']
+        )
+    with pytest.raises(InvalidListParamError):
+        CTPLogListService.decode_cursor('not-a-cursor', 'log_date', 'desc')
+    assert CTPLogListService.parse_sort('to_dict', 'sideways') == ('log_date', 'desc')
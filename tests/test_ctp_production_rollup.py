@@ -0,0 +1,98 @@
+"""
+Unit tests for ctp_production_daily_rollup - rekap harian di-maintain incremental
+dari CTPProductionLog dan sama dengan hasil backfill
+"""
+
+from datetime import date, datetime
+from sqlalchemy.dialects import mysql
+from models import db, CTPProductionLog, CTPProductionDailyRollup
+from services.ctp_production_rollup import CTPProductionRollupService
+
+DAY = date(2026, 3, 2)
+
+
+def _log(log_date=DAY, group='A', plate='FUJI 1030', good=10, not_good=2):
+    return CTPProductionLog(
+        log_date=log_date, ctp_group=group, ctp_shift='Shift 1', ctp_pic='PIC', ctp_machine='M1',
+        mc_number='MC1', print_machine='P1', remarks_job='NEW', item_name='Item',
+        plate_type_material=plate, paper_type='Art', raster='175',
+        num_plate_good=good, num_plate_not_good=not_good
+    )
+
+
+def _snapshot():
+    db.session.expire_all()
+    return sorted(
+        (r.log_date, r.ctp_group, r.plate_type_material, r.num_plate_good, r.num_plate_not_good, r.log_count)
+        for r in CTPProductionDailyRollup.query
+    )
+
+
+class TestIncrementalRollup:
+
+    def test_insert_update_delete(self, app):
+        first, second = _log(), _log(good=5, not_good=None)
+        db.session.add_all([first, second])
+        db.session.commit()
+        assert _snapshot() == [(DAY, 'A', 'FUJI 1030', 15, 2, 2)]
+
+        second = db.session.get(CTPProductionLog, second.id)
+        second.ctp_group = 'B'
+        db.session.commit()
+        assert _snapshot() == [(DAY, 'A', 'FUJI 1030', 10, 2, 1), (DAY, 'B', 'FUJI 1030', 5, 0, 1)]
+
+        db.session.delete(db.session.get(CTPProductionLog, first.id))
+        db.session.commit()
+        assert _snapshot() == [(DAY, 'B', 'FUJI 1030', 5, 0, 1)]
+
+    def test_matches_backfill(self, app):
+        db.session.add_all([
+            _log(), _log(good=3), _log(plate='SAPHIRA 1030', good=8, not_good=1),
+            _log(log_date=date(2026, 4, 1), group='C', good=1),
+        ])
+        db.session.commit()
+        incremental = _snapshot()
+
+        rows = CTPProductionRollupService.backfill()
+
+        assert rows == 3
+        assert _snapshot() == incremental
+
+
+    def test_concurrent_first_insert_adds_to_existing_row(self, app):
+        db.session.add(_log())
+        db.session.commit()
+        key = (DAY, 'Shift 1', 'A', 'M1', 'P1', 'FUJI 1030')
+
+        # Session lain yang juga UPDATE 0 row lalu INSERT: upsert menambah, bukan IntegrityError
+        db.session.execute(CTPProductionRollupService._insert_statement('sqlite', key, 4, 1, 1, datetime.now()))
+        db.session.commit()
+        assert _snapshot() == [(DAY, 'A', 'FUJI 1030', 14, 3, 2)]
+
+    def test_mysql_insert_is_upsert(self):
+        statement = CTPProductionRollupService._insert_statement(
+            'mysql', (DAY, 'Shift 1', 'A', 'M1', 'P1', 'FUJI 1030'), 4, 1, 1, datetime(2026, 3, 2)
+        )
+        sql = str(statement.compile(dialect=mysql.dialect()))
+        assert 'ON DUPLICATE KEY UPDATE' in sql
+        assert 'ctp_production_daily_rollup.log_count +' in sql
+
+class TestPeriodFilters:
+
+    def test_month_range_excludes_neighbours(self, app):
+        db.session.add_all([
+            _log(log_date=date(2026, 2, 28)), _log(log_date=date(2026, 3, 31), good=4),
+            _log(log_date=date(2026, 4, 1)), _log(log_date=date(2025, 3, 15), plate='SAPHIRA 1030'),
+        ])
+        db.session.commit()
+
+        def total(**kwargs):
+            return db.session.query(db.func.sum(CTPProductionDailyRollup.num_plate_good)).filter(
+                *CTPProductionRollupService.period_filters(**kwargs)
+            ).scalar()
+
+        assert total(year=2026, month=3) == 4
+        assert total(year=2026, month=12) is None
+        assert total(year=2026) == 24
+        assert total(month=3) == 14
+        assert total(year=2025, plate_type='saphira') == 10
@@ -0,0 +1,98 @@
+"""
+Unit tests for services/ctp_search.py - token pencarian tabel KPI CTP ikut
+insert/update/delete log, filter exact / tanggal / token, dan count estimate
+"""
+
+import pytest
+from datetime import date
+from models import db, CTPProductionLog, CTPProductionLogSearchToken
+from services import ctp_search
+from services.ctp_search import CTPSearchService, InvalidSearchParamError, tokenize
+
+DAY = date(2026, 3, 2)
+
+
+def _log(wo='WO-1001', mc='MC1', item='Box Susu Coklat', log_date=DAY):
+    return CTPProductionLog(
+        log_date=log_date, ctp_group='A', ctp_shift='Shift 1', ctp_pic='Budi', ctp_machine='M1',
+        wo_number=wo, mc_number=mc, print_machine='P1', remarks_job='NEW', item_name=item,
+        plate_type_material='FUJI 1030', paper_type='Art', raster='175',
+        num_plate_good=10, num_plate_not_good=0
+    )
+
+
+def _search(text):
+    query = CTPProductionLog.query.filter(*CTPSearchService.search_filters(text))
+    return sorted(log.wo_number for log in query)
+
+
+def _tokens(log_id):
+    return {
+        row.token for row in CTPProductionLogSearchToken.query.filter_by(log_id=log_id)
+    }
+
+
+def test_tokenize_splits_mixed_words():
+    assert tokenize('L3210 Box', None) == {'l3210', 'l', '3210', 'box'}
+
+
+def test_tokenize_folds_case_and_accents():
+    # Satu token per kata yang sama menurut collation MySQL (tidak bentrok di primary key)
+    assert tokenize('Café CAFE cafe', 'Straße') == {'cafe', 'strasse'}
+
+
+def test_tokens_follow_insert_update_delete(app):
+    log = _log()
+    db.session.add(log)
+    db.session.commit()
+    assert {'wo', '1001', 'coklat', 'budi'} <= _tokens(log.id)
+
+    log.item_name = 'Karton Teh'
+    db.session.commit()
+    tokens = _tokens(log.id)
+    assert 'teh' in tokens and 'coklat' not in tokens
+
+    log_id = log.id
+    db.session.delete(log)
+    db.session.commit()
+    assert _tokens(log_id) == set()
+
+
+def test_search_filters(app):
+    db.session.add_all([
+        _log('WO-1001', item='Box Susu Coklat'),
+        _log('WO-1002', item='Box Teh', log_date=date(2026, 4, 5)),
+        _log('WO-2001', mc='MC-77', item='Label Susu'),
+    ])
+    db.session.commit()
+
+    assert _search('WO-1002') == ['WO-1002']          # exact WO
+    assert _search('susu') == ['WO-1001', 'WO-2001']  # token di item_name
+    assert _search('box sus') == ['WO-1001']          # semua kata, prefix
+    assert _search('SÜSU') == ['WO-1001', 'WO-2001']  # huruf besar / aksen di-fold
+    assert _search('100') == ['WO-1001', 'WO-1002']   # angka di tengah nomor WO
+    assert _search('2026-04') == ['WO-1002']          # bulan
+    assert _search('2026-03-02') == ['WO-1001', 'WO-2001']
+    assert _search('tidakada') == []
+
+    db.session.execute(db.delete(CTPProductionLogSearchToken))
+    db.session.commit()
+    logs, tokens = CTPSearchService.rebuild(batch_size=2)
+    assert logs == 3 and tokens == CTPProductionLogSearchToken.query.count()
+    assert _search('susu') == ['WO-1001', 'WO-2001']
+
+
+def test_count_modes(app, monkeypatch):
+    db.session.add_all([_log(f"WO-{i}") for i in range(12)])
+    db.session.commit()
+    query = CTPProductionLog.query.order_by(CTPProductionLog.id.desc())
+
+    assert CTPSearchService.count(query, 'exact') == (12, False)
+    assert CTPSearchService.count(query, 'none') == (None, True)
+
+    monkeypatch.setattr(ctp_search, 'ESTIMATE_COUNT_CAP', 5)
+    assert CTPSearchService.count(query, 'estimate', offset=0, per_page=1) == (10, True)
+    assert CTPSearchService.count(query, 'estimate', offset=0, per_page=2) == (12, False)
+
+    with pytest.raises(InvalidSearchParamError):
+        CTPSearchService.count(query, 'fast')
@@ -0,0 +1,123 @@
+"""
+Unit tests for EvidenceStorage
+Upload evidence ditulis per chunk sambil hashing, isi yang sama disimpan sekali (blob
+dipakai banyak row), dan upload resumable bisa dilanjutkan dari offset terakhir
+"""
+
+import io
+import os
+
+import pytest
+from models import db
+from models_rnd import RNDEvidenceFile
+from services.evidence_storage import EvidenceStorage, EvidenceUploadError, UploadOffsetMismatch
+
+
+@pytest.fixture
+def storage(app, tmp_path):
+    app.config['UPLOADS_PATH'] = str(tmp_path / 'share')
+    app.config['EVIDENCE_UPLOAD_STAGING_DIR'] = str(tmp_path / 'staging')
+    app.config['EVIDENCE_UPLOAD_CHUNK_SIZE'] = 4
+    app.config['EVIDENCE_UPLOAD_MAX_BYTES'] = 64
+    service = EvidenceStorage()
+    service.init_app(app)
+    return service
+
+
+def _record(blob, name='proof.pdf'):
+    evidence = RNDEvidenceFile(
+        job_id=1, filename=name, original_filename=name, file_path=blob.path, file_type='pdf',
+        file_size=blob.size, content_sha256=blob.sha256, evidence_type='step_completion', uploaded_by=1
+    )
+    db.session.add(evidence)
+    db.session.commit()
+    return evidence
+
+
+def test_identical_content_stored_once(storage):
+    first = storage.store_stream(io.BytesIO(b'proof content'), 'proof.pdf')
+    assert not first.deduplicated and first.size == 13
+    assert open(first.path, 'rb').read() == b'proof content'
+    evidence = _record(first)
+
+    # Nama/ekstensi lain, isi sama: memakai blob yang sama
+    second = storage.store_stream(io.BytesIO(b'proof content'), 'copy.PDF')
+    assert second.deduplicated and second.path == first.path
+    other = _record(second, 'copy.pdf')
+
+    assert storage.is_shared(first.path, exclude_id=evidence.id)
+    db.session.delete(other)
+    db.session.commit()
+    assert not storage.is_shared(first.path, exclude_id=evidence.id)
+    assert os.listdir(storage.staging_dir) == []
+
+    with pytest.raises(EvidenceUploadError):
+        storage.store_stream(io.BytesIO(b'x' * 65), 'big.pdf')
+    assert os.listdir(storage.staging_dir) == []
+
+
+
+def test_blob_removed_only_when_unreferenced(storage):
+    first = _record(storage.store_stream(io.BytesIO(b'shared'), 'a.pdf'))
+    second = _record(storage.store_stream(io.BytesIO(b'shared'), 'b.pdf'))
+    path = first.file_path
+
+    db.session.delete(first)
+    db.session.commit()
+    assert not storage.remove_blob_if_unreferenced(path)
+    assert os.path.exists(path)
+
+    db.session.delete(second)
+    db.session.commit()
+    assert storage.remove_blob_if_unreferenced(path)
+    assert not os.path.exists(path)
+
+
+def test_dedupe_rewrites_blob_deleted_after_lookup(storage, monkeypatch):
+    blob = storage.store_stream(io.BytesIO(b'evidence'), 'a.pdf')
+    _record(blob)
+    os.remove(blob.path)
+    # Row masih ada tapi file sudah dihapus (delete evidence paralel): upload tidak boleh men-dedupe
+    monkeypatch.setattr(EvidenceStorage, 'find_existing_blob', staticmethod(lambda sha256: blob.path))
+
+    again = storage.store_stream(io.BytesIO(b'evidence'), 'a.pdf')
+    assert not again.deduplicated
+    assert open(again.path, 'rb').read() == b'evidence'
+
+def test_resumable_upload(storage):
+    data = b'0123456789abcdef'
+    session = storage.create_session('scan.pdf', len(data), user_id=7, metadata={'job_id': 1})
+    upload_id = session['upload_id']
+    assert session['offset'] == 0
+
+    assert storage.write_chunk(upload_id, 7, 0, io.BytesIO(data[:6])) == 6
+    # Offset di depan yang sudah diterima ditolak dengan offset yang benar
+    with pytest.raises(UploadOffsetMismatch) as mismatch:
+        storage.write_chunk(upload_id, 7, 10, io.BytesIO(data[10:]))
+    assert mismatch.value.offset == 6
+    # Chunk yang response-nya hilang boleh dikirim ulang
+    assert storage.write_chunk(upload_id, 7, 4, io.BytesIO(data[4:10])) == 10
+    with pytest.raises(UploadOffsetMismatch):
+        storage.complete_session(upload_id, 7)
+    with pytest.raises(EvidenceUploadError):
+        storage.get_session(upload_id, user_id=8)
+
+    assert storage.get_session(upload_id, 7)['offset'] == 10
+    storage.write_chunk(upload_id, 7, 10, io.BytesIO(data[10:]))
+    blob, completed = storage.complete_session(upload_id, 7)
+    assert open(blob.path, 'rb').read() == data
+    assert completed['metadata'] == {'job_id': 1}
+    assert os.listdir(storage.staging_dir) == []
+
+
+def test_invalid_sessions(storage):
+    with pytest.raises(EvidenceUploadError):
+        storage.get_session('../../etc/passwd', 1)
+    with pytest.raises(EvidenceUploadError):
+        storage.create_session('big.pdf', 65, 1)
+    session = storage.create_session('a.pdf', 3, 1)
+    with pytest.raises(EvidenceUploadError):
+        storage.write_chunk(session['upload_id'], 1, 0, io.BytesIO(b'abcd'))
+    storage.abort_session(session['upload_id'], 1)
+    with pytest.raises(EvidenceUploadError):
+        storage.get_session(session['upload_id'], 1)
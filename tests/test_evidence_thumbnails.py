@@ -0,0 +1,126 @@
+"""
+Unit tests for EvidenceThumbnailService
+Thumbnail dibuat di background (process pool) ke cache lokal content-addressed,
+dengan batas ukuran LRU
+"""
+
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+from PIL import Image
+
+from services.evidence_thumbnails import (
+    EvidenceThumbnailService, THUMBNAIL_FORMATS, THUMBNAIL_SIZES, thumbnail_key, thumbnail_path
+)
+
+
+def _evidence(path, sha=None, file_type='photo'):
+    return SimpleNamespace(
+        file_path=str(path), file_type=file_type, original_filename=os.path.basename(str(path)),
+        file_size=os.path.getsize(path), uploaded_at=datetime(2026, 3, 2, 8, 0), content_sha256=sha
+    )
+
+
+def _service(tmp_path, workers=0, max_bytes=10 * 1024 * 1024):
+    app = Flask(__name__)
+    app.config['EVIDENCE_THUMBNAIL_CACHE_DIR'] = str(tmp_path / 'cache')
+    app.config['EVIDENCE_THUMBNAIL_WORKERS'] = workers
+    app.config['EVIDENCE_THUMBNAIL_CACHE_MAX_BYTES'] = max_bytes
+    service = EvidenceThumbnailService()
+    service.init_app(app)
+    return service
+
+
+@pytest.fixture
+def photo(tmp_path):
+    path = tmp_path / 'photo.png'
+    Image.new('RGB', (1600, 900), (200, 30, 30)).save(path)
+    return path
+
+
+def test_render_all_sizes_and_formats(tmp_path, photo):
+    service = _service(tmp_path)
+    evidence = _evidence(photo, sha='ab' * 32)
+
+    future = service.submit(evidence)
+    assert future.result() > 0
+
+    for size, max_side in THUMBNAIL_SIZES.items():
+        for fmt in THUMBNAIL_FORMATS:
+            path = thumbnail_path(service.cache_dir, 'ab' * 32, size, fmt)
+            with Image.open(path) as img:
+                assert max(img.size) == max_side
+    # Sudah lengkap di cache: tidak dijadwalkan lagi
+    assert service.submit(evidence) is None
+    assert service.get_path(evidence, 'md', 'jpeg').endswith('_md.jpg')
+
+
+def test_legacy_key_and_non_image(tmp_path, photo):
+    service = _service(tmp_path)
+    legacy = _evidence(photo)
+    assert thumbnail_key(legacy) == thumbnail_key(_evidence(photo))
+    assert len(thumbnail_key(legacy)) == 64
+
+    document = _evidence(photo, file_type='document')
+    document.original_filename = 'report.xlsx'
+    assert service.submit(document) is None
+    assert service.get_path(document, wait=1) is None
+
+
+def test_lru_eviction_keeps_recent_files(tmp_path, photo):
+    service = _service(tmp_path)
+    old, recent = _evidence(photo, sha='01' * 32), _evidence(photo, sha='02' * 32)
+    service.submit(old).result()
+    service.submit(recent).result()
+
+    past = time.time() - 7200
+    for size in THUMBNAIL_SIZES:
+        for fmt in THUMBNAIL_FORMATS:
+            os.utime(thumbnail_path(service.cache_dir, '01' * 32, size, fmt), (past, past))
+
+    total = sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(service.cache_dir) for name in names
+    )
+    service.max_bytes = int(total * 0.6)
+    assert service.enforce_limit() > 0
+    assert not service.is_ready('01' * 32, 'lg', 'jpeg')
+    assert service.is_ready('02' * 32, 'sm', 'webp')
+
+
+def test_process_pool_worker(tmp_path, photo):
+    service = _service(tmp_path, workers=1)
+    try:
+        evidence = _evidence(photo, sha='cd' * 32)
+        path = service.get_path(evidence, 'sm', 'webp', wait=60)
+        assert path and os.path.exists(path)
+    finally:
+        service.shutdown()
+
+
+def test_broken_pool_is_shut_down_and_replaced(tmp_path, photo):
+    class BrokenExecutor:
+        shutdown_calls = []
+
+        def submit(self, *args):
+            raise BrokenProcessPool('worker died')
+
+        def shutdown(self, wait=True):
+            self.shutdown_calls.append(wait)
+
+    service = _service(tmp_path, workers=1)
+    broken = BrokenExecutor()
+    service._executor = broken
+    try:
+        future = service.submit(_evidence(photo, sha='ef' * 32))
+        future.result(timeout=60)
+        assert broken.shutdown_calls == [False]
+        assert service._executor is not broken
+        assert service.is_ready('ef' * 32, 'sm', 'webp')
+    finally:
+        service.shutdown()
@@ -0,0 +1,117 @@
+"""
+Tests for services/export_cache.py - cache export periode tertutup (hit dari disk + ETag/304,
+versi data berubah = key baru, periode berjalan tidak di-cache, eviction LRU)
+"""
+
+import io
+import os
+import pytest
+import pytz
+from datetime import date, datetime, timedelta
+import openpyxl
+from models import db, CTPProductionLog
+from services.export_cache import ExportCacheService, export_cache
+
+
+@pytest.fixture
+def app(app, tmp_path):
+    from export_routes import export_bp
+
+    app.config['EXPORT_CACHE_DIR'] = str(tmp_path / 'cache')
+    app.register_blueprint(export_bp)
+    export_cache.init_app(app)
+    return app
+
+
+def _add_logs(first_day, count):
+    logs = [
+        CTPProductionLog(
+            log_date=first_day + timedelta(days=n), ctp_group='A', ctp_shift='1', ctp_pic='Budi',
+            ctp_machine='SUPRA', wo_number=f'WO{n}', mc_number=f'MC{n}', print_machine='SM74', remarks_job='PRODUKSI',
+            item_name='Box', plate_type_material='FUJI 1030', paper_type='Art', raster='175', num_plate_good=n
+        )
+        for n in range(count)
+    ]
+    db.session.add_all(logs)
+    db.session.commit()
+    return logs
+
+
+def _wo_numbers(response):
+    rows = list(openpyxl.load_workbook(io.BytesIO(response.data))['KPI CTP Data'].values)
+    return [row[7] for row in rows[1:]]
+
+
+def test_closed_period_served_from_cache_with_etag(app):
+    _add_logs(date(2025, 3, 1), 2)
+    client = app.test_client()
+    url = '/export-kpi-ctp?date_from=2025-03-01&date_to=2025-03-31&ctp_group='
+
+    first = client.get(url)
+    assert first.status_code == 200
+    assert first.headers['X-Export-Cache'] == 'MISS'
+    etag = first.headers['ETag']
+    assert first.headers['Last-Modified']
+    assert _wo_numbers(first) == ['WO1', 'WO0']
+
+    # Filter kosong tidak mengubah key
+    second = client.get('/export-kpi-ctp?date_from=2025-03-01&date_to=2025-03-31')
+    assert second.headers['X-Export-Cache'] == 'HIT'
+    assert second.headers['ETag'] == etag
+    assert second.data == first.data
+
+    revalidate = client.get(url, headers={'If-None-Match': etag})
+    assert revalidate.status_code == 304
+
+
+def test_data_change_invalidates_cached_export(app):
+    logs = _add_logs(date(2025, 3, 1), 2)
+    client = app.test_client()
+    url = '/export-kpi-ctp?date_from=2025-03-01&date_to=2025-03-31'
+    etag = client.get(url).headers['ETag']
+
+    # Koreksi data bulan lalu -> max(updated_at) berubah -> key baru
+    logs[0].wo_number = 'WO-FIX'
+    db.session.commit()
+    fixed = client.get(url)
+    assert fixed.headers['X-Export-Cache'] == 'MISS'
+    assert fixed.headers['ETag'] != etag
+    assert _wo_numbers(fixed) == ['WO1', 'WO-FIX']
+
+    # Row baru di periode yang sama juga
+    _add_logs(date(2025, 3, 20), 1)
+    assert client.get(url).headers['X-Export-Cache'] == 'MISS'
+    assert client.get(url).headers['X-Export-Cache'] == 'HIT'
+
+
+def test_open_period_is_not_cached(app):
+    today = datetime.now(pytz.timezone('Asia/Jakarta')).date()
+    _add_logs(today, 1)
+    client = app.test_client()
+
+    response = client.get(f'/export-kpi-ctp?date_from={today.replace(day=1)}&date_to={today}')
+    assert response.status_code == 200
+    assert 'X-Export-Cache' not in response.headers
+    assert 'ETag' not in response.headers
+    # Tanpa date_to periode tidak pernah tutup
+    assert 'X-Export-Cache' not in client.get('/export-kpi-ctp').headers
+    assert not os.path.exists(export_cache.cache_dir)
+
+
+def test_enforce_limit_evicts_least_recently_used(tmp_path):
+    cache = ExportCacheService()
+    cache.cache_dir = str(tmp_path / 'cache')
+    cache.max_bytes = 10 ** 9
+
+    keys = [cache.cache_key('export.test', {'month': month}, [month]) for month in (1, 2, 3)]
+    for index, key in enumerate(keys):
+        entry = cache.put_buffer(key, io.BytesIO(b'x' * 1000), f'report_{index}.xlsx', 'application/octet-stream')
+        os.utime(entry.path, (1000 + index, 1000 + index))
+    # Entry pertama baru di-download -> paling baru dipakai
+    os.utime(cache.get(keys[0]).path)
+
+    cache.max_bytes = 2500
+    assert cache.enforce_limit() == 1
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+    assert not os.path.exists(os.path.join(cache.cache_dir, keys[1][:2], f'{keys[1]}.json'))
@@ -0,0 +1,183 @@
+"""
+Tests for services/export_jobs.py - POST /export-jobs, polling status, download artifact,
+dedupe job in-flight, dan TTL artifact
+"""
+
+import io
+import json
+import os
+import pytest
+import pytz
+from datetime import date, datetime, timedelta
+import openpyxl
+from models import db, User, Division, CTPProductionLog, ExportJob, ExportJobRequester
+from models_rnd import RNDJob
+from services.export_jobs import ExportJobService, dedupe_key, export_job_worker
+
+
+@pytest.fixture
+def app(app, login_manager, tmp_path):
+    from export_routes import export_bp
+    from rnd_cloudsphere import rnd_cloudsphere_bp
+
+    app.config['EXPORT_JOB_DIR'] = str(tmp_path / 'jobs')
+    app.config['EXPORT_JOB_WORKERS'] = 0  # render langsung di thread request
+    app.register_blueprint(export_bp)
+    app.register_blueprint(rnd_cloudsphere_bp)
+    export_job_worker.init_app(app)
+    return app
+
+
+@pytest.fixture
+def users(app):
+    db.session.add(Division(id=6, name='RND'))
+    owner = User(username='owner', password_hash='x', name='Owner', role='operator', division_id=6)
+    other = User(username='other', password_hash='x', name='Other', role='operator')
+    db.session.add_all([owner, other])
+    db.session.commit()
+    return owner, other
+
+
+def _client(app, user):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+        session['_fresh'] = True
+    return client
+
+
+def _add_logs(count):
+    db.session.add_all([
+        CTPProductionLog(
+            log_date=date(2026, 3, 1) + timedelta(days=n), ctp_group='A', ctp_shift='1', ctp_pic='Budi',
+            ctp_machine='SUPRA', wo_number=f'WO{n}', mc_number=f'MC{n}', print_machine='SM74', remarks_job='PRODUKSI',
+            item_name='Box', plate_type_material='FUJI 1030', paper_type='Art', raster='175', num_plate_good=n
+        )
+        for n in range(count)
+    ])
+    db.session.commit()
+
+
+def test_job_renders_tracks_progress_and_downloads(app, users):
+    owner, other = users
+    _add_logs(3)
+    client = _client(app, owner)
+
+    response = client.post('/export-jobs', json={
+        'type': 'kpi_ctp', 'params': {'date_from': '2026-03-01', 'date_to': '2026-03-31', 'ctp_group': ''}
+    })
+    assert response.status_code == 202
+    body = response.get_json()
+    job_id = body['job']['id']
+
+    status = client.get(body['status_url']).get_json()['job']
+    assert status['status'] == 'done'
+    assert (status['rows_processed'], status['rows_total'], status['progress']) == (3, 3, 100)
+    assert status['filename'].startswith('kpi_ctp_export_')
+
+    download = client.get(f'/export-jobs/{job_id}/download')
+    assert download.status_code == 200
+    rows = list(openpyxl.load_workbook(io.BytesIO(download.data))['KPI CTP Data'].values)
+    assert [row[7] for row in rows[1:]] == ['WO2', 'WO1', 'WO0']
+
+    # Job milik user lain tidak terlihat
+    assert _client(app, other).get(f'/export-jobs/{job_id}').status_code == 404
+
+
+def test_identical_filters_share_in_flight_job(app, users):
+    owner, other = users
+    params = {'date_from': '2026-03-01'}
+    now = datetime.now(pytz.timezone('Asia/Jakarta')).replace(tzinfo=None)
+    running = ExportJob(
+        id='a' * 32, export_type='kpi_ctp', params=json.dumps(params), requested_by=owner.id,
+        dedupe_key=dedupe_key('kpi_ctp', params), inflight_key=dedupe_key('kpi_ctp', params),
+        status='running', rows_processed=10, rows_total=40, started_at=now, updated_at=now
+    )
+    db.session.add(running)
+    db.session.commit()
+
+    # Nilai kosong tidak mengubah kunci dedupe
+    response = _client(app, other).post('/export-jobs', json={
+        'type': 'kpi_ctp', 'params': {'date_from': '2026-03-01', 'ctp_group': ''}
+    })
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['deduplicated'] is True
+    assert body['job']['id'] == running.id
+    assert body['job']['progress'] == 25
+    assert ExportJob.query.count() == 1
+
+
+def test_deduplicated_user_can_poll_and_download(app, users):
+    owner, other = users
+    _add_logs(2)
+    params = {'date_from': '2026-03-01'}
+    queued = ExportJob(
+        id='b' * 32, export_type='kpi_ctp', params=json.dumps(params), requested_by=owner.id,
+        dedupe_key=dedupe_key('kpi_ctp', params), inflight_key=dedupe_key('kpi_ctp', params),
+        status='queued', rows_processed=0
+    )
+    db.session.add(queued)
+    db.session.commit()
+
+    client = _client(app, other)
+    body = client.post('/export-jobs', json={'type': 'kpi_ctp', 'params': params}).get_json()
+    assert body['deduplicated'] is True and body['job']['id'] == queued.id
+
+    # Poll pertama men-submit job queued (render langsung di test), lalu download
+    assert client.get(body['status_url']).status_code == 200
+    assert client.get(body['status_url']).get_json()['job']['status'] == 'done'
+    download = client.get(body['download_url'])
+    assert download.status_code == 200
+    rows = list(openpyxl.load_workbook(io.BytesIO(download.data))['KPI CTP Data'].values)
+    assert [row[7] for row in rows[1:]] == ['WO1', 'WO0']
+    assert _client(app, owner).get(body['download_url']).status_code == 200
+
+    # Requester ikut dihapus bersama job yang expired
+    db.session.get(ExportJob, queued.id).expires_at = datetime(2026, 1, 1)
+    db.session.commit()
+    assert ExportJobService.cleanup_expired() == 1
+    assert ExportJobRequester.query.count() == 0
+    assert client.get(body['status_url']).status_code == 404
+
+
+def test_rejected_and_failed_jobs(app, users):
+    owner, other = users
+    client = _client(app, owner)
+
+    assert client.post('/export-jobs', json={'type': 'unknown'}).status_code == 400
+    assert client.post('/export-jobs', json={'type': 'kpi_ctp', 'params': {'date_from': '01-03-2026'}}).status_code == 400
+    # Export R&D butuh akses divisi RND
+    assert _client(app, other).post('/export-jobs', json={'type': 'rnd_jobs_excel'}).status_code == 403
+
+    # Renderer gagal (tidak ada data) -> status failed dengan pesan error, download 409
+    body = client.post('/export-jobs', json={'type': 'rnd_jobs_excel', 'params': {'status': 'done'}}).get_json()
+    status = client.get(body['status_url']).get_json()['job']
+    assert status['status'] == 'failed'
+    assert 'No jobs found' in status['error']
+    assert client.get(body['download_url']).status_code == 409
+
+    # Setelah gagal, filter yang sama boleh di-enqueue ulang
+    db.session.add(RNDJob(job_id='RND-001', item_name='Box', sample_type='Blank', status='done',
+                          started_at=datetime(2026, 3, 2, 8, 0), deadline_at=datetime(2026, 3, 9, 8, 0)))
+    db.session.commit()
+    retry = client.post('/export-jobs', json={'type': 'rnd_jobs_excel', 'params': {'status': 'done'}}).get_json()
+    assert retry['deduplicated'] is False
+    status = client.get(retry['status_url']).get_json()['job']
+    assert (status['status'], status['rows_processed'], status['rows_total']) == ('done', 1, 1)
+
+
+def test_expired_artifacts_are_removed(app, users):
+    owner, _ = users
+    _add_logs(1)
+    client = _client(app, owner)
+    body = client.post('/export-jobs', json={'type': 'kpi_ctp', 'params': {}}).get_json()
+    job = db.session.get(ExportJob, body['job']['id'])
+    artifact_path = job.artifact_path
+    assert os.path.exists(artifact_path)
+
+    job.expires_at = datetime(2026, 1, 1)
+    db.session.commit()
+    assert ExportJobService.cleanup_expired() == 1
+    assert not os.path.exists(artifact_path)
+    assert client.get(body['download_url']).status_code == 404
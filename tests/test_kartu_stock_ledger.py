@@ -0,0 +1,157 @@
+"""
+Unit tests for KartuStockLedger - pemakaian plate/chemical di-apply incremental
+dari CTPProductionLog / ChemicalBonCTP dan di-carry forward antar shift
+"""
+
+from datetime import date, datetime
+from sqlalchemy import event
+from models import (
+    db, User, CTPProductionLog, ChemicalBonCTP, KartuStockPlateFuji, KartuStockChemicalSaphira
+)
+from services.kartu_stock_ledger import KartuStockLedger, shift_for_timestamp
+
+FUJI_1030 = '02-049-000-0000008'
+SAPHIRA_DEVELOPER = '02-005-000-0000061'
+DAY = date(2026, 3, 2)
+
+
+def _log(log_date=DAY, shift='Shift 1', plate='FUJI 1030', good=10, not_good=2):
+    return CTPProductionLog(
+        log_date=log_date, ctp_group='A', ctp_shift=shift, ctp_pic='PIC', ctp_machine='M1',
+        mc_number='MC1', print_machine='P1', remarks_job='NEW', item_name='Item',
+        plate_type_material=plate, paper_type='Art', raster='175',
+        num_plate_good=good, num_plate_not_good=not_good
+    )
+
+
+def _row(model, item_code, tanggal, shift):
+    db.session.expire_all()
+    return model.query.filter_by(item_code=item_code, tanggal=tanggal, shift=shift).one()
+
+
+class TestPlateLedger:
+
+    def test_log_insert_update_delete_moves_usage(self, app):
+        KartuStockLedger.set_opening_balance(KartuStockPlateFuji, FUJI_1030, DAY, '1', 300)
+        KartuStockLedger.close_shift(DAY, '1')
+        db.session.commit()
+
+        log = _log()
+        db.session.add(log)
+        db.session.commit()
+        shift1 = _row(KartuStockPlateFuji, FUJI_1030, DAY, '1')
+        assert (shift1.jumlah_pemakaian, shift1.jumlah_stock_akhir) == (12, 288)
+        # Shift berikutnya yang sudah dibuka ikut bergeser
+        assert _row(KartuStockPlateFuji, FUJI_1030, DAY, '2').jumlah_stock_awal == 288
+
+        log = db.session.get(CTPProductionLog, log.id)
+        log.ctp_shift = 'Shift 2'
+        log.num_plate_good = 20
+        db.session.commit()
+        assert _row(KartuStockPlateFuji, FUJI_1030, DAY, '1').jumlah_stock_akhir == 300
+        shift2 = _row(KartuStockPlateFuji, FUJI_1030, DAY, '2')
+        assert (shift2.jumlah_stock_awal, shift2.jumlah_pemakaian, shift2.jumlah_stock_akhir) == (300, 22, 278)
+
+        db.session.delete(db.session.get(CTPProductionLog, log.id))
+        db.session.commit()
+        assert _row(KartuStockPlateFuji, FUJI_1030, DAY, '2').jumlah_stock_akhir == 300
+
+    def test_backdated_log_carries_forward(self, app):
+        KartuStockLedger.set_opening_balance(KartuStockPlateFuji, FUJI_1030, DAY, '1', 100)
+        KartuStockLedger.apply_delta(KartuStockPlateFuji, FUJI_1030, date(2026, 3, 3), '1', incoming=30)
+        db.session.commit()
+
+        db.session.add(_log(good=5, not_good=0))
+        db.session.commit()
+
+        later = _row(KartuStockPlateFuji, FUJI_1030, date(2026, 3, 3), '1')
+        assert (later.jumlah_stock_awal, later.jumlah_incoming, later.jumlah_stock_akhir) == (95, 30, 125)
+
+    def test_read_is_single_select_without_writes(self, app):
+        KartuStockLedger.close_shift(DAY, '1')
+        db.session.commit()
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            stocks = KartuStockLedger.get_shift_stocks(KartuStockPlateFuji, DAY, '2')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+        assert len(stocks) == len(KartuStockPlateFuji.PLATE_TYPE_MAPPING)
+        assert len(statements) == 1
+        assert statements[0].lstrip().upper().startswith('SELECT')
+
+    def test_unopened_shift_is_projected_not_written(self, app):
+        KartuStockLedger.set_opening_balance(KartuStockPlateFuji, FUJI_1030, DAY, '1', 60)
+        db.session.commit()
+
+        stocks = KartuStockLedger.get_shift_stocks(KartuStockPlateFuji, date(2026, 3, 5), '1')
+
+        projected = next(stock for stock in stocks if stock.item_code == FUJI_1030)
+        assert projected.jumlah_stock_awal == 60
+        assert projected.id is None
+        assert KartuStockPlateFuji.query.count() == 1
+
+
+class TestChemicalLedger:
+
+    def test_bon_after_midnight_counts_for_previous_shift_2(self, app):
+        user = User(username='ctp', password_hash='x', name='CTP')
+        db.session.add(user)
+        db.session.commit()
+
+        db.session.add(ChemicalBonCTP(
+            bon_number='B1', request_number='R1', tanggal=date(2026, 3, 3), bon_periode='Maret 2026',
+            item_code=SAPHIRA_DEVELOPER, item_name='SAPHIRA DEVELOPER', brand='SAPHIRA', unit='GLN',
+            jumlah=4, created_by=user.id, created_at=datetime(2026, 3, 3, 2, 30)
+        ))
+        db.session.commit()
+
+        row = _row(KartuStockChemicalSaphira, SAPHIRA_DEVELOPER, DAY, '2')
+        assert (row.jumlah_pemakaian, row.jumlah_stock_akhir) == (4, -4)
+        assert row.confirmed_at is None
+
+    def test_shift_for_timestamp(self):
+        assert shift_for_timestamp(datetime(2026, 3, 2, 6, 45)) == (DAY, '1')
+        assert shift_for_timestamp(datetime(2026, 3, 2, 18, 45)) == (DAY, '2')
+        assert shift_for_timestamp(datetime(2026, 3, 3, 6, 44)) == (DAY, '2')
+
+
+class TestRebuild:
+
+    def test_rebuild_matches_incremental_ledger(self, app):
+        KartuStockLedger.set_opening_balance(KartuStockPlateFuji, FUJI_1030, DAY, '1', 200)
+        KartuStockLedger.close_shift(DAY, '1')
+        db.session.add_all([_log(good=7, not_good=1), _log(shift='Shift 2', good=3, not_good=0)])
+        db.session.commit()
+
+        result = KartuStockLedger.rebuild([KartuStockPlateFuji])
+        db.session.commit()
+
+        assert result['corrected'] == 0
+        assert _row(KartuStockPlateFuji, FUJI_1030, DAY, '2').jumlah_stock_akhir == 189
+
+    def test_plate_usage_batch_is_one_query_per_shift(self, app):
+        db.session.add_all([
+            _log(good=7, not_good=1),
+            _log(plate='FUJI 1055', good=4, not_good=0),
+            _log(plate='SAPHIRA 1030', good=9, not_good=0),
+            _log(shift='Shift 2', good=3, not_good=0),
+        ])
+        db.session.commit()
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            usage = KartuStockPlateFuji.calculate_usage_batch(DAY, '1')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+        assert len(statements) == 1
+        assert usage[FUJI_1030] == 8
+        assert usage['02-049-000-0000010'] == 4  # FUJI 1055
+        assert usage['02-049-000-0000009'] == 0  # FUJI 1630, tidak ada log
+        assert set(usage) == set(KartuStockPlateFuji.PLATE_TYPE_MAPPING)
@@ -0,0 +1,120 @@
+"""
+Unit tests for notification retention (NotificationArchiveService) and
+the per-user unread counter maintained by NotificationService
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from models import (
+    db, User, UniversalNotification, NotificationRecipient, NotificationUnreadCounter,
+    UniversalNotificationArchive, NotificationRecipientArchive
+)
+from services.notification_service import NotificationService
+from services.notification_archive import NotificationArchiveService, notifications_cli
+
+
+@pytest.fixture
+def users(app):
+    users = [User(username=f'user{i}', password_hash='x', name=f'User {i}') for i in range(3)]
+    db.session.add_all(users)
+    db.session.commit()
+    return [u.id for u in users]
+
+
+def _notify(user_ids, created_at=None, triggered_by=None):
+    notification = NotificationService.create_notification(
+        'rnd_job_created', 'Title', 'Message', 'rnd_job', 1, triggered_by or user_ids[0]
+    )
+    if created_at:
+        notification.created_at = created_at
+    notification_id = notification.id
+    NotificationService.add_recipients(notification_id, user_ids)
+    return notification_id
+
+
+def _counter(user_id):
+    counter = db.session.get(NotificationUnreadCounter, user_id)
+    return counter.unread_count if counter else None
+
+
+class TestUnreadCounter:
+
+    def test_counter_follows_add_and_read(self, app, users):
+        first = _notify(users[:2])
+        _notify(users[:2])
+        assert _counter(users[0]) == 2
+        assert NotificationService.get_unread_count(users[0]) == 2
+
+        NotificationService.mark_as_read(first, users[0])
+        NotificationService.mark_as_read(first, users[0])  # sudah dibaca - tidak mengurangi lagi
+        assert _counter(users[0]) == 1
+
+        NotificationService.mark_all_as_read(users[1])
+        assert _counter(users[1]) == 0
+        assert NotificationService.get_unread_counts(users) == {users[0]: 1, users[1]: 0, users[2]: 0}
+
+    def test_rebuild_corrects_drift(self, app, users):
+        _notify(users[:1])
+        db.session.get(NotificationUnreadCounter, users[0]).unread_count = 7
+        db.session.commit()
+
+        result = NotificationArchiveService.rebuild_unread_counters()
+
+        assert result == {'users': 3, 'corrected': 3}  # 1 drift + 2 user tanpa row
+        assert _counter(users[0]) == 1
+        assert _counter(users[2]) == 0
+
+
+class TestArchive:
+
+    def test_archives_only_old_fully_read_notifications(self, app, users):
+        old = datetime.now() - timedelta(days=120)
+        archived_id = _notify(users[:2], created_at=old)
+        still_unread_id = _notify(users[:2], created_at=old)
+        recent_id = _notify(users[:2])
+        for user_id in users[:2]:
+            NotificationService.mark_as_read(archived_id, user_id)
+            NotificationService.mark_as_read(recent_id, user_id)
+        NotificationService.mark_as_read(still_unread_id, users[0])
+
+        stats = NotificationArchiveService.archive_read_notifications(older_than_days=90, batch_size=1)
+
+        assert stats['notifications'] == 1
+        assert stats['recipients'] == 2
+        assert stats['rows_per_second'] >= 0
+        assert db.session.get(UniversalNotification, archived_id) is None
+        assert db.session.get(UniversalNotificationArchive, archived_id).title == 'Title'
+        assert NotificationRecipientArchive.query.filter_by(notification_id=archived_id).count() == 2
+        assert {n.id for n in UniversalNotification.query} == {still_unread_id, recent_id}
+        assert NotificationRecipient.query.count() == 4
+        assert NotificationService.get_unread_count(users[1]) == 1
+
+    def test_batches_until_done(self, app, users):
+        old = datetime.now() - timedelta(days=120)
+        for _ in range(5):
+            notification_id = _notify(users[:1], created_at=old)
+            NotificationService.mark_as_read(notification_id, users[0])
+
+        stats = NotificationArchiveService.archive_read_notifications(older_than_days=90, batch_size=2)
+
+        assert stats['batches'] == 3
+        assert stats['notifications'] == 5
+        assert UniversalNotification.query.count() == 0
+
+    def test_cli_days_zero_is_not_replaced_by_config(self, app, users):
+        app.cli.add_command(notifications_cli)
+        notification_id = _notify(users[:1], created_at=datetime.now() - timedelta(hours=1))
+        NotificationService.mark_as_read(notification_id, users[0])
+
+        result = app.test_cli_runner().invoke(args=['notifications', 'archive', '--days', '0'])
+
+        assert result.exit_code == 0, result.output
+        assert 'Archived 1 notifications' in result.output
+        assert UniversalNotification.query.count() == 0
+
+    def test_cli_rejects_zero_batch_size(self, app, users):
+        app.cli.add_command(notifications_cli)
+
+        result = app.test_cli_runner().invoke(args=['notifications', 'archive', '--batch-size', '0'])
+
+        assert result.exit_code != 0
@@ -0,0 +1,136 @@
+"""
+Benchmark-style tests for NotificationService.add_recipients bulk fan-out
+Round trip ke database harus konstan (O(1)), bukan satu query per user (O(N))
+"""
+
+import pytest
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.exc import IntegrityError
+from models import db, User, Division, NotificationRecipient
+from services.notification_service import NotificationService, NotificationDispatcher
+
+DIVISION_SIZE = 200
+
+
+@pytest.fixture
+def division_users(app):
+    division = Division(name='RND')
+    db.session.add(division)
+    db.session.flush()
+    users = [
+        User(username=f'rnd{i}', password_hash='x', name=f'RND {i}', division_id=division.id)
+        for i in range(DIVISION_SIZE)
+    ]
+    db.session.add_all(users)
+    db.session.commit()
+    return division, users
+
+
+class StatementCounter:
+    """Hitung statement SQL yang dikirim ke database"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+def _new_notification(triggered_by):
+    return NotificationService.create_notification(
+        'rnd_job_created', 'Title', 'Message', 'rnd_job', 1, triggered_by
+    )
+
+
+class TestBulkFanOut:
+
+    def test_fan_out_round_trips_are_constant(self, app, division_users):
+        division, users = division_users
+        notification_id = _new_notification(users[0].id).id
+        user_ids = [u.id for u in users]
+        db.session.commit()
+
+        with StatementCounter(db.engine) as counter:
+            added = NotificationService.add_recipients(notification_id, user_ids)
+
+        assert len(added) == DIVISION_SIZE
+        # existing-recipient lookup + bulk insert + unread counter update
+        # (+ INSERT ... SELECT untuk user yang belum punya counter) + unread-count push
+        assert counter.count <= 5
+
+    def test_send_to_division_round_trips_are_constant(self, app, division_users):
+        division, users = division_users
+        division_id, triggered_by = division.id, users[0].id
+
+        with StatementCounter(db.engine) as counter:
+            result = NotificationDispatcher.send_to_division(
+                division_id=division_id,
+                notification_type='rnd_job_created',
+                title='Title',
+                message='Message',
+                related_resource_type='rnd_job',
+                related_resource_id=1,
+                triggered_by_user_id=triggered_by
+            )
+
+        assert result['recipient_count'] == DIVISION_SIZE
+        assert counter.count <= 7
+
+    def test_existing_recipients_are_skipped(self, app, division_users):
+        division, users = division_users
+        notification = _new_notification(users[0].id)
+        NotificationService.add_recipients(notification.id, [users[0].id, users[1].id])
+
+        added = NotificationService.add_recipients(
+            notification.id, [users[1].id, users[2].id, users[2].id]
+        )
+
+        assert added == [users[2].id]
+        assert NotificationRecipient.query.filter_by(notification_id=notification.id).count() == 3
+
+    def test_database_rejects_duplicate_recipient(self, app, division_users):
+        division, users = division_users
+        notification = _new_notification(users[0].id)
+        NotificationService.add_recipients(notification.id, [users[0].id])
+
+        db.session.add(NotificationRecipient(notification_id=notification.id, user_id=users[0].id))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+
+class TestUnreadCounterMaterialize:
+
+    def test_mysql_upsert_applies_delta_on_duplicate(self):
+        statement = NotificationService._materialize_counter_statement('mysql', [1, 2], datetime(2025, 3, 1), 1)
+        sql = str(statement.compile(dialect=mysql.dialect()))
+
+        assert 'INSERT INTO notification_unread_counters' in sql
+        assert 'ON DUPLICATE KEY UPDATE' in sql
+        assert 'notification_unread_counters.unread_count +' in sql
+
+    def test_sqlite_upsert_applies_delta_on_conflict(self):
+        statement = NotificationService._materialize_counter_statement('sqlite', [1, 2], datetime(2025, 3, 1), -1)
+        sql = str(statement.compile(dialect=sqlite.dialect()))
+
+        assert 'ON CONFLICT (user_id) DO UPDATE' in sql
+
+    def test_counters_materialized_for_new_users(self, app, division_users):
+        division, users = division_users
+        notification = _new_notification(users[0].id)
+        NotificationService.add_recipients(notification.id, [users[0].id, users[1].id])
+        second = _new_notification(users[0].id)
+        NotificationService.add_recipients(second.id, [users[1].id, users[2].id])
+
+        counts = NotificationService.get_unread_counts([users[0].id, users[1].id, users[2].id])
+        assert counts == {users[0].id: 1, users[1].id: 2, users[2].id: 1}
@@ -0,0 +1,130 @@
+"""
+Unit tests for NotificationHub (SSE publish/subscribe)
+"""
+
+import pytest
+from models import db, User
+from services.notification_hub import (
+    NotificationHub, InProcessBackend, HubBackend, BADGE_CHANNEL, StreamLimiter, format_sse,
+    stream_limiter, user_channel
+)
+from services.notification_service import NotificationService
+
+
+@pytest.fixture
+def backend():
+    previous = NotificationHub.get_backend()
+    backend = InProcessBackend()
+    NotificationHub.set_backend(backend)
+    yield backend
+    NotificationHub.set_backend(previous)
+
+
+class TestInProcessHub:
+
+    def test_publish_reaches_only_subscribed_channels(self, backend):
+        alice = NotificationHub.subscribe([user_channel(1), BADGE_CHANNEL])
+        bob = NotificationHub.subscribe([user_channel(2)])
+
+        delivered = NotificationHub.publish(user_channel(1), 'unread_count', {'unread_count': 3})
+
+        assert delivered == 1
+        assert alice.get(timeout=0) == {'event': 'unread_count', 'data': {'unread_count': 3}}
+        assert bob.get(timeout=0) is None
+
+    def test_close_unsubscribes(self, backend):
+        subscription = NotificationHub.subscribe([BADGE_CHANNEL])
+        assert backend.subscriber_count() == 1
+
+        subscription.close()
+
+        assert backend.subscriber_count() == 0
+        assert NotificationHub.publish(BADGE_CHANNEL, 'badges', {}) == 0
+
+    def test_backend_error_does_not_raise(self, backend):
+        class BrokenBackend(InProcessBackend):
+            def publish(self, channel, message):
+                raise ConnectionError('broker down')
+
+        NotificationHub.set_backend(BrokenBackend())
+        assert NotificationHub.publish(BADGE_CHANNEL, 'badges', {}) == 0
+
+    def test_backend_must_implement_interface(self):
+        class PublishOnlyBackend(HubBackend):
+            def publish(self, channel, message):
+                return 0
+
+        with pytest.raises(TypeError):
+            PublishOnlyBackend()
+
+    def test_format_sse(self):
+        assert format_sse('badges', {'a': 1}) == 'event: badges\ndata: {"a":1}\n\n'
+
+
+class TestUnreadCountPush:
+
+    def test_add_recipients_pushes_unread_count(self, app, backend):
+        users = [User(username=f'user{i}', password_hash='x', name=f'User {i}') for i in range(2)]
+        db.session.add_all(users)
+        db.session.commit()
+        subscription = NotificationHub.subscribe([user_channel(users[0].id)])
+
+        notification = NotificationService.create_notification(
+            'rnd_job_created', 'Title', 'Message', 'rnd_job', 1, users[1].id
+        )
+        NotificationService.add_recipients(notification.id, [users[0].id, users[1].id])
+
+        message = subscription.get(timeout=0)
+        assert message['event'] == 'unread_count'
+        assert message['data'] == {'unread_count': 1, 'notification_id': notification.id}
+
+
+class TestStreamLimit:
+
+    @pytest.fixture
+    def stream_app(self, app, login_manager, backend):
+        from blueprints.notification_routes import notification_bp
+
+        app.config['NOTIFICATION_STREAM_MAX_CONNECTIONS'] = 1
+        app.register_blueprint(notification_bp)
+        user = User(username='viewer', password_hash='x', name='Viewer')
+        db.session.add(user)
+        db.session.commit()
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user.id)
+            session['_fresh'] = True
+        return client
+
+    def test_limiter_caps_open_streams(self):
+        limiter = StreamLimiter()
+
+        assert limiter.try_acquire(2)
+        assert limiter.try_acquire(2)
+        assert not limiter.try_acquire(2)
+        limiter.release()
+        assert limiter.try_acquire(2)
+        assert limiter.open_count() == 2
+
+    def test_sync_worker_falls_back_to_polling(self, stream_app):
+        response = stream_app.get('/api/notifications/stream', environ_overrides={'wsgi.multithread': False})
+
+        assert response.status_code == 503
+        assert response.get_json()['fallback'] == 'polling'
+        assert response.headers['Retry-After']
+        assert stream_limiter.open_count() == 0
+
+    def test_stream_over_limit_falls_back_and_slot_is_released(self, stream_app, backend):
+        threaded = {'wsgi.multithread': True}
+        first = stream_app.get('/api/notifications/stream', environ_overrides=threaded)
+        assert first.status_code == 200
+        assert first.mimetype == 'text/event-stream'
+        assert stream_limiter.open_count() == 1
+
+        second = stream_app.get('/api/notifications/stream', environ_overrides=threaded)
+        assert second.status_code == 503
+        assert second.get_json()['fallback'] == 'polling'
+
+        first.close()
+        assert stream_limiter.open_count() == 0
+        assert backend.subscriber_count() == 0
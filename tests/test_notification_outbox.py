@@ -0,0 +1,133 @@
+"""
+Unit tests for the asynchronous notification outbox (NotificationOutboxService / OutboxWorker)
+"""
+
+import pytest
+from unittest.mock import patch
+from models import db, User, NotificationOutbox, NotificationRecipient, UniversalNotification
+from services.notification_outbox import (
+    NotificationOutboxService, OutboxWorker, MAX_ATTEMPTS, backoff_seconds
+)
+from services.notification_service import NotificationService
+
+
+@pytest.fixture
+def worker(app):
+    worker = OutboxWorker()
+    worker.app = app
+    return worker
+
+
+@pytest.fixture
+def admin(app):
+    user = User(username='admin', password_hash='x', name='Admin', role='admin')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def _enqueue_entry_created(user, **extra):
+    return NotificationOutboxService.enqueue(
+        'dispatch_5w1h_entry_created',
+        entry_id=1,
+        entry_title='Mesin CTP',
+        created_by_user_id=user.id,
+        created_by_name=user.name,
+        **extra
+    )
+
+
+class TestOutboxEnqueue:
+
+    def test_enqueue_is_part_of_caller_transaction(self, app, admin):
+        _enqueue_entry_created(admin)
+        db.session.rollback()
+
+        assert NotificationOutbox.query.count() == 0
+
+    def test_unknown_dispatcher_rejected(self, app):
+        with pytest.raises(ValueError):
+            NotificationOutboxService.enqueue('send_to_admins')
+
+    def test_dedupe_key(self, app, admin):
+        assert _enqueue_entry_created(admin, dedupe_key='5w1h:1') is not None
+        db.session.commit()
+        assert _enqueue_entry_created(admin, dedupe_key='5w1h:1') is None
+
+
+class TestOutboxWorker:
+
+    def test_run_pending_dispatches_notification(self, app, worker, admin):
+        _enqueue_entry_created(admin)
+        db.session.commit()
+
+        assert worker.run_pending() == 1
+
+        entry = NotificationOutbox.query.one()
+        assert entry.status == 'done'
+        assert entry.attempts == 1
+        notification = UniversalNotification.query.one()
+        assert notification.notification_type == '5w1h_entry_created'
+        metrics = worker.get_metrics()
+        assert metrics['processed'] == 1
+        assert metrics['queue_depth']['pending'] == 0
+
+    def test_failure_is_retried_with_backoff(self, app, worker, admin):
+        _enqueue_entry_created(admin)
+        db.session.commit()
+
+        with patch(
+            'services.notification_service.NotificationDispatcher.dispatch_5w1h_entry_created',
+            side_effect=RuntimeError('db down')
+        ):
+            assert worker.run_pending() == 0
+
+        entry = NotificationOutbox.query.one()
+        assert entry.status == 'pending'
+        assert entry.last_error == 'db down'
+        assert entry.next_attempt_at > entry.started_at
+        # Belum jatuh tempo, tidak diambil lagi
+        assert worker.run_pending() == 0
+        assert worker.get_metrics()['retried'] == 1
+
+    def test_retry_after_partial_dispatch_does_not_duplicate(self, app, worker, admin):
+        _enqueue_entry_created(admin)
+        db.session.commit()
+
+        add_recipients = NotificationService.add_recipients
+
+        def add_recipients_then_fail(notification_id, user_ids):
+            add_recipients(notification_id, user_ids)
+            raise RuntimeError('connection lost')
+
+        # Gagal setelah notifikasi + recipient ditulis: semuanya ikut di-rollback
+        with patch.object(NotificationService, 'add_recipients', side_effect=add_recipients_then_fail):
+            assert worker.run_pending() == 0
+        assert UniversalNotification.query.count() == 0
+        assert NotificationRecipient.query.count() == 0
+
+        entry = NotificationOutbox.query.one()
+        entry.next_attempt_at = entry.started_at
+        db.session.commit()
+        assert worker.run_pending() == 1
+        assert UniversalNotification.query.count() == 1
+        assert NotificationRecipient.query.count() == 1
+        assert NotificationService.get_unread_count(admin.id) == 1
+
+    def test_gives_up_after_max_attempts(self, app, worker, admin):
+        entry = _enqueue_entry_created(admin)
+        entry.attempts = MAX_ATTEMPTS - 1
+        db.session.commit()
+
+        with patch(
+            'services.notification_service.NotificationDispatcher.dispatch_5w1h_entry_created',
+            side_effect=RuntimeError('db down')
+        ):
+            worker.run_pending()
+
+        assert NotificationOutbox.query.one().status == 'failed'
+        assert worker.get_metrics()['queue_depth']['failed'] == 1
+
+    def test_backoff_grows_and_is_capped(self):
+        assert backoff_seconds(1) < backoff_seconds(2) < backoff_seconds(3)
+        assert backoff_seconds(50) == backoff_seconds(60)
@@ -0,0 +1,73 @@
+"""
+Unit tests for keyset (cursor) pagination in NotificationService.get_user_notifications
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from models import db, User, UniversalNotification, NotificationRecipient
+from services.notification_service import NotificationService
+
+
+@pytest.fixture
+def user_with_notifications(app):
+    user = User(username='operator', password_hash='x', name='Operator')
+    db.session.add(user)
+    db.session.flush()
+
+    base = datetime(2026, 3, 1, 8, 0)
+    for i in range(7):
+        notification = UniversalNotification(
+            notification_type='rnd_job_created', title=f'Job {i}', message='Message',
+            related_resource_type='rnd_job', related_resource_id=i,
+            triggered_by_user_id=user.id,
+            # Dua notifikasi dengan created_at yang sama untuk menguji tie-breaker id
+            created_at=base + timedelta(minutes=min(i, 5))
+        )
+        db.session.add(notification)
+        db.session.flush()
+        db.session.add(NotificationRecipient(
+            notification_id=notification.id, user_id=user.id, is_read=(i % 2 == 0)
+        ))
+    db.session.commit()
+    return user.id
+
+
+class TestNotificationKeysetPagination:
+
+    def test_pages_follow_cursor_without_gaps(self, app, user_with_notifications):
+        user_id = user_with_notifications
+        seen = []
+        cursor = None
+        while True:
+            page = NotificationService.get_user_notifications(user_id, limit=3, cursor=cursor)
+            seen.extend(item['title'] for item in page)
+            if len(page) < 3:
+                break
+            cursor = page[-1]['cursor']
+
+        assert seen == ['Job 6', 'Job 5', 'Job 4', 'Job 3', 'Job 2', 'Job 1', 'Job 0']
+
+    def test_page_is_single_statement_with_recipient_status(self, app, user_with_notifications):
+        user_id = user_with_notifications
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            page = NotificationService.get_user_notifications(user_id, limit=5)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+        assert len(statements) == 1
+        assert [item['is_read'] for item in page] == [True, False, True, False, True]
+        assert page[0]['triggered_by_name'] == 'Operator'
+
+    def test_unread_only(self, app, user_with_notifications):
+        page = NotificationService.get_user_notifications(
+            user_with_notifications, limit=10, include_read=False
+        )
+        assert [item['title'] for item in page] == ['Job 5', 'Job 3', 'Job 1']
+
+    def test_invalid_cursor(self, app, user_with_notifications):
+        with pytest.raises(ValueError):
+            NotificationService.get_user_notifications(user_with_notifications, cursor='not-a-cursor')
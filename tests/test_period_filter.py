@@ -0,0 +1,116 @@
+"""
+Unit tests for services.period_filter - filter periode sebagai range setengah terbuka
+yang bisa memakai index kolom tanggal
+"""
+
+import pytest
+from datetime import date, datetime
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import GenericFunction
+from models import db, CTPProblemLog, PlateAdjustmentRequest, User
+from services.period_filter import InvalidPeriodError, period_filters, period_range
+from services.period_filter_benchmark import benchmark_period_filters
+
+
+class TestPeriodRange:
+
+    def test_month_and_year(self):
+        assert period_range(2026, 3) == (date(2026, 3, 1), date(2026, 4, 1))
+        assert period_range('2026', '12') == (date(2026, 12, 1), date(2027, 1, 1))
+        assert period_range(2026) == (date(2026, 1, 1), date(2027, 1, 1))
+        assert period_range('', '') == (None, None)
+
+    def test_date_range_is_inclusive_and_narrows_period(self):
+        assert period_range(date_from='2026-03-05', date_to='2026-03-10') == (date(2026, 3, 5), date(2026, 3, 11))
+        assert period_range(2026, 3, date_to=date(2026, 5, 1)) == (date(2026, 3, 1), date(2026, 4, 1))
+        assert period_range(2026, 3, as_datetime=True) == (datetime(2026, 3, 1), datetime(2026, 4, 1))
+
+    def test_invalid_values(self):
+        with pytest.raises(InvalidPeriodError):
+            period_range(2026, 13)
+        with pytest.raises(InvalidPeriodError):
+            period_range(date_from='05/03/2026')
+
+
+class TestPeriodFilters:
+
+    def test_datetime_column_includes_whole_last_day(self, app):
+        for problem_date in (datetime(2026, 2, 28, 23, 59), datetime(2026, 3, 31, 23, 30), datetime(2026, 4, 1)):
+            db.session.add(CTPProblemLog(
+                machine_id=1, problem_date=problem_date, problem_description='x', start_time=problem_date, created_by=1,
+                technician_type='internal', status='selesai'
+            ))
+        db.session.commit()
+
+        def count(**kwargs):
+            return CTPProblemLog.query.filter(*period_filters(CTPProblemLog.problem_date, **kwargs)).count()
+
+        assert count(year=2026, month=3) == 1
+        assert count(date_from='2026-02-28', date_to='2026-03-31') == 2
+        assert count(month=3) == 1
+
+    def test_range_uses_index_where_extract_scans(self, app):
+        report = {entry['table']: entry for entry in benchmark_period_filters(2026, 3)}
+
+        for table in ('ctp_production_logs', 'chemical_bon_ctp', 'ctp_problem_logs', 'rnd_jobs'):
+            before = ' '.join(report[table]['before']['plan'])
+            after = ' '.join(report[table]['after']['plan'])
+            assert 'SEARCH' not in before, (table, before)
+            assert 'SEARCH' in after and 'INDEX' in after, (table, after)
+
+
+class timestampdiff(GenericFunction):
+    """TIMESTAMPDIFF(MINUTE, a, b) MySQL; di SQLite dihitung dari julianday"""
+    inherit_cache = True
+
+
+@compiles(timestampdiff, 'sqlite')
+def _timestampdiff_sqlite(element, compiler, **kw):
+    _, start, finish = element.clauses
+    return (f"CAST(ROUND((julianday({compiler.process(finish, **kw)}) - "
+            f"julianday({compiler.process(start, **kw)})) * 1440) AS INTEGER)")
+
+
+class TestMountingDashboardData:
+
+    @pytest.fixture
+    def client(self, app, login_manager):
+        # app.py butuh seluruh dependency produksi; view-nya dipasang di app test (SQLite)
+        main = pytest.importorskip('app', exc_type=ImportError)
+        app.add_url_rule('/get-mounting-dashboard-data', view_func=main.get_mounting_dashboard_data)
+
+        admin = User(username='admin', password_hash='x', name='Admin', role='admin')
+        db.session.add(admin)
+        db.session.commit()
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(admin.id)
+            session['_fresh'] = True
+        return client
+
+    def test_fa_and_curve_totals_follow_period(self, app, client):
+        for remarks, start, by in (
+            ('ADJUSTMENT FA PROOF', datetime(2026, 3, 2, 8, 0), 'Andi'),
+            ('ADJUSTMENT CURVE PRODUKSI', datetime(2026, 3, 31, 23, 0), 'Andi'),
+            ('ADJUSTMENT FA PRODUKSI', datetime(2026, 4, 1, 8, 0), 'Budi'),
+            ('ADJUSTMENT CURVE PROOF', datetime(2025, 3, 10, 8, 0), 'Budi'),
+        ):
+            adjustment = PlateAdjustmentRequest(
+                tanggal=start.date(), mesin_cetak='SM74', pic='P', remarks=remarks, wo_number='WO', mc_number='MC',
+                item_name='Box', paper_type='Art', jumlah_plate=4, adjustment_start_at=start,
+                adjustment_finish_at=start.replace(minute=30), adjustment_by=by
+            )
+            adjustment.status = 'selesai'  # __init__ selalu memulai dari status awal alur
+            db.session.add(adjustment)
+        db.session.commit()
+
+        march = client.get('/get-mounting-dashboard-data?year=2026&month=3')
+        assert march.status_code == 200
+        overall = march.get_json()['overall']
+        assert (overall['total_adjustments'], overall['total_fa'], overall['total_curve']) == (2, 1, 1)
+        assert (overall['fa_minutes'], overall['curve_minutes']) == (30, 30)
+        assert [adjuster['name'] for adjuster in march.get_json()['adjusters']] == ['Andi']
+
+        # Tanpa bulan: setahun penuh, tahun lain tidak ikut
+        overall = client.get('/get-mounting-dashboard-data?year=2026').get_json()['overall']
+        assert (overall['total_adjustments'], overall['total_fa'], overall['total_curve']) == (3, 2, 1)
@@ -0,0 +1,153 @@
+"""
+Unit tests for RNDDashboardService (individual scores, dashboard stats)
+Skor dan counter dashboard dihitung dengan query agregat, jumlah statement tidak
+bertambah dengan jumlah user/assignment/job
+"""
+
+import logging
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from models import db, User, Division
+from models_rnd import RNDJob, RNDProgressStep, RNDJobProgressAssignment
+from services.rnd_dashboard_service import RNDDashboardService, SCORE_STAGES
+
+
+@pytest.fixture
+def scored_data(app):
+    db.session.add(Division(id=6, name='RND'))
+    users = [User(username=f'rnd{i}', password_hash='x', name=f'RND {i}', division_id=6) for i in range(5)]
+    steps = {
+        'Blank': RNDProgressStep(name='Initial Plotter', sample_type='Blank', step_order=1),
+        'RoHS ICB': RNDProgressStep(name='Proof Approval', sample_type='RoHS ICB', step_order=1),
+    }
+    db.session.add_all(users + list(steps.values()))
+    db.session.flush()
+
+    base = datetime(2026, 3, 2, 8, 0)
+
+    def assign(job_no, user, sample_type, days, status='completed', finished_offset=0):
+        job = RNDJob(
+            job_id=f'RND-{job_no:03d}', started_at=base, deadline_at=base + timedelta(days=10),
+            item_name='Item', sample_type=sample_type
+        )
+        db.session.add(job)
+        db.session.flush()
+        db.session.add(RNDJobProgressAssignment(
+            job_id=job.id, progress_step_id=steps[sample_type].id, pic_id=user.id, status=status,
+            started_at=base + timedelta(days=finished_offset),
+            finished_at=base + timedelta(days=finished_offset + days)
+        ))
+
+    assign(1, users[0], 'Blank', 1)
+    assign(2, users[0], 'Blank', 2)
+    assign(3, users[0], 'RoHS ICB', 0.5)
+    assign(4, users[1], 'Blank', 3, status='in_progress')
+    assign(5, users[1], 'Blank', 4, finished_offset=40)  # selesai bulan April
+    db.session.commit()
+    return users
+
+
+class StatementCounter:
+    """Hitung statement SQL yang dikirim ke database"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+class TestIndividualScores:
+
+    def test_average_days_per_stage(self, app, scored_data):
+        scores = {row['username']: row['scores'] for row in RNDDashboardService.get_individual_scores()}
+
+        assert list(scores['rnd0']) == list(SCORE_STAGES)
+        assert scores['rnd0']['Blank'] == 1.5
+        assert scores['rnd0']['RoHS ICB'] == 0.5
+        assert scores['rnd1']['Blank'] == 4.0
+        assert scores['rnd2']['Blank'] == 0.0
+
+    def test_period_filters_on_finished_at(self, app, scored_data):
+        scores = {row['username']: row['scores'] for row in RNDDashboardService.get_individual_scores(2026, 3)}
+
+        assert scores['rnd0']['Blank'] == 1.5
+        assert scores['rnd1']['Blank'] == 0.0
+
+    def test_statement_count_is_constant(self, app, scored_data):
+        with StatementCounter(db.engine) as counter:
+            RNDDashboardService.get_individual_scores(2026)
+
+        assert counter.count == 2
+
+    def test_explain_breakdown_goes_to_logger(self, app, scored_data, caplog):
+        with caplog.at_level(logging.INFO, logger='services.rnd_dashboard_service'):
+            logged = RNDDashboardService.log_individual_score_breakdown(2026, 3)
+
+        assert logged == 3
+        assert 'RND-003' in caplog.text
+        assert 'RND-004' not in caplog.text
+
+
+class TestJobStats:
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        RNDDashboardService.invalidate_job_stats()
+        yield
+        RNDDashboardService.invalidate_job_stats()
+
+    def _job(self, job_no, started_at, **kwargs):
+        values = dict(
+            job_id=f'JOB-{job_no:03d}', started_at=started_at, deadline_at=started_at + timedelta(days=5),
+            item_name='Item', sample_type='Blank', status='in_progress'
+        )
+        values.update(kwargs)
+        return RNDJob(**values)
+
+    def test_counters_in_one_statement(self, app):
+        march = datetime(2026, 3, 10)
+        db.session.add_all([
+            self._job(1, march),
+            self._job(2, march, status='completed', finished_at=march + timedelta(days=9)),
+            self._job(3, march, status='completed', finished_at=march + timedelta(days=1), sample_type='RoHS ICB'),
+            self._job(4, march, status='rejected', sample_type='RoHS Ribbon'),
+            self._job(5, datetime(2026, 4, 1)),
+        ])
+        db.session.commit()
+
+        with StatementCounter(db.engine) as counter:
+            stats = RNDDashboardService.get_job_stats(2026, 3)
+
+        assert counter.count == 1
+        assert stats == {
+            'total_jobs': 4, 'in_progress': 1, 'completed': 2, 'completed_jobs': 2, 'rejected': 1,
+            'blank_jobs': 2, 'rohs_icb_jobs': 1, 'rohs_ribbon_jobs': 1, 'overdue_jobs': 1
+        }
+        assert RNDDashboardService.get_job_stats()['total_jobs'] == 5
+
+    def test_cache_is_invalidated_on_job_commit(self, app):
+        db.session.add(self._job(1, datetime(2026, 3, 10)))
+        db.session.commit()
+        assert RNDDashboardService.get_job_stats(2026, 3)['in_progress'] == 1
+
+        with StatementCounter(db.engine) as counter:
+            RNDDashboardService.get_job_stats(2026, 3)
+        assert counter.count == 0
+
+        job = RNDJob.query.first()
+        job.status = 'completed'
+        db.session.commit()
+
+        stats = RNDDashboardService.get_job_stats(2026, 3)
+        assert stats['in_progress'] == 0
+        assert stats['completed'] == 1
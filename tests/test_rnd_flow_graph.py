@@ -0,0 +1,96 @@
+"""
+Unit tests for RNDFlowGraphCache
+Graph flow configuration di-load sekali per flow_configuration_id, lookup next/final
+tanpa query, dan di-invalidate setelah flow diubah
+"""
+
+import pytest
+from sqlalchemy import event
+from models import db, User
+from models_rnd import RNDFlowConfiguration, RNDFlowStep, RNDProgressStep
+from services.rnd_flow_graph import RNDFlowGraphCache, FlowGraph
+
+
+class StatementCounter:
+    """Hitung SQL statement yang dieksekusi selama block with"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _count(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._count)
+
+
+@pytest.fixture
+def app(app):
+    RNDFlowGraphCache.invalidate()
+    yield app
+    RNDFlowGraphCache.invalidate()
+
+
+@pytest.fixture
+def flow(app):
+    admin = User(username='admin', password_hash='x', name='Admin', role='admin')
+    steps = [RNDProgressStep(name=f'Step {i}', sample_type='Blank', step_order=i) for i in (1, 2, 3)]
+    db.session.add_all([admin] + steps)
+    db.session.flush()
+    config = RNDFlowConfiguration(name='Blank flow', sample_type='Blank', created_by=admin.id)
+    db.session.add(config)
+    db.session.flush()
+    # step_order flow berbeda dengan step_order RNDProgressStep
+    for order, step in enumerate([steps[0], steps[2], steps[1]], 1):
+        db.session.add(RNDFlowStep(flow_configuration_id=config.id, progress_step_id=step.id, step_order=order))
+    db.session.commit()
+    return config, steps
+
+
+def test_graph_lookups_hit_cache(flow):
+    config, steps = flow
+    config_id = config.id
+
+    with StatementCounter(db.engine) as counter:
+        graph = RNDFlowGraphCache.get(config_id)
+        for _ in range(10):
+            graph = RNDFlowGraphCache.get(config_id)
+    assert counter.count == 1
+
+    assert graph.steps == (steps[0].id, steps[2].id, steps[1].id)
+    assert graph.next_step(steps[0].id) == steps[2].id
+    assert graph.prev_step(steps[1].id) == steps[2].id
+    assert graph.next_step(steps[1].id) is None
+    assert graph.is_final(steps[1].id)
+    assert not graph.is_final(steps[2].id)
+
+
+def test_invalidate_reloads_changed_flow(flow):
+    config, steps = flow
+    assert len(RNDFlowGraphCache.get(config.id)) == 3
+
+    RNDFlowStep.query.filter_by(flow_configuration_id=config.id, progress_step_id=steps[1].id).delete()
+    db.session.commit()
+    # Belum di-invalidate: masih graph lama
+    assert len(RNDFlowGraphCache.get(config.id)) == 3
+
+    RNDFlowGraphCache.invalidate(config.id)
+    graph = RNDFlowGraphCache.get(config.id)
+    assert graph.steps == (steps[0].id, steps[2].id)
+    assert graph.is_final(steps[2].id)
+
+
+def test_static_fallback_and_empty_flow(app):
+    graph = RNDFlowGraphCache.static_graph('Blank')
+    assert graph.next_step('Mastercard Release') == 'Initial Plotter'
+    assert graph.is_final('Quality Validation')
+    assert RNDFlowGraphCache.static_graph('Unknown') is None
+
+    empty = RNDFlowGraphCache.get(999)
+    assert isinstance(empty, FlowGraph) and len(empty) == 0
+    assert empty.next_step(1) is None and not empty.is_final(1)
@@ -0,0 +1,135 @@
+"""
+Tests for /rnd-cloudsphere/api/jobs (RNDJobListService)
+Keyset pagination, fields= projection, dan jumlah statement tetap per request
+berapapun ukuran halaman
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from models import db, User, Division
+from models_rnd import RNDJob, RNDProgressStep, RNDJobProgressAssignment
+from rnd_cloudsphere import rnd_cloudsphere_bp
+
+
+class StatementCounter:
+    """Hitung SQL statement yang dieksekusi selama block with"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _count(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._count)
+
+
+@pytest.fixture
+def app(app, login_manager):
+    app.register_blueprint(rnd_cloudsphere_bp)
+    return app
+
+
+@pytest.fixture
+def users(app):
+    db.session.add(Division(id=6, name='RND'))
+    admin = User(username='admin', password_hash='x', name='Admin', role='admin')
+    pics = [User(username=f'pic{i}', password_hash='x', name=f'PIC {i}', role='operator', division_id=6) for i in range(3)]
+    db.session.add_all([admin] + pics)
+    db.session.commit()
+    return admin, pics
+
+
+def _create_jobs(pics, count):
+    steps = [RNDProgressStep(name=f'Step {i}', sample_type='Blank', step_order=i) for i in (1, 2)]
+    db.session.add_all(steps)
+    db.session.flush()
+
+    started = datetime(2026, 3, 2, 8, 0)
+    for n in range(count):
+        job = RNDJob(
+            job_id=f'RND-{n:03d}', started_at=started, deadline_at=started + timedelta(days=7),
+            item_name=f'Item {n}', sample_type='Blank', current_step_id=steps[0].id
+        )
+        db.session.add(job)
+        db.session.flush()
+        for i, step in enumerate(steps):
+            db.session.add(RNDJobProgressAssignment(
+                job_id=job.id, progress_step_id=step.id, pic_id=pics[(n + i) % len(pics)].id,
+                status='in_progress' if i == 0 else 'pending'
+            ))
+    db.session.commit()
+
+
+def _login(client, user):
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+        session['_fresh'] = True
+
+
+@pytest.mark.parametrize('job_count,limit', [(3, 2), (30, 25)])
+def test_list_statement_count_is_constant(app, users, job_count, limit):
+    admin, pics = users
+    _create_jobs(pics, job_count)
+    client = app.test_client()
+    _login(client, admin)
+
+    with StatementCounter(db.engine) as counter:
+        response = client.get(f'/rnd-cloudsphere/api/jobs?limit={limit}')
+
+    body = response.get_json()
+    assert body['success'] is True
+    assert len(body['data']) == limit
+    assert body['data'][0]['current_pic_name'] == pics[(job_count - 1) % len(pics)].name
+    assert len(body['data'][0]['pic_assignments']) == 2
+    assert counter.count <= 5
+
+
+def test_keyset_pagination_walks_all_jobs(app, users):
+    admin, pics = users
+    _create_jobs(pics, 7)
+    client = app.test_client()
+    _login(client, admin)
+
+    seen, cursor = [], None
+    while True:
+        url = '/rnd-cloudsphere/api/jobs?limit=3&fields=job_id'
+        if cursor:
+            url += f'&cursor={cursor}'
+        body = client.get(url).get_json()
+        assert all(set(job) == {'id', 'job_id'} for job in body['data'])
+        seen += [job['job_id'] for job in body['data']]
+        if not body['pagination']['has_next']:
+            break
+        cursor = body['pagination']['next_cursor']
+
+    assert seen == [f'RND-{n:03d}' for n in reversed(range(7))]
+
+
+def test_pic_sees_only_assigned_jobs(app, users):
+    _, pics = users
+    _create_jobs(pics[:2], 4)
+    client = app.test_client()
+    _login(client, pics[0])
+
+    with StatementCounter(db.engine) as counter:
+        body = client.get('/rnd-cloudsphere/api/jobs').get_json()
+    assert {job['job_id'] for job in body['data']} == {'RND-000', 'RND-001', 'RND-002', 'RND-003'}
+    assert counter.count <= 5
+
+
+def test_unassigned_pic_and_bad_params(app, users):
+    _, pics = users
+    _create_jobs(pics[:2], 4)
+    client = app.test_client()
+    _login(client, pics[2])
+
+    assert client.get('/rnd-cloudsphere/api/jobs').get_json()['data'] == []
+    assert client.get('/rnd-cloudsphere/api/jobs?fields=job_id,secret').status_code == 400
+    assert client.get('/rnd-cloudsphere/api/jobs?cursor=abc').status_code == 400
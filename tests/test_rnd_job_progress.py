@@ -0,0 +1,117 @@
+"""
+Unit tests for RNDJobProgressService
+Progress job (total/completed tasks, persentase, current step) disimpan di rnd_jobs,
+dihitung ulang di transaksi perubahan task dan bisa di-backfill/verify
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from models import db, User
+from models_rnd import (
+    RNDJob, RNDProgressStep, RNDProgressTask, RNDJobProgressAssignment, RNDJobTaskAssignment
+)
+from services.rnd_job_progress import RNDJobProgressService
+
+
+@pytest.fixture
+def job(app):
+    """Job dengan 2 step (step_order 1, 2), masing-masing 2 task"""
+    pic = User(username='pic', password_hash='x', name='PIC')
+    steps = [RNDProgressStep(name=f'Step {i}', sample_type='Blank', step_order=i) for i in (1, 2)]
+    db.session.add_all([pic] + steps)
+    db.session.flush()
+
+    started = datetime(2026, 3, 2, 8, 0)
+    job = RNDJob(
+        job_id='RND-001', started_at=started, deadline_at=started + timedelta(days=7),
+        item_name='Item', sample_type='Blank'
+    )
+    db.session.add(job)
+    db.session.flush()
+
+    for i, step in enumerate(steps):
+        assignment = RNDJobProgressAssignment(
+            job_id=job.id, progress_step_id=step.id, pic_id=pic.id,
+            status='in_progress' if i == 0 else 'pending'
+        )
+        db.session.add(assignment)
+        db.session.flush()
+        for order in (1, 2):
+            task = RNDProgressTask(progress_step_id=step.id, name=f'Task {order}', task_order=order)
+            db.session.add(task)
+            db.session.flush()
+            db.session.add(RNDJobTaskAssignment(
+                job_progress_assignment_id=assignment.id, progress_task_id=task.id, status='pending'
+            ))
+
+    RNDJobProgressService.refresh(job, sync_status=False)
+    db.session.commit()
+    return job
+
+
+def _complete_step(job, step_order):
+    assignment = next(a for a in job.progress_assignments if a.progress_step.step_order == step_order)
+    for task_assignment in assignment.task_assignments:
+        task_assignment.status = 'completed'
+    assignment.status = 'completed'
+
+
+def test_refresh_stores_counts_and_current_step(job):
+    assert (job.total_tasks, job.completed_tasks, job.completion_percentage) == (4, 0, 0)
+    assert job.current_step.step_order == 1
+    assert job.current_progress_step['step_name'] == 'Step 1'
+
+    _complete_step(job, 1)
+    RNDJobProgressService.refresh(job)
+    db.session.commit()
+
+    assert (job.total_tasks, job.completed_tasks, job.completion_percentage) == (4, 2, 50)
+    assert job.current_step.step_order == 2
+    assert job.status == 'in_progress'
+
+
+def test_refresh_sees_raw_updates_and_syncs_status(job):
+    # toggle_rnd_task mengubah status task lewat UPDATE raw
+    db.session.execute(text("UPDATE rnd_job_task_assignments SET status = 'completed'"))
+    db.session.execute(text("UPDATE rnd_job_progress_assignments SET status = 'completed'"))
+    RNDJobProgressService.refresh(job)
+    db.session.commit()
+
+    assert job.completion_percentage == 100
+    assert job.current_step_id is None
+    assert job.status == 'completed'
+    assert job.finished_at is not None
+
+    # Task di-uncheck -> job kembali in_progress
+    db.session.execute(text("UPDATE rnd_job_task_assignments SET status = 'pending' WHERE id = 1"))
+    RNDJobProgressService.refresh(job)
+    db.session.commit()
+
+    assert job.completion_percentage == 75
+    assert job.status == 'in_progress'
+    assert job.finished_at is None
+
+
+def test_verify_and_backfill(job):
+    assert RNDJobProgressService.find_mismatches() == []
+
+    # Job lama sebelum migrasi: kolom masih default
+    db.session.execute(text(
+        "UPDATE rnd_jobs SET total_tasks = 0, completed_tasks = 0, completion_percentage = 0, current_step_id = NULL"
+    ))
+    db.session.commit()
+
+    mismatches = RNDJobProgressService.find_mismatches()
+    assert [item['job_id'] for item in mismatches] == ['RND-001']
+    assert mismatches[0]['expected']['total_tasks'] == 4
+
+    updated_at = job.updated_at
+    assert RNDJobProgressService.backfill() == 1
+    assert RNDJobProgressService.find_mismatches() == []
+
+    db.session.expire_all()
+    job = db.session.get(RNDJob, job.id)
+    assert job.total_tasks == 4
+    assert job.current_step.step_order == 1
+    assert job.updated_at == updated_at
@@ -0,0 +1,80 @@
+"""
+Unit tests for RND WebCenter ParallelDirectoryCrawler
+Stat entry dibagi ke thread pool dengan batas per share, hasil di-stream per batch
+(NDJSON) dan listing lengkap masuk directory_cache
+"""
+
+import contextlib
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from rnd_webcenter import services as webcenter_services
+from rnd_webcenter.services import FileExplorerService, ParallelDirectoryCrawler, directory_cache
+
+
+class SlowEntry:
+    """DirEntry palsu: stat() lambat dan mencatat jumlah stat bersamaan"""
+
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def __init__(self, name):
+        self.name = name
+        self.path = f"/share/{name}"
+
+    def is_dir(self):
+        return False
+
+    def stat(self):
+        with SlowEntry.lock:
+            SlowEntry.active += 1
+            SlowEntry.peak = max(SlowEntry.peak, SlowEntry.active)
+        time.sleep(0.005)
+        with SlowEntry.lock:
+            SlowEntry.active -= 1
+        return SimpleNamespace(st_size=1, st_mtime=0)
+
+
+@pytest.fixture
+def share(tmp_path):
+    for i in range(150):
+        (tmp_path / f"file_{i:03d}.pdf").write_bytes(b'x' * i)
+    (tmp_path / 'Artwork').mkdir()
+    directory_cache.invalidate()
+    yield tmp_path
+    directory_cache.invalidate()
+
+
+def test_stream_batches_then_cache(share):
+    events = list(FileExplorerService(str(share)).stream_directory_contents(''))
+    batches = [event for event in events if event['type'] == 'items']
+    assert len(batches) > 1
+    assert events[-1]['type'] == 'done'
+    assert events[-1]['files'] == 150 and events[-1]['folders'] == 1
+    assert events[-1]['totalSize'] == sum(range(150)) and events[-1]['source'] == 'scan'
+
+    # Listing lengkap sudah di cache: request berikutnya satu batch terurut
+    again = list(FileExplorerService(str(share)).stream_directory_contents(''))
+    assert again[-1]['source'] == 'cache'
+    assert again[0]['items'][0]['name'] == 'Artwork'
+    assert FileExplorerService(str(share)).network_service.list_directory('') is again[0]['items']
+
+    missing = list(FileExplorerService(str(share)).stream_directory_contents('missing'))
+    assert [event['type'] for event in missing] == ['error']
+
+
+def test_share_concurrency_limit(monkeypatch):
+    entries = [SlowEntry(f"scan_{i}.tif") for i in range(40)]
+    monkeypatch.setattr(webcenter_services.os, 'scandir', lambda path: contextlib.nullcontext(iter(entries)))
+    SlowEntry.peak = 0
+
+    crawler = ParallelDirectoryCrawler(max_workers=8, share_concurrency=3)
+    build = lambda name, relative_path, is_directory, stat_info: name
+    batches = list(crawler.iter_batches('//server/share', '/share', '', build, batch_size=2))
+
+    assert [name for batch in batches for name in batch] == [entry.name for entry in entries]
+    assert 1 < SlowEntry.peak <= 3
@@ -0,0 +1,72 @@
+"""
+Unit tests for RND WebCenter DirectoryCache
+Listing direktori dipakai bersama antar request (instance service baru tiap request),
+dimuat ulang kalau mtime direktori berubah, dan dibatasi LRU
+"""
+
+import os
+
+import pytest
+
+from rnd_webcenter.services import DirectoryCache, NetworkDriveService, directory_cache
+
+
+@pytest.fixture
+def share(tmp_path):
+    (tmp_path / 'Artwork').mkdir()
+    (tmp_path / 'Artwork' / 'proof.pdf').write_bytes(b'%PDF')
+    (tmp_path / 'readme.txt').write_text('hello')
+    directory_cache.invalidate()
+    yield tmp_path
+    directory_cache.invalidate()
+
+
+def _bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_listing_shared_across_service_instances(share):
+    before = directory_cache.stats()
+    items = NetworkDriveService(str(share)).list_directory('')
+    assert [(item['name'], item['isDirectory']) for item in items] == [('Artwork', True), ('readme.txt', False)]
+
+    # Request berikutnya membuat service baru, listing tetap dari cache
+    again = NetworkDriveService(str(share)).list_directory('')
+    assert again is items
+    nested = NetworkDriveService(str(share)).list_directory('Artwork')
+    assert nested[0]['path'] == 'Artwork/proof.pdf' and nested[0]['type'] == 'document'
+
+    stats = directory_cache.stats()
+    assert stats['hits'] - before['hits'] == 1
+    assert stats['misses'] - before['misses'] == 2
+    assert NetworkDriveService(str(share)).is_accessible()
+
+
+def test_mtime_change_reloads_listing(share):
+    service = NetworkDriveService(str(share))
+    assert len(service.list_directory('Artwork')) == 1
+
+    (share / 'Artwork' / 'mastercard.png').write_bytes(b'png')
+    _bump_mtime(share / 'Artwork')
+    names = [item['name'] for item in service.list_directory('Artwork')]
+    assert names == ['mastercard.png', 'proof.pdf']
+    assert service.list_directory('missing') == []
+
+
+def test_lru_bound(tmp_path):
+    cache = DirectoryCache(max_entries=2)
+    for name in ('a', 'b', 'c'):
+        (tmp_path / name).mkdir()
+    load = lambda path: [os.path.basename(path)]
+
+    cache.get('base', 'a', str(tmp_path / 'a'), load)
+    cache.get('base', 'b', str(tmp_path / 'b'), load)
+    cache.get('base', 'a', str(tmp_path / 'a'), load)  # a jadi paling baru
+    cache.get('base', 'c', str(tmp_path / 'c'), load)  # b di-evict
+
+    assert cache.is_fresh('base', 'a', str(tmp_path / 'a'))
+    assert not cache.is_fresh('base', 'b', str(tmp_path / 'b'))
+    assert cache.stats() == {
+        'entries': 2, 'max_entries': 2, 'hits': 1, 'misses': 3, 'evictions': 1, 'hit_ratio': 0.25
+    }
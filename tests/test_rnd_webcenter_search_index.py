@@ -0,0 +1,107 @@
+"""
+Unit tests for RND WebCenter FilenameIndex
+Search dijawab dari index SQLite (substring/prefix/ekstensi + paging), refresh hanya
+listing ulang direktori yang berubah, dan path yang belum ter-index memakai live walk
+"""
+
+import os
+
+import pytest
+from flask import Flask
+
+from rnd_webcenter.search_index import FilenameIndex, FilenameIndexScheduler
+from rnd_webcenter.services import NetworkDriveService, directory_cache
+from rnd_webcenter import services as webcenter_services
+
+
+@pytest.fixture
+def share(tmp_path):
+    root = tmp_path / 'share'
+    (root / 'Epson L3210' / 'Artwork').mkdir(parents=True)
+    (root / 'Epson L3210' / 'Artwork' / 'L3210_box_front.pdf').write_bytes(b'%PDF')
+    (root / 'Epson L3210' / 'Artwork' / 'L3210_box_back.ai').write_bytes(b'ai')
+    (root / 'Epson L5290').mkdir()
+    (root / 'Epson L5290' / 'box_label.pdf').write_bytes(b'%PDF-1.4')
+    directory_cache.invalidate()
+    return root
+
+
+@pytest.fixture
+def index(share, tmp_path):
+    return FilenameIndex(str(share), str(tmp_path / 'index' / 'share.sqlite3'))
+
+
+def _names(rows):
+    return [row['name'] for row in rows]
+
+
+def _bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_search_modes_and_paging(index):
+    assert not index.covers('')
+    stats = index.refresh()
+    assert stats['directories'] == 4 and stats['rescanned'] == 4
+    assert index.covers('') and index.covers('Epson L3210/Artwork')
+
+    rows, total = index.search('BOX')
+    assert total == 3
+    assert _names(rows) == ['box_label.pdf', 'L3210_box_back.ai', 'L3210_box_front.pdf']
+
+    rows, total = index.search('box', extension='PDF', limit=1, offset=1)
+    assert total == 2 and _names(rows) == ['L3210_box_front.pdf']
+
+    rows, _ = index.search('epson', mode='prefix')
+    assert _names(rows) == ['Epson L3210', 'Epson L5290']
+    rows, _ = index.search('l5', relative_path='Epson L5290')  # < 3 karakter: tanpa trigram
+    assert _names(rows) == []
+    rows, _ = index.search('bo', relative_path='Epson L5290')
+    assert _names(rows) == ['box_label.pdf']
+
+
+def test_incremental_refresh(index, share):
+    index.refresh()
+    assert index.refresh()['rescanned'] == 0
+
+    artwork = share / 'Epson L3210' / 'Artwork'
+    (artwork / 'L3210_box_front.pdf').unlink()
+    (artwork / 'L3210_manual.pdf').write_bytes(b'%PDF')
+    _bump_mtime(artwork)
+    stats = index.refresh()
+    assert stats['rescanned'] == 1 and stats['removed'] == 1
+    assert _names(index.search('l3210')[0]) == ['Epson L3210', 'L3210_box_back.ai', 'L3210_manual.pdf']
+
+    # Folder dihapus: seluruh subtree keluar dari index
+    for name in os.listdir(artwork):
+        (artwork / name).unlink()
+    artwork.rmdir()
+    _bump_mtime(share / 'Epson L3210')
+    index.refresh()
+    assert index.search('l3210')[1] == 1
+    assert not index.covers('Epson L3210/Artwork')
+
+
+def test_service_uses_index_and_falls_back_to_live_walk(share, tmp_path, monkeypatch):
+    app = Flask(__name__)
+    app.config['RND_WEBCENTER_INDEX_DIR'] = str(tmp_path / 'index')
+    app.config['RND_WEBCENTER_INDEX_PATHS'] = [str(share)]
+    app.config['RND_WEBCENTER_INDEX_INTERVAL_MINUTES'] = 0
+    indexer = FilenameIndexScheduler()
+    indexer.init_app(app)
+    monkeypatch.setattr(webcenter_services, 'search_indexer', indexer)
+
+    service = NetworkDriveService(str(share))
+    items, total, source = service.search_files('box', 'Epson L3210\\Artwork')
+    assert source == 'live' and total == 2
+    assert items[0]['path'] == 'Epson L3210/Artwork/L3210_box_back.ai'
+
+    indexer.run_once()
+    items, total, source = service.search_files('box', 'Epson L3210\\Artwork', extension='pdf')
+    assert source == 'index' and total == 1
+    assert items[0]['path'] == 'Epson L3210/Artwork/L3210_box_front.pdf'
+    assert items[0]['icon'] == 'bi-file-earmark-pdf-fill text-danger'
+
+    # Share lain (custom path) tidak di-index
+    assert NetworkDriveService(str(share / 'Epson L5290')).search_files('box')[2] == 'live'
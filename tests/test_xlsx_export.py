@@ -0,0 +1,76 @@
+"""
+Unit tests for services/xlsx_export.py - workbook constant_memory di file sementara,
+merge di atas row yang sudah ditulis, dan response streaming yang membersihkan file
+"""
+
+import io
+import os
+import pytest
+from datetime import date, datetime
+import openpyxl
+from models import db, PlateBonRequest
+from services.xlsx_export import StreamingWorkbook, XLSX_MIMETYPE, merge_written
+
+
+@pytest.fixture
+def app(app, login_manager, tmp_path):
+    from export_routes import export_bp
+
+    app.config['EXPORT_TMP_DIR'] = str(tmp_path)
+    app.config['LOGIN_DISABLED'] = True
+    app.register_blueprint(export_bp)
+    return app
+
+
+def _load(response):
+    return openpyxl.load_workbook(io.BytesIO(b''.join(response.response)))
+
+
+def test_streamed_workbook_with_merges(app, tmp_path):
+    with StreamingWorkbook() as book:
+        sheet = book.add_sheet('Data')
+        assert book.format(bold=True, border=1) is book.format(border=1, bold=True)
+        sheet.merge_range('A1:C1', 'Judul', book.format(bold=True))
+        book.set_column_widths(sheet, [20, 10])
+        next_row = book.write_rows(sheet, 1, ([f'row {i}', i, None] for i in range(3)), book.format(border=1))
+        merge_written(sheet, 1, 2, next_row - 1, 2)
+        response = book.response('data.xlsx')
+
+    assert response.mimetype == XLSX_MIMETYPE
+    assert response.headers['Content-Disposition'] == 'attachment; filename=data.xlsx'
+    sheet = _load(response)['Data']
+    assert [[cell.value for cell in row] for row in sheet.iter_rows(min_row=2)] == [
+        ['row 0', 0, None], ['row 1', 1, None], ['row 2', 2, None]
+    ]
+    assert sorted(str(r) for r in sheet.merged_cells.ranges) == ['A1:C1', 'C2:C4']
+    assert sheet.column_dimensions['A'].width == pytest.approx(20)
+
+    response.close()
+    assert os.listdir(tmp_path) == []
+
+
+def test_error_discards_temp_file(app, tmp_path):
+    with pytest.raises(RuntimeError):
+        with StreamingWorkbook():
+            raise RuntimeError('query failed')
+    assert os.listdir(tmp_path) == []
+
+
+def test_export_route_keeps_column_layout(app):
+    db.session.add_all([
+        PlateBonRequest(
+            tanggal=date(2026, 3, day), mesin_cetak='SM74', pic='Budi', remarks='PRODUKSI', wo_number=f'WO{day}',
+            mc_number='MC1', item_name='Box', paper_type='Art', jumlah_plate=4,
+            machine_off_at=datetime(2026, 3, day, 8, 0), plate_delivered_at=datetime(2026, 3, day, 9, 30),
+            ctp_by='Andi', status='selesai'
+        )
+        for day in (1, 2)
+    ])
+    db.session.commit()
+
+    response = app.test_client().get('/export-ctp-bon')
+    assert response.status_code == 200
+    rows = list(openpyxl.load_workbook(io.BytesIO(response.data))['CTP Bon Data'].values)
+    assert rows[0][:3] == ('ID', 'Tanggal', 'Mesin Cetak') and len(rows[0]) == 17
+    assert [row[1] for row in rows[1:]] == ['2026-03-02', '2026-03-01']
+    assert rows[1][11:15] == ('2026-03-02 08:00:00', None, None, '2026-03-02 09:30:00')